@@ -4,7 +4,7 @@ import time
 import typing
 
 from langgraph.graph.state import CompiledStateGraph
-from langchain_core.messages import BaseMessage
+from langchain_core.messages import BaseMessage, AIMessageChunk, convert_to_messages
 from langchain_core.runnables import AddableDict
 from langgraph.checkpoint.memory import MemorySaver
 
@@ -14,8 +14,9 @@ from cdc_agents.agent.response_format_parser import (
     AdditionalContextResponseFormatParser, StatusValidationResponseFormatParser
 )
 from cdc_agents.common.server import TaskManager
-from cdc_agents.common.types import Message, ResponseFormat, AgentGraphResponse, AgentGraphResult, WaitStatusMessage
-from cdc_agents.config.agent_config_props import AgentMcpTool
+from cdc_agents.common.types import Message, ResponseFormat, AgentGraphResponse, AgentGraphResult, WaitStatusMessage, \
+    AgentGraphToken, AgentGraphUpdate
+from cdc_agents.config.agent_config_props import AgentMcpTool, AgentStreamMode
 from python_di.inject.profile_composite_injector.inject_context_di import InjectionDescriptor, InjectionType, \
     autowire_fn
 from python_util.logger.logger import LoggerFacade
@@ -58,6 +59,10 @@ class BaseAgent(abc.ABC):
         return answer in last_message.content or any([answer in c for c in last_message.content])
 
 class A2AAgent(BaseAgent, abc.ABC):
+
+    stream_tokens: bool = False
+    stream_mode: AgentStreamMode = AgentStreamMode.VALUES
+
     def __init__(self, model=None, tools=None, system_prompts=None,
                  memory: MemorySaver = MemorySaver(), content_types = None):
         self._response_parsers = self.initialize_response_format_parsers()
@@ -90,9 +95,20 @@ class A2AAgent(BaseAgent, abc.ABC):
             return None
         return self.task_manager.pop_to_process_task(session_id)
 
+    def drain_to_process(self, session_id, max_n: typing.Optional[int] = None) -> typing.List[Message]:
+        if not self.task_manager:
+            return []
+        return self.task_manager.drain_to_process(session_id, max_n)
+
     def set_task_manager(self, task_manager: TaskManager):
         self.task_manager = task_manager
 
+    def warm_up(self):
+        """
+        Finish any construction deferred by the agent startup mode, such as compiling the agent's graph.
+        """
+        pass
+
     @property
     def supported_content_types(self) -> list[str]:
         return self._content_types
@@ -228,14 +244,58 @@ class A2AAgent(BaseAgent, abc.ABC):
         })
 
     def stream_agent_response_graph(self, query, sessionId, graph: CompiledStateGraph):
+        """
+        Yields an AgentGraphResponse for each state update of the graph and, when stream_tokens is set, an
+        AgentGraphToken for each chunk of model output as it is generated. With the UPDATES stream mode an
+        AgentGraphUpdate is yielded instead for each step that added messages, parsed from those messages only.
+        """
         inputs = TaskManager.get_user_query_message(query, sessionId)
         config = {"configurable": {"thread_id": sessionId, 'checkpoint_time': time.time_ns()}}
 
-        for item in graph.stream(inputs, config, stream_mode="values"):
-            config['configurable']['checkpoint_time'] = time.time_ns()
-            if 'messages' in item.keys() and len(item['messages']) == 1 and item['messages'][0].content == query:
-                found =  self._do_get_res(item, False)
-                yield found
+        stream_updates = self.stream_mode == AgentStreamMode.UPDATES
+        stream_mode = ["updates" if stream_updates else "values"]
+        if self.stream_tokens:
+            stream_mode.append("messages")
+        streamed = self._checkpointed_message_ids(graph, config) if stream_updates else None
+
+        for mode, item in graph.stream(inputs, config, stream_mode=stream_mode):
+            if mode == "messages":
+                chunk, metadata = item
+                if isinstance(chunk, AIMessageChunk) and isinstance(chunk.content, str) and chunk.content:
+                    yield AgentGraphToken(token=chunk.content, agent_name=metadata.get('langgraph_node'))
+            elif mode == "updates":
+                config['configurable']['checkpoint_time'] = time.time_ns()
+                yield from self._stream_updates_responses(item, streamed)
             else:
-                res =  self._do_get_res(item)
-                yield res
+                config['configurable']['checkpoint_time'] = time.time_ns()
+                yield self._stream_values_response(item, query)
+
+    @staticmethod
+    def _checkpointed_message_ids(graph: CompiledStateGraph, config) -> typing.Set[str]:
+        if graph.checkpointer is None:
+            return set([])
+        messages = graph.get_state(config).values.get('messages') or []
+        return {m.id for m in messages if m.id is not None}
+
+    def _stream_updates_responses(self, item, streamed: typing.Set[str]) -> typing.Iterator[AgentGraphUpdate]:
+        """
+        Nodes may return their whole history, as the orchestrator's do, so messages already in the checkpoint at the
+        start of the stream or already streamed are skipped by id.
+        """
+        for node, update in item.items():
+            for u in update if isinstance(update, (list, tuple)) else [update]:
+                messages = u.get('messages') if isinstance(u, dict) else None
+                if not messages:
+                    continue
+                added = [m for m in convert_to_messages(messages if isinstance(messages, list) else [messages])
+                         if m.id is None or m.id not in streamed]
+                if len(added) == 0:
+                    continue
+                streamed.update(m.id for m in added if m.id is not None)
+                yield AgentGraphUpdate(agent_name=node, **dict(self._do_get_res({'messages': added})))
+
+    def _stream_values_response(self, item, query) -> AgentGraphResponse:
+        if 'messages' in item.keys() and len(item['messages']) == 1 and item['messages'][0].content == query:
+            return self._do_get_res(item, False)
+        else:
+            return self._do_get_res(item)
@@ -1,4 +1,6 @@
 import abc
+import concurrent.futures
+import threading
 import time
 
 import asyncio
@@ -12,7 +14,6 @@ from langchain_core.agents import AgentAction
 from python_di.inject.profile_composite_injector.inject_context_di import autowire_fn, InjectionDescriptor, \
     InjectionType
 from cdc_agents.tools.tool_call_decorator import  ToolCallDecorator
-import atexit
 
 import nest_asyncio
 
@@ -20,25 +21,27 @@ from cdc_agents.common.server import TaskManager
 from python_util.logger.logger import LoggerFacade
 
 from cdc_agents.agent.a2a import A2AAgent
+from cdc_agents.agent.agent_startup import startup_timings
+from cdc_agents.agent.message_budget import MessageBudget
 import json
-import subprocess
 import typing
 import uuid
 from typing import Any, Dict, AsyncIterable, Optional
 
 from langchain_core.callbacks import Callbacks
-from langchain_core.messages import ToolMessage, BaseMessage
+from langchain_core.messages import ToolMessage, BaseMessage, HumanMessage, get_buffer_string
 from langchain_core.runnables.config import RunnableConfig
 from langchain_core.tools import StructuredTool, BaseTool
-from langchain_mcp_adapters.client import MultiServerMCPClient
 from langgraph.checkpoint.memory import MemorySaver
+from langgraph.constants import TAG_NOSTREAM
 from langgraph.prebuilt import create_react_agent
 from cdc_agents.tools.tool_call_decorator import LoggingToolCallback
 
 
 from cdc_agents.config.secret_config_props import SecretConfigProps
-from cdc_agents.config.agent_config_props import AgentConfigProps, AgentMcpTool, AgentCardItem
+from cdc_agents.config.agent_config_props import AgentConfigProps, AgentMcpTool, AgentCardItem, AgentStartupMode
 from cdc_agents.model_server.model_provider import ModelProvider
+from cdc_agents.tools.mcp_session_pool import McpSessionPool
 from cdc_agents.util.nest_async_util import do_run_on_event_loop
 
 
@@ -53,6 +56,9 @@ class A2ASmolAgent(A2AAgent, abc.ABC):
 
 class A2AReactAgent(A2AAgent, abc.ABC):
 
+    _graph = None
+    _mcp_tools_future: typing.Optional[concurrent.futures.Future] = None
+
     def __init__(self, agent_config: AgentConfigProps, tools, system_prompts,
                  memory: MemorySaver,
                  model_server_provider: ModelProvider, model = None):
@@ -61,16 +67,28 @@ class A2AReactAgent(A2AAgent, abc.ABC):
         this_agent_name = self.__class__.__name__
         self.agent_config: AgentCardItem = agent_config.agents.get(this_agent_name)
         inputs = self.agent_config.agent_card.defaultInputModes
-        self.model = self.model_server_provider.retrieve_model(
-            agent_config.agents[this_agent_name] if this_agent_name in agent_config.agents.keys() else None, model)
+        with startup_timings.time(this_agent_name, 'model'):
+            self.model = self.model_server_provider.retrieve_model(
+                agent_config.agents[this_agent_name] if this_agent_name in agent_config.agents.keys() else None, model)
 
         A2AAgent.__init__(self, self.model, tools, system_prompts, memory, inputs)
+        self.stream_tokens = agent_config.stream_tokens
+        self.stream_mode = agent_config.stream_mode
+        self.message_budget = MessageBudget(
+            agent_config.max_tokens_message_state, agent_config.message_overflow_strategy,
+            summarize=self._summarize_overflow,
+            max_tokens_truncated_message=agent_config.max_tokens_truncated_message)
 
-        self.add_mcp_tools(additional_tools=self.agent_config.mcp_tools)
+        self._graph_lock = threading.RLock()
 
-        self._set_tools_return_direct()
+        if agent_config.startup_mode == AgentStartupMode.CONCURRENT:
+            self._mcp_tools_future = self.submit_mcp_tools(additional_tools=self.agent_config.mcp_tools)
+        else:
+            with startup_timings.time(this_agent_name, 'mcp_tools'):
+                self.add_mcp_tools(additional_tools=self.agent_config.mcp_tools)
 
-        self._create_react_agent()
+        if agent_config.startup_mode == AgentStartupMode.SEQUENTIAL and not agent_config.lazy_graph_compile:
+            self.warm_up()
 
         # if self.graph.config is None:
         #     self.graph.config = {}
@@ -82,6 +100,32 @@ class A2AReactAgent(A2AAgent, abc.ABC):
         # else:
         #     cb.append(LoggingToolCallback(self))
 
+    @property
+    def graph(self):
+        """
+        Compiled on first access when construction was deferred, by the concurrent startup mode or lazy compilation.
+        """
+        if self._graph is None:
+            with self._graph_lock:
+                if self._graph is None:
+                    self._await_mcp_tools()
+                    with startup_timings.time(self.agent_name, 'graph_compile'):
+                        self._set_tools_return_direct()
+                        self._create_react_agent()
+        return self._graph
+
+    @graph.setter
+    def graph(self, graph):
+        self._graph = graph
+
+    def warm_up(self):
+        return self.graph
+
+    def _await_mcp_tools(self):
+        if self._mcp_tools_future is not None:
+            future, self._mcp_tools_future = self._mcp_tools_future, None
+            future.result()
+
     def _create_graph(self, mcp_tools):
         self.add_mcp_tools(additional_tools=mcp_tools)
         self._set_tools_return_direct()
@@ -90,7 +134,18 @@ class A2AReactAgent(A2AAgent, abc.ABC):
     def _create_react_agent(self):
         self.graph = create_react_agent(
             self.model, tools=self.tools, checkpointer=self.memory,
-            prompt=self.system_prompts)
+            prompt=self.system_prompts, pre_model_hook=self.message_budget.pre_model_hook)
+
+    def _summarize_overflow(self, messages: typing.List[BaseMessage]) -> str:
+        """
+        Summarizes the messages removed from a model call by the message budget, hidden from token streaming.
+        """
+        summary = self.model.invoke(
+            [HumanMessage(content=f"Summarize the following conversation in a few sentences, keeping the facts, "
+                                  f"decisions and open tasks that later steps depend on.\n\n"
+                                  f"{get_buffer_string(messages)}")],
+            config={'tags': [TAG_NOSTREAM], 'callbacks': []})
+        return summary.content if isinstance(summary.content, str) else str(summary.content)
 
     def _set_tools_return_direct(self):
         for t in self.tools:
@@ -102,32 +157,55 @@ class A2AReactAgent(A2AAgent, abc.ABC):
     @autowire_fn({
         'additional_tools': InjectionDescriptor(injection_ty=InjectionType.Provided),
         'loop': InjectionDescriptor(injection_ty=InjectionType.Provided),
-        'secrets': InjectionDescriptor(injection_ty=InjectionType.Dependency)
+        'secrets': InjectionDescriptor(injection_ty=InjectionType.Dependency),
+        'mcp_session_pool': InjectionDescriptor(injection_ty=InjectionType.Dependency)
     })
-    def add_mcp_tools(self, additional_tools: typing.Dict[str, AgentMcpTool], secrets: SecretConfigProps, loop=None):
-        done = do_run_on_event_loop(self.add_mcp_tools_async(secrets, additional_tools, loop), lambda s: None, loop)
+    def add_mcp_tools(self, additional_tools: typing.Dict[str, AgentMcpTool], secrets: SecretConfigProps,
+                      mcp_session_pool: McpSessionPool, loop=None):
+        done = do_run_on_event_loop(self.add_mcp_tools_async(secrets, mcp_session_pool, additional_tools, loop),
+                                    lambda s: None, loop)
 
-    async def add_mcp_tools_async(self, secrets: SecretConfigProps, additional_tools: typing.Dict[str, AgentMcpTool] = None, loop=None):
+    @autowire_fn({
+        'additional_tools': InjectionDescriptor(injection_ty=InjectionType.Provided),
+        'secrets': InjectionDescriptor(injection_ty=InjectionType.Dependency),
+        'mcp_session_pool': InjectionDescriptor(injection_ty=InjectionType.Dependency)
+    })
+    def submit_mcp_tools(self, additional_tools: typing.Dict[str, AgentMcpTool], secrets: SecretConfigProps,
+                         mcp_session_pool: McpSessionPool) -> concurrent.futures.Future:
+        """
+        Start MCP tool discovery on the MCP session pool's loop without waiting for it, so that every agent's MCP
+        servers start concurrently.
+        """
+        start = time.perf_counter()
+
+        async def add_mcp_tools_timed():
+            try:
+                await self.add_mcp_tools_async(secrets, mcp_session_pool, additional_tools)
+            finally:
+                startup_timings.record(self.agent_name, 'mcp_tools', time.perf_counter() - start)
+
+        return mcp_session_pool.background.submit(add_mcp_tools_timed())
+
+    async def add_mcp_tools_async(self, secrets: SecretConfigProps, mcp_session_pool: McpSessionPool,
+                                  additional_tools: typing.Dict[str, AgentMcpTool] = None, loop=None):
         if additional_tools is not None:
+            session_keys = {}
             for k,v in additional_tools.items():
                 if v and v.tool_options:
                     self._replace_tool_secrets(k, secrets, v.tool_options)
-                async with MultiServerMCPClient({k: v.tool_options}) as client:
-                    tools = client.get_tools()
-                    for t in tools:
-                        tool_name = k
-                        agent_tool = additional_tools[tool_name]
-                        t.description = f"""
-                            {t.description}
-                            {self._get_tool_prompt(agent_tool)}
-                        """
-
-                        self.tools.append(await self._next_tool(loop, t, k, v))
-
-                    if v.stop_tool:
-                        stop_tool = v.stop_tool
-                        self.do_run_stop(stop_tool)
-                        atexit.register(lambda stop_tool_=stop_tool: self.do_run_stop(stop_tool_))
+                session_keys[k] = mcp_session_pool.register(k, v.tool_options, v.stop_tool)
+
+            discovered = await asyncio.gather(*[mcp_session_pool.aget_tools(session_key)
+                                                for session_key in session_keys.values()])
+
+            for (k, session_key), tools in zip(session_keys.items(), discovered):
+                for t in tools:
+                    t.description = f"""
+                        {t.description}
+                        {self._get_tool_prompt(additional_tools[k])}
+                    """
+
+                    self.tools.append(await self._next_tool(mcp_session_pool, t, session_key))
 
     def _replace_tool_secrets(self, k, secrets, v):
         for m in secrets.mcp_tool_secrets:
@@ -141,17 +219,18 @@ class A2AReactAgent(A2AAgent, abc.ABC):
                         ]
                         v['args'] = a
 
-    def do_run_stop(self, stop_tool_):
-        try:
-            subprocess.run(stop_tool_, shell=True)
-        except Exception as e:
-            pass
-
-    async def _next_tool(self, loop, t, k, v):
+    async def _next_tool(self, mcp_session_pool: McpSessionPool, t, session_key: str):
         class SynchronousMcpAdapter(StructuredTool):
-            def __init__(self, other, to_run_loop):
+            def __init__(self, other, pool):
                 StructuredTool.__init__(self, **other.__dict__)
-                self.__loop__ = to_run_loop
+                self.__pool__ = pool
+
+            def _failure(self, err, tool_input, tool_call_id):
+                return ToolMessage(
+                    content=f"Failed to run tool with err {err}. Could not find matching tools for {self.name} - are all the services running?",
+                    name=self.name,
+                    tool_call_id=tool_call_id if tool_call_id is not None else tool_input.get("id") if isinstance(tool_input, dict) else str(uuid.uuid4()),
+                    status="error")
 
             async def arun(
                     self,
@@ -169,28 +248,13 @@ class A2AReactAgent(A2AAgent, abc.ABC):
                     tool_call_id: typing.Optional[str] = None,
                     **kwargs: Any,
             ):
-                async with MultiServerMCPClient({k: v.tool_options}) as c:
-                    for tool in c.get_tools():
-                        if self.name == tool.name:
-                            try:
-                                out = await tool.arun(tool_input, verbose, start_color, color, callbacks, tags=tags,
-                                                       metadata=metadata,run_name=run_name, run_id=run_id,config=config,
-                                                       tool_call_id=tool_call_id, **kwargs)
-                                return out
-                            except Exception as e:
-                                failure = ToolMessage(
-                                    content=f"Failed to run tool with err {e}. Could not find matching tools for {self.name} - are all the services running?",
-                                    name=self.name,
-                                    tool_call_id=tool_call_id if tool_call_id is not None else tool_input.get("id") if isinstance(tool_input, dict) else str(uuid.uuid4()),
-                                    status="error")
-                                return failure
-
-                    failure = ToolMessage(
-                        content=f"Failed to run tool. Could not find matching tools for {self.name}",
-                        name=self.name,
-                        tool_call_id=tool_call_id if tool_call_id is not None else tool_input.get("id") if isinstance(tool_input, dict) else str(uuid.uuid4()),
-                        status="error")
-                    return failure
+                try:
+                    return await self.__pool__.acall_tool(
+                        session_key, self.name, tool_input, verbose=verbose, start_color=start_color, color=color,
+                        callbacks=callbacks, tags=tags, metadata=metadata, run_name=run_name, run_id=run_id,
+                        config=config, tool_call_id=tool_call_id, **kwargs)
+                except Exception as e:
+                    return self._failure(e, tool_input, tool_call_id)
 
             def run(
                     self,
@@ -208,26 +272,17 @@ class A2AReactAgent(A2AAgent, abc.ABC):
                     tool_call_id: typing.Optional[str] = None,
                     **kwargs: Any,
             ):
-                to_run_loop = self.__loop__
-
-                ran = do_run_on_event_loop(self.arun(tool_input, verbose, start_color,
-                                                     color, callbacks, tags=tags, metadata=metadata,
-                                                     run_name=run_name, run_id=run_id,
-                                                     config=config, tool_call_id=tool_call_id, **kwargs),
-                                           lambda err: ToolMessage(
-                                               content=f"Failed to run tool. MCP tools cannot run inside already running event loop. "
-                                                       f"Must have called sync inside async, and cannot then call async. Err: {err}",
-                                               name=self.name,
-                                               tool_call_id=tool_input.get("id") if isinstance(tool_input, dict) else None,
-                                               status="error"),
-                                           to_run_loop)
+                try:
+                    ran = self.__pool__.call_tool(
+                        session_key, self.name, tool_input, verbose=verbose, start_color=start_color, color=color,
+                        callbacks=callbacks, tags=tags, metadata=metadata, run_name=run_name, run_id=run_id,
+                        config=config, tool_call_id=tool_call_id, **kwargs)
+                except Exception as e:
+                    ran = self._failure(e, tool_input, tool_call_id)
 
                 if isinstance(ran, str):
                     ran = json.loads(ran)
 
-                if v.stop_tool:
-                    subprocess.run(v.stop_tool, shell=True)
-
                 if isinstance(ran, ToolMessage):
                     return ran
 
@@ -238,7 +293,7 @@ class A2AReactAgent(A2AAgent, abc.ABC):
                     if isinstance(tool_input, dict) else None,
                     status="success" if isinstance(ran, dict) else "error")
 
-        s = SynchronousMcpAdapter(t, loop)
+        s = SynchronousMcpAdapter(t, mcp_session_pool)
         return s
 
     def _get_tool_prompt(self, agent_tool):
@@ -252,12 +307,13 @@ class A2AReactAgent(A2AAgent, abc.ABC):
     def invoke(self, query, sessionId):
         config = self._parse_query_config(sessionId)
         invoked = self.graph.invoke(TaskManager.get_user_query_message(query, sessionId), config)
-        next_message = self.pop_to_process_task(sessionId)
-        while next_message is not None:
-            query = self.task_manager.get_user_query_message(next_message, sessionId)
-            config['configurable']['checkpoint_time'] = time.time_ns()
-            invoked = self.graph.invoke(query, config)
-            next_message = self.pop_to_process_task(sessionId)
+        pending = self.drain_to_process(sessionId)
+        while len(pending) != 0:
+            for next_message in pending:
+                query = self.task_manager.get_user_query_message(next_message, sessionId)
+                config['configurable']['checkpoint_time'] = time.time_ns()
+                invoked = self.graph.invoke(query, config)
+            pending = self.drain_to_process(sessionId)
         return self.get_agent_response(config)
 
     def stream(self, query, session_id, graph=None):
@@ -9,11 +9,14 @@ from langchain_core.runnables import RunnableConfig
 from langgraph.checkpoint.memory import MemorySaver
 from langgraph.constants import END
 from langgraph.graph import StateGraph, MessagesState
-from langgraph.types import Command
+from langgraph.graph.message import add_messages
+from langgraph.types import Command, Send
 
 from cdc_agents.agent.a2a import A2AAgent, BaseAgent
 from cdc_agents.agent.agent import A2AReactAgent
-from cdc_agents.agent.agent_state import AgentState
+from cdc_agents.agent.agent_startup import startup_timings
+from cdc_agents.agent.agent_state import AgentState, PARALLEL_BRANCH
+from cdc_agents.agent.summarization import GatedSummarizationNode
 from cdc_agents.common.server import TaskManager
 from cdc_agents.common.types import ResponseFormat, AgentGraphResponse, AgentGraphResult, WaitStatusMessage
 from cdc_agents.config.agent_config_props import AgentConfigProps, AgentCardItem
@@ -87,6 +90,30 @@ class OrchestratedAgent:
         self.agent = agent
 
 
+class SubgraphAgent:
+    """
+    Runs a sub-orchestrator's graph as a subgraph of the orchestrator it is nested in. Invoked from within the
+    parent's node, the subgraph checkpoints to the parent's checkpointer under its own namespace, instead of
+    re-entering the sub-orchestrator's separately compiled graph under the parent's thread and namespace.
+    """
+
+    def __init__(self, orchestrator: 'StateGraphOrchestrator'):
+        self.orchestrator = orchestrator
+
+    @property
+    def agent_name(self) -> str:
+        return self.orchestrator.agent_name
+
+    def invoke(self, state, session_id) -> AgentGraphResponse:
+        mapping = self.orchestrator.subgraph_state_mapping
+        values = self.orchestrator.compile_subgraph().invoke(
+            {child: state[parent] for parent, child in mapping.items() if parent in state})
+        return self.orchestrator.get_subgraph_response(values)
+
+    def is_terminate_node(self, last_message: AgentGraphResult, state) -> bool:
+        return self.orchestrator.is_terminate_node(last_message, state)
+
+
 @dataclasses.dataclass(init=True)
 class OrchestratorAgentGraph:
     state_graph: StateGraph
@@ -216,6 +243,10 @@ class StateGraphOrchestrator(AgentOrchestrator, abc.ABC):
     Facilitate multi-agent through lang-graph state graph. This means multiple models, each with smaller prompt from lower number of tools.
     """
 
+    # state keys passed into this orchestrator's graph when it is mounted as a subgraph, parent key to subgraph key.
+    # Only messages are returned to the parent; the summarizer's keys stay private to each graph.
+    subgraph_state_mapping: typing.Dict[str, str] = {'messages': 'messages', 'session_id': 'session_id'}
+
     def __init__(self, agents: typing.Dict[str, OrchestratedAgent],
                  orchestrator_agent: typing.Union[OrchestratorAgent, A2AAgent],
                  props: AgentConfigProps, memory: MemorySaver, model_provider: ModelProvider):
@@ -233,25 +264,38 @@ class StateGraphOrchestrator(AgentOrchestrator, abc.ABC):
         if not self._orchestrator_propagator:
             self._orchestrator_propagator = ""
         self.max_recurs = props.orchestrator_max_recurs if props.orchestrator_max_recurs else 5000
+        self.stream_tokens = props.stream_tokens
+        self.stream_mode = props.stream_mode
+        self.parallel_delegation = props.parallel_delegation
+        self.compose_subgraphs = props.compose_subgraphs
+        self._subgraph = None
         from cdc_agents.agents.summarizer_agent import SummarizerAgent
         self.summarizer_name = SummarizerAgent.__name__
         from langmem.short_term import SummarizationNode
         summarizer_card = typing.cast(AgentCardItem, self.props.agents[self.summarizer_name])
-        self.summarizer_node = SummarizationNode(
-            model=model_provider.retrieve_model(summarizer_card),
-            **summarizer_card.options)
-        self.graph = self._build_graph()
-
+        self.summarizer_node = GatedSummarizationNode(
+            SummarizationNode(model=model_provider.retrieve_model(summarizer_card), **summarizer_card.options),
+            min_tokens=props.summarize_min_tokens, min_messages=props.summarize_min_messages,
+            incremental=props.incremental_summary)
         # Track sub-orchestrators for propagation handling
         self._sub_orchestrators: typing.Dict[str, StateGraphOrchestrator] = {
             name: agent.agent for name, agent in agents.items()
             if isinstance(agent.agent, StateGraphOrchestrator)
         }
+        self.graph = None
+        if not props.lazy_graph_compile:
+            self._create_compile_graph()
 
     @property
     def orchestrator_propagator_prompt(self):
         return self._orchestrator_propagator
 
+    def summarizer_stats(self) -> typing.Dict[str, int]:
+        """
+        :return: how many times the summarizer ran and how many agent turns skipped it.
+        """
+        return dict(self.summarizer_node.stats)
+
     def get_next_node(self, last_executed_agent: BaseAgent, graph_result: AgentGraphResult,
                       state: MessagesState, config):
 
@@ -263,11 +307,17 @@ class StateGraphOrchestrator(AgentOrchestrator, abc.ABC):
             return self.orchestrator_agent.agent_name
 
         if not is_this_agent_orchestrator:
-            return self.summarizer_name
+            # parallel branches all return to the orchestrator, so that it runs once on their merged results.
+            if not state.get(PARALLEL_BRANCH) and self.summarizer_node.should_summarize(state, graph_result.content):
+                return self.summarizer_name
+            return self.orchestrator_agent.agent_name
         elif last_executed_agent_name == self.summarizer_name:
             return self.orchestrator_agent.agent_name
 
         if graph_result.agent_route is not None and is_this_agent_orchestrator:
+            routes = self._parallel_routes(graph_result)
+            if len(routes) > 1:
+                return routes
             if graph_result.agent_route not in self.agents.keys():
                 LoggerFacade.error(f"Found message route {graph_result.agent_route} not in keys {self.agents.keys()}")
                 graph_result.add_last_message(SystemMessage(content=f"""
@@ -297,6 +347,26 @@ class StateGraphOrchestrator(AgentOrchestrator, abc.ABC):
     def _is_orchestrator(self, name):
         return self.orchestrator_agent.agent_name == name
 
+    def _parallel_routes(self, graph_result: AgentGraphResult) -> typing.List[str]:
+        if not self.parallel_delegation or not graph_result.agent_routes:
+            return []
+        routes = [r for r in graph_result.agent_routes if r in self.agents.keys()]
+        if len(routes) != len(graph_result.agent_routes):
+            LoggerFacade.error(f"Found message routes {graph_result.agent_routes} not in keys {self.agents.keys()} - "
+                               f"delegating to {routes}.")
+        return routes
+
+    def _fan_out(self, routes: typing.List[str], state, result: AgentGraphResult) -> typing.List[Send]:
+        """
+        Runs each agent routed to in the same step, concurrently. Each branch receives the state with the
+        orchestrator's messages, as the update is only applied after the step, and the branches' messages are
+        merged in the order routed to.
+        """
+        branch_state = {**state, 'messages': add_messages(state.get('messages') or [], result.content),
+                        PARALLEL_BRANCH: True}
+        LoggerFacade.debug(f"Delegating to {routes} in parallel.")
+        return [Send(route, branch_state) for route in routes]
+
     def invoke(self, query, sessionId) -> AgentGraphResponse:
         config, graph = self._create_invoke_graph(query, sessionId)
         return self.get_agent_response(config, graph)
@@ -367,6 +437,7 @@ class StateGraphOrchestrator(AgentOrchestrator, abc.ABC):
             content=messages, is_task_complete=result.is_task_complete,
             require_user_input=result.require_user_input,
             agent_route=result.content.route_to if isinstance(result.content, ResponseFormat) else None,
+            agent_routes=result.content.parallel_routes if isinstance(result.content, ResponseFormat) else None,
             last_message=messages[-1])
 
 
@@ -405,18 +476,10 @@ class StateGraphOrchestrator(AgentOrchestrator, abc.ABC):
 
     def parse_messages(self, agent, result: AgentGraphResult, session_id, state, config) -> Command[typing.Union[str, END]]:
         if self.task_manager:
-            recent = self.pop_to_process_task(session_id)
-            if recent is not None:
-                # only route to a single agent at a time, but can add as many other messages to the context
-                result.content.append(HumanMessage(content=self._parse_content(recent), name="pushed task"))
-
-                while recent is not None and recent.agent_route is not None:
-                    result.content.append(
-                        HumanMessage(content=self._parse_content(self.peek_to_process_task(session_id)),
-                                     name="pushed task"))
-                    # pop already appended to result, but still in task manager queue, remove from task manager
-                    # queue here and set to recent to check if go out of loop now.
-                    recent = self.pop_to_process_task(session_id)
+            # only route to a single agent at a time, but can add as many other messages to the context - take every
+            # message pushed to the task so far at once, rather than locking the task for each.
+            for pushed in self.drain_to_process(session_id):
+                result.content.append(HumanMessage(content=self._parse_content(pushed), name="pushed task"))
 
             goto = self.get_next_node(agent, result, state, session_id)
         else:
@@ -431,6 +494,9 @@ class StateGraphOrchestrator(AgentOrchestrator, abc.ABC):
         if goto == END:
             result.content = self._remove_prev_considers(result.content)
 
+        if isinstance(goto, list):
+            goto = self._fan_out(goto, state, result)
+
         return Command(update={"messages": result.content},
                        goto=goto)
 
@@ -456,8 +522,11 @@ class StateGraphOrchestrator(AgentOrchestrator, abc.ABC):
 
         for agent_name, agent in self.agents.items():
             if agent_name != self.summarizer_name:
+                next_agent = agent.agent
+                if self.compose_subgraphs and agent_name in self._sub_orchestrators:
+                    next_agent = SubgraphAgent(self._sub_orchestrators[agent_name])
                 state_graph.add_node(agent_name,
-                                     lambda state, config, next_agent=agent.agent: self.next_node_inner(next_agent))
+                                     lambda state, config, next_agent=next_agent: self.next_node_inner(next_agent))
 
         state_graph.add_edge(self.summarizer_name, self.orchestrator_agent.agent_name)
         state_graph.set_entry_point(self.orchestrator_agent.agent_name)
@@ -478,9 +547,26 @@ class StateGraphOrchestrator(AgentOrchestrator, abc.ABC):
 
     def _create_compile_graph(self):
         if self.graph is None:
-            self.graph = self._build_graph()
+            with startup_timings.time(self.agent_name, 'graph_compile'):
+                self.graph = self._build_graph()
         return self.graph
 
+    def warm_up(self):
+        return self._create_compile_graph()
+
+    def compile_subgraph(self):
+        """
+        This orchestrator's graph compiled without a checkpointer, so that when invoked from a parent graph's node it
+        uses the parent's checkpointer under the node's namespace.
+        """
+        if self._subgraph is None:
+            with startup_timings.time(self.agent_name, 'subgraph_compile'):
+                self._subgraph = self._create_orchestration_graph().state_graph.compile()
+        return self._subgraph
+
+    def get_subgraph_response(self, values) -> AgentGraphResponse:
+        return self._do_get_res({'messages': values['messages']})
+
     def _build_graph(self):
         a = self._create_orchestration_graph()
         state_graph = a.state_graph
@@ -1,6 +1,8 @@
 import dataclasses
 import dataclasses
 import importlib
+import os
+import sys
 import typing
 
 import injector
@@ -9,19 +11,49 @@ from langgraph.checkpoint.memory import MemorySaver
 from starlette.applications import Starlette
 
 from cdc_agents.agent.a2a import A2AAgent
-from cdc_agents.agent.task_manager import AgentTaskManager
+from cdc_agents.agent.agent_startup import warm_up_agents
+from cdc_agents.agent.task_manager import AsyncAgentTaskManager, AgentExecutionScheduler, task_retention, task_store, \
+    event_bus, task_workers
 from cdc_agents.common.server import A2AServer
 from cdc_agents.common.server.server import DynamicA2AServer, create_json_response, _add_all_managed_agents
 from cdc_agents.common.types import DiscoverAgents, AgentCard
 from cdc_agents.common.utils.push_notification_auth import PushNotificationSenderAuth
 from cdc_agents.config.agent_config_props import AgentConfigProps
 from cdc_agents.config.runner_props import RunnerConfigProps
+from cdc_agents.config.task_manager_config_props import TaskStoreType
 from cdc_agents.model_server.model_provider import ModelProvider
 from python_di.configs.autowire import injectable
 from python_di.configs.component import component
 from python_di.inject.profile_composite_injector.composite_injector import profile_scope
 from python_util.logger.logger import LoggerFacade
 
+# set in the environment of the worker processes run_server starts, to the module booting the application.
+A2A_WORKER_BOOT_MODULE = 'CDC_AGENTS_A2A_WORKER_BOOT_MODULE'
+# set in the environment of the worker processes run_server starts, to the private JWK all of them sign push
+# notifications with.
+A2A_WORKER_SIGNING_KEY = 'CDC_AGENTS_A2A_WORKER_SIGNING_KEY'
+
+_worker_runner: typing.Optional['AgentServerRunner'] = None
+
+
+def worker_app() -> Starlette:
+    """
+    The app of a worker process started by run_server, booting the application in the worker.
+    """
+    importlib.import_module(os.environ[A2A_WORKER_BOOT_MODULE])
+    if _worker_runner is None:
+        raise RuntimeError(f"Booting {os.environ[A2A_WORKER_BOOT_MODULE]} did not load the agent server.")
+    return _worker_runner.starlette
+
+
+def supervises_workers(agent_config_props: AgentConfigProps, runner_config_props: RunnerConfigProps) -> bool:
+    """
+    Whether this process only starts the A2A worker processes - the agents, task managers and checkpoint compaction
+    are left to the workers, which boot the application again in worker_app.
+    """
+    return (runner_config_props.is_a2a() and agent_config_props.workers > 1
+            and A2A_WORKER_BOOT_MODULE not in os.environ)
+
 
 @dataclasses.dataclass(init=True)
 class DiscoverableAgent:
@@ -41,19 +73,31 @@ class AgentServerRunner:
                  runner_config_props: RunnerConfigProps,
                  model_server_provider: ModelProvider,
                  starlette: Starlette,
+                 agent_execution_scheduler: AgentExecutionScheduler,
                  agents: typing.List[A2AAgent] = None):
         self.model_server_provider = model_server_provider
+        self.agent_execution_scheduler = agent_execution_scheduler
         self.memory = memory
         self.agent_config_props = agent_config_props
         self.agents: typing.Dict[str, DiscoverableAgent] = {
             next_agent.agent_name: DiscoverableAgent(next_agent, self._to_discoverable_agent(next_agent))
             for next_agent in agents}
+        if supervises_workers(agent_config_props, runner_config_props):
+            self.run_server()
+            return
+
+        warm_up_agents(agents, agent_config_props)
         _add_all_managed_agents(self.agent_config_props)
         # self.start_dynamic_agent_cards() # TODO:
         self.starlette = self.load_server(agent_config_props.host, agent_config_props.port, starlette)
 
         if runner_config_props.is_a2a():
-            self.run_server()
+            if A2A_WORKER_BOOT_MODULE in os.environ:
+                # a worker of run_server - uvicorn serves the app from worker_app.
+                global _worker_runner
+                _worker_runner = self
+            else:
+                self.run_server()
 
     # def start_dynamic_agent_cards(self):
     #     DynamicA2AServer(self.agent_config_props, agents=self.agents).start() # TODO:
@@ -61,12 +105,44 @@ class AgentServerRunner:
     def run_server(self):
         """Starts the Currency Agent server."""
         LoggerFacade.info(f"Starting server on {self.agent_config_props.host}:{self.agent_config_props.port}")
-        uvicorn.run(self.starlette, host=self.agent_config_props.host,
-                    port=self.agent_config_props.port)
+        if self.agent_config_props.workers <= 1:
+            uvicorn.run(self.starlette, host=self.agent_config_props.host,
+                        port=self.agent_config_props.port)
+            return
+
+        self._validate_shared_state()
+        os.environ[A2A_WORKER_SIGNING_KEY] = PushNotificationSenderAuth().generate_jwk()
+        main_spec = getattr(sys.modules.get('__main__'), '__spec__', None)
+        os.environ[A2A_WORKER_BOOT_MODULE] = main_spec.name if main_spec is not None \
+            else 'cdc_agents.main.run_cdc_agents'
+        LoggerFacade.info(f"Starting {self.agent_config_props.workers} workers booting "
+                          f"{os.environ[A2A_WORKER_BOOT_MODULE]}.")
+        uvicorn.run(f"{__name__}:worker_app", factory=True, workers=self.agent_config_props.workers,
+                    host=self.agent_config_props.host, port=self.agent_config_props.port)
+
+    def _validate_shared_state(self):
+        props = self.agent_execution_scheduler.props
+        if props.task_store == TaskStoreType.MEMORY:
+            raise ValueError(f"{self.agent_config_props.workers} workers require a task store they share - set "
+                             f"task_manager.task_store to SQLITE or POSTGRES.")
+        if not props.task_store_uri:
+            raise ValueError(f"task_manager.task_store_uri is required for a {props.task_store.value} task store.")
+        if props.event_bus is None:
+            LoggerFacade.warn("Without task_manager.event_bus, a task's stream can only be consumed from the worker "
+                              "it was sent to.")
+        saver = self.memory
+        while hasattr(saver, 'saver'):
+            saver = saver.saver
+        if isinstance(saver, MemorySaver):
+            LoggerFacade.warn("Checkpoints are kept in memory of each worker - a session continued on another worker "
+                              "loses its history. Set checkpoint.sqlite_path or checkpoint.uri.")
 
     def load_server(self, host, port, starlette: Starlette):
         notification_sender_auth = PushNotificationSenderAuth()
-        notification_sender_auth.generate_jwk()
+        if A2A_WORKER_SIGNING_KEY in os.environ:
+            notification_sender_auth.load_jwk(os.environ[A2A_WORKER_SIGNING_KEY])
+        else:
+            notification_sender_auth.generate_jwk()
         starlette.add_route(
             "/.well-known/jwks.json", notification_sender_auth.handle_jwks_endpoint, methods=["GET"])
         for name, a in self.agent_config_props.agents.items():
@@ -78,7 +154,13 @@ class AgentServerRunner:
             if name not in self.agents.keys():
                 raise ValueError(f"Could not find agent: {name}.")
 
-            task_manager = AgentTaskManager(agent=self.agents[name].agent, notification_sender_auth=notification_sender_auth)
+            task_manager = AsyncAgentTaskManager(agent=self.agents[name].agent,
+                                                 notification_sender_auth=notification_sender_auth,
+                                                 executor=self.agent_execution_scheduler.executor_for(name),
+                                                 retention=task_retention(self.agent_execution_scheduler.props),
+                                                 task_store=task_store(self.agent_execution_scheduler.props, name),
+                                                 event_bus=event_bus(self.agent_execution_scheduler.props),
+                                                 workers=task_workers(self.agent_execution_scheduler.props))
             self.agents[name].agent.set_task_manager(task_manager)
             self.agents[name].agent.system_prompts = a.agent_descriptor.system_prompts
             A2AServer(
@@ -0,0 +1,68 @@
+import concurrent.futures
+import contextlib
+import threading
+import time
+import typing
+
+from cdc_agents.config.agent_config_props import AgentConfigProps, AgentStartupMode
+from python_util.logger.logger import LoggerFacade
+
+
+class StartupTimings:
+    """
+    Wall-clock time spent per agent in each boot phase (model retrieval, MCP tool discovery, graph compilation), so
+    that slow startups can be traced to the agent and phase responsible.
+    """
+
+    def __init__(self):
+        self._timings: typing.Dict[str, typing.Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, agent_name: str, phase: str, seconds: float):
+        with self._lock:
+            phases = self._timings.setdefault(agent_name, {})
+            phases[phase] = phases.get(phase, 0.0) + seconds
+
+    @contextlib.contextmanager
+    def time(self, agent_name: str, phase: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(agent_name, phase, time.perf_counter() - start)
+
+    def timings(self) -> typing.Dict[str, typing.Dict[str, float]]:
+        with self._lock:
+            return {agent: dict(phases) for agent, phases in self._timings.items()}
+
+    def report(self) -> str:
+        timings = self.timings()
+        lines = ["Agent startup timings (seconds):"]
+        for agent, phases in sorted(timings.items(), key=lambda a: -sum(a[1].values())):
+            phase_str = ", ".join(f"{phase}={seconds:.3f}" for phase, seconds in phases.items())
+            lines.append(f"  {agent}: total={sum(phases.values()):.3f} ({phase_str})")
+        return "\n".join(lines)
+
+
+startup_timings = StartupTimings()
+
+
+def warm_up_agents(agents: typing.Iterable, agent_config_props: AgentConfigProps, max_workers: int = None):
+    """
+    Finish constructing agents deferred by the concurrent startup mode - wait for their MCP tools and compile their
+    graphs in parallel - unless graph compilation is lazy, in which case each agent compiles on its first request.
+    Logs the startup timing report either way.
+    """
+    agents = list(agents)
+    if agent_config_props.startup_mode == AgentStartupMode.CONCURRENT and not agent_config_props.lazy_graph_compile \
+            and len(agents) != 0:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers or len(agents),
+                                                   thread_name_prefix="agent-warm-up") as executor:
+            futures = {executor.submit(a.warm_up): a for a in agents}
+            for f in concurrent.futures.as_completed(futures):
+                try:
+                    f.result()
+                except Exception as e:
+                    LoggerFacade.error(f"Failed to warm up agent {futures[f].agent_name}: {e}")
+
+    LoggerFacade.info(startup_timings.report())
@@ -29,6 +29,14 @@ from typing_extensions import TypedDict
 
 from langgraph.graph.state import StateGraph
 
+# set on the state sent to each agent delegated to in parallel.
+PARALLEL_BRANCH = 'parallel_branch'
+
 class AgentState(MessagesState):
     messages: Annotated[list[AnyMessage], add_messages]
     session_id: str
+    # id of the last message when the summarizer last ran.
+    summarized_through: Optional[str]
+    # holds the running summary of the summarizer.
+    context: dict[str, Any]
+
@@ -0,0 +1,210 @@
+import collections
+import threading
+import typing
+
+from langchain_core.messages import BaseMessage, AIMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.messages.utils import count_tokens_approximately
+
+from cdc_agents.config.agent_config_props import MessageOverflowStrategy
+from python_util.logger.logger import LoggerFacade
+
+PINNED = 'pinned'
+
+
+def pin_message(message: BaseMessage) -> BaseMessage:
+    """
+    Mark a message to be kept in full whenever the message state is over budget.
+    """
+    message.additional_kwargs[PINNED] = True
+    return message
+
+
+def is_pinned(message: BaseMessage) -> bool:
+    return bool(message.additional_kwargs.get(PINNED)) or isinstance(message, SystemMessage)
+
+
+class MessageTokenCounter:
+    """
+    Token counts per message, cached by message id and content so that the history shared by the orchestrator and
+    every agent it delegates to is only counted once.
+    """
+
+    def __init__(self, count_tokens: typing.Callable[[typing.List[BaseMessage]], int] = count_tokens_approximately,
+                 max_cached: int = 10000):
+        self.count_tokens = count_tokens
+        self.max_cached = max_cached
+        self._counts: typing.OrderedDict[typing.Hashable, int] = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def count(self, message: BaseMessage) -> int:
+        key = self._key(message)
+        with self._lock:
+            count = self._counts.get(key)
+            if count is not None:
+                self._counts.move_to_end(key)
+                return count
+        count = self.count_tokens([message])
+        with self._lock:
+            self._counts[key] = count
+            if len(self._counts) > self.max_cached:
+                self._counts.popitem(last=False)
+        return count
+
+    def count_all(self, messages: typing.Sequence[BaseMessage]) -> int:
+        return sum(self.count(m) for m in messages)
+
+    @staticmethod
+    def _key(message: BaseMessage) -> typing.Hashable:
+        # str caches its own hash, so re-keying the same content is constant time.
+        content = message.content if isinstance(message.content, str) else repr(message.content)
+        tool_calls = len(message.tool_calls) if isinstance(message, AIMessage) else 0
+        return message.id or id(message), message.type, hash(content), tool_calls
+
+
+message_token_counter = MessageTokenCounter()
+
+
+class MessageBudget:
+    """
+    Fits the messages sent to a model into max_tokens. The oldest messages are dropped, truncated or summarized
+    first. System messages, pinned messages, the first human message (the task) and the latest turn are always
+    kept. An AI message's tool calls and their tool messages are kept or removed together.
+
+    Summaries are cached by the id of the last message they summarize - as the removed messages only grow from one
+    model call to the next, a later call summarizes the previous summary and the messages removed since.
+    """
+
+    def __init__(self, max_tokens: int,
+                 strategy: MessageOverflowStrategy = MessageOverflowStrategy.DROP,
+                 counter: MessageTokenCounter = message_token_counter,
+                 summarize: typing.Optional[typing.Callable[[typing.List[BaseMessage]], str]] = None,
+                 max_tokens_truncated_message: int = 512,
+                 max_cached_summaries: int = 256):
+        self.max_tokens = max_tokens
+        self.strategy = strategy
+        self.counter = counter
+        self.summarize = summarize
+        self.max_tokens_truncated_message = max_tokens_truncated_message
+        self.max_cached_summaries = max_cached_summaries
+        # id of the last message summarized -> (id of the first, how many, summary).
+        self._summaries: typing.OrderedDict[str, typing.Tuple[typing.Optional[str], int, str]] = \
+            collections.OrderedDict()
+        self._summaries_lock = threading.Lock()
+
+    def pre_model_hook(self, state) -> typing.Dict[str, typing.Any]:
+        """
+        create_react_agent pre_model_hook. The budgeted messages are only the model's input, the graph's message
+        state is left as it is.
+        """
+        messages = state['messages'] if isinstance(state, dict) else state.messages
+        return {'llm_input_messages': self.fit(messages)}
+
+    def fit(self, messages: typing.Sequence[BaseMessage]) -> typing.List[BaseMessage]:
+        messages = list(messages)
+        total = self.counter.count_all(messages)
+        if self.max_tokens is None or total <= self.max_tokens:
+            return messages
+
+        units = self._units(messages)
+        first_human = next((i for i, unit in enumerate(units) if isinstance(unit[0], HumanMessage)), None)
+        removable = [i for i, unit in enumerate(units)
+                     if i != first_human and i != len(units) - 1 and not any(is_pinned(m) for m in unit)]
+        kept: typing.List[typing.Optional[typing.List[BaseMessage]]] = list(units)
+        removed: typing.List[BaseMessage] = []
+        before = total
+
+        if self.strategy == MessageOverflowStrategy.TRUNCATE:
+            for i in removable:
+                if total <= self.max_tokens:
+                    break
+                truncated = [self._truncate(m) for m in units[i]]
+                total -= self.counter.count_all(units[i]) - self.counter.count_all(truncated)
+                kept[i] = truncated
+
+        for i in removable:
+            if total <= self.max_tokens:
+                break
+            total -= self.counter.count_all(kept[i])
+            removed.extend(units[i])
+            kept[i] = None
+
+        summary = self._summary(removed) if self.strategy == MessageOverflowStrategy.SUMMARIZE and removed else None
+        fitted = []
+        for unit in kept:
+            if unit is None:
+                if summary is not None:
+                    fitted.append(summary)
+                    summary = None
+                continue
+            fitted.extend(unit)
+
+        LoggerFacade.debug(f"Message state of {before} tokens over budget of {self.max_tokens} - sending "
+                           f"{len(fitted)} of {len(messages)} messages with {self.strategy.value}.")
+        return fitted
+
+    @staticmethod
+    def _units(messages: typing.List[BaseMessage]) -> typing.List[typing.List[BaseMessage]]:
+        """
+        Groups each AI message with the tool messages answering its tool calls, as a model rejects either without
+        the other.
+        """
+        units = []
+        for m in messages:
+            if isinstance(m, ToolMessage) and units and isinstance(units[-1][0], AIMessage) \
+                    and units[-1][0].tool_calls:
+                units[-1].append(m)
+            else:
+                units.append([m])
+        return units
+
+    def _truncate(self, message: BaseMessage) -> BaseMessage:
+        tokens = self.counter.count(message)
+        if not isinstance(message.content, str) or tokens <= self.max_tokens_truncated_message:
+            return message
+        chars = len(message.content) * self.max_tokens_truncated_message // tokens
+        return message.model_copy(update={
+            'content': f"{message.content[:chars]}\n... [truncated {tokens - self.max_tokens_truncated_message} "
+                       f"tokens]"})
+
+    def _summary(self, removed: typing.List[BaseMessage]) -> typing.Optional[BaseMessage]:
+        if self.summarize is None:
+            return None
+        summarized, previous = self._cached_summary(removed)
+        try:
+            if previous is None:
+                summary = self.summarize(removed)
+            elif summarized == len(removed):
+                summary = previous
+            else:
+                summary = self.summarize([self._summary_message(previous)] + removed[summarized:])
+        except Exception as e:
+            LoggerFacade.warn(f"Failed to summarize {len(removed)} messages over the message budget - dropping "
+                              f"them instead: {e}")
+            return None
+        self._cache_summary(removed, summary)
+        return self._summary_message(summary)
+
+    @staticmethod
+    def _summary_message(summary: str) -> BaseMessage:
+        return HumanMessage(content=f"Summary of earlier messages:\n{summary}", name='summary')
+
+    def _cached_summary(self, removed: typing.List[BaseMessage]) -> typing.Tuple[int, typing.Optional[str]]:
+        """
+        :return: how many of the removed messages, from the first, the longest cached summary of them covers, and it.
+        """
+        with self._summaries_lock:
+            for i in range(len(removed) - 1, -1, -1):
+                cached = self._summaries.get(removed[i].id) if removed[i].id is not None else None
+                if cached is not None and cached[:2] == (removed[0].id, i + 1):
+                    self._summaries.move_to_end(removed[i].id)
+                    return i + 1, cached[2]
+        return 0, None
+
+    def _cache_summary(self, removed: typing.List[BaseMessage], summary: str):
+        if removed[-1].id is None:
+            return
+        with self._summaries_lock:
+            self._summaries[removed[-1].id] = (removed[0].id, len(removed), summary)
+            self._summaries.move_to_end(removed[-1].id)
+            if len(self._summaries) > self.max_cached_summaries:
+                self._summaries.popitem(last=False)
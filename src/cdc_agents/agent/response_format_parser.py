@@ -24,6 +24,7 @@ class ResponseFormatBuilder:
         self.is_tool_message: bool = False
         self.additional_context: Optional[str] = None
         self.next_agent: Optional[str] = None
+        self.next_agents: List[str] = []
 
     def set_status(self, status: str) -> 'ResponseFormatBuilder':
         self.status = status
@@ -61,6 +62,13 @@ class ResponseFormatBuilder:
         self.next_agent = next_agent
         return self
 
+    def add_next_agent(self, next_agent: str) -> 'ResponseFormatBuilder':
+        if self.next_agent is None:
+            self.next_agent = next_agent
+        if next_agent not in self.next_agents:
+            self.next_agents.append(next_agent)
+        return self
+
     def build(self) -> ResponseFormat:
         """Build the final ResponseFormat object."""
         message = self.additional_context if self.additional_context is not None else self.content
@@ -88,7 +96,8 @@ class ResponseFormatBuilder:
             status=self.status,
             message=final_message,
             history=self.history or [],
-            route_to=self.route_to or self.next_agent
+            route_to=self.route_to or self.next_agent,
+            parallel_routes=self.next_agents if len(self.next_agents) > 1 else None
         )
 
 
@@ -189,7 +198,8 @@ class NextAgentResponseFormatParser(ResponseFormatParser):
     """Parser to extract next agent information using regex."""
 
     def __init__(self):
-        self.NEXT_AGENT_RX = re.compile(r"NEXT AGENT\s*:\s*(?P<state>[A-Za-z0-9_]+)", re.IGNORECASE)
+        self.NEXT_AGENT_RX = re.compile(r"NEXT AGENT\s*:\s*(?P<state>[A-Za-z0-9_]+(\s*,\s*[A-Za-z0-9_]+)*)",
+                                        re.IGNORECASE)
         self.possible_agents = set([])
 
     def set_agents(self, agents):
@@ -197,6 +207,9 @@ class NextAgentResponseFormatParser(ResponseFormatParser):
             self.possible_agents.add(a)
 
     def parse(self, builder: ResponseFormatBuilder, last_message: BaseMessage, values: Dict[str, Any]) -> ResponseFormatBuilder:
+        """
+        Several agents, on one NEXT AGENT line separated by commas or on several lines, are delegated to in parallel.
+        """
         if builder.is_tool_message:
             return builder
 
@@ -205,22 +218,21 @@ class NextAgentResponseFormatParser(ResponseFormatParser):
         for line in content.splitlines():
             match = self.NEXT_AGENT_RX.search(line)
             if match:
-                agent = self._get_match_group(match)
-                if agent == 'skip':
-                    agent = None
-                elif agent is not None and agent in self.possible_agents:
-                    builder.set_next_agent(agent)
-                else:
-                    LoggerFacade.error(f"Found unknown agent {agent}")
-                break
+                for agent in self._get_match_group(match):
+                    if agent == 'skip':
+                        continue
+                    elif agent in self.possible_agents:
+                        builder.add_next_agent(agent)
+                    else:
+                        LoggerFacade.error(f"Found unknown agent {agent}")
 
         return builder
 
-    def _get_match_group(self, match):
-        agent = match.group("state")
-        if agent is not None:
-            agent = agent.strip()
-        return agent
+    def _get_match_group(self, match) -> List[str]:
+        agents = match.group("state")
+        if agents is None:
+            return []
+        return [agent.strip() for agent in agents.split(',') if agent.strip()]
 
     def ordering(self) -> int:
         return 20
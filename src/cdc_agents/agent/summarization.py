@@ -0,0 +1,70 @@
+import threading
+import typing
+
+from langchain_core.messages import BaseMessage
+from langchain_core.runnables import Runnable, RunnableConfig
+
+from cdc_agents.agent.message_budget import MessageTokenCounter, message_token_counter
+from python_util.logger.logger import LoggerFacade
+
+
+class GatedSummarizationNode:
+    """
+    Runs the summarization node only once min_tokens or min_messages have been added to the message state since it
+    last ran, instead of after every agent turn. With neither threshold set, every turn is summarized.
+
+    The running summary is kept in the graph state's context. In incremental mode it is passed to the next run, so each
+    run only summarizes the messages added since the previous summary - otherwise each run summarizes every message.
+    """
+
+    def __init__(self, summarization_node: Runnable,
+                 min_tokens: typing.Optional[int] = None,
+                 min_messages: typing.Optional[int] = None,
+                 incremental: bool = False,
+                 counter: MessageTokenCounter = message_token_counter):
+        self.summarization_node = summarization_node
+        self.min_tokens = min_tokens
+        self.min_messages = min_messages
+        self.incremental = incremental
+        self.counter = counter
+        self.stats = {'calls': 0, 'skipped': 0}
+        self._lock = threading.Lock()
+
+    def should_summarize(self, state, messages: typing.Optional[typing.List[BaseMessage]] = None) -> bool:
+        """
+        :param state: the graph state, holding where the last summary ended.
+        :param messages: the messages the state will hold after the current update, when not yet applied to it.
+        """
+        if self.min_tokens is None and self.min_messages is None:
+            return True
+        added = self._added_since_summary(state, messages if messages is not None else state.get('messages') or [])
+        summarize = ((self.min_messages is not None and len(added) >= self.min_messages)
+                     or (self.min_tokens is not None and self.counter.count_all(added) >= self.min_tokens))
+        if not summarize:
+            with self._lock:
+                self.stats['skipped'] += 1
+        return summarize
+
+    def __call__(self, state, config: RunnableConfig) -> typing.Dict[str, typing.Any]:
+        messages = state.get('messages') or []
+        summarization_input = {'messages': messages,
+                               'context': (state.get('context') or {}) if self.incremental else {}}
+        update = self.summarization_node.invoke(summarization_input, config)
+        with self._lock:
+            self.stats['calls'] += 1
+            LoggerFacade.debug(f"Summarized {len(messages)} messages - {self.stats['calls']} summarizer calls, "
+                               f"{self.stats['skipped']} skipped.")
+        state_update = {'summarized_through': messages[-1].id if messages else None}
+        if 'context' in update:
+            state_update['context'] = update['context']
+        return state_update
+
+    @staticmethod
+    def _added_since_summary(state, messages: typing.List[BaseMessage]) -> typing.List[BaseMessage]:
+        summarized_through = state.get('summarized_through')
+        if summarized_through is None:
+            return messages
+        for i in range(len(messages) - 1, -1, -1):
+            if messages[i].id == summarized_through:
+                return messages[i + 1:]
+        return messages
@@ -1,17 +1,28 @@
+import collections
+import dataclasses
+import functools
 import logging
+import threading
+import time
 import typing
+import uuid
 
-from cdc_agents.common.types import Message, ResponseFormat, AgentGraphResponse, AgentGraphResult, WaitStatusMessage
-import threading
+from cdc_agents.common.types import Message, ResponseFormat, AgentGraphResponse, AgentGraphResult, WaitStatusMessage, \
+    AgentGraphToken, AgentGraphUpdate
+import concurrent.futures
 import traceback
 from typing import AsyncIterable
 from typing import Union
 
 import asyncio
 
+import injector
+
 import cdc_agents.common.server.utils as utils
 from cdc_agents.agent.a2a import A2AAgent
-from cdc_agents.common.server.task_manager import InMemoryTaskManager
+from cdc_agents.common.server.event_bus import EventBus, LocalEventBus, PostgresEventBus, Workers
+from cdc_agents.common.server.task_manager import InMemoryTaskManager, AsyncInMemoryTaskManager, TaskRetention
+from cdc_agents.common.server.task_store import TaskStore, SqliteTaskStore, PostgresTaskStore, SqlTaskStore
 from cdc_agents.common.types import (
     SendTaskRequest,
     TaskSendParams,
@@ -30,22 +41,360 @@ from cdc_agents.common.types import (
     Task,
     TaskIdParams,
     PushNotificationConfig,
-    InvalidParamsError, Part, InvalidRequestError,
+    InvalidParamsError, Part, InvalidRequestError, ServerBusyError,
     # PushTaskEvent,
 )
 from cdc_agents.common.utils.push_notification_auth import PushNotificationSenderAuth
+from cdc_agents.config.task_manager_config_props import TaskManagerConfigProps, TaskStoreType, EventBusType
+from python_di.configs.autowire import injectable
+from python_di.configs.component import component
 from python_util.logger.logger import LoggerFacade
 
 logger = logging.getLogger(__name__)
 
+class AgentSchedulerBusyError(Exception):
+    pass
+
+
+@dataclasses.dataclass
+class ScheduledWork:
+    agent_name: str
+    fn: typing.Callable[[], typing.Any]
+    future: concurrent.futures.Future
+    enqueued_at: float
+
+
+@dataclasses.dataclass
+class QueueWaitStats:
+    scheduled: int = 0
+    rejected: int = 0
+    total_wait_seconds: float = 0.0
+    max_wait_seconds: float = 0.0
+
+    @property
+    def mean_wait_seconds(self) -> float:
+        return self.total_wait_seconds / self.scheduled if self.scheduled else 0.0
+
+
+@dataclasses.dataclass(frozen=True)
+class HistoryMark:
+    """
+    How much of the agent's history of a task is already in the task's history - the agent messages converted and the
+    id of the last of them, and the number of task history messages they made along with the last of those.
+    """
+    converted: int
+    last_id: str
+    kept: int
+    last_kept: typing.Optional[Message]
+
+
+class AgentExecutor(concurrent.futures.Executor):
+    """
+    Executor view of the scheduler for one agent, to hand to a task manager.
+    """
+
+    def __init__(self, scheduler: "AgentExecutionScheduler", agent_name: str):
+        self.scheduler = scheduler
+        self.agent_name = agent_name
+
+    def submit(self, fn, /, *args, **kwargs) -> concurrent.futures.Future:
+        return self.scheduler.submit(self.agent_name, fn, *args, **kwargs)
+
+
+@component()
+@injectable()
+class AgentExecutionScheduler:
+    """
+    Admission control for agent invocations. At most task_manager.max_workers invocations run at once, each agent is
+    limited to its own concurrency, and at most task_manager.max_queued wait for a slot - beyond that submissions are
+    rejected with AgentSchedulerBusyError, which task managers report as a JSON-RPC ServerBusyError. Queued work is
+    started in submission order, skipping agents that are at their limit. The time each invocation waits is recorded
+    per agent for sizing the limits.
+    """
+
+    @injector.inject
+    def __init__(self, task_manager_config_props: TaskManagerConfigProps):
+        self.props = task_manager_config_props
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=task_manager_config_props.max_workers,
+                                                               thread_name_prefix="agent-execution")
+        self._lock = threading.Lock()
+        self._queue: collections.deque[ScheduledWork] = collections.deque()
+        self._running = 0
+        self._agent_running: typing.Dict[str, int] = collections.defaultdict(int)
+        self._stats: typing.Dict[str, QueueWaitStats] = collections.defaultdict(QueueWaitStats)
+
+    def executor_for(self, agent_name: str) -> AgentExecutor:
+        return AgentExecutor(self, agent_name)
+
+    def agent_limit(self, agent_name: str) -> int:
+        limit = self.props.agent_max_concurrency.get(agent_name, self.props.default_agent_max_concurrency)
+        return limit if limit is not None and limit > 0 else self.props.max_workers
+
+    def submit(self, agent_name: str, fn: typing.Callable, *args, **kwargs) -> concurrent.futures.Future:
+        future = concurrent.futures.Future()
+        work = ScheduledWork(agent_name, functools.partial(fn, *args, **kwargs), future, time.monotonic())
+        with self._lock:
+            self._queue.append(work)
+            self._dispatch()
+            if len(self._queue) > self.props.max_queued:
+                # it could not start right away and there's no room left to wait.
+                self._queue.remove(work)
+                self._stats[agent_name].rejected += 1
+                raise AgentSchedulerBusyError(f"{len(self._queue)} agent invocations are already waiting, "
+                                              f"could not schedule {agent_name}.")
+        return future
+
+    def queue_wait_stats(self) -> typing.Dict[str, QueueWaitStats]:
+        with self._lock:
+            return {agent: dataclasses.replace(stats) for agent, stats in self._stats.items()}
+
+    @property
+    def queued(self) -> int:
+        return len(self._queue)
+
+    @property
+    def running(self) -> int:
+        return self._running
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+    def _dispatch(self):
+        while self._running < self.props.max_workers:
+            work = next((w for w in self._queue if self._agent_running[w.agent_name] < self.agent_limit(w.agent_name)),
+                        None)
+            if work is None:
+                return
+            self._queue.remove(work)
+            self._running += 1
+            self._agent_running[work.agent_name] += 1
+            waited = time.monotonic() - work.enqueued_at
+            stats = self._stats[work.agent_name]
+            stats.scheduled += 1
+            stats.total_wait_seconds += waited
+            stats.max_wait_seconds = max(stats.max_wait_seconds, waited)
+            self._executor.submit(self._run, work)
+
+    def _run(self, work: ScheduledWork):
+        try:
+            if work.future.set_running_or_notify_cancel():
+                try:
+                    work.future.set_result(work.fn())
+                except BaseException as e:
+                    work.future.set_exception(e)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._agent_running[work.agent_name] -= 1
+                self._dispatch()
+
+
+def task_retention(task_manager_config_props: TaskManagerConfigProps) -> typing.Optional[TaskRetention]:
+    """
+    The retention configured for finished tasks, or None to keep every task.
+    """
+    props = task_manager_config_props
+    if props.max_retained_tasks is None and props.task_idle_ttl_seconds is None and props.max_retained_task_bytes is None:
+        return None
+    return TaskRetention(props.max_retained_tasks, props.task_idle_ttl_seconds, props.max_retained_task_bytes,
+                         props.task_sweep_interval_seconds)
+
+
+_task_stores: typing.Dict[typing.Tuple[TaskStoreType, str], SqlTaskStore] = {}
+_task_stores_lock = threading.Lock()
+
+
+def task_store(task_manager_config_props: TaskManagerConfigProps, namespace: str) -> typing.Optional[TaskStore]:
+    """
+    The store configured for the tasks of the agent namespace, or None to keep them in memory. The agents' stores
+    share one connection to the database.
+    """
+    props = task_manager_config_props
+    if props.task_store == TaskStoreType.MEMORY:
+        return None
+    if not props.task_store_uri:
+        raise ValueError(f"task_manager.task_store_uri is required for a {props.task_store.value} task store.")
+    key = (props.task_store, props.task_store_uri)
+    with _task_stores_lock:
+        if key not in _task_stores:
+            LoggerFacade.info(f"Loading {props.task_store.value} task store from {props.task_store_uri}.")
+            if props.task_store == TaskStoreType.SQLITE:
+                store = SqliteTaskStore.from_path(props.task_store_uri)
+            else:
+                store = PostgresTaskStore.from_uri(props.task_store_uri, max_size=props.task_store_pool_max_size)
+            store.setup()
+            _task_stores[key] = store
+        return _task_stores[key].namespaced(namespace)
+
+
+_event_buses: typing.Dict[typing.Tuple[EventBusType, typing.Optional[str]], EventBus] = {}
+_workers: typing.Dict[EventBus, Workers] = {}
+
+
+def event_bus(task_manager_config_props: TaskManagerConfigProps) -> typing.Optional[EventBus]:
+    """
+    The event bus configured for task events, shared by the agents of this process, or None to deliver them to this
+    process's subscribers directly.
+    """
+    props = task_manager_config_props
+    if props.event_bus is None:
+        return None
+    uri = props.event_bus_uri or props.task_store_uri
+    key = (props.event_bus, uri if props.event_bus == EventBusType.POSTGRES else None)
+    with _task_stores_lock:
+        if key not in _event_buses:
+            if props.event_bus == EventBusType.LOCAL:
+                _event_buses[key] = LocalEventBus()
+            else:
+                if not uri:
+                    raise ValueError("task_manager.event_bus_uri is required for a POSTGRES event bus.")
+                LoggerFacade.info(f"Connecting to POSTGRES event bus at {uri}.")
+                bus = PostgresEventBus(uri)
+                bus.setup()
+                _event_buses[key] = bus.start()
+        return _event_buses[key]
+
+
+def task_workers(task_manager_config_props: TaskManagerConfigProps) -> typing.Optional[Workers]:
+    """
+    The workers on the event bus sessions are assigned to with session_affinity, or None to run every session on the
+    worker receiving it.
+    """
+    props = task_manager_config_props
+    bus = event_bus(props)
+    if not props.session_affinity or bus is None:
+        return None
+    with _task_stores_lock:
+        if bus not in _workers:
+            _workers[bus] = Workers(bus, props.worker_heartbeat_seconds).start()
+        return _workers[bus]
+
+
 class AgentTaskManager(InMemoryTaskManager):
+    """
+    With workers, each session runs on the worker it is assigned to, so the agent's checkpoints of the session stay
+    cached there - tasks received by another worker are forwarded to it over the event bus, and their response or
+    events sent back the same way.
+    """
 
     def __init__(self,
                  agent: A2AAgent,
-                 notification_sender_auth: PushNotificationSenderAuth):
-        super().__init__()
+                 notification_sender_auth: PushNotificationSenderAuth,
+                 retention: typing.Optional[TaskRetention] = None,
+                 task_store: typing.Optional[TaskStore] = None,
+                 event_bus: typing.Optional[EventBus] = None,
+                 workers: typing.Optional[Workers] = None):
+        if event_bus is None and workers is not None:
+            event_bus = workers.event_bus
+        super().__init__(retention=retention, task_store=task_store, event_bus=event_bus,
+                         event_channel=f"task_events:{agent.agent_name}" if event_bus is not None else 'task_events')
         self.agent = agent
         self.notification_sender_auth = notification_sender_auth
+        self.workers = workers
+        self._forwarded: typing.Dict[str, concurrent.futures.Future] = {}
+        self._history_marks: typing.Dict[str, HistoryMark] = {}
+        self._unsubscribe_forwarding = []
+        if workers is not None:
+            self._unsubscribe_forwarding = [
+                workers.event_bus.subscribe(self._work_channel(workers.worker_id), self._on_forwarded_work),
+                workers.event_bus.subscribe(self._reply_channel(workers.worker_id), self._on_forwarded_reply)]
+
+    def close(self):
+        for unsubscribe in self._unsubscribe_forwarding:
+            unsubscribe()
+        super().close()
+
+    def _remove_task(self, task_id: str) -> str:
+        self._history_marks.pop(task_id, None)
+        return super()._remove_task(task_id)
+
+    def session_owner(self, session_id) -> typing.Optional[str]:
+        """
+        The worker the session is assigned to, when it is another worker.
+        """
+        if self.workers is None or session_id is None:
+            return None
+        owner = self.workers.owner(session_id)
+        return owner if owner != self.workers.worker_id else None
+
+    def _work_channel(self, worker_id: str) -> str:
+        return f"task_work:{self.agent.agent_name}:{worker_id}"
+
+    def _reply_channel(self, worker_id: str) -> str:
+        return f"task_replies:{self.agent.agent_name}:{worker_id}"
+
+    def _forward(self, owner: str, kind: str,
+                 request: Union[SendTaskRequest, SendTaskStreamingRequest]) -> concurrent.futures.Future:
+        reply_id = str(uuid.uuid4())
+        future = concurrent.futures.Future()
+        if kind == 'send':
+            self._forwarded[reply_id] = future
+        else:
+            # the stream's events are the reply.
+            future.set_result(None)
+        LoggerFacade.debug(f"Forwarding task {request.params.id} to {owner}.")
+        self.workers.event_bus.publish(self._work_channel(owner), {
+            'kind': kind, 'request': request.model_dump(mode='json'), 'reply_to': self.workers.worker_id,
+            'reply_id': reply_id})
+        return future
+
+    def _forwarded_response(self, owner: str, future: concurrent.futures.Future, request: SendTaskRequest):
+        """
+        Waits for the response of the task forwarded to owner, for as long as owner is live.
+        """
+        while True:
+            try:
+                return future.result(timeout=self.workers.heartbeat_seconds)
+            except concurrent.futures.TimeoutError:
+                if not self.workers.is_live(owner):
+                    return self._owner_lost(owner, future, request)
+
+    def _owner_lost(self, owner: str, future: concurrent.futures.Future, request: SendTaskRequest):
+        for reply_id in [r for r, f in list(self._forwarded.items()) if f is future]:
+            self._forwarded.pop(reply_id, None)
+        LoggerFacade.error(f"Worker {owner} running task {request.params.id} stopped.")
+        return SendTaskResponse(id=request.id, error=InternalError(
+            message=f"The worker running task {request.params.id} stopped."))
+
+    def _on_forwarded_work(self, message: dict):
+        if message['kind'] == 'send':
+            request = SendTaskRequest.model_validate(message['request'])
+
+            def send():
+                try:
+                    response = self._send_task(request)
+                except AgentSchedulerBusyError as e:
+                    response = SendTaskResponse(id=request.id, error=ServerBusyError(data=str(e)))
+                except Exception as e:
+                    response = SendTaskResponse(id=request.id, error=InternalError(message=str(e)))
+                self.workers.event_bus.publish(self._reply_channel(message['reply_to']), {
+                    'reply_id': message['reply_id'], 'response': response.model_dump(mode='json')})
+        else:
+            request = SendTaskStreamingRequest.model_validate(message['request'])
+
+            def send():
+                error = self._start_stream(request)
+                if error is not None:
+                    self.enqueue_events_for_sse(request.params.id, error.error)
+                else:
+                    self._run_streaming_agent(request)
+
+        try:
+            self.submit_agent_work(send)
+        except AgentSchedulerBusyError as e:
+            logger.warning(f"Rejecting task {request.params.id} forwarded by {message['reply_to']}: {e}")
+            if message['kind'] == 'send':
+                self.workers.event_bus.publish(self._reply_channel(message['reply_to']), {
+                    'reply_id': message['reply_id'],
+                    'response': SendTaskResponse(id=request.id, error=ServerBusyError(data=str(e))).model_dump(
+                        mode='json')})
+            else:
+                self.enqueue_events_for_sse(request.params.id, ServerBusyError(data=str(e)))
+
+    def _on_forwarded_reply(self, message: dict):
+        future = self._forwarded.pop(message['reply_id'], None)
+        if future is not None:
+            future.set_result(SendTaskResponse.model_validate(message['response']))
 
     def _run_streaming_agent(self, request: SendTaskStreamingRequest):
         self.insert_lock(request.params.id)
@@ -54,7 +403,20 @@ class AgentTaskManager(InMemoryTaskManager):
         query = self.get_user_query(task_send_params)
 
         try:
-            threading.Thread(target=lambda: self._do_agent_stream(query, task_send_params.sessionId)).start()
+            self.submit_agent_work(lambda: self._do_agent_stream_or_error(query, task_send_params))
+        except AgentSchedulerBusyError as e:
+            logger.warning(f"Rejecting stream for task {task_send_params.id}: {e}")
+            self.update_store(task_send_params.id, TaskStatus(state=TaskState.FAILED), append_process=False)
+            self.enqueue_events_for_sse(task_send_params.id, ServerBusyError(data=str(e)))
+        except Exception as e:
+            logger.error(f"An error occurred while streaming the response: {e}")
+            self.enqueue_events_for_sse(
+                task_send_params.id,
+                InternalError(message=f"An error occurred while streaming the response: {e}"))
+
+    def _do_agent_stream_or_error(self, query, task_send_params: TaskSendParams):
+        try:
+            self._do_agent_stream(query, task_send_params.sessionId)
         except Exception as e:
             logger.error(f"An error occurred while streaming the response: {e}")
             self.enqueue_events_for_sse(
@@ -63,32 +425,38 @@ class AgentTaskManager(InMemoryTaskManager):
 
     def _do_agent_stream(self, query, session_id):
         for item in self.agent.stream(query, session_id):
+            if isinstance(item, AgentGraphToken):
+                self._enqueue_token(item, session_id)
+                continue
             item: AgentGraphResponse = item
             is_task_complete = item.is_task_complete
             require_user_input = item.require_user_input
             artifact = None
             message = None
             parts = [{"type": "text", "text": item.content.message}]
+            # updates carry only the messages added by one node of the graph - which node is passed to the client.
+            metadata = {'agent_name': item.agent_name} \
+                if isinstance(item, AgentGraphUpdate) and item.agent_name is not None else None
             do_end_stream = False
             do_restart_stream = False
 
             if not is_task_complete and not require_user_input:
                 with self.task_locks[session_id]:
                     task_state = TaskState.WORKING
-                    message = Message(role="agent", parts=parts)
+                    message = Message(role="agent", parts=parts, metadata=metadata)
                     self._apply_task_enqueue(artifact, do_end_stream, message, session_id, task_state)
             elif require_user_input:
                 with self.task_locks[session_id]:
                     task_state = TaskState.INPUT_REQUIRED
-                    message = Message(role="agent", parts=parts)
+                    message = Message(role="agent", parts=parts, metadata=metadata)
                     do_end_stream = True
                     self._apply_task_enqueue(artifact, do_end_stream, message, session_id, task_state)
             else:
                 with self.task_locks[session_id]:
-                    task = self.task(session_id)
+                    task = self.task_without_history(session_id)
                     if self._no_more_to_process(task):
                         task_state = TaskState.COMPLETED
-                        artifact = Artifact(parts=parts, index=0, append=False)
+                        artifact = Artifact(parts=parts, index=0, append=False, metadata=metadata)
                         do_end_stream = True
                         self._apply_task_enqueue(artifact, do_end_stream, message, session_id, task_state)
                     else:
@@ -107,6 +475,15 @@ class AgentTaskManager(InMemoryTaskManager):
             if do_end_stream:
                 return
 
+    def _enqueue_token(self, token: AgentGraphToken, session_id):
+        """
+        Tokens are appended to the task's artifact on the SSE stream only - the store and push notifications get the
+        full artifact that replaces them when the task completes.
+        """
+        artifact = Artifact(parts=[TextPart(text=token.token)], index=0, append=True, lastChunk=False,
+                            metadata=None if token.agent_name is None else {'agent_name': token.agent_name})
+        self.enqueue_events_for_sse(session_id, TaskArtifactUpdateEvent(id=session_id, artifact=artifact))
+
     def _no_more_to_process(self, task):
         return not task.to_process or (task.to_process is not None and len(task.to_process) == 0)
 
@@ -156,7 +533,14 @@ class AgentTaskManager(InMemoryTaskManager):
         validation_error = self._validate_request(request)
         if validation_error:
             return SendTaskResponse(id=request.id, error=validation_error.error)
-        
+
+        owner = self.session_owner(request.params.sessionId)
+        if owner is not None:
+            return self._forwarded_response(owner, self._forward(owner, 'send', request), request)
+
+        return self._send_task(request)
+
+    def _send_task(self, request: SendTaskRequest) -> SendTaskResponse:
         if request.params.pushNotification:
             if not self.set_push_notification_info(request.params.id, request.params.pushNotification):
                 return SendTaskResponse(id=request.id, error=InvalidParamsError(message="Push notification URL is invalid"))
@@ -167,7 +551,7 @@ class AgentTaskManager(InMemoryTaskManager):
         request_id = request.id
 
         with self.task_locks[task_send_params.id]:
-            prev_task = self.task(task_send_params.id)
+            prev_task = self.task_without_history(task_send_params.id)
             if prev_task is not None and prev_task.status == TaskState.WORKING:
                 prev_task = self.upsert_task(task_send_params, True)
                 # Task already working - will catch the messages below
@@ -192,7 +576,7 @@ class AgentTaskManager(InMemoryTaskManager):
             # loop until stop receiving messages for this agent.
             has_more_work = False
             with self.task_locks[request_id]:
-                task = self.task(request_id)
+                task = self.task_without_history(request_id)
                 if task and len(task.to_process)  != 0:
                     query = self.get_user_query_message(next(iter(task.to_process)),
                                                         task_send_params.sessionId)
@@ -219,43 +603,63 @@ class AgentTaskManager(InMemoryTaskManager):
             if error:
                 return error
 
-            self.insert_lock(request.params.id)
+            owner = self.session_owner(request.params.sessionId)
+            if owner is not None:
+                # the events of the run on owner are published to this worker's subscribers.
+                sse_event_queue = self.setup_sse_consumer(request.params.id, False)
+                self._forward(owner, 'subscribe', request)
+                return self.dequeue_events_for_sse(request.id, request.params.id, sse_event_queue)
 
-            with self.task_locks[request.params.id]:
-                prev_task = self.task(request.params.id)
-                if prev_task is not None and prev_task.status.state == TaskState.WORKING:
-                    prev_task = self.upsert_task(request.params, True)
-                    return JSONRPCResponse(
-                        id=request.id,
-                        error=InvalidRequestError(
-                            message="Cannot stream task that has already started. "
-                                    "Must send a task message or wait until task is completed."))
-                # must update the store in the same lock here - otherwise it fails.
-                prev_task = self.upsert_task(request.params, False)
-                prev_task = self.update_store(
-                    request.params.id, TaskStatus(state=TaskState.WORKING),None)
+            error = self._start_stream(request)
+            if error:
+                return error
 
+            return self._subscribe_started_stream(request)
+        except Exception as e:
+            return self._stream_error(request, e)
 
-            if request.params.pushNotification:
-                if not self.set_push_notification_info(request.params.id, request.params.pushNotification):
-                    return JSONRPCResponse(id=request.id, error=InvalidParamsError(message="Push notification URL is invalid"))
+    def _subscribe_started_stream(self, request: SendTaskStreamingRequest):
+        task_send_params: TaskSendParams = request.params
 
-            task_send_params: TaskSendParams = request.params
+        sse_event_queue = self.setup_sse_consumer(task_send_params.id, False)
 
-            sse_event_queue = self.setup_sse_consumer(task_send_params.id, False)
+        self._run_streaming_agent(request)
 
-            self._run_streaming_agent(request)
+        return self.dequeue_events_for_sse(
+            request.id, task_send_params.id, sse_event_queue)
+
+    def _stream_error(self, request: SendTaskStreamingRequest, e: Exception) -> JSONRPCResponse:
+        logger.error(f"Error in SSE stream: {e}")
+        print(traceback.format_exc())
+        return JSONRPCResponse(
+            id=request.id,
+            error=InternalError(
+                message="An error occurred while streaming the response"
+            ))
+
+    def _start_stream(self, request: SendTaskStreamingRequest) -> JSONRPCResponse | None:
+        self.insert_lock(request.params.id)
+
+        with self.task_locks[request.params.id]:
+            prev_task = self.task_without_history(request.params.id)
+            if prev_task is not None and prev_task.status.state == TaskState.WORKING:
+                prev_task = self.upsert_task(request.params, True)
+                return JSONRPCResponse(
+                    id=request.id,
+                    error=InvalidRequestError(
+                        message="Cannot stream task that has already started. "
+                                "Must send a task message or wait until task is completed."))
+            # must update the store in the same lock here - otherwise it fails.
+            prev_task = self.upsert_task(request.params, False)
+            prev_task = self.update_store(
+                request.params.id, TaskStatus(state=TaskState.WORKING),None)
 
-            return self.dequeue_events_for_sse(
-                request.id, task_send_params.id, sse_event_queue)
-        except Exception as e:
-            logger.error(f"Error in SSE stream: {e}")
-            print(traceback.format_exc())
-            return JSONRPCResponse(
-                id=request.id,
-                error=InternalError(
-                    message="An error occurred while streaming the response"
-                ))
+
+        if request.params.pushNotification:
+            if not self.set_push_notification_info(request.params.id, request.params.pushNotification):
+                return JSONRPCResponse(id=request.id, error=InvalidParamsError(message="Push notification URL is invalid"))
+
+        return None
 
     def _process_agent_response(
         self, request_id, request_params: TaskSendParams, agent_response: AgentGraphResponse
@@ -278,9 +682,43 @@ class AgentTaskManager(InMemoryTaskManager):
         task = self.update_store(
             task_id, task_status, None if artifact is None else [artifact])
 
-        task.history.clear()
+        agent_history = agent_response.content.history
+        with self.task_locks[task_id]:
+            if task.history is None:
+                task = self.task(task_id)
+            # the agent's history only grows between responses - convert and append the messages after the mark,
+            # dropping what was appended to the task since then, as the agent's history has that too.
+            mark = self._history_mark(task, agent_history)
+            history = self._to_task_history(agent_history[mark.converted:])
+            self.task_store.replace_history(task, history, mark.kept)
+            if len(agent_history) != 0 and agent_history[-1].id is not None:
+                self._history_marks[task_id] = HistoryMark(
+                    len(agent_history), agent_history[-1].id, len(task.history),
+                    task.history[-1] if len(task.history) != 0 else None)
+            else:
+                self._history_marks.pop(task_id, None)
+
+        task_result = self.append_task_history(task, history_length)
+        self.send_task_notification(task)
+        return SendTaskResponse(id=request_id, result=task_result)
 
-        for a in agent_response.content.history:
+    def _history_mark(self, task: Task, agent_history) -> HistoryMark:
+        """
+        The mark of the task when the agent's history and the task's history still start as they did when it was
+        made, or else the start of both.
+        """
+        mark = self._history_marks.get(task.id)
+        if (mark is None or mark.converted > len(agent_history)
+                or agent_history[mark.converted - 1].id != mark.last_id
+                or task.history is None or len(task.history) < mark.kept
+                or (mark.kept != 0 and task.history[mark.kept - 1] != mark.last_kept)):
+            return HistoryMark(0, '', 0, None)
+        return mark
+
+    @staticmethod
+    def _to_task_history(agent_history) -> typing.List[Message]:
+        history = []
+        for a in agent_history:
             parts = []
             if isinstance(a.content, str):
                 if a.content and len(a.content) != 0:
@@ -292,17 +730,16 @@ class AgentTaskManager(InMemoryTaskManager):
             elif isinstance(a.content, dict):
                 parts.append({"type": "text", "text": a.content})
             if len(parts) != 0:
-                task.history.append(Message(role="agent" if a.type == "ai" or a.type == 'tool' else "user", parts=parts))
-
-        task_result = self.append_task_history(task, history_length)
-        self.send_task_notification(task)
-        return SendTaskResponse(id=request_id, result=task_result)
+                history.append(Message(role="agent" if a.type == "ai" or a.type == 'tool' else "user", parts=parts))
+        return history
 
     def send_task_notification(self, task: Task):
         if not self.has_push_notification_info(task.id):
             logger.info(f"No push notification info found for task {task.id}")
             return
         push_info = self.get_push_notification_info(task.id)
+        if task.history is None:
+            task = self.task(task.id) or task
 
         logger.info(f"Notifying for task {task.id} => {task.status.state}")
         self.notification_sender_auth.send_push_notification(
@@ -334,3 +771,63 @@ class AgentTaskManager(InMemoryTaskManager):
         
         super().set_push_notification_info(task_id, push_notification_config)
         return True
+
+
+class AsyncAgentTaskManager(AgentTaskManager, AsyncInMemoryTaskManager):
+    """
+    AgentTaskManager for asyncio servers: agent invocations run in the executor rather than on the event loop, and
+    streaming responses are async iterables fed from the executor.
+    """
+
+    def __init__(self,
+                 agent: A2AAgent,
+                 notification_sender_auth: PushNotificationSenderAuth,
+                 executor: typing.Optional[concurrent.futures.Executor] = None,
+                 retention: typing.Optional[TaskRetention] = None,
+                 task_store: typing.Optional[TaskStore] = None,
+                 event_bus: typing.Optional[EventBus] = None,
+                 workers: typing.Optional[Workers] = None):
+        super().__init__(agent, notification_sender_auth, retention, task_store, event_bus, workers)
+        self._executor = executor
+
+    async def on_send_task(self, request: SendTaskRequest) -> SendTaskResponse:
+        owner = self.session_owner(request.params.sessionId)
+        if owner is not None and self._validate_request(request) is None:
+            # waits on the event loop, not holding a worker of the executor while the owner runs the task.
+            return await self._await_forwarded_response(owner, self._forward(owner, 'send', request), request)
+        try:
+            return await self.run_in_executor(AgentTaskManager.on_send_task, self, request)
+        except AgentSchedulerBusyError as e:
+            logger.warning(f"Rejecting task {request.params.id}: {e}")
+            return SendTaskResponse(id=request.id, error=ServerBusyError(data=str(e)))
+
+    async def _await_forwarded_response(self, owner: str, future: concurrent.futures.Future,
+                                        request: SendTaskRequest) -> SendTaskResponse:
+        response = asyncio.wrap_future(future)
+        while True:
+            try:
+                return await asyncio.wait_for(asyncio.shield(response), self.workers.heartbeat_seconds)
+            except asyncio.TimeoutError:
+                if not self.workers.is_live(owner):
+                    return self._owner_lost(owner, future, request)
+
+    async def on_send_task_subscribe(
+        self, request: SendTaskStreamingRequest
+    ) -> AsyncIterable[SendTaskStreamingResponse] | JSONRPCResponse:
+        if self._validate_request(request) is not None or self.session_owner(request.params.sessionId) is not None:
+            return AgentTaskManager.on_send_task_subscribe(self, request)
+        try:
+            # the task is read, updated and its push notification URL verified off of the event loop, and subscribed to
+            # on it, as its subscriber queue is bound to the loop.
+            error = await asyncio.to_thread(self._start_stream, request)
+            if error:
+                return error
+
+            return self._subscribe_started_stream(request)
+        except Exception as e:
+            return self._stream_error(request, e)
+
+    async def on_resubscribe_to_task(
+        self, request
+    ) -> AsyncIterable[SendTaskStreamingResponse] | JSONRPCResponse:
+        return AgentTaskManager.on_resubscribe_to_task(self, request)
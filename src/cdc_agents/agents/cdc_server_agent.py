@@ -2,7 +2,6 @@ import typing
 from typing import Any, TypeVar, Union, List, Optional
 
 import injector
-from langchain_core.tools import tool
 from langgraph.checkpoint.memory import MemorySaver
 from langgraph.prebuilt import InjectedStore, InjectedState
 from typing_extensions import Annotated
@@ -30,16 +29,188 @@ from cdc_agents.common.graphql_models import (
     GitAction,
     GitRepoRequestOptions,
     PromptingOptions,
-    GitRepo, execute_graphql_request
+    GitRepo
 )
+from cdc_agents.common.graphql_client import GraphQLClient
+from cdc_agents.common.graphql_operations import graphql_operations
 from cdc_agents.config.agent_config_props import AgentConfigProps, AgentCardItem
 from cdc_agents.config.cdc_server_config_props import CdcServerConfigProps
 from cdc_agents.model_server.model_provider import ModelProvider
+from cdc_agents.tools.async_tool import async_tool
 from cdc_agents.tools.tool_call_decorator import ToolCallDecorator
 from python_di.configs.autowire import injectable
 from python_di.configs.component import component
 from python_util.logger.logger import LoggerFacade
 
+PERFORM_GIT_ACTIONS = graphql_operations.register("""
+mutation PerformGitActions($request: GitRepositoryRequest!) {
+    doGit(repoRequest: $request) {
+        branch
+        url
+        repoStatus
+        error {
+            message
+        }
+        sessionKey {
+            key
+        }
+        clientServerDiffs {
+            items {
+                value
+            }
+            numDiffs
+        }
+    }
+}
+""")
+
+RETRIEVE_COMMIT_DIFF_CONTEXT = graphql_operations.register("""
+mutation RetrieveCommitDiffContext($request: GitRepoPromptingRequest!) {
+    buildCommitDiffContext(commitDiffContextRequest: $request) {
+        files {
+            path
+            source
+        }
+        errs {
+            message
+        }
+        sessionKey {
+            key
+        }
+    }
+}
+""")
+
+RETRIEVE_NEXT_CODE_COMMIT = graphql_operations.register("""
+mutation RetrieveNextCodeCommit($request: GitRepoPromptingRequest!) {
+    doCommit(gitRepoPromptingRequest: $request) {
+        diffs {
+            newPath
+            oldPath
+            diffType
+            content {
+                content
+                hunks {
+                    commitDiffEdits {
+                        diffType
+                        contentChange
+                    }
+                }
+            }
+        }
+        commitMessage {
+            value
+        }
+        sessionKey {
+            key
+        }
+        errors {
+            message
+        }
+    }
+}
+""")
+
+RETRIEVE_AND_APPLY_CODE_COMMIT = graphql_operations.register("""
+mutation RetrieveAndApplyCodeCommit($request: GitRepoPromptingRequest!) {
+    doCommit(gitRepoPromptingRequest: $request) {
+        diffs {
+            newPath
+            oldPath
+            diffType
+            content {
+                content
+            }
+        }
+        commitMessage {
+            value
+        }
+        sessionKey {
+            key
+        }
+        errors {
+            message
+        }
+    }
+}
+""")
+
+GET_STAGED = graphql_operations.register("""
+mutation GetStaged($request: GitRepoQueryRequest!) {
+    getStaged(repoRequest: $request) {
+        staged {
+            files {
+                beforeApplyDiff {
+                    name
+                    linesWithLineNumbers
+                }
+                afterApplyDiff {
+                    name
+                    linesWithLineNumbers
+                }
+            }
+        }
+        error {
+            message
+        }
+        sessionKey {
+            key
+        }
+    }
+}
+""")
+
+APPLY_LAST_STAGED = graphql_operations.register("""
+mutation ApplyLastStaged($request: GitRepoQueryRequest!) {
+    applyLastStaged(repoRequest: $request) {
+        staged {
+            files {
+                beforeApplyDiff {
+                    name
+                    linesWithLineNumbers
+                }
+                afterApplyDiff {
+                    name
+                    linesWithLineNumbers
+                }
+            }
+        }
+        error {
+            message
+        }
+        sessionKey {
+            key
+        }
+    }
+}
+""")
+
+RESET_ANY_STAGED = graphql_operations.register("""
+mutation ResetAnyStaged($request: GitRepoQueryRequest!) {
+    resetAnyStaged(repoRequest: $request) {
+        staged {
+            files {
+                beforeApplyDiff {
+                    name
+                    linesWithLineNumbers
+                }
+                afterApplyDiff {
+                    name
+                    linesWithLineNumbers
+                }
+            }
+        }
+        error {
+            message
+        }
+        sessionKey {
+            key
+        }
+    }
+}
+""")
+
+
 T = TypeVar('T')
 
 def _get_err(e):
@@ -73,13 +244,15 @@ def _build_git_repo_prompting_req(git_branch, git_repo_url, query, session_id, g
 class CdcServerAgentToolCallProvider:
 
     @injector.inject
-    def __init__(self, cdc_server: CdcServerConfigProps, tool_call_decorator: ToolCallDecorator):
+    def __init__(self, cdc_server: CdcServerConfigProps, tool_call_decorator: ToolCallDecorator,
+                 graphql_client: GraphQLClient):
         self.tool_call_decorator = tool_call_decorator
         self.cdc_server = cdc_server
+        self.graphql_client = graphql_client
 
     def produce_perform_commit_diff_context_git_actions(self):
-        @tool
-        def perform_commit_diff_context_git_actions(actions_to_perform: Union[List[str], str, List[GitAction]],
+        @async_tool
+        async def perform_commit_diff_context_git_actions(actions_to_perform: Union[List[str], str, List[GitAction]],
                                                     git_repo_url: str,
                                                     session_id: Annotated[str, InjectedState("session_id")],
                                                     git_branch: str = "main",
@@ -118,29 +291,6 @@ class CdcServerAgentToolCallProvider:
                 return _git_repo_result_err("""No valid operation provided. Could not call server with nothing to do.
                                                Options are ADD_BRANCH, REMOVE_BRANCH, REMOVE_REPO, PARSE_BLAME_TREE, SET_EMBEDDINGS, ADD_REPO.""")
 
-            # Construct GraphQL query
-            query = """
-            mutation PerformGitActions($request: GitRepositoryRequest!) {
-                doGit(repoRequest: $request) {
-                    branch
-                    url
-                    repoStatus
-                    error {
-                        message
-                    }
-                    sessionKey {
-                        key
-                    }
-                    clientServerDiffs {
-                        items {
-                            value
-                        }
-                        numDiffs
-                    }
-                }
-            }
-            """
-
             # Construct variables
             variables = {
                 "request": {
@@ -159,9 +309,9 @@ class CdcServerAgentToolCallProvider:
             }
 
             try:
-                return execute_graphql_request(
+                return await self.graphql_client.aexecute(
                     endpoint=self.cdc_server.graphql_endpoint,
-                    query=query,
+                    query=PERFORM_GIT_ACTIONS,
                     variables=variables,
                     result_key="doGit",
                     model_class=GitRepoResult
@@ -178,8 +328,8 @@ class CdcServerAgentToolCallProvider:
         return perform_commit_diff_context_git_actions
 
     def produce_retrieve_commit_diff_code_context(self):
-        @tool
-        def retrieve_commit_diff_code_context(session_id: Annotated[str, InjectedState("session_id")],
+        @async_tool
+        async def retrieve_commit_diff_code_context(session_id: Annotated[str, InjectedState("session_id")],
                                               query: str, git_repo_url: str,
                                               context_repos: typing.List[CdcGitRepoBranch] = None,
                                               git_branch: str = "main") -> CommitDiffFileResult:
@@ -195,23 +345,6 @@ class CdcServerAgentToolCallProvider:
                 a result object containing a list of source files, with the source field containing the XML delimited history of the source code, up to the current state of the file.
             """
 
-            query_mutation = """
-            mutation RetrieveCommitDiffContext($request: GitRepoPromptingRequest!) {
-                buildCommitDiffContext(commitDiffContextRequest: $request) {
-                    files {
-                        path
-                        source
-                    }
-                    errs {
-                        message
-                    }
-                    sessionKey {
-                        key
-                    }
-                }
-            }
-            """
-
             if not git_repo_url or not git_branch:
                 return CommitDiffFileResult(
                     errs=[GraphQLError(message="No git repositories provided")],
@@ -222,9 +355,9 @@ class CdcServerAgentToolCallProvider:
                                                     session_id, context_repos)
 
             try:
-                return execute_graphql_request(
+                return await self.graphql_client.aexecute(
                     endpoint=self.cdc_server.graphql_endpoint,
-                    query=query_mutation,
+                    query=RETRIEVE_COMMIT_DIFF_CONTEXT,
                     variables={"request": request.model_dump(exclude_none=True)},
                     result_key="buildCommitDiffContext",
                     model_class=CommitDiffFileResult)
@@ -238,8 +371,8 @@ class CdcServerAgentToolCallProvider:
 
 
     def produce_retrieve_next_code_commit(self):
-        @tool
-        def retrieve_next_code_commit(git_repo_url: str,
+        @async_tool
+        async def retrieve_next_code_commit(git_repo_url: str,
                                       session_id: Annotated[str, InjectedState("session_id")],
                                       branch_name: Optional[str] = None,
                                       query: Optional[str] = None) -> NextCommit:
@@ -254,42 +387,12 @@ class CdcServerAgentToolCallProvider:
                 Next commit information including diffs and commit message.
             """
 
-            query_mutation = """
-            mutation RetrieveNextCodeCommit($request: GitRepoPromptingRequest!) {
-                doCommit(gitRepoPromptingRequest: $request) {
-                    diffs {
-                        newPath
-                        oldPath
-                        diffType
-                        content {
-                            content
-                            hunks {
-                                commitDiffEdits {
-                                    diffType
-                                    contentChange
-                                }
-                            }
-                        }
-                    }
-                    commitMessage {
-                        value
-                    }
-                    sessionKey {
-                        key
-                    }
-                    errors {
-                        message
-                    }
-                }
-            }
-            """
-
             request = _build_git_repo_prompting_req(branch_name, git_repo_url, query, session_id)
 
             try:
-                return execute_graphql_request(
+                return await self.graphql_client.aexecute(
                     endpoint=self.cdc_server.graphql_endpoint,
-                    query=query_mutation,
+                    query=RETRIEVE_NEXT_CODE_COMMIT,
                     variables={"request": request.model_dump(exclude_none=True)},
                     result_key="doCommit",
                     model_class=NextCommit
@@ -306,8 +409,8 @@ class CdcServerAgentToolCallProvider:
 
 
     def produce_retrieve_and_apply_code_commit(self):
-        @tool
-        def retrieve_and_apply_code_commit(git_repo_url: str,
+        @async_tool
+        async def retrieve_and_apply_code_commit(git_repo_url: str,
                                            session_id: Annotated[str, InjectedState("session_id")],
                                            branch_name: Optional[str] = None,
                                            query: Optional[str] = None) -> NextCommit:
@@ -322,30 +425,6 @@ class CdcServerAgentToolCallProvider:
                 Result of retrieving and applying the commit.
             """
 
-            query_mutation = """
-            mutation RetrieveAndApplyCodeCommit($request: GitRepoPromptingRequest!) {
-                doCommit(gitRepoPromptingRequest: $request) {
-                    diffs {
-                        newPath
-                        oldPath
-                        diffType
-                        content {
-                            content
-                        }
-                    }
-                    commitMessage {
-                        value
-                    }
-                    sessionKey {
-                        key
-                    }
-                    errors {
-                        message
-                    }
-                }
-            }
-            """
-
             # Create request with Pydantic models
             request = GitRepoPromptingRequest(
                 gitRepo=GitRepoModel(path=git_repo_url),
@@ -354,14 +433,14 @@ class CdcServerAgentToolCallProvider:
                 codeQuery=CodeQuery(codeString=query) if query is not None else None)
 
             try:
-                next_commit = execute_graphql_request(
+                next_commit = await self.graphql_client.aexecute(
                     endpoint=self.cdc_server.graphql_endpoint,
-                    query=query_mutation,
+                    query=RETRIEVE_AND_APPLY_CODE_COMMIT,
                     variables={"request": request.model_dump(exclude_none=True)},
                     result_key="doCommit",
                     model_class=NextCommit)
 
-                applied = self._do_apply_last_staged(branch_name, git_repo_url, session_id, self.cdc_server)
+                applied = await self._do_apply_last_staged(branch_name, git_repo_url, session_id, self.cdc_server)
 
                 if len(applied.error) != 0:
                     next_commit.errors.extend(applied.error)
@@ -378,8 +457,8 @@ class CdcServerAgentToolCallProvider:
 
 
     def produce_retrieve_current_repository_staged(self):
-        @tool
-        def retrieve_current_repository_staged(git_repo_url: str,
+        @async_tool
+        async def retrieve_current_repository_staged(git_repo_url: str,
                                                session_id: Annotated[str, InjectedState("session_id")],
                                                branch_name: Optional[str] = None) -> GitStagedResult:
             """Retrieve current staged changes in the repository.
@@ -392,31 +471,6 @@ class CdcServerAgentToolCallProvider:
                 Current staged changes in the repository.
             """
 
-            query = """
-            mutation GetStaged($request: GitRepoQueryRequest!) {
-                getStaged(repoRequest: $request) {
-                    staged {
-                        files {
-                            beforeApplyDiff {
-                                name
-                                linesWithLineNumbers
-                            }
-                            afterApplyDiff {
-                                name
-                                linesWithLineNumbers
-                            }
-                        }
-                    }
-                    error {
-                        message
-                    }
-                    sessionKey {
-                        key
-                    }
-                }
-            }
-            """
-
 
             if git_repo_url is None:
                 return GitStagedResult(
@@ -434,9 +488,9 @@ class CdcServerAgentToolCallProvider:
                 sessionKey=SessionKey(key=session_id))
 
             try:
-                return execute_graphql_request(
+                return await self.graphql_client.aexecute(
                     endpoint=self.cdc_server.graphql_endpoint,
-                    query=query,
+                    query=GET_STAGED,
                     variables={"request": request.model_dump(exclude_none=True)},
                     result_key="getStaged",
                     model_class=GitStagedResult
@@ -452,31 +506,7 @@ class CdcServerAgentToolCallProvider:
         return retrieve_current_repository_staged
 
 
-    def _do_apply_last_staged(self, branch_name, git_repo_url, session_id, cdc_server):
-        query = """
-        mutation ApplyLastStaged($request: GitRepoQueryRequest!) {
-            applyLastStaged(repoRequest: $request) {
-                staged {
-                    files {
-                        beforeApplyDiff {
-                            name
-                            linesWithLineNumbers
-                        }
-                        afterApplyDiff {
-                            name
-                            linesWithLineNumbers
-                        }
-                    }
-                }
-                error {
-                    message
-                }
-                sessionKey {
-                    key
-                }
-            }
-        }
-        """
+    async def _do_apply_last_staged(self, branch_name, git_repo_url, session_id, cdc_server):
         # Create request with Pydantic models
         request = GitRepoQueryRequest(
             gitRepo=GitRepoModel(path=git_repo_url),
@@ -484,9 +514,9 @@ class CdcServerAgentToolCallProvider:
             sessionKey=SessionKey(key=session_id))
 
         try:
-            return execute_graphql_request(
+            return await self.graphql_client.aexecute(
                 endpoint=self.cdc_server.graphql_endpoint,
-                query=query,
+                query=APPLY_LAST_STAGED,
                 variables={"request": request.model_dump(exclude_none=True)},
                 result_key="applyLastStaged",
                 model_class=GitStagedResult
@@ -500,8 +530,8 @@ class CdcServerAgentToolCallProvider:
 
 
     def produce_apply_last_staged(self):
-        @tool
-        def apply_last_staged(git_repo_url: str,
+        @async_tool
+        async def apply_last_staged(git_repo_url: str,
                               session_id: Annotated[str, InjectedState("session_id")],
                               branch_name: Optional[str] = None) -> GitStagedResult:
             """Apply changes created last in the commit diff context session
@@ -514,14 +544,14 @@ class CdcServerAgentToolCallProvider:
                 Apply the staged changes from the last next commit call to the repository so the code can be tested and ran
             """
 
-            return self._do_apply_last_staged(branch_name, git_repo_url, session_id, self.cdc_server)
+            return await self._do_apply_last_staged(branch_name, git_repo_url, session_id, self.cdc_server)
 
         return apply_last_staged
 
 
     def produce_reset_any_staged(self):
-        @tool
-        def reset_any_staged(git_repo_url: str,
+        @async_tool
+        async def reset_any_staged(git_repo_url: str,
                              session_id: Annotated[str, InjectedState("session_id")],
                              branch_name: Optional[str] = None) -> GitStagedResult:
             """Reset the repository from any application of staged.
@@ -534,31 +564,6 @@ class CdcServerAgentToolCallProvider:
                 If any changes are staged in the repository, reset them. This will return the changes that were staged.
             """
 
-            query = """
-            mutation ResetAnyStaged($request: GitRepoQueryRequest!) {
-                resetAnyStaged(repoRequest: $request) {
-                    staged {
-                        files {
-                            beforeApplyDiff {
-                                name
-                                linesWithLineNumbers
-                            }
-                            afterApplyDiff {
-                                name
-                                linesWithLineNumbers
-                            }
-                        }
-                    }
-                    error {
-                        message
-                    }
-                    sessionKey {
-                        key
-                    }
-                }
-            }
-            """
-
             # Create request with Pydantic models
             request = GitRepoQueryRequest(
                 gitRepo=GitRepoModel(path=git_repo_url),
@@ -566,9 +571,9 @@ class CdcServerAgentToolCallProvider:
                 sessionKey=SessionKey(key=session_id))
 
             try:
-                return execute_graphql_request(
+                return await self.graphql_client.aexecute(
                     endpoint=self.cdc_server.graphql_endpoint,
-                    query=query,
+                    query=RESET_ANY_STAGED,
                     variables={"request": request.model_dump(exclude_none=True)},
                     result_key="resetAnyStaged",
                     model_class=GitStagedResult)
@@ -4,22 +4,171 @@ from typing import List, Optional, Any, Dict
 
 import pydantic
 from langgraph.checkpoint.memory import MemorySaver
-from langchain_core.tools import tool
 from langgraph.prebuilt import InjectedState
 from typing_extensions import Annotated
 
 from cdc_agents.agent.a2a import A2AAgent
 from cdc_agents.agent.agent import A2AReactAgent
-from cdc_agents.common.graphql_models import execute_graphql_request, Error
+from cdc_agents.common.graphql_client import GraphQLClient
+from cdc_agents.common.graphql_operations import graphql_operations
+from cdc_agents.common.graphql_models import Error
 from cdc_agents.agent.agent_orchestrator import DeepResearchOrchestrated
 from cdc_agents.config.agent_config_props import AgentConfigProps, AgentCardItem
 from cdc_agents.config.cdc_server_config_props import CdcServerConfigProps
 from cdc_agents.model_server.model_provider import ModelProvider
+from cdc_agents.tools.async_tool import async_tool
 from cdc_agents.tools.tool_call_decorator import ToolCallDecorator
 from python_di.configs.autowire import injectable
 from python_di.configs.component import component
 from python_util.logger.logger import LoggerFacade
 
+BUILD_CODE = graphql_operations.register("""
+mutation BuildCode($options: CodeBuildOptions!) {
+    build(options: $options) {
+        success
+        output
+        error {
+            message
+            code
+        }
+        buildId
+        registrationId
+        exitCode
+        executionTime
+        artifactPaths
+        artifactOutputDirectory
+    }
+}
+""")
+
+REGISTER_CODE_BUILD = graphql_operations.register("""
+mutation RegisterCodeBuild($codeBuildRegistration: CodeBuildRegistrationIn!) {
+    registerCodeBuild(codeBuildRegistration: $codeBuildRegistration) {
+        registrationId
+        buildCommand
+        workingDirectory
+        description
+        arguments
+        timeoutSeconds
+        enabled
+        artifactPaths
+        artifactOutputDirectory
+        executionType
+    }
+}
+""")
+
+UPDATE_CODE_BUILD_REGISTRATION = graphql_operations.register("""
+mutation UpdateCodeBuildRegistration(
+    $registrationId: String!
+    $enabled: Boolean
+    $buildCommand: String
+    $workingDirectory: String
+    $arguments: String
+    $timeoutSeconds: Int
+    $sessionId: String
+) {
+    updateCodeBuildRegistration(
+        registrationId: $registrationId
+        enabled: $enabled
+        buildCommand: $buildCommand
+        workingDirectory: $workingDirectory
+        arguments: $arguments
+        timeoutSeconds: $timeoutSeconds
+        sessionId: $sessionId
+    ) {
+        registrationId
+        buildCommand
+        workingDirectory
+        description
+        arguments
+        timeoutSeconds
+        enabled
+        artifactPaths
+        artifactOutputDirectory
+        executionType
+    }
+}
+""")
+
+DELETE_CODE_BUILD_REGISTRATION = graphql_operations.register("""
+mutation DeleteCodeBuildRegistration($registrationId: String!, $sessionId: String!) {
+    deleteCodeBuildRegistration(registrationId: $registrationId, sessionId: $sessionId)
+}
+""")
+
+RETRIEVE_BUILDS = graphql_operations.register("""
+query RetrieveBuilds {
+    retrieveBuilds {
+        sessionId
+        registrationId
+        buildCommand
+        status
+        startTime
+        endTime
+        exitCode
+        output
+        error {
+            message
+            code
+        }
+        buildId
+    }
+}
+""")
+
+RETRIEVE_BUILD_REGISTRATIONS = graphql_operations.register("""
+query RetrieveBuildRegistrations {
+    retrieveBuildRegistrations {
+        registrationId
+        buildCommand
+        workingDirectory
+        description
+        arguments
+        timeoutSeconds
+        enabled
+        artifactPaths
+        artifactOutputDirectory
+        executionType
+    }
+}
+""")
+
+GET_CODE_BUILD_REGISTRATION = graphql_operations.register("""
+query GetCodeBuildRegistration($registrationId: String!) {
+    getCodeBuildRegistration(registrationId: $registrationId) {
+        registrationId
+        buildCommand
+        workingDirectory
+        description
+        arguments
+        timeoutSeconds
+        enabled
+        artifactPaths
+        artifactOutputDirectory
+        executionType
+    }
+}
+""")
+
+GET_BUILD_OUTPUT = graphql_operations.register("""
+query GetBuildOutput($buildId: String!, $sessionId: String) {
+    getBuildOutput(buildId: $buildId, sessionId: $sessionId) {
+        success
+        output
+        error {
+            message
+            code
+        }
+        buildId
+        registrationId
+        exitCode
+        executionTime
+        artifactPaths
+        artifactOutputDirectory
+    }
+}
+""")
 
 
 # Pydantic models for code build
@@ -62,7 +211,8 @@ class BuildAgent(A2AReactAgent):
     """Base build agent that can be orchestrated by different orchestration types."""
 
     def __init__(self, agent_config: AgentConfigProps, memory_saver: MemorySaver, model_provider: ModelProvider,
-                 cdc_server: CdcServerConfigProps, tool_call_decorator: ToolCallDecorator, orchestration_type: type):
+                 cdc_server: CdcServerConfigProps, tool_call_decorator: ToolCallDecorator, graphql_client: GraphQLClient,
+                 orchestration_type: type):
         self_card: AgentCardItem = agent_config.agents[self.__class__.__name__]
         orchestration_type.__init__(self, self_card)
         A2AReactAgent.__init__(self, agent_config,
@@ -80,10 +230,11 @@ class BuildAgent(A2AReactAgent):
                                memory_saver, model_provider)
         self.tool_call_decorator = tool_call_decorator
         self.cdc_server = cdc_server
+        self.graphql_client = graphql_client
 
     def produce_build_code(self):
-        @tool
-        def build_code(registration_id: str, session_id: Annotated[str, InjectedState("session_id")],
+        @async_tool
+        async def build_code(registration_id: str, session_id: Annotated[str, InjectedState("session_id")],
                       arguments: Optional[str] = None, timeout_seconds: Optional[int] = None) -> CodeBuildResult:
             """Build code using a registered code build configuration.
 
@@ -95,25 +246,6 @@ class BuildAgent(A2AReactAgent):
             Returns:
                 Result of the code build including success status, output, and error
             """
-            query = """
-            mutation BuildCode($options: CodeBuildOptions!) {
-                build(options: $options) {
-                    success
-                    output
-                    error {
-                        message
-                        code
-                    }
-                    buildId
-                    registrationId
-                    exitCode
-                    executionTime
-                    artifactPaths
-                    artifactOutputDirectory
-                }
-            }
-            """
-
             variables: Dict[str, Any] = {
                 "options": {
                     "registrationId": registration_id,
@@ -127,9 +259,9 @@ class BuildAgent(A2AReactAgent):
                 variables["options"]["timeoutSeconds"] = timeout_seconds
 
             try:
-                return execute_graphql_request(
+                return await self.graphql_client.aexecute(
                     endpoint=self.cdc_server.graphql_endpoint,
-                    query=query,
+                    query=BUILD_CODE,
                     variables=variables,
                     result_key="build",
                     model_class=CodeBuildResult
@@ -143,8 +275,8 @@ class BuildAgent(A2AReactAgent):
         return build_code
 
     def produce_register_code_build(self):
-        @tool
-        def register_code_build(registration_id: str, build_command: str,
+        @async_tool
+        async def register_code_build(registration_id: str, build_command: str,
                                session_id: Annotated[str, InjectedState("session_id")],
                                working_directory: Optional[str] = None,
                                description: Optional[str] = None,
@@ -169,23 +301,6 @@ class BuildAgent(A2AReactAgent):
             Returns:
                 The registered code build configuration
             """
-            query = """
-            mutation RegisterCodeBuild($codeBuildRegistration: CodeBuildRegistrationIn!) {
-                registerCodeBuild(codeBuildRegistration: $codeBuildRegistration) {
-                    registrationId
-                    buildCommand
-                    workingDirectory
-                    description
-                    arguments
-                    timeoutSeconds
-                    enabled
-                    artifactPaths
-                    artifactOutputDirectory
-                    executionType
-                }
-            }
-            """
-
             variables: Dict[str, Any] = {
                 "codeBuildRegistration": {
                     "sessionId": session_id,
@@ -209,9 +324,9 @@ class BuildAgent(A2AReactAgent):
                 variables["codeBuildRegistration"]["artifactOutputDirectory"] = artifact_output_directory
 
             try:
-                return execute_graphql_request(
+                return await self.graphql_client.aexecute(
                     endpoint=self.cdc_server.graphql_endpoint,
-                    query=query,
+                    query=REGISTER_CODE_BUILD,
                     variables=variables,
                     result_key="registerCodeBuild",
                     model_class=CodeBuildRegistration
@@ -226,8 +341,8 @@ class BuildAgent(A2AReactAgent):
         return register_code_build
 
     def produce_update_code_build_registration(self):
-        @tool
-        def update_code_build_registration(registration_id: str,
+        @async_tool
+        async def update_code_build_registration(registration_id: str,
                                           session_id: Annotated[str, InjectedState("session_id")],
                                           enabled: Optional[bool] = None,
                                           build_command: Optional[str] = None,
@@ -247,39 +362,6 @@ class BuildAgent(A2AReactAgent):
             Returns:
                 The updated code build registration
             """
-            query = """
-            mutation UpdateCodeBuildRegistration(
-                $registrationId: String!
-                $enabled: Boolean
-                $buildCommand: String
-                $workingDirectory: String
-                $arguments: String
-                $timeoutSeconds: Int
-                $sessionId: String
-            ) {
-                updateCodeBuildRegistration(
-                    registrationId: $registrationId
-                    enabled: $enabled
-                    buildCommand: $buildCommand
-                    workingDirectory: $workingDirectory
-                    arguments: $arguments
-                    timeoutSeconds: $timeoutSeconds
-                    sessionId: $sessionId
-                ) {
-                    registrationId
-                    buildCommand
-                    workingDirectory
-                    description
-                    arguments
-                    timeoutSeconds
-                    enabled
-                    artifactPaths
-                    artifactOutputDirectory
-                    executionType
-                }
-            }
-            """
-
             variables: Dict[str, Any] = {
                 "registrationId": registration_id,
                 "sessionId": session_id
@@ -297,9 +379,9 @@ class BuildAgent(A2AReactAgent):
                 variables["timeoutSeconds"] = timeout_seconds
 
             try:
-                return execute_graphql_request(
+                return await self.graphql_client.aexecute(
                     endpoint=self.cdc_server.graphql_endpoint,
-                    query=query,
+                    query=UPDATE_CODE_BUILD_REGISTRATION,
                     variables=variables,
                     result_key="updateCodeBuildRegistration",
                     model_class=CodeBuildRegistration
@@ -314,8 +396,8 @@ class BuildAgent(A2AReactAgent):
         return update_code_build_registration
 
     def produce_delete_code_build_registration(self):
-        @tool
-        def delete_code_build_registration(registration_id: str,
+        @async_tool
+        async def delete_code_build_registration(registration_id: str,
                                           session_id: Annotated[str, InjectedState("session_id")]) -> bool:
             """Delete a code build registration.
 
@@ -325,21 +407,15 @@ class BuildAgent(A2AReactAgent):
             Returns:
                 True if deletion was successful, False otherwise
             """
-            query = """
-            mutation DeleteCodeBuildRegistration($registrationId: String!, $sessionId: String!) {
-                deleteCodeBuildRegistration(registrationId: $registrationId, sessionId: $sessionId)
-            }
-            """
-
             variables: Dict[str, Any] = {
                 "registrationId": registration_id,
                 "sessionId": session_id
             }
 
             try:
-                result = execute_graphql_request(
+                result = await self.graphql_client.aexecute(
                     endpoint=self.cdc_server.graphql_endpoint,
-                    query=query,
+                    query=DELETE_CODE_BUILD_REGISTRATION,
                     variables=variables,
                     result_key="deleteCodeBuildRegistration",
                     model_class=bool
@@ -352,37 +428,17 @@ class BuildAgent(A2AReactAgent):
         return delete_code_build_registration
 
     def produce_retrieve_builds(self):
-        @tool
-        def retrieve_builds() -> List[CodeBuild]:
+        @async_tool
+        async def retrieve_builds() -> List[CodeBuild]:
             """Retrieve all code builds.
 
             Returns:
                 List of code builds
             """
-            query = """
-            query RetrieveBuilds {
-                retrieveBuilds {
-                    sessionId
-                    registrationId
-                    buildCommand
-                    status
-                    startTime
-                    endTime
-                    exitCode
-                    output
-                    error {
-                        message
-                        code
-                    }
-                    buildId
-                }
-            }
-            """
-
             try:
-                return execute_graphql_request(
+                return await self.graphql_client.aexecute(
                     endpoint=self.cdc_server.graphql_endpoint,
-                    query=query,
+                    query=RETRIEVE_BUILDS,
                     variables={},
                     result_key="retrieveBuilds",
                     model_class=List[CodeBuild]
@@ -394,34 +450,17 @@ class BuildAgent(A2AReactAgent):
         return retrieve_builds
 
     def produce_retrieve_build_registrations(self):
-        @tool
-        def retrieve_build_registrations() -> List[CodeBuildRegistration]:
+        @async_tool
+        async def retrieve_build_registrations() -> List[CodeBuildRegistration]:
             """Retrieve all code build registrations.
 
             Returns:
                 List of code build registrations
             """
-            query = """
-            query RetrieveBuildRegistrations {
-                retrieveBuildRegistrations {
-                    registrationId
-                    buildCommand
-                    workingDirectory
-                    description
-                    arguments
-                    timeoutSeconds
-                    enabled
-                    artifactPaths
-                    artifactOutputDirectory
-                    executionType
-                }
-            }
-            """
-
             try:
-                return execute_graphql_request(
+                return await self.graphql_client.aexecute(
                     endpoint=self.cdc_server.graphql_endpoint,
-                    query=query,
+                    query=RETRIEVE_BUILD_REGISTRATIONS,
                     variables={},
                     result_key="retrieveBuildRegistrations",
                     model_class=List[CodeBuildRegistration]
@@ -433,8 +472,8 @@ class BuildAgent(A2AReactAgent):
         return retrieve_build_registrations
 
     def produce_get_code_build_registration(self):
-        @tool
-        def get_code_build_registration(registration_id: str) -> Optional[CodeBuildRegistration]:
+        @async_tool
+        async def get_code_build_registration(registration_id: str) -> Optional[CodeBuildRegistration]:
             """Get a specific code build registration by ID.
 
             Args:
@@ -443,31 +482,14 @@ class BuildAgent(A2AReactAgent):
             Returns:
                 The code build registration if found, None otherwise
             """
-            query = """
-            query GetCodeBuildRegistration($registrationId: String!) {
-                getCodeBuildRegistration(registrationId: $registrationId) {
-                    registrationId
-                    buildCommand
-                    workingDirectory
-                    description
-                    arguments
-                    timeoutSeconds
-                    enabled
-                    artifactPaths
-                    artifactOutputDirectory
-                    executionType
-                }
-            }
-            """
-
             variables: Dict[str, Any] = {
                 "registrationId": registration_id
             }
 
             try:
-                return execute_graphql_request(
+                return await self.graphql_client.aexecute(
                     endpoint=self.cdc_server.graphql_endpoint,
-                    query=query,
+                    query=GET_CODE_BUILD_REGISTRATION,
                     variables=variables,
                     result_key="getCodeBuildRegistration",
                     model_class=CodeBuildRegistration
@@ -479,8 +501,8 @@ class BuildAgent(A2AReactAgent):
         return get_code_build_registration
 
     def produce_get_build_output(self):
-        @tool
-        def get_build_output(build_id: str, session_id: Annotated[str, InjectedState("session_id")]) -> Optional[CodeBuildResult]:
+        @async_tool
+        async def get_build_output(build_id: str, session_id: Annotated[str, InjectedState("session_id")]) -> Optional[CodeBuildResult]:
             """Get the output of a specific build by ID.
 
             Args:
@@ -489,34 +511,15 @@ class BuildAgent(A2AReactAgent):
             Returns:
                 The build result if found, None otherwise
             """
-            query = """
-            query GetBuildOutput($buildId: String!, $sessionId: String) {
-                getBuildOutput(buildId: $buildId, sessionId: $sessionId) {
-                    success
-                    output
-                    error {
-                        message
-                        code
-                    }
-                    buildId
-                    registrationId
-                    exitCode
-                    executionTime
-                    artifactPaths
-                    artifactOutputDirectory
-                }
-            }
-            """
-
             variables: Dict[str, Any] = {
                 "buildId": build_id,
                 "sessionId": session_id
             }
 
             try:
-                return execute_graphql_request(
+                return await self.graphql_client.aexecute(
                     endpoint=self.cdc_server.graphql_endpoint,
-                    query=query,
+                    query=GET_BUILD_OUTPUT,
                     variables=variables,
                     result_key="getBuildOutput",
                     model_class=CodeBuildResult
@@ -535,5 +538,6 @@ class CodeBuildAgent(BuildAgent, DeepResearchOrchestrated):
 
     @injector.inject
     def __init__(self, agent_config: AgentConfigProps, memory_saver: MemorySaver, model_provider: ModelProvider,
-                 cdc_server: CdcServerConfigProps, tool_call_decorator: ToolCallDecorator):
-        super().__init__(agent_config, memory_saver, model_provider, cdc_server, tool_call_decorator, DeepResearchOrchestrated)
+                 cdc_server: CdcServerConfigProps, tool_call_decorator: ToolCallDecorator, graphql_client: GraphQLClient):
+        super().__init__(agent_config, memory_saver, model_provider, cdc_server, tool_call_decorator, graphql_client,
+                         DeepResearchOrchestrated)
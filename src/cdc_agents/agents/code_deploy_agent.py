@@ -4,22 +4,212 @@ from typing import List, Optional, Any, Dict
 
 import pydantic
 from langgraph.checkpoint.memory import MemorySaver
-from langchain_core.tools import tool
 from langgraph.prebuilt import InjectedState
 from typing_extensions import Annotated
 
 from cdc_agents.agent.a2a import A2AAgent
 from cdc_agents.agent.agent import A2AReactAgent
-from cdc_agents.common.graphql_models import execute_graphql_request, Error
+from cdc_agents.common.graphql_client import GraphQLClient
+from cdc_agents.common.graphql_operations import graphql_operations
+from cdc_agents.common.graphql_models import Error
 from cdc_agents.agent.agent_orchestrator import DeepResearchOrchestrated
 from cdc_agents.config.agent_config_props import AgentConfigProps, AgentCardItem
 from cdc_agents.config.cdc_server_config_props import CdcServerConfigProps
 from cdc_agents.model_server.model_provider import ModelProvider
+from cdc_agents.tools.async_tool import async_tool
 from cdc_agents.tools.tool_call_decorator import ToolCallDecorator
 from python_di.configs.autowire import injectable
 from python_di.configs.component import component
 from python_util.logger.logger import LoggerFacade
 
+DEPLOY_CODE = graphql_operations.register("""
+mutation DeployCode($options: CodeDeployOptions!) {
+    deploy(options: $options) {
+        success
+        output
+        error {
+            message
+            code
+        }
+        deployId
+        registrationId
+        exitCode
+        executionTime
+        deployLog
+        healthCheckStatus
+    }
+}
+""")
+
+STOP_DEPLOYMENT = graphql_operations.register("""
+mutation StopDeployment($registrationId: String!, $sessionId: String!) {
+    stopDeployment(registrationId: $registrationId, sessionId: $sessionId) {
+        success
+        output
+        error {
+            message
+            code
+        }
+        deployId
+        registrationId
+        exitCode
+        executionTime
+        deployLog
+        healthCheckStatus
+    }
+}
+""")
+
+REGISTER_CODE_DEPLOY = graphql_operations.register("""
+mutation RegisterCodeDeploy($codeDeployRegistration: CodeDeployRegistrationIn!) {
+    registerCodeDeploy(codeDeployRegistration: $codeDeployRegistration) {
+        registrationId
+        deployCommand
+        workingDirectory
+        description
+        arguments
+        timeoutSeconds
+        enabled
+        healthCheckUrl
+        stopCommand
+        executionType
+    }
+}
+""")
+
+UPDATE_CODE_DEPLOY_REGISTRATION = graphql_operations.register("""
+mutation UpdateCodeDeployRegistration(
+    $registrationId: String!
+    $enabled: Boolean
+    $deployCommand: String
+    $workingDirectory: String
+    $arguments: String
+    $timeoutSeconds: Int
+    $sessionId: String
+) {
+    updateCodeDeployRegistration(
+        registrationId: $registrationId
+        enabled: $enabled
+        deployCommand: $deployCommand
+        workingDirectory: $workingDirectory
+        arguments: $arguments
+        timeoutSeconds: $timeoutSeconds
+        sessionId: $sessionId
+    ) {
+        registrationId
+        deployCommand
+        workingDirectory
+        description
+        arguments
+        timeoutSeconds
+        enabled
+        healthCheckUrl
+        stopCommand
+        executionType
+    }
+}
+""")
+
+DELETE_CODE_DEPLOY_REGISTRATION = graphql_operations.register("""
+mutation DeleteCodeDeployRegistration($registrationId: String!, $sessionId: String!) {
+    deleteCodeDeployRegistration(registrationId: $registrationId, sessionId: $sessionId)
+}
+""")
+
+RETRIEVE_DEPLOYS = graphql_operations.register("""
+query RetrieveDeploys {
+    retrieveDeploys {
+        sessionId
+        registrationId
+        deployCommand
+        status
+        startTime
+        endTime
+        exitCode
+        output
+        error {
+            message
+            code
+        }
+        deployId
+    }
+}
+""")
+
+RETRIEVE_DEPLOY_REGISTRATIONS = graphql_operations.register("""
+query RetrieveDeployRegistrations {
+    retrieveDeployRegistrations {
+        registrationId
+        deployCommand
+        workingDirectory
+        description
+        arguments
+        timeoutSeconds
+        enabled
+        healthCheckUrl
+        stopCommand
+        executionType
+    }
+}
+""")
+
+GET_CODE_DEPLOY_REGISTRATION = graphql_operations.register("""
+query GetCodeDeployRegistration($registrationId: String!) {
+    getCodeDeployRegistration(registrationId: $registrationId) {
+        registrationId
+        deployCommand
+        workingDirectory
+        description
+        arguments
+        timeoutSeconds
+        enabled
+        healthCheckUrl
+        stopCommand
+        executionType
+    }
+}
+""")
+
+GET_DEPLOY_OUTPUT = graphql_operations.register("""
+query GetDeployOutput($deployId: String!, $sessionId: String) {
+    getDeployOutput(deployId: $deployId, sessionId: $sessionId) {
+        success
+        output
+        error {
+            message
+            code
+        }
+        deployId
+        registrationId
+        exitCode
+        executionTime
+        deployLog
+        healthCheckStatus
+    }
+}
+""")
+
+GET_RUNNING_DEPLOYMENTS = graphql_operations.register("""
+query GetRunningDeployments {
+    getRunningDeployments {
+        sessionId
+        registrationId
+        deployCommand
+        status
+        startTime
+        endTime
+        exitCode
+        output
+        error {
+            message
+            code
+        }
+        deployId
+    }
+}
+""")
+
+
 # Pydantic models for code deployment
 class CodeDeployResult(pydantic.BaseModel):
     success: bool
@@ -64,7 +254,8 @@ class DeployAgent(A2AReactAgent):
     """Base deploy agent that can be orchestrated by different orchestration types."""
 
     def __init__(self, agent_config: AgentConfigProps, memory_saver: MemorySaver, model_provider: ModelProvider,
-                 cdc_server: CdcServerConfigProps, tool_call_decorator: ToolCallDecorator, orchestration_type: type):
+                 cdc_server: CdcServerConfigProps, tool_call_decorator: ToolCallDecorator, graphql_client: GraphQLClient,
+                 orchestration_type: type):
         self_card: AgentCardItem = agent_config.agents[self.__class__.__name__]
         orchestration_type.__init__(self, self_card)
         A2AReactAgent.__init__(self, agent_config,
@@ -84,10 +275,11 @@ class DeployAgent(A2AReactAgent):
                                memory_saver, model_provider)
         self.tool_call_decorator = tool_call_decorator
         self.cdc_server = cdc_server
+        self.graphql_client = graphql_client
 
     def produce_deploy_code(self):
-        @tool
-        def deploy_code(registration_id: str, session_id: Annotated[str, InjectedState("session_id")],
+        @async_tool
+        async def deploy_code(registration_id: str, session_id: Annotated[str, InjectedState("session_id")],
                        arguments: Optional[str] = None, timeout_seconds: Optional[int] = None) -> CodeDeployResult:
             """Deploy code using a registered code deployment configuration.
 
@@ -99,25 +291,6 @@ class DeployAgent(A2AReactAgent):
             Returns:
                 Result of the code deployment including success status, output, and error
             """
-            query = """
-            mutation DeployCode($options: CodeDeployOptions!) {
-                deploy(options: $options) {
-                    success
-                    output
-                    error {
-                        message
-                        code
-                    }
-                    deployId
-                    registrationId
-                    exitCode
-                    executionTime
-                    deployLog
-                    healthCheckStatus
-                }
-            }
-            """
-
             variables: Dict[str, Any] = {
                 "options": {
                     "registrationId": registration_id,
@@ -131,9 +304,9 @@ class DeployAgent(A2AReactAgent):
                 variables["options"]["timeoutSeconds"] = timeout_seconds
 
             try:
-                return execute_graphql_request(
+                return await self.graphql_client.aexecute(
                     endpoint=self.cdc_server.graphql_endpoint,
-                    query=query,
+                    query=DEPLOY_CODE,
                     variables=variables,
                     result_key="deploy",
                     model_class=CodeDeployResult
@@ -147,8 +320,8 @@ class DeployAgent(A2AReactAgent):
         return deploy_code
 
     def produce_stop_deployment(self):
-        @tool
-        def stop_deployment(registration_id: str, session_id: Annotated[str, InjectedState("session_id")]) -> CodeDeployResult:
+        @async_tool
+        async def stop_deployment(registration_id: str, session_id: Annotated[str, InjectedState("session_id")]) -> CodeDeployResult:
             """Stop a running deployment.
 
             Args:
@@ -157,34 +330,15 @@ class DeployAgent(A2AReactAgent):
             Returns:
                 Result of stopping the deployment
             """
-            query = """
-            mutation StopDeployment($registrationId: String!, $sessionId: String!) {
-                stopDeployment(registrationId: $registrationId, sessionId: $sessionId) {
-                    success
-                    output
-                    error {
-                        message
-                        code
-                    }
-                    deployId
-                    registrationId
-                    exitCode
-                    executionTime
-                    deployLog
-                    healthCheckStatus
-                }
-            }
-            """
-
             variables: Dict[str, Any] = {
                 "registrationId": registration_id,
                 "sessionId": session_id
             }
 
             try:
-                return execute_graphql_request(
+                return await self.graphql_client.aexecute(
                     endpoint=self.cdc_server.graphql_endpoint,
-                    query=query,
+                    query=STOP_DEPLOYMENT,
                     variables=variables,
                     result_key="stopDeployment",
                     model_class=CodeDeployResult
@@ -198,8 +352,8 @@ class DeployAgent(A2AReactAgent):
         return stop_deployment
 
     def produce_register_code_deploy(self):
-        @tool
-        def register_code_deploy(registration_id: str, deploy_command: str,
+        @async_tool
+        async def register_code_deploy(registration_id: str, deploy_command: str,
                                 session_id: Annotated[str, InjectedState("session_id")],
                                 working_directory: Optional[str] = None,
                                 description: Optional[str] = None,
@@ -228,23 +382,6 @@ class DeployAgent(A2AReactAgent):
             Returns:
                 The registered code deployment configuration
             """
-            query = """
-            mutation RegisterCodeDeploy($codeDeployRegistration: CodeDeployRegistrationIn!) {
-                registerCodeDeploy(codeDeployRegistration: $codeDeployRegistration) {
-                    registrationId
-                    deployCommand
-                    workingDirectory
-                    description
-                    arguments
-                    timeoutSeconds
-                    enabled
-                    healthCheckUrl
-                    stopCommand
-                    executionType
-                }
-            }
-            """
-
             variables: Dict[str, Any] = {
                 "codeDeployRegistration": {
                     "sessionId": session_id,
@@ -272,9 +409,9 @@ class DeployAgent(A2AReactAgent):
                 variables["codeDeployRegistration"]["deployFailurePatterns"] = deploy_failure_patterns
 
             try:
-                return execute_graphql_request(
+                return await self.graphql_client.aexecute(
                     endpoint=self.cdc_server.graphql_endpoint,
-                    query=query,
+                    query=REGISTER_CODE_DEPLOY,
                     variables=variables,
                     result_key="registerCodeDeploy",
                     model_class=CodeDeployRegistration
@@ -289,8 +426,8 @@ class DeployAgent(A2AReactAgent):
         return register_code_deploy
 
     def produce_update_code_deploy_registration(self):
-        @tool
-        def update_code_deploy_registration(registration_id: str,
+        @async_tool
+        async def update_code_deploy_registration(registration_id: str,
                                            session_id: Annotated[str, InjectedState("session_id")],
                                            enabled: Optional[bool] = None,
                                            deploy_command: Optional[str] = None,
@@ -310,39 +447,6 @@ class DeployAgent(A2AReactAgent):
             Returns:
                 The updated code deployment registration
             """
-            query = """
-            mutation UpdateCodeDeployRegistration(
-                $registrationId: String!
-                $enabled: Boolean
-                $deployCommand: String
-                $workingDirectory: String
-                $arguments: String
-                $timeoutSeconds: Int
-                $sessionId: String
-            ) {
-                updateCodeDeployRegistration(
-                    registrationId: $registrationId
-                    enabled: $enabled
-                    deployCommand: $deployCommand
-                    workingDirectory: $workingDirectory
-                    arguments: $arguments
-                    timeoutSeconds: $timeoutSeconds
-                    sessionId: $sessionId
-                ) {
-                    registrationId
-                    deployCommand
-                    workingDirectory
-                    description
-                    arguments
-                    timeoutSeconds
-                    enabled
-                    healthCheckUrl
-                    stopCommand
-                    executionType
-                }
-            }
-            """
-
             variables: Dict[str, Any] = {
                 "registrationId": registration_id,
                 "sessionId": session_id
@@ -360,9 +464,9 @@ class DeployAgent(A2AReactAgent):
                 variables["timeoutSeconds"] = timeout_seconds
 
             try:
-                return execute_graphql_request(
+                return await self.graphql_client.aexecute(
                     endpoint=self.cdc_server.graphql_endpoint,
-                    query=query,
+                    query=UPDATE_CODE_DEPLOY_REGISTRATION,
                     variables=variables,
                     result_key="updateCodeDeployRegistration",
                     model_class=CodeDeployRegistration
@@ -377,8 +481,8 @@ class DeployAgent(A2AReactAgent):
         return update_code_deploy_registration
 
     def produce_delete_code_deploy_registration(self):
-        @tool
-        def delete_code_deploy_registration(registration_id: str,
+        @async_tool
+        async def delete_code_deploy_registration(registration_id: str,
                                            session_id: Annotated[str, InjectedState("session_id")]) -> bool:
             """Delete a code deployment registration.
 
@@ -388,21 +492,15 @@ class DeployAgent(A2AReactAgent):
             Returns:
                 True if deletion was successful, False otherwise
             """
-            query = """
-            mutation DeleteCodeDeployRegistration($registrationId: String!, $sessionId: String!) {
-                deleteCodeDeployRegistration(registrationId: $registrationId, sessionId: $sessionId)
-            }
-            """
-
             variables: Dict[str, Any] = {
                 "registrationId": registration_id,
                 "sessionId": session_id
             }
 
             try:
-                result = execute_graphql_request(
+                result = await self.graphql_client.aexecute(
                     endpoint=self.cdc_server.graphql_endpoint,
-                    query=query,
+                    query=DELETE_CODE_DEPLOY_REGISTRATION,
                     variables=variables,
                     result_key="deleteCodeDeployRegistration",
                     model_class=bool
@@ -415,37 +513,17 @@ class DeployAgent(A2AReactAgent):
         return delete_code_deploy_registration
 
     def produce_retrieve_deploys(self):
-        @tool
-        def retrieve_deploys() -> List[CodeDeploy]:
+        @async_tool
+        async def retrieve_deploys() -> List[CodeDeploy]:
             """Retrieve all code deployments.
 
             Returns:
                 List of code deployments
             """
-            query = """
-            query RetrieveDeploys {
-                retrieveDeploys {
-                    sessionId
-                    registrationId
-                    deployCommand
-                    status
-                    startTime
-                    endTime
-                    exitCode
-                    output
-                    error {
-                        message
-                        code
-                    }
-                    deployId
-                }
-            }
-            """
-
             try:
-                return execute_graphql_request(
+                return await self.graphql_client.aexecute(
                     endpoint=self.cdc_server.graphql_endpoint,
-                    query=query,
+                    query=RETRIEVE_DEPLOYS,
                     variables={},
                     result_key="retrieveDeploys",
                     model_class=List[CodeDeploy]
@@ -457,34 +535,17 @@ class DeployAgent(A2AReactAgent):
         return retrieve_deploys
 
     def produce_retrieve_deploy_registrations(self):
-        @tool
-        def retrieve_deploy_registrations() -> List[CodeDeployRegistration]:
+        @async_tool
+        async def retrieve_deploy_registrations() -> List[CodeDeployRegistration]:
             """Retrieve all code deployment registrations.
 
             Returns:
                 List of code deployment registrations
             """
-            query = """
-            query RetrieveDeployRegistrations {
-                retrieveDeployRegistrations {
-                    registrationId
-                    deployCommand
-                    workingDirectory
-                    description
-                    arguments
-                    timeoutSeconds
-                    enabled
-                    healthCheckUrl
-                    stopCommand
-                    executionType
-                }
-            }
-            """
-
             try:
-                return execute_graphql_request(
+                return await self.graphql_client.aexecute(
                     endpoint=self.cdc_server.graphql_endpoint,
-                    query=query,
+                    query=RETRIEVE_DEPLOY_REGISTRATIONS,
                     variables={},
                     result_key="retrieveDeployRegistrations",
                     model_class=List[CodeDeployRegistration]
@@ -496,8 +557,8 @@ class DeployAgent(A2AReactAgent):
         return retrieve_deploy_registrations
 
     def produce_get_code_deploy_registration(self):
-        @tool
-        def get_code_deploy_registration(registration_id: str) -> Optional[CodeDeployRegistration]:
+        @async_tool
+        async def get_code_deploy_registration(registration_id: str) -> Optional[CodeDeployRegistration]:
             """Get a specific code deployment registration by ID.
 
             Args:
@@ -506,31 +567,14 @@ class DeployAgent(A2AReactAgent):
             Returns:
                 The code deployment registration if found, None otherwise
             """
-            query = """
-            query GetCodeDeployRegistration($registrationId: String!) {
-                getCodeDeployRegistration(registrationId: $registrationId) {
-                    registrationId
-                    deployCommand
-                    workingDirectory
-                    description
-                    arguments
-                    timeoutSeconds
-                    enabled
-                    healthCheckUrl
-                    stopCommand
-                    executionType
-                }
-            }
-            """
-
             variables: Dict[str, Any] = {
                 "registrationId": registration_id
             }
 
             try:
-                return execute_graphql_request(
+                return await self.graphql_client.aexecute(
                     endpoint=self.cdc_server.graphql_endpoint,
-                    query=query,
+                    query=GET_CODE_DEPLOY_REGISTRATION,
                     variables=variables,
                     result_key="getCodeDeployRegistration",
                     model_class=CodeDeployRegistration
@@ -542,8 +586,8 @@ class DeployAgent(A2AReactAgent):
         return get_code_deploy_registration
 
     def produce_get_deploy_output(self):
-        @tool
-        def get_deploy_output(deploy_id: str, session_id: Annotated[str, InjectedState("session_id")]) -> Optional[CodeDeployResult]:
+        @async_tool
+        async def get_deploy_output(deploy_id: str, session_id: Annotated[str, InjectedState("session_id")]) -> Optional[CodeDeployResult]:
             """Get the output of a specific deployment by ID.
 
             Args:
@@ -552,34 +596,15 @@ class DeployAgent(A2AReactAgent):
             Returns:
                 The deployment result if found, None otherwise
             """
-            query = """
-            query GetDeployOutput($deployId: String!, $sessionId: String) {
-                getDeployOutput(deployId: $deployId, sessionId: $sessionId) {
-                    success
-                    output
-                    error {
-                        message
-                        code
-                    }
-                    deployId
-                    registrationId
-                    exitCode
-                    executionTime
-                    deployLog
-                    healthCheckStatus
-                }
-            }
-            """
-
             variables: Dict[str, Any] = {
                 "deployId": deploy_id,
                 "sessionId": session_id
             }
 
             try:
-                return execute_graphql_request(
+                return await self.graphql_client.aexecute(
                     endpoint=self.cdc_server.graphql_endpoint,
-                    query=query,
+                    query=GET_DEPLOY_OUTPUT,
                     variables=variables,
                     result_key="getDeployOutput",
                     model_class=CodeDeployResult
@@ -591,37 +616,17 @@ class DeployAgent(A2AReactAgent):
         return get_deploy_output
 
     def produce_get_running_deployments(self):
-        @tool
-        def get_running_deployments() -> List[CodeDeploy]:
+        @async_tool
+        async def get_running_deployments() -> List[CodeDeploy]:
             """Get all currently running deployments.
 
             Returns:
                 List of running deployments
             """
-            query = """
-            query GetRunningDeployments {
-                getRunningDeployments {
-                    sessionId
-                    registrationId
-                    deployCommand
-                    status
-                    startTime
-                    endTime
-                    exitCode
-                    output
-                    error {
-                        message
-                        code
-                    }
-                    deployId
-                }
-            }
-            """
-
             try:
-                return execute_graphql_request(
+                return await self.graphql_client.aexecute(
                     endpoint=self.cdc_server.graphql_endpoint,
-                    query=query,
+                    query=GET_RUNNING_DEPLOYMENTS,
                     variables={},
                     result_key="getRunningDeployments",
                     model_class=List[CodeDeploy]
@@ -640,5 +645,6 @@ class CodeDeployAgent(DeployAgent, DeepResearchOrchestrated):
 
     @injector.inject
     def __init__(self, agent_config: AgentConfigProps, memory_saver: MemorySaver, model_provider: ModelProvider,
-                 cdc_server: CdcServerConfigProps, tool_call_decorator: ToolCallDecorator):
-        super().__init__(agent_config, memory_saver, model_provider, cdc_server, tool_call_decorator, DeepResearchOrchestrated)
+                 cdc_server: CdcServerConfigProps, tool_call_decorator: ToolCallDecorator, graphql_client: GraphQLClient):
+        super().__init__(agent_config, memory_saver, model_provider, cdc_server, tool_call_decorator, graphql_client,
+                         DeepResearchOrchestrated)
@@ -5,6 +5,7 @@ from langgraph.checkpoint.memory import MemorySaver
 from cdc_agents.agent.agent import A2AAgent, A2AReactAgent
 from cdc_agents.agent.agent_orchestrator import TestGraphOrchestrated
 from cdc_agents.agents.code_build_agent import BuildAgent
+from cdc_agents.common.graphql_client import GraphQLClient
 from cdc_agents.config.agent_config_props import AgentConfigProps, AgentCardItem
 from cdc_agents.config.cdc_server_config_props import CdcServerConfigProps
 from cdc_agents.model_server.model_provider import ModelProvider
@@ -23,6 +24,7 @@ class TestGraphCodeBuildAgent(BuildAgent, TestGraphOrchestrated):
 
     @injector.inject
     def __init__(self, agent_config: AgentConfigProps, memory_saver: MemorySaver, model_provider: ModelProvider,
-                 cdc_server: CdcServerConfigProps, tool_call_decorator: ToolCallDecorator):
+                 cdc_server: CdcServerConfigProps, tool_call_decorator: ToolCallDecorator,
+                 graphql_client: GraphQLClient):
         BuildAgent.__init__(self, agent_config, memory_saver, model_provider, cdc_server, tool_call_decorator,
-                            TestGraphOrchestrated)
+                            graphql_client, TestGraphOrchestrated)
@@ -6,6 +6,7 @@ from cdc_agents.agent.agent import A2AAgent, A2AReactAgent
 from cdc_agents.agent.agent_orchestrator import TestGraphOrchestrated
 from cdc_agents.agents.cdc_server_agent import CdcServerAgentToolCallProvider
 from cdc_agents.agents.test_runner_agent import TestRunnerBaseAgent
+from cdc_agents.common.graphql_client import GraphQLClient
 from cdc_agents.config.agent_config_props import AgentConfigProps, AgentCardItem
 from cdc_agents.config.cdc_server_config_props import CdcServerConfigProps
 from cdc_agents.model_server.model_provider import ModelProvider
@@ -24,6 +25,7 @@ class TestGraphTestRunnerAgent(TestRunnerBaseAgent, TestGraphOrchestrated):
 
     @injector.inject
     def __init__(self, agent_config: AgentConfigProps, memory_saver: MemorySaver, model_provider: ModelProvider,
-                 cdc_server: CdcServerConfigProps, tool_call_provider: ToolCallDecorator):
+                 cdc_server: CdcServerConfigProps, tool_call_provider: ToolCallDecorator,
+                 graphql_client: GraphQLClient):
         TestRunnerBaseAgent.__init__(self, agent_config, memory_saver, model_provider, cdc_server, tool_call_provider,
-                                     TestGraphOrchestrated)
+                                     graphql_client, TestGraphOrchestrated)
@@ -5,23 +5,152 @@ import pydantic
 import requests
 from typing import Dict, Any, TypeVar, Type, cast, List, Optional
 from langgraph.checkpoint.memory import MemorySaver
-from langchain_core.tools import tool
 from langgraph.prebuilt import InjectedStore, InjectedState
 from typing_extensions import Annotated
 
 from cdc_agents.agent.a2a import A2AAgent
 from cdc_agents.agent.agent import A2AReactAgent
-from cdc_agents.agents.cdc_server_agent import execute_graphql_request
 from cdc_agents.agent.agent_orchestrator import DeepResearchOrchestrated
+from cdc_agents.common.graphql_client import GraphQLClient
+from cdc_agents.common.graphql_operations import graphql_operations
 from cdc_agents.common.graphql_models import Error
 from cdc_agents.config.agent_config_props import AgentConfigProps, AgentCardItem
 from cdc_agents.config.cdc_server_config_props import CdcServerConfigProps
 from cdc_agents.model_server.model_provider import ModelProvider
+from cdc_agents.tools.async_tool import async_tool
 from cdc_agents.tools.tool_call_decorator import ToolCallDecorator
 from python_di.configs.autowire import injectable
 from python_di.configs.component import component
 from python_util.logger.logger import LoggerFacade
 
+EXECUTE_CODE = graphql_operations.register("""
+mutation ExecuteCode($options: CodeExecutionOptions!) {
+    execute(options: $options) {
+        success
+        output
+        error
+        executionId
+        registrationId
+        exitCode
+        executionTime
+        outputFile
+    }
+}
+""")
+
+EXECUTE_CODE_WITH_OUTPUT_FILE = graphql_operations.register("""
+mutation ExecuteCodeWithOutputFile($options: CodeExecutionOptions!, $outputFilePath: String!) {
+    executeWithOutputFile(options: $options, outputFilePath: $outputFilePath) {
+        success
+        output
+        error
+        executionId
+        registrationId
+        exitCode
+        executionTime
+        outputFile
+    }
+}
+""")
+
+REGISTER_CODE_EXECUTION = graphql_operations.register("""
+mutation RegisterCodeExecution($registration: CodeExecutionRegistrationIn!) {
+    registerCodeExecution(codeExecutionRegistration: $registration) {
+        registrationId
+        command
+        workingDirectory
+        description
+        arguments
+        timeoutSeconds
+        enabled
+    }
+}
+""")
+
+UPDATE_CODE_EXECUTION_REGISTRATION = graphql_operations.register("""
+mutation UpdateCodeExecutionRegistration($registrationId: String!, $enabled: Boolean, $command: String,
+                                        $workingDirectory: String, $arguments: String,
+                                        $timeoutSeconds: Int) {
+    updateCodeExecutionRegistration(registrationId: $registrationId, enabled: $enabled, command: $command,
+                                   workingDirectory: $workingDirectory, arguments: $arguments,
+                                   timeoutSeconds: $timeoutSeconds) {
+        registrationId
+        command
+        workingDirectory
+        description
+        arguments
+        timeoutSeconds
+        enabled
+    }
+}
+""")
+
+DELETE_CODE_EXECUTION_REGISTRATION = graphql_operations.register("""
+mutation DeleteCodeExecutionRegistration($registrationId: String!) {
+    deleteCodeExecutionRegistration(registrationId: $registrationId)
+}
+""")
+
+RETRIEVE_EXECUTIONS = graphql_operations.register("""
+query RetrieveExecutions {
+    retrieveExecutions {
+        registrationId
+        command
+        status
+        startTime
+        endTime
+        exitCode
+        output
+        error
+        outputFile
+    }
+}
+""")
+
+RETRIEVE_REGISTRATIONS = graphql_operations.register("""
+query RetrieveRegistrations {
+    retrieveRegistrations {
+        registrationId
+        command
+        workingDirectory
+        description
+        arguments
+        timeoutSeconds
+        enabled
+    }
+}
+""")
+
+GET_CODE_EXECUTION_REGISTRATION = graphql_operations.register("""
+query GetCodeExecutionRegistration($registrationId: String!) {
+    getCodeExecutionRegistration(registrationId: $registrationId) {
+        registrationId
+        command
+        workingDirectory
+        description
+        arguments
+        timeoutSeconds
+        enabled
+    }
+}
+""")
+
+GET_EXECUTION_OUTPUT = graphql_operations.register("""
+query GetExecutionOutput($executionId: String!) {
+    getExecutionOutput(executionId: $executionId) {
+        success
+        output
+        error
+        executionId
+        exitCode
+        executionTime
+        outputFile
+        registrationId
+    }
+}
+""")
+
+
 T = TypeVar('T')
 
 # Pydantic models for code execution
@@ -60,7 +189,8 @@ class TestRunnerBaseAgent(A2AReactAgent):
     """Base test runner agent that can be orchestrated by different orchestration types."""
 
     def __init__(self, agent_config: AgentConfigProps, memory_saver: MemorySaver, model_provider: ModelProvider,
-                 cdc_server: CdcServerConfigProps, tool_call_decorator: ToolCallDecorator, orchestration_type: type):
+                 cdc_server: CdcServerConfigProps, tool_call_decorator: ToolCallDecorator, graphql_client: GraphQLClient,
+                 orchestration_type: type):
         self_card: AgentCardItem = agent_config.agents[self.__class__.__name__]
         orchestration_type.__init__(self, self_card)
         A2AReactAgent.__init__(self, agent_config,
@@ -79,10 +209,11 @@ class TestRunnerBaseAgent(A2AReactAgent):
                                memory_saver, model_provider)
         self.tool_call_decorator = tool_call_decorator
         self.cdc_server = cdc_server
+        self.graphql_client = graphql_client
 
     def produce_execute_code(self):
-        @tool
-        def execute_code(registration_id: str, session_id: Annotated[str, InjectedState("session_id")]) -> CodeExecutionResult:
+        @async_tool
+        async def execute_code(registration_id: str, session_id: Annotated[str, InjectedState("session_id")]) -> CodeExecutionResult:
             """Execute code using a registered code execution configuration.
 
             Args:
@@ -91,21 +222,6 @@ class TestRunnerBaseAgent(A2AReactAgent):
             Returns:
                 Result of the code execution including success status, output, and error
             """
-            query = """
-            mutation ExecuteCode($options: CodeExecutionOptions!) {
-                execute(options: $options) {
-                    success
-                    output
-                    error
-                    executionId
-                    registrationId
-                    exitCode
-                    executionTime
-                    outputFile
-                }
-            }
-            """
-
             variables = {
                 "options": {
                     "registrationId": registration_id,
@@ -114,9 +230,9 @@ class TestRunnerBaseAgent(A2AReactAgent):
             }
 
             try:
-                return execute_graphql_request(
+                return await self.graphql_client.aexecute(
                     endpoint=self.cdc_server.graphql_endpoint,
-                    query=query,
+                    query=EXECUTE_CODE,
                     variables=variables,
                     result_key="execute",
                     model_class=CodeExecutionResult
@@ -130,8 +246,8 @@ class TestRunnerBaseAgent(A2AReactAgent):
         return execute_code
 
     def produce_execute_code_with_output_file(self):
-        @tool
-        def execute_code_with_output_file(registration_id: str, output_file_path: str, session_id: Annotated[str, InjectedState("session_id")],
+        @async_tool
+        async def execute_code_with_output_file(registration_id: str, output_file_path: str, session_id: Annotated[str, InjectedState("session_id")],
                                          arguments: str = None, timeout_seconds: int = None) -> CodeExecutionResult:
             """Execute code and write the output to a file.
 
@@ -144,21 +260,6 @@ class TestRunnerBaseAgent(A2AReactAgent):
             Returns:
                 Result of the code execution including success status, output, and error
             """
-            query = """
-            mutation ExecuteCodeWithOutputFile($options: CodeExecutionOptions!, $outputFilePath: String!) {
-                executeWithOutputFile(options: $options, outputFilePath: $outputFilePath) {
-                    success
-                    output
-                    error
-                    executionId
-                    registrationId
-                    exitCode
-                    executionTime
-                    outputFile
-                }
-            }
-            """
-
             variables = {
                 "options": {
                     "registrationId": registration_id,
@@ -171,9 +272,9 @@ class TestRunnerBaseAgent(A2AReactAgent):
             }
 
             try:
-                return execute_graphql_request(
+                return await self.graphql_client.aexecute(
                     endpoint=self.cdc_server.graphql_endpoint,
-                    query=query,
+                    query=EXECUTE_CODE_WITH_OUTPUT_FILE,
                     variables=variables,
                     result_key="executeWithOutputFile",
                     model_class=CodeExecutionResult
@@ -186,8 +287,8 @@ class TestRunnerBaseAgent(A2AReactAgent):
         return execute_code_with_output_file
 
     def produce_register_code_execution(self):
-        @tool
-        def register_code_execution(registration_id: str, command: str, session_id: Annotated[str, InjectedState("session_id")], working_directory: str = None,
+        @async_tool
+        async def register_code_execution(registration_id: str, command: str, session_id: Annotated[str, InjectedState("session_id")], working_directory: str = None,
                                    description: str = None, arguments: str = None,
                                    timeout_seconds: int = None, enabled: bool = True) -> CodeExecutionRegistration:
             """Register a new code execution configuration.
@@ -204,20 +305,6 @@ class TestRunnerBaseAgent(A2AReactAgent):
             Returns:
                 The registered code execution configuration
             """
-            query = """
-            mutation RegisterCodeExecution($registration: CodeExecutionRegistrationIn!) {
-                registerCodeExecution(codeExecutionRegistration: $registration) {
-                    registrationId
-                    command
-                    workingDirectory
-                    description
-                    arguments
-                    timeoutSeconds
-                    enabled
-                }
-            }
-            """
-
             variables = {
                 "registration": {
                     "registrationId": registration_id,
@@ -232,9 +319,9 @@ class TestRunnerBaseAgent(A2AReactAgent):
             }
 
             try:
-                return execute_graphql_request(
+                return await self.graphql_client.aexecute(
                     endpoint=self.cdc_server.graphql_endpoint,
-                    query=query,
+                    query=REGISTER_CODE_EXECUTION,
                     variables=variables,
                     result_key="registerCodeExecution",
                     model_class=CodeExecutionRegistration
@@ -249,8 +336,8 @@ class TestRunnerBaseAgent(A2AReactAgent):
         return register_code_execution
 
     def produce_update_code_execution_registration(self):
-        @tool
-        def update_code_execution_registration(registration_id: str,session_id: Annotated[str, InjectedState("session_id")],  enabled: bool = None, command: str = None,
+        @async_tool
+        async def update_code_execution_registration(registration_id: str,session_id: Annotated[str, InjectedState("session_id")],  enabled: bool = None, command: str = None,
                                                working_directory: str = None, arguments: str = None,
                                                timeout_seconds: int = None) -> CodeExecutionRegistration:
             """Update an existing code execution registration.
@@ -266,24 +353,6 @@ class TestRunnerBaseAgent(A2AReactAgent):
             Returns:
                 The updated code execution registration
             """
-            query = """
-            mutation UpdateCodeExecutionRegistration($registrationId: String!, $enabled: Boolean, $command: String,
-                                                    $workingDirectory: String, $arguments: String,
-                                                    $timeoutSeconds: Int) {
-                updateCodeExecutionRegistration(registrationId: $registrationId, enabled: $enabled, command: $command,
-                                               workingDirectory: $workingDirectory, arguments: $arguments,
-                                               timeoutSeconds: $timeoutSeconds) {
-                    registrationId
-                    command
-                    workingDirectory
-                    description
-                    arguments
-                    timeoutSeconds
-                    enabled
-                }
-            }
-            """
-
             variables = {
                 "registrationId": registration_id,
                 "sessionId": session_id
@@ -301,9 +370,9 @@ class TestRunnerBaseAgent(A2AReactAgent):
                 variables["timeoutSeconds"] = str(timeout_seconds)
 
             try:
-                return execute_graphql_request(
+                return await self.graphql_client.aexecute(
                     endpoint=self.cdc_server.graphql_endpoint,
-                    query=query,
+                    query=UPDATE_CODE_EXECUTION_REGISTRATION,
                     variables=variables,
                     result_key="updateCodeExecutionRegistration",
                     model_class=CodeExecutionRegistration
@@ -318,8 +387,8 @@ class TestRunnerBaseAgent(A2AReactAgent):
         return update_code_execution_registration
 
     def produce_delete_code_execution_registration(self):
-        @tool
-        def delete_code_execution_registration(registration_id: str, session_id: Annotated[str, InjectedState("session_id")]) -> bool:
+        @async_tool
+        async def delete_code_execution_registration(registration_id: str, session_id: Annotated[str, InjectedState("session_id")]) -> bool:
             """Delete a code execution registration.
 
             Args:
@@ -328,21 +397,15 @@ class TestRunnerBaseAgent(A2AReactAgent):
             Returns:
                 True if the deletion was successful, False otherwise
             """
-            query = """
-            mutation DeleteCodeExecutionRegistration($registrationId: String!) {
-                deleteCodeExecutionRegistration(registrationId: $registrationId)
-            }
-            """
-
             variables = {
                 "registrationId": registration_id,
                 "sessionId": session_id
             }
 
             try:
-                result = execute_graphql_request(
+                result = await self.graphql_client.aexecute(
                     endpoint=self.cdc_server.graphql_endpoint,
-                    query=query,
+                    query=DELETE_CODE_EXECUTION_REGISTRATION,
                     variables=variables,
                     result_key="deleteCodeExecutionRegistration",
                     model_class=bool
@@ -354,33 +417,17 @@ class TestRunnerBaseAgent(A2AReactAgent):
         return delete_code_execution_registration
 
     def produce_retrieve_executions(self):
-        @tool
-        def retrieve_executions() -> List[CodeExecution]:
+        @async_tool
+        async def retrieve_executions() -> List[CodeExecution]:
             """Retrieve all code execution
 
             Returns:
                 List of code executions
             """
-            query = """
-            query RetrieveExecutions {
-                retrieveExecutions {
-                    registrationId
-                    command
-                    status
-                    startTime
-                    endTime
-                    exitCode
-                    output
-                    error
-                    outputFile
-                }
-            }
-            """
-
             try:
-                return execute_graphql_request(
+                return await self.graphql_client.aexecute(
                     endpoint=self.cdc_server.graphql_endpoint,
-                    query=query,
+                    query=RETRIEVE_EXECUTIONS,
                     variables={},
                     result_key="retrieveExecutions",
                     model_class=List[CodeExecution]
@@ -391,31 +438,17 @@ class TestRunnerBaseAgent(A2AReactAgent):
         return retrieve_executions
 
     def produce_retrieve_registrations(self):
-        @tool
-        def retrieve_registrations() -> List[CodeExecutionRegistration]:
+        @async_tool
+        async def retrieve_registrations() -> List[CodeExecutionRegistration]:
             """Retrieve all code execution registrations. You could use this method to retrieve the registrations to retrieve a particular registration id to call the execute_code function, to run the code.
 
             Returns:
                 List of code execution registrations for commands that can be run, so you can run the code by retrieving their registration id.
             """
-            query = """
-            query RetrieveRegistrations {
-                retrieveRegistrations {
-                    registrationId
-                    command
-                    workingDirectory
-                    description
-                    arguments
-                    timeoutSeconds
-                    enabled
-                }
-            }
-            """
-
             try:
-                return execute_graphql_request(
+                return await self.graphql_client.aexecute(
                     endpoint=self.cdc_server.graphql_endpoint,
-                    query=query,
+                    query=RETRIEVE_REGISTRATIONS,
                     variables={},
                     result_key="retrieveRegistrations",
                     model_class=List[CodeExecutionRegistration]
@@ -426,8 +459,8 @@ class TestRunnerBaseAgent(A2AReactAgent):
         return retrieve_registrations
 
     def produce_get_code_execution_registration(self):
-        @tool
-        def get_code_execution_registration(registration_id: str, session_id: Annotated[str, InjectedState("session_id")]) -> CodeExecutionRegistration:
+        @async_tool
+        async def get_code_execution_registration(registration_id: str, session_id: Annotated[str, InjectedState("session_id")]) -> CodeExecutionRegistration:
             """Get a specific code execution registration by the registration_id.
 
             Args:
@@ -436,29 +469,15 @@ class TestRunnerBaseAgent(A2AReactAgent):
             Returns:
                 The code execution registration with the specified ID
             """
-            query = """
-            query GetCodeExecutionRegistration($registrationId: String!) {
-                getCodeExecutionRegistration(registrationId: $registrationId) {
-                    registrationId
-                    command
-                    workingDirectory
-                    description
-                    arguments
-                    timeoutSeconds
-                    enabled
-                }
-            }
-            """
-
             variables = {
                 "registrationId": registration_id,
                 "sessionId": session_id
             }
 
             try:
-                return execute_graphql_request(
+                return await self.graphql_client.aexecute(
                     endpoint=self.cdc_server.graphql_endpoint,
-                    query=query,
+                    query=GET_CODE_EXECUTION_REGISTRATION,
                     variables=variables,
                     result_key="getCodeExecutionRegistration",
                     model_class=CodeExecutionRegistration
@@ -473,8 +492,8 @@ class TestRunnerBaseAgent(A2AReactAgent):
         return get_code_execution_registration
 
     def produce_get_execution_output(self):
-        @tool
-        def get_execution_output(execution_id: str, session_id: Annotated[str, InjectedState("session_id")]) -> CodeExecutionResult:
+        @async_tool
+        async def get_execution_output(execution_id: str, session_id: Annotated[str, InjectedState("session_id")]) -> CodeExecutionResult:
             """Get the output of a specific code execution.
 
             Args:
@@ -483,29 +502,14 @@ class TestRunnerBaseAgent(A2AReactAgent):
             Returns:
                 The code execution result with output and error information
             """
-            query = """
-            query GetExecutionOutput($executionId: String!) {
-                getExecutionOutput(executionId: $executionId) {
-                    success
-                    output
-                    error
-                    executionId
-                    exitCode
-                    executionTime
-                    outputFile
-                    registrationId
-                }
-            }
-            """
-
             variables = {
                 "executionId": execution_id
             }
 
             try:
-                return execute_graphql_request(
+                return await self.graphql_client.aexecute(
                     endpoint=self.cdc_server.graphql_endpoint,
-                    query=query,
+                    query=GET_EXECUTION_OUTPUT,
                     variables=variables,
                     result_key="getExecutionOutput",
                     model_class=CodeExecutionResult
@@ -525,5 +529,6 @@ class TestRunnerAgent(TestRunnerBaseAgent, DeepResearchOrchestrated):
 
     @injector.inject
     def __init__(self, agent_config: AgentConfigProps, memory_saver: MemorySaver, model_provider: ModelProvider,
-                 cdc_server: CdcServerConfigProps, tool_call_decorator: ToolCallDecorator):
-        super().__init__(agent_config, memory_saver, model_provider, cdc_server, tool_call_decorator, DeepResearchOrchestrated)
+                 cdc_server: CdcServerConfigProps, tool_call_decorator: ToolCallDecorator, graphql_client: GraphQLClient):
+        super().__init__(agent_config, memory_saver, model_provider, cdc_server, tool_call_decorator, graphql_client,
+                         DeepResearchOrchestrated)
@@ -0,0 +1,233 @@
+import collections
+import dataclasses
+import threading
+import time
+import typing
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import Checkpoint, CheckpointMetadata, CheckpointTuple, ChannelVersions
+from langgraph.checkpoint.memory import MemorySaver
+
+from python_util.logger.logger import LoggerFacade
+
+
+@dataclasses.dataclass
+class ThreadCheckpoints:
+    """
+    What a thread holds in the saver's storage, indexed so the thread or its oldest checkpoints can be removed without
+    scanning every thread's writes and blobs.
+    """
+    last_access: float
+    resident_bytes: int = 0
+    # checkpoint ids of each namespace in the order they were put.
+    checkpoints: typing.Dict[str, typing.Deque[str]] = dataclasses.field(
+        default_factory=lambda: collections.defaultdict(collections.deque))
+    # the size of each checkpoint and the keys of the channel values it references.
+    checkpoint_refs: typing.Dict[typing.Tuple[str, str], typing.Tuple[int, typing.List[tuple]]] = dataclasses.field(
+        default_factory=dict)
+    blob_refs: typing.Dict[tuple, int] = dataclasses.field(default_factory=dict)
+    write_bytes: typing.Dict[typing.Tuple[str, str], int] = dataclasses.field(default_factory=dict)
+
+
+class BoundedMemorySaver(MemorySaver):
+    """
+    MemorySaver that evicts, so that a long-running server without a checkpoint database does not keep every
+    checkpoint of every session forever:
+
+    - threads not read or written for idle_ttl_seconds are removed,
+    - the least recently used threads are removed beyond max_threads, or while the saver holds more than max_bytes,
+    - each namespace of a thread keeps its latest max_checkpoints_per_thread checkpoints - older checkpoints, their
+      writes and the channel values only they reference are removed.
+
+    Sizes are of the serialized checkpoints, writes and channel values. stats counts evictions and the resident size.
+    """
+
+    def __init__(self, max_threads: typing.Optional[int] = None,
+                 max_checkpoints_per_thread: typing.Optional[int] = None,
+                 idle_ttl_seconds: typing.Optional[float] = None,
+                 max_bytes: typing.Optional[int] = None,
+                 serde=None,
+                 clock: typing.Callable[[], float] = time.monotonic):
+        super().__init__(serde=serde)
+        self.max_threads = max_threads
+        self.max_checkpoints_per_thread = max_checkpoints_per_thread
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self.stats = {'evicted_threads': 0, 'expired_threads': 0, 'evicted_checkpoints': 0, 'resident_bytes': 0,
+                      'threads': 0}
+        self._threads: typing.OrderedDict[str, ThreadCheckpoints] = collections.OrderedDict()
+        self._lock = threading.RLock()
+
+    def put(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+            new_versions: ChannelVersions) -> RunnableConfig:
+        with self._lock:
+            saved = super().put(config, checkpoint, metadata, new_versions)
+            thread_id = config['configurable']['thread_id']
+            checkpoint_ns = config['configurable']['checkpoint_ns']
+            thread = self._touch(thread_id)
+
+            c, m, _ = self.storage[thread_id][checkpoint_ns][checkpoint['id']]
+            self._add_bytes(thread, len(c[1]) + len(m[1]))
+            blob_keys = [(thread_id, checkpoint_ns, channel, version)
+                         for channel, version in checkpoint['channel_versions'].items()
+                         if (thread_id, checkpoint_ns, channel, version) in self.blobs]
+            thread.checkpoint_refs[(checkpoint_ns, checkpoint['id'])] = (len(c[1]) + len(m[1]), blob_keys)
+            thread.checkpoints[checkpoint_ns].append(checkpoint['id'])
+            for key in blob_keys:
+                if key not in thread.blob_refs:
+                    self._add_bytes(thread, len(self.blobs[key][1]))
+                thread.blob_refs[key] = thread.blob_refs.get(key, 0) + 1
+
+            self._evict(thread_id, checkpoint_ns)
+            return saved
+
+    def put_writes(self, config: RunnableConfig, writes: typing.Sequence[typing.Tuple[str, typing.Any]], task_id: str,
+                   task_path: str = '') -> None:
+        with self._lock:
+            thread_id = config['configurable']['thread_id']
+            checkpoint_ns = config['configurable'].get('checkpoint_ns', '')
+            checkpoint_id = config['configurable']['checkpoint_id']
+            outer_key = (thread_id, checkpoint_ns, checkpoint_id)
+            before = self._writes_size(outer_key)
+            super().put_writes(config, writes, task_id, task_path)
+            thread = self._touch(thread_id)
+            added = self._writes_size(outer_key) - before
+            thread.write_bytes[(checkpoint_ns, checkpoint_id)] = \
+                thread.write_bytes.get((checkpoint_ns, checkpoint_id), 0) + added
+            self._add_bytes(thread, added)
+            self._evict(thread_id, checkpoint_ns)
+
+    def get_tuple(self, config: RunnableConfig) -> typing.Optional[CheckpointTuple]:
+        with self._lock:
+            self._expire()
+            # reading an evicted thread through the storage's defaultdict would add it back empty.
+            if config['configurable']['thread_id'] not in self._threads:
+                return None
+            self._touch(config['configurable']['thread_id'])
+            return super().get_tuple(config)
+
+    def list(self, config: typing.Optional[RunnableConfig], *, filter: typing.Optional[typing.Dict[str, typing.Any]] = None,
+             before: typing.Optional[RunnableConfig] = None, limit: typing.Optional[int] = None) \
+            -> typing.Iterator[CheckpointTuple]:
+        with self._lock:
+            self._expire()
+            if config is not None:
+                if config['configurable']['thread_id'] not in self._threads:
+                    return iter([])
+                self._touch(config['configurable']['thread_id'])
+            # materialized under the lock, as eviction mutates the storage being iterated.
+            return iter(list(super().list(config, filter=filter, before=before, limit=limit)))
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            self._remove_thread(thread_id)
+
+    def remove_checkpoints(self, thread_id: str, checkpoint_ns: str, checkpoint_ids: typing.Collection[str]) -> int:
+        """
+        Removes the checkpoints, their writes and the channel values only they reference, as compaction does.
+
+        :return: the bytes released.
+        """
+        with self._lock:
+            thread = self._threads.get(thread_id)
+            if thread is None:
+                return 0
+            resident_bytes = thread.resident_bytes
+            removed = set(checkpoint_ids) & set(thread.checkpoints[checkpoint_ns])
+            for checkpoint_id in removed:
+                self._remove_checkpoint(thread_id, thread, checkpoint_ns, checkpoint_id)
+            thread.checkpoints[checkpoint_ns] = collections.deque(
+                c for c in thread.checkpoints[checkpoint_ns] if c not in removed)
+            return resident_bytes - thread.resident_bytes
+
+    def _touch(self, thread_id: str) -> ThreadCheckpoints:
+        thread = self._threads.get(thread_id)
+        if thread is None:
+            thread = ThreadCheckpoints(last_access=self.clock())
+            self._threads[thread_id] = thread
+            self.stats['threads'] = len(self._threads)
+        thread.last_access = self.clock()
+        self._threads.move_to_end(thread_id)
+        return thread
+
+    def _add_bytes(self, thread: ThreadCheckpoints, size: int):
+        thread.resident_bytes += size
+        self.stats['resident_bytes'] += size
+
+    def _writes_size(self, outer_key) -> int:
+        writes = self.writes.get(outer_key)
+        return sum(len(w[2][1]) for w in writes.values()) if writes else 0
+
+    def _evict(self, thread_id: str, checkpoint_ns: str):
+        self._expire()
+        thread = self._threads.get(thread_id)
+        if thread is not None and self.max_checkpoints_per_thread is not None:
+            while len(thread.checkpoints[checkpoint_ns]) > self.max_checkpoints_per_thread:
+                self._remove_oldest_checkpoint(thread_id, thread, checkpoint_ns)
+
+        while self.max_threads is not None and len(self._threads) > self.max_threads:
+            self._evict_lru()
+        while self.max_bytes is not None and self.stats['resident_bytes'] > self.max_bytes:
+            if len(self._threads) > 1:
+                self._evict_lru()
+                continue
+            # the only thread left is the one being written - keep its latest checkpoint of each namespace.
+            if thread is None or not self._remove_oldest_checkpoint_of_thread(thread_id, thread):
+                break
+
+    def _expire(self):
+        if self.idle_ttl_seconds is None:
+            return
+        now = self.clock()
+        while len(self._threads) != 0:
+            thread_id, thread = next(iter(self._threads.items()))
+            if now - thread.last_access < self.idle_ttl_seconds:
+                return
+            LoggerFacade.debug(f"Expiring checkpoints of thread {thread_id} idle for {now - thread.last_access:.0f}s.")
+            self._remove_thread(thread_id)
+            self.stats['expired_threads'] += 1
+
+    def _evict_lru(self):
+        thread_id = next(iter(self._threads.keys()))
+        LoggerFacade.debug(f"Evicting checkpoints of least recently used thread {thread_id}.")
+        self._remove_thread(thread_id)
+        self.stats['evicted_threads'] += 1
+
+    def _remove_thread(self, thread_id: str):
+        thread = self._threads.pop(thread_id, None)
+        self.storage.pop(thread_id, None)
+        if thread is not None:
+            for checkpoint_ns, checkpoint_id in thread.write_bytes.keys():
+                self.writes.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+            for key in thread.blob_refs.keys():
+                self.blobs.pop(key, None)
+            self.stats['resident_bytes'] -= thread.resident_bytes
+        self.stats['threads'] = len(self._threads)
+
+    def _remove_oldest_checkpoint_of_thread(self, thread_id: str, thread: ThreadCheckpoints) -> bool:
+        for checkpoint_ns, checkpoint_ids in thread.checkpoints.items():
+            if len(checkpoint_ids) > 1:
+                self._remove_oldest_checkpoint(thread_id, thread, checkpoint_ns)
+                return True
+        return False
+
+    def _remove_oldest_checkpoint(self, thread_id: str, thread: ThreadCheckpoints, checkpoint_ns: str):
+        self._remove_checkpoint(thread_id, thread, checkpoint_ns, thread.checkpoints[checkpoint_ns].popleft())
+        self.stats['evicted_checkpoints'] += 1
+
+    def _remove_checkpoint(self, thread_id: str, thread: ThreadCheckpoints, checkpoint_ns: str, checkpoint_id: str):
+        self.storage[thread_id][checkpoint_ns].pop(checkpoint_id, None)
+        self.writes.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+        self._add_bytes(thread, -thread.write_bytes.pop((checkpoint_ns, checkpoint_id), 0))
+        size, blob_keys = thread.checkpoint_refs.pop((checkpoint_ns, checkpoint_id))
+        self._add_bytes(thread, -size)
+        for key in blob_keys:
+            refs = thread.blob_refs.get(key, 0)
+            if refs > 1:
+                thread.blob_refs[key] = refs - 1
+                continue
+            thread.blob_refs.pop(key, None)
+            blob = self.blobs.pop(key, None)
+            if blob is not None:
+                self._add_bytes(thread, -len(blob[1]))
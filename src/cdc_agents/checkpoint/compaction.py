@@ -0,0 +1,210 @@
+import abc
+import threading
+import typing
+
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.checkpoint.memory import MemorySaver
+
+from cdc_agents.checkpoint.delta import DeltaMessageSaver
+from python_util.logger.logger import LoggerFacade
+
+# the namespace, id and metadata source of a checkpoint.
+CheckpointRef = typing.Tuple[str, str, typing.Optional[str]]
+
+
+class CheckpointPruner(abc.ABC):
+    """
+    Deletes checkpoints from a saver's storage, with their writes and the channel values no remaining checkpoint
+    references.
+    """
+
+    @abc.abstractmethod
+    def thread_ids(self, after: typing.Optional[str], limit: int) -> typing.List[str]:
+        """
+        :return: up to limit thread ids, in order, after the thread id given.
+        """
+        pass
+
+    @abc.abstractmethod
+    def checkpoints(self, thread_id: str) -> typing.List[CheckpointRef]:
+        """
+        :return: the checkpoints of the thread, oldest first.
+        """
+        pass
+
+    @abc.abstractmethod
+    def prune(self, thread_id: str, checkpoint_ns: str, checkpoint_ids: typing.Collection[str]) -> int:
+        """
+        :return: the bytes reclaimed.
+        """
+        pass
+
+
+class MemoryCheckpointPruner(CheckpointPruner):
+
+    def __init__(self, saver: MemorySaver):
+        self.saver = saver
+
+    def thread_ids(self, after: typing.Optional[str], limit: int) -> typing.List[str]:
+        return sorted(t for t in list(self.saver.storage.keys()) if after is None or t > after)[:limit]
+
+    def checkpoints(self, thread_id: str) -> typing.List[CheckpointRef]:
+        namespaces = self.saver.storage.get(thread_id) or {}
+        return [(checkpoint_ns, checkpoint_id, self.saver.serde.loads_typed(metadata).get('source'))
+                for checkpoint_ns, checkpoints in list(namespaces.items())
+                for checkpoint_id, (_, metadata, _) in sorted(list(checkpoints.items()))]
+
+    def prune(self, thread_id: str, checkpoint_ns: str, checkpoint_ids: typing.Collection[str]) -> int:
+        from cdc_agents.checkpoint.bounded_memory import BoundedMemorySaver
+        if isinstance(self.saver, BoundedMemorySaver):
+            return self.saver.remove_checkpoints(thread_id, checkpoint_ns, checkpoint_ids)
+
+        checkpoints = self.saver.storage[thread_id][checkpoint_ns]
+        reclaimed = 0
+        for checkpoint_id in checkpoint_ids:
+            c, m, _ = checkpoints.pop(checkpoint_id)
+            reclaimed += len(c[1]) + len(m[1])
+            writes = self.saver.writes.pop((thread_id, checkpoint_ns, checkpoint_id), None) or {}
+            reclaimed += sum(len(w[2][1]) for w in writes.values())
+
+        referenced = {(channel, version) for c, _, _ in checkpoints.values()
+                      for channel, version in self.saver.serde.loads_typed(c)['channel_versions'].items()}
+        for key in [k for k in list(self.saver.blobs.keys())
+                    if k[0] == thread_id and k[1] == checkpoint_ns and (k[2], k[3]) not in referenced]:
+            reclaimed += len(self.saver.blobs.pop(key)[1])
+        return reclaimed
+
+
+def checkpoint_pruner(saver: BaseCheckpointSaver) -> typing.Optional[CheckpointPruner]:
+    """
+    The pruner for the storage under saver, through the savers wrapping it, or None when it has none.
+    """
+    while hasattr(saver, 'saver') and isinstance(saver.saver, BaseCheckpointSaver):
+        saver = saver.saver
+    if isinstance(saver, MemorySaver):
+        return MemoryCheckpointPruner(saver)
+    try:
+        from cdc_agents.checkpoint.sqlite import SqliteSaver, SqliteCheckpointPruner
+        if isinstance(saver, SqliteSaver):
+            return SqliteCheckpointPruner(saver)
+    except ImportError:
+        pass
+    try:
+        from langgraph.checkpoint.postgres import PostgresSaver
+        from cdc_agents.checkpoint.postgres import PostgresCheckpointPruner
+        if isinstance(saver, PostgresSaver):
+            return PostgresCheckpointPruner(saver)
+    except ImportError:
+        pass
+    return None
+
+
+def delta_message_saver(saver: BaseCheckpointSaver) -> typing.Optional[DeltaMessageSaver]:
+    """
+    The DeltaMessageSaver storing the messages of saver's checkpoints, through the savers wrapping it, if any.
+    """
+    while not isinstance(saver, DeltaMessageSaver) and hasattr(saver, 'saver') \
+            and isinstance(saver.saver, BaseCheckpointSaver):
+        saver = saver.saver
+    return saver if isinstance(saver, DeltaMessageSaver) else None
+
+
+class CheckpointCompactor:
+    """
+    Prunes the history of threads in the background - a checkpoint is written at every step of every graph, and none
+    is deleted otherwise.
+
+    A thread keeps its keep_latest latest checkpoints and, with keep_task_completions, the last checkpoint of each
+    graph run, which is where a task completed or stopped for input. The latest checkpoint and its parent are always
+    kept, as resuming the thread reads the writes of both.
+
+    Each run compacts at most threads_per_run threads, continuing from where the last run stopped, and runs are
+    interval_seconds apart, so compaction does not compete with the agents for the checkpoint store.
+
+    With the messages of checkpoints stored as blobs by a DeltaMessageSaver, the blobs each thread references are
+    marked as it is compacted, and those no thread references any more are swept once every thread has been.
+    """
+
+    def __init__(self, saver: BaseCheckpointSaver, pruner: CheckpointPruner,
+                 keep_latest: typing.Optional[int] = None, keep_task_completions: bool = True,
+                 interval_seconds: float = 300, threads_per_run: int = 100):
+        self.saver = saver
+        self.pruner = pruner
+        self.keep_latest = keep_latest
+        self.keep_task_completions = keep_task_completions
+        self.interval_seconds = interval_seconds
+        self.threads_per_run = threads_per_run
+        self.stats = {'runs': 0, 'threads': 0, 'checkpoints': 0, 'message_blobs': 0, 'reclaimed_bytes': 0}
+        self.delta_messages = delta_message_saver(saver)
+        self._after: typing.Optional[str] = None
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._thread: typing.Optional[threading.Thread] = None
+
+    def start(self) -> 'CheckpointCompactor':
+        self._thread = threading.Thread(target=self._compact_periodically, name='checkpoint-compaction', daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        self._closed.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def run_once(self) -> int:
+        """
+        Compacts the next threads_per_run threads.
+
+        :return: the bytes reclaimed.
+        """
+        with self._lock:
+            flush = getattr(self.saver, 'flush', None)
+            if flush is not None:
+                # buffered checkpoints are pruned with the rest of their thread.
+                flush()
+            thread_ids = self.pruner.thread_ids(self._after, self.threads_per_run)
+            self._after = thread_ids[-1] if len(thread_ids) == self.threads_per_run else None
+            reclaimed, pruned = 0, 0
+            for thread_id in thread_ids:
+                for checkpoint_ns, checkpoint_ids in self._prunable(self.pruner.checkpoints(thread_id)).items():
+                    reclaimed += self.pruner.prune(thread_id, checkpoint_ns, checkpoint_ids)
+                    pruned += len(checkpoint_ids)
+                if self.delta_messages is not None:
+                    self.delta_messages.mark_thread(thread_id)
+            swept = 0
+            if self.delta_messages is not None and self._after is None:
+                swept, swept_bytes = self.delta_messages.sweep_blobs()
+                reclaimed += swept_bytes
+            self.stats['runs'] += 1
+            self.stats['threads'] += len(thread_ids)
+            self.stats['checkpoints'] += pruned
+            self.stats['message_blobs'] += swept
+            self.stats['reclaimed_bytes'] += reclaimed
+            if pruned != 0 or swept != 0:
+                LoggerFacade.info(f"Compacted {len(thread_ids)} threads - pruned {pruned} checkpoints and {swept} "
+                                  f"message blobs, reclaimed {reclaimed} bytes, {self.stats['reclaimed_bytes']} in "
+                                  f"total.")
+            return reclaimed
+
+    def _prunable(self, checkpoints: typing.List[CheckpointRef]) -> typing.Dict[str, typing.List[str]]:
+        namespaces: typing.Dict[str, typing.List[typing.Tuple[str, typing.Optional[str]]]] = {}
+        for checkpoint_ns, checkpoint_id, source in checkpoints:
+            namespaces.setdefault(checkpoint_ns, []).append((checkpoint_id, source))
+
+        prunable = {}
+        for checkpoint_ns, ordered in namespaces.items():
+            keep = {checkpoint_id for checkpoint_id, _ in ordered[-max(2, self.keep_latest or 0):]}
+            if self.keep_task_completions:
+                # each run starts with an input checkpoint, so the one before it is where the previous run ended.
+                keep.update(ordered[i][0] for i in range(len(ordered) - 1) if ordered[i + 1][1] == 'input')
+            checkpoint_ids = [checkpoint_id for checkpoint_id, _ in ordered if checkpoint_id not in keep]
+            if len(checkpoint_ids) != 0:
+                prunable[checkpoint_ns] = checkpoint_ids
+        return prunable
+
+    def _compact_periodically(self):
+        while not self._closed.wait(self.interval_seconds):
+            try:
+                self.run_once()
+            except Exception as e:
+                LoggerFacade.error(f"Failed to compact checkpoints - retrying with the next run: {e}")
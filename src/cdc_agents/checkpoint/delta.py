@@ -0,0 +1,368 @@
+import asyncio
+import collections
+import contextlib
+import copy
+import dataclasses
+import hashlib
+import json
+import threading
+import typing
+
+from langchain_core.messages import BaseMessage, AIMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import BaseCheckpointSaver, Checkpoint, CheckpointMetadata, CheckpointTuple, \
+    ChannelVersions
+
+from cdc_agents.checkpoint.message_blobs import MessageBlobStore, MessageBlob
+
+MESSAGE_REFS = '__message_refs__'
+
+SEGMENT_TYPE = 'message_segment'
+
+
+@dataclasses.dataclass
+class ThreadMessages:
+    """
+    The last message list checkpointed for a thread - its messages, their digests and the segment it is stored as,
+    and a fingerprint of each message as it was stored.
+    """
+    messages: typing.List[BaseMessage]
+    digests: typing.List[str]
+    segment: str
+    fingerprints: typing.List[typing.Hashable]
+
+
+class DeltaMessageSaver(BaseCheckpointSaver):
+    """
+    Stores the message lists of checkpoints and their writes as references into a content-addressed MessageBlobStore
+    instead of in full, so that storage and write volume grow linearly with the conversation rather than with the
+    square of it.
+
+    A message list is stored as a segment - the digest of the segment it extends and the digests of the messages it
+    adds. A list that extends the last one checkpointed for its thread only stores its new messages, and each message
+    is stored once however many checkpoints reference it. Lists are reconstructed when a checkpoint is read, from a
+    cache of the messages most recently read or written.
+
+    Blobs are not deleted with the checkpoints referencing them, as other checkpoints and threads may share them -
+    sweep_blobs deletes those no checkpoint references any more, once mark_thread has marked every thread.
+    """
+
+    def __init__(self, saver: BaseCheckpointSaver, blobs: MessageBlobStore,
+                 channels: typing.Collection[str] = ('messages',), max_cached_messages: int = 10000,
+                 max_cached_threads: int = 1000):
+        super().__init__(serde=saver.serde)
+        self.saver = saver
+        self.blobs = blobs
+        self.channels = set(channels)
+        self.max_cached_messages = max_cached_messages
+        self.max_cached_threads = max_cached_threads
+        self._messages: typing.OrderedDict[str, BaseMessage] = collections.OrderedDict()
+        self._segments: typing.OrderedDict[str, typing.Tuple[typing.Optional[str], typing.List[str]]] = \
+            collections.OrderedDict()
+        self._threads: typing.OrderedDict[typing.Tuple[str, str], ThreadMessages] = collections.OrderedDict()
+        # blobs written and segments marked since the last sweep, and the blobs the last sweep found unreferenced.
+        self._written: typing.Set[str] = set()
+        self._marked: typing.Set[str] = set()
+        self._unreferenced: typing.Set[str] = set()
+        self._lock = threading.RLock()
+
+    def put(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+            new_versions: ChannelVersions) -> RunnableConfig:
+        channel_values = checkpoint['channel_values']
+        if any(self._is_message_list(channel_values.get(c)) for c in self.channels):
+            checkpoint = copy.copy(checkpoint)
+            checkpoint['channel_values'] = {
+                c: self._store(config, v, True) if c in self.channels and self._is_message_list(v) else v
+                for c, v in channel_values.items()}
+        if metadata.get('writes'):
+            # the metadata records what each node wrote, the whole history for the orchestrator's nodes.
+            metadata = {**metadata, 'writes': self._map_node_writes(
+                metadata['writes'], lambda v: self._store(config, v, False) if self._is_message_list(v) else v)}
+        return self.saver.put(config, checkpoint, metadata, new_versions)
+
+    def put_writes(self, config: RunnableConfig, writes: typing.Sequence[typing.Tuple[str, typing.Any]], task_id: str,
+                   task_path: str = '') -> None:
+        writes = [(c, self._store(config, v, False) if c in self.channels and self._is_message_list(v) else v)
+                  for c, v in writes]
+        self.saver.put_writes(config, writes, task_id, task_path)
+
+    def get_tuple(self, config: RunnableConfig) -> typing.Optional[CheckpointTuple]:
+        checkpoint_tuple = self.saver.get_tuple(config)
+        return self._load_tuple(checkpoint_tuple, True) if checkpoint_tuple is not None else None
+
+    def list(self, config: typing.Optional[RunnableConfig], *, filter: typing.Optional[typing.Dict[str, typing.Any]] = None,
+             before: typing.Optional[RunnableConfig] = None, limit: typing.Optional[int] = None) \
+            -> typing.Iterator[CheckpointTuple]:
+        for checkpoint_tuple in self.saver.list(config, filter=filter, before=before, limit=limit):
+            yield self._load_tuple(checkpoint_tuple, False)
+
+    def delete_thread(self, thread_id: str) -> None:
+        # message blobs may be shared with other threads, so are left to sweep_blobs.
+        with self._lock:
+            for key in [k for k in self._threads.keys() if k[0] == thread_id]:
+                del self._threads[key]
+        self.saver.delete_thread(thread_id)
+
+    def get_next_version(self, current, channel):
+        return self.saver.get_next_version(current, channel)
+
+    @contextlib.contextmanager
+    def batch(self) -> typing.Iterator['DeltaMessageSaver']:
+        """
+        The saver's batch, when it has one, storing message lists into the same blob store and caches.
+        """
+        batch = getattr(self.saver, 'batch', None)
+        if batch is None:
+            yield self
+            return
+        with batch() as saver:
+            view = copy.copy(self)
+            view.saver = saver
+            yield view
+
+    async def aput(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+                   new_versions: ChannelVersions) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config: RunnableConfig, writes: typing.Sequence[typing.Tuple[str, typing.Any]],
+                          task_id: str, task_path: str = '') -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def aget_tuple(self, config: RunnableConfig) -> typing.Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config: typing.Optional[RunnableConfig], *,
+                    filter: typing.Optional[typing.Dict[str, typing.Any]] = None,
+                    before: typing.Optional[RunnableConfig] = None, limit: typing.Optional[int] = None) \
+            -> typing.AsyncIterator[CheckpointTuple]:
+        for checkpoint_tuple in await asyncio.to_thread(
+                lambda: list(self.list(config, filter=filter, before=before, limit=limit))):
+            yield checkpoint_tuple
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    @staticmethod
+    def _is_message_list(value) -> bool:
+        return isinstance(value, list) and len(value) != 0 and all(isinstance(m, BaseMessage) for m in value)
+
+    @staticmethod
+    def _is_message_refs(value) -> bool:
+        return isinstance(value, list) and len(value) == 2 and value[0] == MESSAGE_REFS
+
+    @staticmethod
+    def _thread_key(config: RunnableConfig) -> typing.Tuple[str, str]:
+        return config['configurable']['thread_id'], config['configurable'].get('checkpoint_ns', '')
+
+    def _store(self, config: RunnableConfig, messages: typing.List[BaseMessage], is_checkpoint: bool) -> typing.List[str]:
+        key = self._thread_key(config)
+        with self._lock:
+            last = self._threads.get(key)
+        fingerprints = [self._fingerprint(m) for m in messages]
+        prefix = last if last is not None and self._extends(messages, fingerprints, last) else None
+
+        blobs: typing.Dict[str, MessageBlob] = {}
+        added = []
+        for m in messages[len(prefix.messages) if prefix is not None else 0:]:
+            blob = self.serde.dumps_typed(m)
+            digest = self._digest(blob)
+            blobs[digest] = blob
+            added.append(digest)
+            self._cache_message(digest, m)
+
+        if prefix is not None and len(added) == 0:
+            segment = prefix.segment
+        else:
+            segment_blob = (SEGMENT_TYPE, json.dumps({'prev': prefix.segment if prefix is not None else None,
+                                                      'added': added}).encode('utf-8'))
+            segment = self._digest(segment_blob)
+            blobs[segment] = segment_blob
+            self._cache_segment(segment, prefix.segment if prefix is not None else None, added)
+        with self._lock:
+            self._written.update(blobs.keys())
+        self.blobs.put(blobs)
+
+        if is_checkpoint:
+            digests = (prefix.digests if prefix is not None else []) + added
+            self._cache_thread(key, ThreadMessages(list(messages), digests, segment, fingerprints))
+        return [MESSAGE_REFS, segment]
+
+    def mark_thread(self, thread_id: str):
+        """
+        Marks the segments the checkpoints and writes of the thread reference as referenced for the next sweep - a
+        thread at a time, so that the checkpoint store is not read whole while sweeping.
+        """
+        segments = set()
+        for checkpoint_tuple in self.saver.list({'configurable': {'thread_id': thread_id}}):
+            self._find_refs(checkpoint_tuple.checkpoint['channel_values'], segments)
+            self._find_refs(checkpoint_tuple.metadata, segments)
+            self._find_refs([w[2] for w in checkpoint_tuple.pending_writes or []], segments)
+        with self._lock:
+            self._marked.update(segments)
+
+    def sweep_blobs(self) -> typing.Tuple[int, int]:
+        """
+        Deletes the message blobs that no thread marked since the last sweep, nor any cached thread, references -
+        through the segments they reference and the segments those extend. Every thread of the saver must have been
+        marked since the last sweep, as CheckpointCompactor does in each pass.
+
+        A blob is only deleted when the previous sweep found it unreferenced too and it was not written since, so a blob
+        written as the sweep runs - by this process or another sharing the store - is kept until its checkpoint is.
+
+        :return: the blobs deleted and the bytes reclaimed.
+        """
+        with self._lock:
+            written = set(self._written)
+            self._written.clear()
+            segments = self._marked | {t.segment for t in self._threads.values()}
+            self._marked = set()
+        stored = self.blobs.digests()
+
+        unreferenced = stored - self._referenced(segments)
+        with self._lock:
+            written.update(self._written)
+            deleted = (unreferenced & self._unreferenced) - written
+            self._unreferenced = unreferenced - deleted
+            for digest in deleted:
+                self._messages.pop(digest, None)
+                self._segments.pop(digest, None)
+        return len(deleted), self.blobs.delete(deleted) if len(deleted) != 0 else 0
+
+    def _find_refs(self, value, segments: typing.Set[str]):
+        if self._is_message_refs(value):
+            segments.add(value[1])
+        elif isinstance(value, dict):
+            for v in value.values():
+                self._find_refs(v, segments)
+        elif isinstance(value, (list, tuple)):
+            for v in value:
+                self._find_refs(v, segments)
+
+    def _referenced(self, segments: typing.Set[str]) -> typing.Set[str]:
+        referenced = set()
+        pending = list(segments)
+        while len(pending) != 0:
+            segment = pending.pop()
+            if segment is None or segment in referenced:
+                continue
+            referenced.add(segment)
+            try:
+                prev, added = self._segment(segment)
+            except KeyError:
+                continue
+            referenced.update(added)
+            pending.append(prev)
+        return referenced
+
+    @staticmethod
+    def _extends(messages: typing.List[BaseMessage], fingerprints: typing.List[typing.Hashable],
+                 last: ThreadMessages) -> bool:
+        """
+        Messages carried over from one step to the next are the same objects, so comparing them by identity finds the
+        new ones without serializing the whole list - and by fingerprint, as messages are also changed in place, such
+        as when added to or pinned, and must then be stored again.
+        """
+        return len(messages) >= len(last.messages) and all(
+            m is p and f == pf for m, p, f, pf in zip(messages, last.messages, fingerprints, last.fingerprints))
+
+    @staticmethod
+    def _fingerprint(message: BaseMessage) -> typing.Hashable:
+        # str caches its own hash, so fingerprinting the same content again is constant time.
+        content = message.content if isinstance(message.content, str) else repr(message.content)
+        tool_calls = len(message.tool_calls) if isinstance(message, AIMessage) else 0
+        return message.id, message.type, hash(content), tool_calls, tuple(message.additional_kwargs.keys())
+
+    def _load_tuple(self, checkpoint_tuple: CheckpointTuple, is_latest: bool) -> CheckpointTuple:
+        channel_values = checkpoint_tuple.checkpoint['channel_values']
+        checkpoint = checkpoint_tuple.checkpoint
+        if any(self._is_message_refs(v) for v in channel_values.values()):
+            checkpoint = copy.copy(checkpoint)
+            checkpoint['channel_values'] = {c: self._load(v[1]) if self._is_message_refs(v) else v
+                                            for c, v in channel_values.items()}
+            if is_latest:
+                for c in self.channels:
+                    refs = channel_values.get(c)
+                    if self._is_message_refs(refs):
+                        digests = self._segment_digests(refs[1])
+                        messages = checkpoint['channel_values'][c]
+                        self._cache_thread(self._thread_key(checkpoint_tuple.config),
+                                           ThreadMessages(messages, digests, refs[1],
+                                                          [self._fingerprint(m) for m in messages]))
+        pending_writes = checkpoint_tuple.pending_writes
+        if pending_writes is not None and any(self._is_message_refs(w[2]) for w in pending_writes):
+            pending_writes = [(task_id, c, self._load(v[1]) if self._is_message_refs(v) else v)
+                              for task_id, c, v in pending_writes]
+        metadata = checkpoint_tuple.metadata
+        if metadata is not None and metadata.get('writes'):
+            metadata = {**metadata, 'writes': self._map_node_writes(
+                metadata['writes'], lambda v: self._load(v[1]) if self._is_message_refs(v) else v)}
+        return checkpoint_tuple._replace(checkpoint=checkpoint, metadata=metadata, pending_writes=pending_writes)
+
+    def _map_node_writes(self, writes, fn):
+        def map_update(update):
+            if isinstance(update, dict):
+                return {c: fn(v) if c in self.channels else v for c, v in update.items()}
+            if isinstance(update, (list, tuple)):
+                return [map_update(u) for u in update]
+            return update
+
+        if not isinstance(writes, dict):
+            return writes
+        return {node: map_update(update) for node, update in writes.items()}
+
+    def _load(self, segment: str) -> typing.List[BaseMessage]:
+        digests = self._segment_digests(segment)
+        with self._lock:
+            loaded = {d: self._messages[d] for d in set(digests) if d in self._messages}
+        missing = [d for d in set(digests) if d not in loaded]
+        if len(missing) != 0:
+            for digest, blob in self.blobs.get(missing).items():
+                loaded[digest] = self.serde.loads_typed(blob)
+                self._cache_message(digest, loaded[digest])
+        return [loaded[d] for d in digests]
+
+    def _segment_digests(self, segment: str) -> typing.List[str]:
+        chain = []
+        next_segment = segment
+        while next_segment is not None:
+            next_segment, added = self._segment(next_segment)
+            chain.append(added)
+        return [d for added in reversed(chain) for d in added]
+
+    def _segment(self, segment: str) -> typing.Tuple[typing.Optional[str], typing.List[str]]:
+        """
+        :return: the segment the segment extends and the digests of the messages it adds.
+        """
+        with self._lock:
+            cached = self._segments.get(segment)
+        if cached is None:
+            blob = self.blobs.get([segment])[segment]
+            decoded = json.loads(blob[1])
+            cached = (decoded['prev'], decoded['added'])
+            self._cache_segment(segment, *cached)
+        return cached
+
+    @staticmethod
+    def _digest(blob: MessageBlob) -> str:
+        return hashlib.sha256(blob[0].encode('utf-8') + b'\0' + blob[1]).hexdigest()
+
+    def _cache_message(self, digest: str, message: BaseMessage):
+        with self._lock:
+            self._messages[digest] = message
+            self._messages.move_to_end(digest)
+            while len(self._messages) > self.max_cached_messages:
+                self._messages.popitem(last=False)
+
+    def _cache_segment(self, segment: str, prev: typing.Optional[str], added: typing.List[str]):
+        with self._lock:
+            self._segments[segment] = (prev, added)
+            self._segments.move_to_end(segment)
+            while len(self._segments) > self.max_cached_messages:
+                self._segments.popitem(last=False)
+
+    def _cache_thread(self, key: typing.Tuple[str, str], thread_messages: ThreadMessages):
+        with self._lock:
+            self._threads[key] = thread_messages
+            self._threads.move_to_end(key)
+            while len(self._threads) > self.max_cached_threads:
+                self._threads.popitem(last=False)
@@ -0,0 +1,55 @@
+import abc
+import threading
+import typing
+
+MessageBlob = typing.Tuple[str, bytes]
+
+
+class MessageBlobStore(abc.ABC):
+    """
+    Content-addressed store of serialized messages and message list segments, keyed by digest. Blobs are never
+    overwritten, so putting a digest that is already stored is a no-op.
+    """
+
+    @abc.abstractmethod
+    def put(self, blobs: typing.Dict[str, MessageBlob]) -> None:
+        pass
+
+    @abc.abstractmethod
+    def get(self, digests: typing.Collection[str]) -> typing.Dict[str, MessageBlob]:
+        pass
+
+    @abc.abstractmethod
+    def digests(self) -> typing.Set[str]:
+        pass
+
+    @abc.abstractmethod
+    def delete(self, digests: typing.Collection[str]) -> int:
+        """
+        :return: the bytes reclaimed.
+        """
+        pass
+
+
+class InMemoryMessageBlobStore(MessageBlobStore):
+
+    def __init__(self):
+        self.blobs: typing.Dict[str, MessageBlob] = {}
+        self._lock = threading.Lock()
+
+    def put(self, blobs: typing.Dict[str, MessageBlob]) -> None:
+        with self._lock:
+            for digest, blob in blobs.items():
+                self.blobs.setdefault(digest, blob)
+
+    def get(self, digests: typing.Collection[str]) -> typing.Dict[str, MessageBlob]:
+        with self._lock:
+            return {d: self.blobs[d] for d in digests if d in self.blobs}
+
+    def digests(self) -> typing.Set[str]:
+        with self._lock:
+            return set(self.blobs.keys())
+
+    def delete(self, digests: typing.Collection[str]) -> int:
+        with self._lock:
+            return sum(len(self.blobs.pop(d)[1]) for d in digests if d in self.blobs)
@@ -0,0 +1,144 @@
+import contextlib
+import typing
+
+from langgraph.checkpoint.postgres import PostgresSaver
+from langgraph.checkpoint.serde.base import SerializerProtocol
+from psycopg import Connection
+from psycopg.rows import dict_row, tuple_row
+from psycopg_pool import ConnectionPool
+
+from cdc_agents.checkpoint.compaction import CheckpointPruner, CheckpointRef
+from cdc_agents.checkpoint.message_blobs import MessageBlobStore, MessageBlob
+
+
+class PooledPostgresSaver(PostgresSaver):
+    """
+    PostgresSaver over a connection pool, so that agents and sessions checkpoint concurrently instead of taking turns
+    on one connection.
+    """
+
+    def __init__(self, pool: ConnectionPool, serde: typing.Optional[SerializerProtocol] = None):
+        super().__init__(pool, serde=serde)
+        self.pool = pool
+
+    @classmethod
+    def from_uri(cls, uri: str, min_size: int = 1, max_size: int = 10,
+                 serde: typing.Optional[SerializerProtocol] = None) -> 'PooledPostgresSaver':
+        pool = ConnectionPool(uri, min_size=min_size, max_size=max_size, open=True,
+                              kwargs={'autocommit': True, 'prepare_threshold': 0, 'row_factory': dict_row})
+        return cls(pool, serde)
+
+    @contextlib.contextmanager
+    def batch(self) -> typing.Iterator[PostgresSaver]:
+        """
+        A saver on one connection from the pool, each of its writes pipelined and all of them committed in one
+        transaction.
+        """
+        with self.pool.connection() as conn, conn.transaction():
+            yield PostgresSaver(conn, serde=self.serde)
+
+    def close(self):
+        self.pool.close()
+
+
+class PostgresMessageBlobStore(MessageBlobStore):
+    """
+    Message blobs in the checkpoint database, written with the checkpoints on the saver's connection or pool.
+    """
+
+    def __init__(self, conn: typing.Union[Connection, ConnectionPool]):
+        self.conn = conn
+
+    def setup(self):
+        with self._connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS checkpoint_message_blobs (
+                    digest TEXT PRIMARY KEY,
+                    type TEXT NOT NULL,
+                    blob BYTEA NOT NULL
+                )""")
+
+    def put(self, blobs: typing.Dict[str, MessageBlob]) -> None:
+        if len(blobs) == 0:
+            return
+        with self._connection() as conn, conn.cursor() as cur:
+            cur.executemany("INSERT INTO checkpoint_message_blobs (digest, type, blob) VALUES (%s, %s, %s) "
+                            "ON CONFLICT (digest) DO NOTHING",
+                            [(digest, type_, blob) for digest, (type_, blob) in blobs.items()])
+
+    def get(self, digests: typing.Collection[str]) -> typing.Dict[str, MessageBlob]:
+        if len(digests) == 0:
+            return {}
+        with self._connection() as conn, conn.cursor(row_factory=tuple_row) as cur:
+            cur.execute("SELECT digest, type, blob FROM checkpoint_message_blobs WHERE digest = ANY(%s)",
+                        (list(digests),))
+            return {digest: (type_, bytes(blob)) for digest, type_, blob in cur.fetchall()}
+
+    def digests(self) -> typing.Set[str]:
+        with self._connection() as conn, conn.cursor(row_factory=tuple_row) as cur:
+            cur.execute("SELECT digest FROM checkpoint_message_blobs")
+            return {digest for digest, in cur.fetchall()}
+
+    def delete(self, digests: typing.Collection[str]) -> int:
+        if len(digests) == 0:
+            return 0
+        with self._connection() as conn, conn.cursor(row_factory=tuple_row) as cur:
+            cur.execute("DELETE FROM checkpoint_message_blobs WHERE digest = ANY(%s) RETURNING length(blob)",
+                        (list(digests),))
+            return sum(length for length, in cur.fetchall())
+
+    @contextlib.contextmanager
+    def _connection(self) -> typing.Iterator[Connection]:
+        if isinstance(self.conn, ConnectionPool):
+            with self.conn.connection() as conn:
+                yield conn
+        else:
+            yield self.conn
+
+
+class PostgresCheckpointPruner(CheckpointPruner):
+    """
+    Prunes the saver's tables, each thread's deletes in one transaction.
+    """
+
+    def __init__(self, saver: PostgresSaver):
+        self.saver = saver
+
+    def thread_ids(self, after: typing.Optional[str], limit: int) -> typing.List[str]:
+        with self._transaction() as conn, conn.cursor(row_factory=tuple_row) as cur:
+            cur.execute("SELECT DISTINCT thread_id FROM checkpoints WHERE %s::text IS NULL OR thread_id > %s "
+                        "ORDER BY thread_id LIMIT %s", (after, after, limit))
+            return [thread_id for thread_id, in cur.fetchall()]
+
+    def checkpoints(self, thread_id: str) -> typing.List[CheckpointRef]:
+        with self._transaction() as conn, conn.cursor(row_factory=tuple_row) as cur:
+            cur.execute("SELECT checkpoint_ns, checkpoint_id, metadata ->> 'source' FROM checkpoints "
+                        "WHERE thread_id = %s ORDER BY checkpoint_ns, checkpoint_id", (thread_id,))
+            return [(checkpoint_ns, checkpoint_id, source) for checkpoint_ns, checkpoint_id, source in cur.fetchall()]
+
+    def prune(self, thread_id: str, checkpoint_ns: str, checkpoint_ids: typing.Collection[str]) -> int:
+        params = (thread_id, checkpoint_ns, list(checkpoint_ids))
+        with self._transaction() as conn, conn.cursor(row_factory=tuple_row) as cur:
+            cur.execute("DELETE FROM checkpoint_writes WHERE thread_id = %s AND checkpoint_ns = %s "
+                        "AND checkpoint_id = ANY(%s) RETURNING octet_length(blob)", params)
+            reclaimed = sum(size for size, in cur.fetchall())
+            cur.execute("DELETE FROM checkpoints WHERE thread_id = %s AND checkpoint_ns = %s "
+                        "AND checkpoint_id = ANY(%s) RETURNING pg_column_size(checkpoint) + pg_column_size(metadata)",
+                        params)
+            reclaimed += sum(size for size, in cur.fetchall())
+            cur.execute("DELETE FROM checkpoint_blobs b WHERE b.thread_id = %s AND b.checkpoint_ns = %s "
+                        "AND NOT EXISTS (SELECT 1 FROM checkpoints c WHERE c.thread_id = b.thread_id "
+                        "AND c.checkpoint_ns = b.checkpoint_ns "
+                        "AND c.checkpoint -> 'channel_versions' ->> b.channel = b.version) "
+                        "RETURNING coalesce(octet_length(b.blob), 0)", (thread_id, checkpoint_ns))
+            return reclaimed + sum(size for size, in cur.fetchall())
+
+    @contextlib.contextmanager
+    def _transaction(self) -> typing.Iterator[Connection]:
+        if isinstance(self.saver.conn, ConnectionPool):
+            with self.saver.conn.connection() as conn, conn.transaction():
+                yield conn
+        else:
+            # the saver's connection is shared across threads, each taking the saver's lock to use it.
+            with self.saver.lock, self.saver.conn.transaction():
+                yield self.saver.conn
@@ -0,0 +1,103 @@
+import json
+import threading
+import typing
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, FunctionMessage, ToolMessage
+from langgraph.checkpoint.serde.base import SerializerProtocol
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from pydantic import BaseModel
+
+ZSTD_SUFFIX = '+zstd'
+
+MSGPACK_TYPES = {'null', 'bytes', 'bytearray', 'json', 'msgpack'}
+
+
+TYPE_REGISTRY = {
+    'ai': AIMessage,
+    'human': HumanMessage,
+    'system': SystemMessage,
+    'function': FunctionMessage,
+    'tool': ToolMessage,
+}
+
+
+class JsonSerializationProtocol:
+    """
+    Untyped json serialization of checkpoints, wrapped with SerializerCompat.
+    """
+
+    def dumps(self, obj: typing.Any) -> bytes:
+        if isinstance(obj, BaseModel):
+            obj = obj.model_dump()
+
+        elif isinstance(obj, typing.Collection) and not isinstance(obj, str):
+            obj = [
+                o.model_dump() if isinstance(o, BaseModel) else o
+                for o in obj
+            ]
+
+        return json.dumps(obj).encode('utf-8')
+
+    def loads(self, data: bytes) -> typing.Any:
+        obj = json.loads(data)
+
+        if isinstance(obj, dict) and 'type' in obj and obj['type'] in TYPE_REGISTRY:
+            return TYPE_REGISTRY[obj['type']](**obj)
+
+        if isinstance(obj, list):
+            return [
+                TYPE_REGISTRY[o['type']](**o) if isinstance(o, dict) and 'type' in o and o['type'] in TYPE_REGISTRY else o
+                for o in obj
+            ]
+
+        return obj
+
+
+class MsgpackCheckpointSerializer(JsonPlusSerializer):
+    """
+    Serializes checkpoint channel values and writes with msgpack, compressing those of at least compress_min_bytes
+    with zstd when zstd_level is set. Compressed values are stored with a +zstd suffix on their type, so compression
+    can be switched on or off against an existing checkpoint store.
+
+    Values stored by another serializer, such as the JSON serializer checkpoints were written with before, are read
+    with legacy.
+    """
+
+    def __init__(self, zstd_level: typing.Optional[int] = None, compress_min_bytes: int = 1024,
+                 legacy: typing.Optional[SerializerProtocol] = None):
+        super().__init__()
+        self.zstd_level = zstd_level
+        self.compress_min_bytes = compress_min_bytes
+        self.legacy = legacy
+        self._zstd = threading.local()
+
+    def dumps_typed(self, obj: typing.Any) -> typing.Tuple[str, bytes]:
+        type_, data = super().dumps_typed(obj)
+        if self.zstd_level is None or len(data) < self.compress_min_bytes:
+            return type_, data
+        return type_ + ZSTD_SUFFIX, self._compressor().compress(data)
+
+    def loads_typed(self, data: typing.Tuple[str, bytes]) -> typing.Any:
+        type_, data_ = data
+        if type_.endswith(ZSTD_SUFFIX):
+            type_, data_ = type_[:-len(ZSTD_SUFFIX)], self._decompressor().decompress(data_)
+        if type_ not in MSGPACK_TYPES and self.legacy is not None:
+            return self.legacy.loads_typed((type_, data_))
+        return super().loads_typed((type_, data_))
+
+    def _compressor(self):
+        # zstd contexts are not thread safe, and checkpoints are written from every agent's thread.
+        compressor = getattr(self._zstd, 'compressor', None)
+        if compressor is None:
+            import zstandard
+            compressor = zstandard.ZstdCompressor(level=self.zstd_level)
+            self._zstd.compressor = compressor
+        return compressor
+
+    def _decompressor(self):
+        decompressor = getattr(self._zstd, 'decompressor', None)
+        if decompressor is None:
+            import zstandard
+            decompressor = zstandard.ZstdDecompressor()
+            self._zstd.decompressor = decompressor
+        return decompressor
@@ -0,0 +1,376 @@
+import asyncio
+import contextlib
+import os
+import random
+import sqlite3
+import threading
+import typing
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import BaseCheckpointSaver, Checkpoint, CheckpointMetadata, CheckpointTuple, \
+    ChannelVersions, WRITES_IDX_MAP, get_checkpoint_id, get_checkpoint_metadata
+from langgraph.checkpoint.serde.base import SerializerProtocol
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.checkpoint.serde.types import TASKS
+
+from cdc_agents.checkpoint.compaction import CheckpointPruner, CheckpointRef
+from cdc_agents.checkpoint.message_blobs import MessageBlobStore, MessageBlob
+
+
+class SqliteSaver(BaseCheckpointSaver):
+    """
+    Checkpoints in a local SQLite database, for single-node deployments that should keep their sessions across
+    restarts without running Postgres.
+
+    The database is in WAL mode with synchronous=NORMAL, so a commit appends to the log without waiting on fsync -
+    a crash of the process loses nothing, a power loss at most the last commits. Channel values are stored once per
+    version, as PostgresSaver stores them. Each write is its own transaction unless written in a batch(), so wrap the
+    saver with WriteBehindSaver to commit a step's writes together from its flush thread.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, serde: typing.Optional[SerializerProtocol] = None):
+        super().__init__(serde=serde)
+        self.conn = conn
+        # the checkpoints and metadata themselves, as PostgresSaver stores them as jsonb whatever the serde.
+        self.jsonplus_serde = JsonPlusSerializer()
+        self._lock = threading.RLock()
+        self._in_transaction = False
+
+    @classmethod
+    def from_path(cls, path: str, serde: typing.Optional[SerializerProtocol] = None) -> 'SqliteSaver':
+        path = os.path.expanduser(path)
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA busy_timeout=5000')
+        return cls(conn, serde)
+
+    def setup(self):
+        with self.transaction() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS checkpoints (
+                    thread_id TEXT NOT NULL,
+                    checkpoint_ns TEXT NOT NULL DEFAULT '',
+                    checkpoint_id TEXT NOT NULL,
+                    parent_checkpoint_id TEXT,
+                    checkpoint BLOB NOT NULL,
+                    metadata BLOB NOT NULL,
+                    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+                )""")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS checkpoint_blobs (
+                    thread_id TEXT NOT NULL,
+                    checkpoint_ns TEXT NOT NULL DEFAULT '',
+                    channel TEXT NOT NULL,
+                    version TEXT NOT NULL,
+                    type TEXT NOT NULL,
+                    blob BLOB,
+                    PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+                )""")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS checkpoint_writes (
+                    thread_id TEXT NOT NULL,
+                    checkpoint_ns TEXT NOT NULL DEFAULT '',
+                    checkpoint_id TEXT NOT NULL,
+                    task_id TEXT NOT NULL,
+                    idx INTEGER NOT NULL,
+                    channel TEXT NOT NULL,
+                    type TEXT,
+                    blob BLOB NOT NULL,
+                    task_path TEXT NOT NULL DEFAULT '',
+                    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+                )""")
+
+    @contextlib.contextmanager
+    def connection(self) -> typing.Iterator[sqlite3.Connection]:
+        """
+        The connection, held by the calling thread.
+        """
+        with self._lock:
+            yield self.conn
+
+    @contextlib.contextmanager
+    def transaction(self) -> typing.Iterator[sqlite3.Connection]:
+        """
+        The connection, held by the calling thread in one transaction - joining the transaction already open when
+        nested.
+        """
+        with self._lock:
+            if self._in_transaction:
+                yield self.conn
+                return
+            self.conn.execute('BEGIN IMMEDIATE')
+            self._in_transaction = True
+            try:
+                yield self.conn
+            except BaseException:
+                self.conn.execute('ROLLBACK')
+                raise
+            else:
+                self.conn.execute('COMMIT')
+            finally:
+                self._in_transaction = False
+
+    @contextlib.contextmanager
+    def batch(self) -> typing.Iterator['SqliteSaver']:
+        """
+        The saver, its writes committed in one transaction.
+        """
+        with self.transaction():
+            yield self
+
+    def put(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+            new_versions: ChannelVersions) -> RunnableConfig:
+        thread_id = config['configurable']['thread_id']
+        checkpoint_ns = config['configurable'].get('checkpoint_ns', '')
+        c = checkpoint.copy()
+        c.pop('pending_sends', None)
+        values = c.pop('channel_values')
+        blobs = [(thread_id, checkpoint_ns, channel, version,
+                  *(self.serde.dumps_typed(values[channel]) if channel in values else ('empty', None)))
+                 for channel, version in new_versions.items()]
+        with self.transaction() as conn:
+            conn.executemany("INSERT OR IGNORE INTO checkpoint_blobs "
+                             "(thread_id, checkpoint_ns, channel, version, type, blob) VALUES (?, ?, ?, ?, ?, ?)",
+                             blobs)
+            conn.execute("INSERT OR REPLACE INTO checkpoints "
+                         "(thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, checkpoint, metadata) "
+                         "VALUES (?, ?, ?, ?, ?, ?)",
+                         (thread_id, checkpoint_ns, checkpoint['id'], config['configurable'].get('checkpoint_id'),
+                          self.jsonplus_serde.dumps(c),
+                          self.jsonplus_serde.dumps(get_checkpoint_metadata(config, metadata))))
+        return {'configurable': {'thread_id': thread_id, 'checkpoint_ns': checkpoint_ns,
+                                 'checkpoint_id': checkpoint['id']}}
+
+    def put_writes(self, config: RunnableConfig, writes: typing.Sequence[typing.Tuple[str, typing.Any]], task_id: str,
+                   task_path: str = '') -> None:
+        thread_id = config['configurable']['thread_id']
+        checkpoint_ns = config['configurable'].get('checkpoint_ns', '')
+        checkpoint_id = config['configurable']['checkpoint_id']
+        # special writes, such as errors, replace the ones before - the others are written once.
+        upsert = all(c in WRITES_IDX_MAP for c, _ in writes)
+        rows = [(thread_id, checkpoint_ns, checkpoint_id, task_id, WRITES_IDX_MAP.get(c, idx), c,
+                 *self.serde.dumps_typed(v), task_path)
+                for idx, (c, v) in enumerate(writes)]
+        with self.transaction() as conn:
+            conn.executemany(f"INSERT OR {'REPLACE' if upsert else 'IGNORE'} INTO checkpoint_writes "
+                             "(thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, type, blob, task_path) "
+                             "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def get_tuple(self, config: RunnableConfig) -> typing.Optional[CheckpointTuple]:
+        config = {**config, 'configurable': {'checkpoint_ns': '', **config['configurable']}}
+        for checkpoint_tuple in self.list(config, limit=1):
+            return checkpoint_tuple
+        return None
+
+    def list(self, config: typing.Optional[RunnableConfig], *, filter: typing.Optional[typing.Dict[str, typing.Any]] = None,
+             before: typing.Optional[RunnableConfig] = None, limit: typing.Optional[int] = None) \
+            -> typing.Iterator[CheckpointTuple]:
+        where, params = [], []
+        if config is not None:
+            where.append('thread_id = ?')
+            params.append(config['configurable']['thread_id'])
+            if config['configurable'].get('checkpoint_ns') is not None:
+                where.append('checkpoint_ns = ?')
+                params.append(config['configurable']['checkpoint_ns'])
+            if checkpoint_id := get_checkpoint_id(config):
+                where.append('checkpoint_id = ?')
+                params.append(checkpoint_id)
+        if before is not None and (before_checkpoint_id := get_checkpoint_id(before)):
+            where.append('checkpoint_id < ?')
+            params.append(before_checkpoint_id)
+        query = ("SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, checkpoint, metadata "
+                 f"FROM checkpoints {'WHERE ' + ' AND '.join(where) if where else ''} "
+                 "ORDER BY checkpoint_id DESC")
+        # a filter is matched against the decoded metadata, so only the rows after it are limited.
+        if limit is not None and not filter:
+            query += " LIMIT ?"
+            params.append(limit)
+
+        # materialized while holding the connection, which is shared with the writes.
+        with self.connection() as conn:
+            tuples = []
+            for thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, checkpoint, metadata in \
+                    conn.execute(query, params):
+                metadata = self.jsonplus_serde.loads(metadata)
+                if filter and not all(v == metadata.get(k) for k, v in filter.items()):
+                    continue
+                if limit is not None and len(tuples) >= limit:
+                    break
+                tuples.append(self._load_tuple(conn, thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id,
+                                               self.jsonplus_serde.loads(checkpoint), metadata))
+        return iter(tuples)
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self.transaction() as conn:
+            for table in ['checkpoints', 'checkpoint_blobs', 'checkpoint_writes']:
+                conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+
+    def get_next_version(self, current, channel):
+        current_v = 0 if current is None else current if isinstance(current, int) else int(current.split('.')[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    async def aput(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+                   new_versions: ChannelVersions) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config: RunnableConfig, writes: typing.Sequence[typing.Tuple[str, typing.Any]],
+                          task_id: str, task_path: str = '') -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def aget_tuple(self, config: RunnableConfig) -> typing.Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config: typing.Optional[RunnableConfig], *,
+                    filter: typing.Optional[typing.Dict[str, typing.Any]] = None,
+                    before: typing.Optional[RunnableConfig] = None, limit: typing.Optional[int] = None) \
+            -> typing.AsyncIterator[CheckpointTuple]:
+        for checkpoint_tuple in await asyncio.to_thread(
+                lambda: list(self.list(config, filter=filter, before=before, limit=limit))):
+            yield checkpoint_tuple
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def close(self):
+        with self.connection() as conn:
+            conn.close()
+
+    def _load_tuple(self, conn: sqlite3.Connection, thread_id: str, checkpoint_ns: str, checkpoint_id: str,
+                    parent_checkpoint_id: typing.Optional[str], checkpoint: Checkpoint,
+                    metadata: CheckpointMetadata) -> CheckpointTuple:
+        channel_values = {}
+        for channel, version in checkpoint['channel_versions'].items():
+            row = conn.execute("SELECT type, blob FROM checkpoint_blobs WHERE thread_id = ? AND checkpoint_ns = ? "
+                               "AND channel = ? AND version = ?",
+                               (thread_id, checkpoint_ns, channel, str(version))).fetchone()
+            if row is not None and row[0] != 'empty':
+                channel_values[channel] = self.serde.loads_typed((row[0], row[1]))
+        pending_writes = [(task_id, channel, self.serde.loads_typed((type_, blob))) for task_id, channel, type_, blob in
+                          conn.execute("SELECT task_id, channel, type, blob FROM checkpoint_writes WHERE thread_id = ? "
+                                       "AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_id, idx",
+                                       (thread_id, checkpoint_ns, checkpoint_id))]
+        pending_sends = []
+        if parent_checkpoint_id:
+            pending_sends = [self.serde.loads_typed((type_, blob)) for type_, blob in conn.execute(
+                "SELECT type, blob FROM checkpoint_writes WHERE thread_id = ? AND checkpoint_ns = ? "
+                "AND checkpoint_id = ? AND channel = ? ORDER BY task_path, task_id, idx",
+                (thread_id, checkpoint_ns, parent_checkpoint_id, TASKS))]
+        return CheckpointTuple(
+            config={'configurable': {'thread_id': thread_id, 'checkpoint_ns': checkpoint_ns,
+                                     'checkpoint_id': checkpoint_id}},
+            checkpoint={**checkpoint, 'channel_values': channel_values, 'pending_sends': pending_sends},
+            metadata=metadata,
+            parent_config={'configurable': {'thread_id': thread_id, 'checkpoint_ns': checkpoint_ns,
+                                            'checkpoint_id': parent_checkpoint_id}} if parent_checkpoint_id else None,
+            pending_writes=pending_writes)
+
+
+class SqliteCheckpointPruner(CheckpointPruner):
+    """
+    Prunes the saver's tables, each thread's deletes in one transaction.
+    """
+
+    def __init__(self, saver: SqliteSaver):
+        self.saver = saver
+
+    def thread_ids(self, after: typing.Optional[str], limit: int) -> typing.List[str]:
+        with self.saver.connection() as conn:
+            return [thread_id for thread_id, in conn.execute(
+                "SELECT DISTINCT thread_id FROM checkpoints WHERE ? IS NULL OR thread_id > ? ORDER BY thread_id LIMIT ?",
+                (after, after, limit))]
+
+    def checkpoints(self, thread_id: str) -> typing.List[CheckpointRef]:
+        with self.saver.connection() as conn:
+            rows = conn.execute("SELECT checkpoint_ns, checkpoint_id, metadata FROM checkpoints WHERE thread_id = ? "
+                                "ORDER BY checkpoint_ns, checkpoint_id", (thread_id,)).fetchall()
+        return [(checkpoint_ns, checkpoint_id, self.saver.jsonplus_serde.loads(metadata).get('source'))
+                for checkpoint_ns, checkpoint_id, metadata in rows]
+
+    def prune(self, thread_id: str, checkpoint_ns: str, checkpoint_ids: typing.Collection[str]) -> int:
+        checkpoint_ids = list(checkpoint_ids)
+        reclaimed = 0
+        with self.saver.transaction() as conn:
+            for i in range(0, len(checkpoint_ids), 500):
+                chunk = checkpoint_ids[i:i + 500]
+                in_chunk = f"checkpoint_id IN ({', '.join('?' * len(chunk))})"
+                params = (thread_id, checkpoint_ns, *chunk)
+                reclaimed += conn.execute(
+                    f"SELECT coalesce(sum(length(blob)), 0) FROM checkpoint_writes WHERE thread_id = ? "
+                    f"AND checkpoint_ns = ? AND {in_chunk}", params).fetchone()[0]
+                reclaimed += conn.execute(
+                    f"SELECT coalesce(sum(length(checkpoint) + length(metadata)), 0) FROM checkpoints "
+                    f"WHERE thread_id = ? AND checkpoint_ns = ? AND {in_chunk}", params).fetchone()[0]
+                conn.execute(f"DELETE FROM checkpoint_writes WHERE thread_id = ? AND checkpoint_ns = ? AND {in_chunk}",
+                             params)
+                conn.execute(f"DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND {in_chunk}",
+                             params)
+
+            referenced = set()
+            for checkpoint, in conn.execute("SELECT checkpoint FROM checkpoints WHERE thread_id = ? "
+                                            "AND checkpoint_ns = ?", (thread_id, checkpoint_ns)):
+                versions = self.saver.jsonplus_serde.loads(checkpoint)['channel_versions']
+                referenced.update((channel, str(version)) for channel, version in versions.items())
+            blobs = conn.execute("SELECT channel, version, coalesce(length(blob), 0) FROM checkpoint_blobs "
+                                 "WHERE thread_id = ? AND checkpoint_ns = ?", (thread_id, checkpoint_ns)).fetchall()
+            unreferenced = [(channel, version, size) for channel, version, size in blobs
+                            if (channel, version) not in referenced]
+            conn.executemany("DELETE FROM checkpoint_blobs WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? "
+                             "AND version = ?", [(thread_id, checkpoint_ns, c, v) for c, v, _ in unreferenced])
+            return reclaimed + sum(size for _, _, size in unreferenced)
+
+
+class SqliteMessageBlobStore(MessageBlobStore):
+    """
+    Message blobs in the saver's SQLite database, written in the same transaction as the checkpoints.
+    """
+
+    def __init__(self, saver: SqliteSaver):
+        self.saver = saver
+
+    def setup(self):
+        with self.saver.transaction() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS checkpoint_message_blobs (
+                    digest TEXT PRIMARY KEY,
+                    type TEXT NOT NULL,
+                    blob BLOB NOT NULL
+                )""")
+
+    def put(self, blobs: typing.Dict[str, MessageBlob]) -> None:
+        if len(blobs) == 0:
+            return
+        with self.saver.transaction() as conn:
+            conn.executemany("INSERT OR IGNORE INTO checkpoint_message_blobs (digest, type, blob) VALUES (?, ?, ?)",
+                             [(digest, type_, blob) for digest, (type_, blob) in blobs.items()])
+
+    def get(self, digests: typing.Collection[str]) -> typing.Dict[str, MessageBlob]:
+        digests = list(digests)
+        found = {}
+        with self.saver.connection() as conn:
+            # within sqlite's default limit on the number of query parameters.
+            for i in range(0, len(digests), 500):
+                chunk = digests[i:i + 500]
+                for digest, type_, blob in conn.execute(
+                        "SELECT digest, type, blob FROM checkpoint_message_blobs "
+                        f"WHERE digest IN ({', '.join('?' * len(chunk))})", chunk):
+                    found[digest] = (type_, bytes(blob))
+        return found
+
+    def digests(self) -> typing.Set[str]:
+        with self.saver.connection() as conn:
+            return {digest for digest, in conn.execute("SELECT digest FROM checkpoint_message_blobs")}
+
+    def delete(self, digests: typing.Collection[str]) -> int:
+        digests = list(digests)
+        reclaimed = 0
+        with self.saver.transaction() as conn:
+            for i in range(0, len(digests), 500):
+                chunk = digests[i:i + 500]
+                in_chunk = f"digest IN ({', '.join('?' * len(chunk))})"
+                reclaimed += conn.execute("SELECT COALESCE(SUM(LENGTH(blob)), 0) FROM checkpoint_message_blobs "
+                                          f"WHERE {in_chunk}", chunk).fetchone()[0]
+                conn.execute(f"DELETE FROM checkpoint_message_blobs WHERE {in_chunk}", chunk)
+        return reclaimed
@@ -0,0 +1,163 @@
+import asyncio
+import contextlib
+import threading
+import typing
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import BaseCheckpointSaver, Checkpoint, CheckpointMetadata, CheckpointTuple, \
+    ChannelVersions
+
+from python_util.logger.logger import LoggerFacade
+
+
+class WriteBehindSaver(BaseCheckpointSaver):
+    """
+    Buffers the checkpoints and writes of every step and flushes them to saver in batches - once max_pending_writes are
+    buffered, every flush_interval_seconds, and before any read, so reads always see every write. When saver has a
+    batch() context, as PooledPostgresSaver does, each flush is written on one connection in one transaction instead
+    of a transaction per intermediate checkpoint.
+
+    Values are serialized as they are buffered, so that a value that cannot be stored fails the session writing it
+    rather than a later flush. When a batch fails, its writes are retried one at a time, and a write failing
+    max_flush_attempts times is dropped - reads do not see writes waiting to be retried.
+
+    Writes buffered when the process stops are lost, at most flush_interval_seconds of them unless close is called.
+    """
+
+    def __init__(self, saver: BaseCheckpointSaver, max_pending_writes: int = 64, flush_interval_seconds: float = 0.5,
+                 max_flush_attempts: int = 3):
+        super().__init__(serde=saver.serde)
+        self.saver = saver
+        self.max_pending_writes = max_pending_writes
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_flush_attempts = max_flush_attempts
+        self.stats = {'writes': 0, 'flushes': 0, 'dropped': 0}
+        # (method, args, failed flush attempts)
+        self._pending: typing.List[typing.Tuple[str, tuple, int]] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_periodically, name='checkpoint-write-behind', daemon=True)
+        self._flusher.start()
+
+    def put(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+            new_versions: ChannelVersions) -> RunnableConfig:
+        self._buffer('put', (config, checkpoint, metadata, new_versions))
+        return {'configurable': {'thread_id': config['configurable']['thread_id'],
+                                 'checkpoint_ns': config['configurable'].get('checkpoint_ns', ''),
+                                 'checkpoint_id': checkpoint['id']}}
+
+    def put_writes(self, config: RunnableConfig, writes: typing.Sequence[typing.Tuple[str, typing.Any]], task_id: str,
+                   task_path: str = '') -> None:
+        self._buffer('put_writes', (config, writes, task_id, task_path))
+
+    def get_tuple(self, config: RunnableConfig) -> typing.Optional[CheckpointTuple]:
+        self.flush()
+        return self.saver.get_tuple(config)
+
+    def list(self, config: typing.Optional[RunnableConfig], *, filter: typing.Optional[typing.Dict[str, typing.Any]] = None,
+             before: typing.Optional[RunnableConfig] = None, limit: typing.Optional[int] = None) \
+            -> typing.Iterator[CheckpointTuple]:
+        self.flush()
+        return self.saver.list(config, filter=filter, before=before, limit=limit)
+
+    def delete_thread(self, thread_id: str) -> None:
+        self.flush()
+        self.saver.delete_thread(thread_id)
+
+    def get_next_version(self, current, channel):
+        return self.saver.get_next_version(current, channel)
+
+    async def aput(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+                   new_versions: ChannelVersions) -> RunnableConfig:
+        return self.put(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config: RunnableConfig, writes: typing.Sequence[typing.Tuple[str, typing.Any]],
+                          task_id: str, task_path: str = '') -> None:
+        self.put_writes(config, writes, task_id, task_path)
+
+    async def aget_tuple(self, config: RunnableConfig) -> typing.Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config: typing.Optional[RunnableConfig], *,
+                    filter: typing.Optional[typing.Dict[str, typing.Any]] = None,
+                    before: typing.Optional[RunnableConfig] = None, limit: typing.Optional[int] = None) \
+            -> typing.AsyncIterator[CheckpointTuple]:
+        for checkpoint_tuple in await asyncio.to_thread(
+                lambda: list(self.list(config, filter=filter, before=before, limit=limit))):
+            yield checkpoint_tuple
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, []
+            if len(pending) == 0:
+                return
+            try:
+                with self._batch() as saver:
+                    for method, args, _ in pending:
+                        getattr(saver, method)(*args)
+                written, retried = len(pending), []
+            except Exception as e:
+                # nothing of a failed batch is committed when the saver writes it in one transaction.
+                LoggerFacade.warn(f"Failed to flush {len(pending)} buffered checkpoint writes in a batch - writing "
+                                  f"them one at a time: {e}")
+                written, retried = self._write_each(pending)
+            with self._lock:
+                self._pending[:0] = retried
+                self.stats['writes'] += written
+                self.stats['flushes'] += 1
+
+    def _write_each(self, pending: typing.List[typing.Tuple[str, tuple, int]]) \
+            -> typing.Tuple[int, typing.List[typing.Tuple[str, tuple, int]]]:
+        written, retried = 0, []
+        for method, args, attempts in pending:
+            try:
+                getattr(self.saver, method)(*args)
+                written += 1
+            except Exception as e:
+                if attempts + 1 < self.max_flush_attempts:
+                    retried.append((method, args, attempts + 1))
+                    continue
+                LoggerFacade.error(f"Dropping buffered checkpoint {method} of thread "
+                                   f"{args[0]['configurable'].get('thread_id')} after {attempts + 1} failed flushes: {e}")
+                with self._lock:
+                    self.stats['dropped'] += 1
+        return written, retried
+
+    def close(self):
+        self._closed.set()
+        self._flusher.join()
+        self.flush()
+
+    def _buffer(self, method: str, args: tuple):
+        for value in self._values(method, args):
+            self.serde.dumps_typed(value)
+        with self._lock:
+            self._pending.append((method, args, 0))
+            full = len(self._pending) >= self.max_pending_writes
+        if full:
+            self.flush()
+
+    @staticmethod
+    def _values(method: str, args: tuple) -> typing.Iterator[typing.Any]:
+        if method == 'put':
+            _, checkpoint, _, new_versions = args
+            channel_values = checkpoint['channel_values']
+            yield from (channel_values[c] for c in new_versions if c in channel_values)
+        else:
+            yield from (value for _, value in args[1])
+
+    def _batch(self):
+        batch = getattr(self.saver, 'batch', None)
+        return batch() if batch is not None else contextlib.nullcontext(self.saver)
+
+    def _flush_periodically(self):
+        while not self._closed.wait(self.flush_interval_seconds):
+            try:
+                self.flush()
+            except Exception as e:
+                LoggerFacade.error(f"Failed to flush buffered checkpoint writes: {e}")
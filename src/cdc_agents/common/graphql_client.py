@@ -0,0 +1,106 @@
+import atexit
+import typing
+from typing import Any, Dict, Type
+
+import httpx
+import injector
+
+from cdc_agents.common.graphql_models import parse_graphql_result, T
+from cdc_agents.common.graphql_operations import GraphQLOperation, request_payload, response_json, \
+    persisted_query_error, PERSISTED_QUERY_NOT_SUPPORTED
+from cdc_agents.config.cdc_server_config_props import CdcServerConfigProps
+from cdc_agents.util.nest_async_util import background_loop
+from python_di.configs.autowire import injectable
+from python_di.configs.component import component
+from python_util.logger.logger import LoggerFacade
+
+
+@component()
+@injectable()
+class GraphQLClient:
+    """
+    Keep-alive connection pool to the CDC server's GraphQL endpoint, shared by all agents' tools. The async client is
+    bound to the background event loop, so aexecute can be awaited from any loop without holding a thread. With
+    persisted_queries, registered operations are sent by their sha256 and the full document only when the server has
+    not seen it yet.
+    """
+
+    @injector.inject
+    def __init__(self, cdc_server: CdcServerConfigProps):
+        self.cdc_server = cdc_server
+        self.background = background_loop()
+        self.client = httpx.Client(timeout=self._timeout(), limits=self._limits())
+        self._async_client: typing.Optional[httpx.AsyncClient] = None
+        self.persisted_queries = cdc_server.persisted_queries
+        atexit.register(self.close)
+
+    def execute(self, endpoint: typing.Optional[str], query: typing.Union[str, GraphQLOperation],
+                variables: Dict[str, Any], result_key: str, model_class: Type[T]) -> T:
+        endpoint = endpoint or self.cdc_server.graphql_endpoint
+        persisted = self._persisted(query)
+        try:
+            body = self._post(endpoint, request_payload(query, variables, persisted), persisted)
+            if persisted and (error := persisted_query_error(body)) is not None:
+                register = self._register(query, error)
+                body = self._post(endpoint, request_payload(query, variables, register, register=True), register)
+            return parse_graphql_result(body, result_key, model_class)
+        except Exception as e:
+            LoggerFacade.error(f"GraphQL request:\n{query}\n{variables} failed: {str(e)}")
+            raise e
+
+    async def aexecute(self, endpoint: typing.Optional[str], query: typing.Union[str, GraphQLOperation],
+                       variables: Dict[str, Any], result_key: str, model_class: Type[T]) -> T:
+        return await self.background.arun(self._aexecute(endpoint, query, variables, result_key, model_class))
+
+    def close(self):
+        self.client.close()
+        if self._async_client is not None:
+            async_client, self._async_client = self._async_client, None
+            try:
+                self.background.run(async_client.aclose(), timeout=5)
+            except Exception as e:
+                LoggerFacade.debug(f"Failed to close async GraphQL client: {e}")
+
+    async def _aexecute(self, endpoint, query, variables, result_key, model_class):
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(timeout=self._timeout(), limits=self._limits())
+        endpoint = endpoint or self.cdc_server.graphql_endpoint
+        persisted = self._persisted(query)
+        try:
+            body = await self._apost(endpoint, request_payload(query, variables, persisted), persisted)
+            if persisted and (error := persisted_query_error(body)) is not None:
+                register = self._register(query, error)
+                body = await self._apost(endpoint, request_payload(query, variables, register, register=True),
+                                         register)
+            return parse_graphql_result(body, result_key, model_class)
+        except Exception as e:
+            LoggerFacade.error(f"GraphQL request:\n{query}\n{variables} failed: {str(e)}")
+            raise e
+
+    def _post(self, endpoint, payload, persisted):
+        return response_json(self.client.post(endpoint, json=payload), persisted)
+
+    async def _apost(self, endpoint, payload, persisted):
+        return response_json(await self._async_client.post(endpoint, json=payload), persisted)
+
+    def _persisted(self, query) -> bool:
+        return self.persisted_queries and isinstance(query, GraphQLOperation)
+
+    def _register(self, operation: GraphQLOperation, error: str) -> bool:
+        """
+        Whether to send the document again under its hash, for the server to store, or to stop persisting queries
+        because the server does not support them.
+        """
+        if error == PERSISTED_QUERY_NOT_SUPPORTED:
+            LoggerFacade.warn("CDC server does not support persisted queries - sending full GraphQL documents.")
+            self.persisted_queries = False
+            return False
+        LoggerFacade.debug(f"Registering persisted query {operation.name} with the CDC server.")
+        return True
+
+    def _timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(self.cdc_server.timeout_seconds, connect=self.cdc_server.connect_timeout_seconds)
+
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(max_connections=self.cdc_server.max_connections,
+                            max_keepalive_connections=self.cdc_server.max_keepalive_connections)
@@ -1,8 +1,10 @@
 import typing
 from typing import TypeVar, Type, cast
 
-import requests
+import httpx
 
+from cdc_agents.common.graphql_operations import GraphQLOperation, request_payload, response_json, \
+    persisted_query_error, PERSISTED_QUERY_NOT_FOUND
 from python_util.logger.logger import LoggerFacade
 
 T = TypeVar('T')
@@ -571,23 +573,50 @@ class GraphQLResponse(BaseModel):
     errors: Optional[List[Dict[str, Any]]] = None
 
 
+def parse_graphql_result(response_json: Dict[str, Any], result_key: str, model_class: Type[T]) -> T:
+    result_data = (response_json.get("data") or {}).get(result_key, {})
+
+    # Safely handle model instantiation regardless of Pydantic version
+    try:
+        # Try Pydantic v2 style
+        if hasattr(model_class, 'model_validate'):
+            return model_class.model_validate(result_data)
+        # Try Pydantic v1 style
+        elif hasattr(model_class, 'parse_obj'):
+            return model_class.parse_obj(result_data)
+        # Fallback to direct instantiation
+        else:
+            return cast(T, model_class(**result_data))
+    except TypeError:
+        # If all else fails, try direct instantiation
+        return cast(T, model_class(**result_data))
+
+
+_graphql_http_client = httpx.Client(timeout=httpx.Timeout(600.0, connect=10.0))
+
+
 def execute_graphql_request(
         endpoint: str,
-        query: str,
+        query: typing.Union[str, GraphQLOperation],
         variables: Dict[str, Any],
         result_key: str,
         model_class: Type[T],
-        err_producer: typing.Callable[[str], T] = None
+        err_producer: typing.Callable[[str], T] = None,
+        persisted_query: bool = False
 ) -> T:
     """Execute a GraphQL request and parse the response into the specified model.
 
+    Agents' tools use the GraphQLClient component instead, which has configurable timeouts and an async variant.
+
     Args:
         err_producer:
         endpoint: GraphQL endpoint URL
-        query: GraphQL query or mutation
+        query: GraphQL query or mutation, or a registered GraphQLOperation
         variables: Variables for the GraphQL query
         result_key: Key in the response data to extract
         model_class: Pydantic model class to parse the response into
+        persisted_query: Send a registered operation by its sha256 hash, falling back to the full document when the
+            server has not seen it
 
     Returns:
         Parsed response data as a Pydantic model
@@ -596,32 +625,16 @@ def execute_graphql_request(
         "Content-Type": "application/json",
     }
 
-    data = {
-        "query": query,
-        "variables": variables
-    }
+    persisted = persisted_query and isinstance(query, GraphQLOperation)
+    data = request_payload(query, variables, persisted)
 
     try:
-        response = requests.post(endpoint, headers=headers, json=data)
-        response.raise_for_status()
-
-        response_json = response.json()
-        result_data = response_json.get("data", {}).get(result_key, {})
-
-        # Safely handle model instantiation regardless of Pydantic version
-        try:
-            # Try Pydantic v2 style
-            if hasattr(model_class, 'model_validate'):
-                return model_class.model_validate(result_data)
-            # Try Pydantic v1 style
-            elif hasattr(model_class, 'parse_obj'):
-                return model_class.parse_obj(result_data)
-            # Fallback to direct instantiation
-            else:
-                return cast(T, model_class(**result_data))
-        except TypeError:
-            # If all else fails, try direct instantiation
-            return cast(T, model_class(**result_data))
+        body = response_json(_graphql_http_client.post(endpoint, headers=headers, json=data), persisted)
+        if persisted and (error := persisted_query_error(body)) is not None:
+            register = error == PERSISTED_QUERY_NOT_FOUND
+            data = request_payload(query, variables, register, register=True)
+            body = response_json(_graphql_http_client.post(endpoint, headers=headers, json=data), register)
+        return parse_graphql_result(body, result_key, model_class)
     except Exception as e:
         LoggerFacade.error(f"GraphQL request:\n{query}\n{data}\n{headers} failed: {str(e)}")
         raise e
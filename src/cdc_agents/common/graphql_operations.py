@@ -0,0 +1,170 @@
+import dataclasses
+import hashlib
+import re
+import textwrap
+import threading
+import typing
+from typing import Any, Dict, Optional
+
+import httpx
+
+OPERATION_HEADER = re.compile(r'^\s*(query|mutation|subscription)\s+([_A-Za-z][_0-9A-Za-z]*)\s*(\(([^)]*)\))?\s*\{')
+VARIABLE_REFERENCE = re.compile(r'\$([_A-Za-z][_0-9A-Za-z]*)')
+
+PERSISTED_QUERY_NOT_FOUND = 'PersistedQueryNotFound'
+PERSISTED_QUERY_NOT_SUPPORTED = 'PersistedQueryNotSupported'
+
+
+class GraphQLOperationError(ValueError):
+    pass
+
+
+@dataclasses.dataclass(frozen=True)
+class GraphQLOperation:
+    """
+    A named GraphQL document, minified and hashed once so each request only serializes it, or only its hash when the
+    server supports automatic persisted queries.
+    """
+    operation_type: str
+    name: str
+    document: str
+    sha256: str
+
+    def payload(self, variables: Dict[str, Any], persisted: bool = False,
+                register: bool = False) -> Dict[str, Any]:
+        """
+        The request body for this operation. A persisted payload carries the document's sha256 in place of the
+        document; the server answers PersistedQueryNotFound the first time it sees the hash, and the request is sent
+        again with register, carrying both so the server stores the document under its hash.
+        """
+        payload = {"operationName": self.name, "variables": variables}
+        if not persisted or register:
+            payload["query"] = self.document
+        if persisted:
+            payload["extensions"] = {"persistedQuery": {"version": 1, "sha256Hash": self.sha256}}
+        return payload
+
+    def __str__(self):
+        return self.document
+
+
+def minify_document(document: str) -> str:
+    """
+    Collapse the whitespace of a document. Documents with string literals or comments are only dedented, as their
+    whitespace can be significant.
+    """
+    if '"' in document or '#' in document:
+        return textwrap.dedent(document).strip()
+    minified = ' '.join(document.split())
+    return re.sub(r'\s*([{}():,!=\[\]])\s*', r'\1', minified)
+
+
+def validate_document(document: str) -> typing.Tuple[str, str]:
+    """
+    Checks a document holds exactly one named operation with balanced delimiters, and that every variable it
+    references is declared. Returns the operation type and name.
+    """
+    header = OPERATION_HEADER.match(document)
+    if header is None:
+        raise GraphQLOperationError(f"GraphQL document must start with a named operation:\n{document}")
+
+    depth = {'{': 0, '(': 0, '[': 0}
+    closing = {'}': '{', ')': '(', ']': '['}
+    closed_operations = 0
+    for c in document:
+        if c in depth:
+            depth[c] += 1
+        elif c in closing:
+            depth[closing[c]] -= 1
+            if depth[closing[c]] < 0:
+                raise GraphQLOperationError(f"Unbalanced '{c}' in GraphQL operation {header.group(2)}.")
+            if c == '}' and depth['{'] == 0:
+                closed_operations += 1
+    if any(depth.values()):
+        raise GraphQLOperationError(f"Unclosed delimiter in GraphQL operation {header.group(2)}.")
+    if closed_operations != 1:
+        raise GraphQLOperationError(f"GraphQL document for {header.group(2)} must contain exactly one operation.")
+
+    declared = set(VARIABLE_REFERENCE.findall(header.group(4) or ''))
+    body = document[header.end():]
+    undeclared = set(VARIABLE_REFERENCE.findall(body)) - declared
+    if undeclared:
+        raise GraphQLOperationError(f"GraphQL operation {header.group(2)} references undeclared variables "
+                                    f"{sorted(undeclared)}.")
+    return header.group(1), header.group(2)
+
+
+class GraphQLOperationRegistry:
+    """
+    Named GraphQL operations, validated and hashed when registered. Tools register their documents at import so a
+    malformed document fails at startup rather than on the first call.
+    """
+
+    def __init__(self):
+        self.operations: Dict[str, GraphQLOperation] = {}
+        self._lock = threading.Lock()
+
+    def register(self, document: str) -> GraphQLOperation:
+        operation_type, name = validate_document(document)
+        minified = minify_document(document)
+        with self._lock:
+            existing = self.operations.get(name)
+            if existing is not None:
+                if existing.document != minified:
+                    raise GraphQLOperationError(f"GraphQL operation {name} is already registered with a different "
+                                                f"document.")
+                return existing
+            operation = GraphQLOperation(operation_type, name, minified,
+                                         hashlib.sha256(minified.encode('utf-8')).hexdigest())
+            self.operations[name] = operation
+            return operation
+
+    def get(self, name: str) -> Optional[GraphQLOperation]:
+        return self.operations.get(name)
+
+
+graphql_operations = GraphQLOperationRegistry()
+
+
+def request_payload(query: typing.Union[str, GraphQLOperation], variables: Dict[str, Any],
+                    persisted: bool = False, register: bool = False) -> Dict[str, Any]:
+    """
+    Raw documents are sent as they are; only registered operations can be sent as persisted queries.
+    """
+    if isinstance(query, GraphQLOperation):
+        return query.payload(variables, persisted, register)
+    return {"query": query, "variables": variables}
+
+
+def response_json(response: httpx.Response, persisted: bool) -> Any:
+    """
+    The response body, raising for error statuses unless the server is only asking for the full document of a
+    persisted query, which some servers answer with a 400.
+    """
+    if response.is_error and persisted:
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+        if persisted_query_error(body) is not None:
+            return body
+    response.raise_for_status()
+    return response.json()
+
+
+def persisted_query_error(response_json: Any) -> Optional[str]:
+    """
+    PersistedQueryNotFound or PersistedQueryNotSupported when the server could not resolve a persisted query hash.
+    """
+    if not isinstance(response_json, dict):
+        return None
+    for error in response_json.get("errors") or []:
+        if not isinstance(error, dict):
+            continue
+        code = (error.get("extensions") or {}).get("code")
+        message = error.get("message")
+        if PERSISTED_QUERY_NOT_FOUND in (message, code) or code == 'PERSISTED_QUERY_NOT_FOUND':
+            return PERSISTED_QUERY_NOT_FOUND
+        if PERSISTED_QUERY_NOT_SUPPORTED in (message, code) or code == 'PERSISTED_QUERY_NOT_SUPPORTED':
+            return PERSISTED_QUERY_NOT_SUPPORTED
+    return None
@@ -1,4 +1,4 @@
 from .server import A2AServer
-from .task_manager import TaskManager, InMemoryTaskManager
+from .task_manager import TaskManager, InMemoryTaskManager, AsyncInMemoryTaskManager
 
-__all__ = ["A2AServer", "TaskManager", "InMemoryTaskManager"]
+__all__ = ["A2AServer", "TaskManager", "InMemoryTaskManager", "AsyncInMemoryTaskManager"]
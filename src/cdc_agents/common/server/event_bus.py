@@ -0,0 +1,239 @@
+import abc
+import collections
+import hashlib
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import typing
+
+logger = logging.getLogger(__name__)
+
+EventHandler = typing.Callable[[dict], None]
+
+
+def new_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class EventBus(abc.ABC):
+    """
+    Publishes messages, dicts of JSON values, to the handlers subscribed to their channel in every worker process
+    connected to the bus - including the publishing one. Handlers must not block, as other messages wait on them.
+    """
+
+    def __init__(self, worker_id: typing.Optional[str] = None):
+        self.worker_id = worker_id if worker_id is not None else new_worker_id()
+        self._handlers: typing.Dict[str, typing.List[EventHandler]] = collections.defaultdict(list)
+        self._handlers_lock = threading.RLock()
+
+    @abc.abstractmethod
+    def publish(self, channel: str, message: dict) -> None:
+        pass
+
+    def subscribe(self, channel: str, handler: EventHandler) -> typing.Callable[[], None]:
+        """
+        :return: a callable unsubscribing the handler.
+        """
+        with self._handlers_lock:
+            self._handlers[channel].append(handler)
+
+        def unsubscribe():
+            with self._handlers_lock:
+                if handler in self._handlers.get(channel, []):
+                    self._handlers[channel].remove(handler)
+                    if len(self._handlers[channel]) == 0:
+                        del self._handlers[channel]
+
+        return unsubscribe
+
+    def close(self):
+        pass
+
+    def _deliver(self, channel: str, message: dict):
+        with self._handlers_lock:
+            handlers = list(self._handlers.get(channel, []))
+        for handler in handlers:
+            try:
+                handler(message)
+            except Exception as e:
+                logger.error(f"Event handler for {channel} failed: {e}")
+
+
+class LocalEventBus(EventBus):
+    """
+    Delivers messages within this process, for a single worker and in tests.
+    """
+
+    def publish(self, channel: str, message: dict) -> None:
+        self._deliver(channel, message)
+
+
+class PostgresEventBus(EventBus):
+    """
+    Delivers messages across workers and hosts with LISTEN/NOTIFY. Messages are delivered to this process's handlers
+    as they are published, and to other workers from a listening connection - one notification channel carries every
+    channel of the bus.
+
+    A notification holds at most 8000 bytes, so larger messages are written to a table and notified by id, and those
+    older than payload_ttl_seconds are deleted as new ones are written.
+    """
+
+    NOTIFY_CHANNEL = 'cdc_agents_events'
+    MAX_NOTIFY_BYTES = 7900
+
+    def __init__(self, uri: str, worker_id: typing.Optional[str] = None, payload_ttl_seconds: float = 300,
+                 reconnect_seconds: float = 1.0):
+        super().__init__(worker_id)
+        self.uri = uri
+        self.payload_ttl_seconds = payload_ttl_seconds
+        self.reconnect_seconds = reconnect_seconds
+        self._publish_lock = threading.Lock()
+        self._publish_conn = None
+        self._closed = threading.Event()
+        self._listening = threading.Event()
+        self._listener: typing.Optional[threading.Thread] = None
+
+    def setup(self):
+        with self._publish_lock:
+            self._connection().execute("""
+                CREATE TABLE IF NOT EXISTS event_payloads (
+                    id BIGSERIAL PRIMARY KEY,
+                    payload JSONB NOT NULL,
+                    created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+                )""")
+
+    def start(self) -> 'PostgresEventBus':
+        self._listener = threading.Thread(target=self._listen, name='event-bus-listener', daemon=True)
+        self._listener.start()
+        self._listening.wait(self.reconnect_seconds * 5)
+        return self
+
+    def publish(self, channel: str, message: dict) -> None:
+        self._deliver(channel, message)
+        notification = json.dumps({'origin': self.worker_id, 'channel': channel, 'message': message})
+        with self._publish_lock:
+            conn = self._connection()
+            if len(notification.encode('utf-8')) > self.MAX_NOTIFY_BYTES:
+                payload_id, = conn.execute("INSERT INTO event_payloads (payload) VALUES (%s) RETURNING id",
+                                           (notification,)).fetchone()
+                conn.execute("DELETE FROM event_payloads WHERE created_at < now() - make_interval(secs => %s)",
+                             (self.payload_ttl_seconds,))
+                notification = json.dumps({'origin': self.worker_id, 'payload_id': payload_id})
+            conn.execute("SELECT pg_notify(%s, %s)", (self.NOTIFY_CHANNEL, notification))
+
+    def close(self):
+        self._closed.set()
+        if self._listener is not None:
+            self._listener.join()
+        with self._publish_lock:
+            if self._publish_conn is not None:
+                self._publish_conn.close()
+
+    def _connection(self):
+        from psycopg import Connection
+        if self._publish_conn is None or self._publish_conn.closed:
+            self._publish_conn = Connection.connect(self.uri, autocommit=True)
+        return self._publish_conn
+
+    def _listen(self):
+        from psycopg import Connection
+        while not self._closed.is_set():
+            try:
+                with Connection.connect(self.uri, autocommit=True) as conn:
+                    conn.execute(f"LISTEN {self.NOTIFY_CHANNEL}")
+                    self._listening.set()
+                    while not self._closed.is_set():
+                        for notify in conn.notifies(timeout=self.reconnect_seconds):
+                            self._receive(conn, notify.payload)
+            except Exception as e:
+                if self._closed.is_set():
+                    return
+                # messages published while reconnecting are missed - subscribers see the task in the store.
+                logger.error(f"Event bus listener failed, reconnecting in {self.reconnect_seconds}s: {e}")
+                self._closed.wait(self.reconnect_seconds)
+
+    def _receive(self, conn, payload: str):
+        notification = json.loads(payload)
+        if notification.get('origin') == self.worker_id:
+            return
+        if 'payload_id' in notification:
+            row = conn.execute("SELECT payload FROM event_payloads WHERE id = %s",
+                               (notification['payload_id'],)).fetchone()
+            if row is None:
+                logger.warning(f"Event payload {notification['payload_id']} was deleted before it was received.")
+                return
+            notification = row[0] if isinstance(row[0], dict) else json.loads(row[0])
+        self._deliver(notification['channel'], notification['message'])
+
+
+class Workers:
+    """
+    The workers connected to an event bus, each publishing a heartbeat every heartbeat_seconds and live until it
+    misses three.
+
+    Keys such as session ids are assigned to live workers by rendezvous hashing, so every worker agrees on the owner
+    of a key, and a worker joining or leaving only moves the keys it takes or had.
+    """
+
+    CHANNEL = 'workers'
+
+    def __init__(self, event_bus: EventBus, heartbeat_seconds: float = 5,
+                 clock: typing.Callable[[], float] = time.monotonic):
+        self.event_bus = event_bus
+        self.worker_id = event_bus.worker_id
+        self.heartbeat_seconds = heartbeat_seconds
+        self.clock = clock
+        self._seen: typing.Dict[str, float] = {self.worker_id: clock()}
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._thread: typing.Optional[threading.Thread] = None
+        self._unsubscribe = event_bus.subscribe(self.CHANNEL, self._on_heartbeat)
+
+    def start(self) -> 'Workers':
+        self._heartbeat()
+        self._thread = threading.Thread(target=self._heartbeat_periodically, name='worker-heartbeat', daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        self._closed.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._unsubscribe()
+        self.event_bus.publish(self.CHANNEL, {'worker_id': self.worker_id, 'leaving': True})
+
+    def live(self) -> typing.List[str]:
+        now = self.clock()
+        with self._lock:
+            self._seen[self.worker_id] = now
+            return sorted(w for w, seen in self._seen.items() if now - seen < self.heartbeat_seconds * 3)
+
+    def is_live(self, worker_id: str) -> bool:
+        return worker_id in self.live()
+
+    def owner(self, key: str) -> str:
+        return max(self.live(), key=lambda w: hashlib.sha256(f"{w}\0{key}".encode('utf-8')).digest())
+
+    def _on_heartbeat(self, message: dict):
+        with self._lock:
+            joined = message['worker_id'] not in self._seen
+            if message.get('leaving'):
+                self._seen.pop(message['worker_id'], None)
+            else:
+                self._seen[message['worker_id']] = self.clock()
+        if joined and not message.get('leaving') and message['worker_id'] != self.worker_id:
+            # so the worker joining knows of this one before its next heartbeat.
+            self._heartbeat()
+
+    def _heartbeat(self):
+        self.event_bus.publish(self.CHANNEL, {'worker_id': self.worker_id})
+
+    def _heartbeat_periodically(self):
+        while not self._closed.wait(self.heartbeat_seconds):
+            try:
+                self._heartbeat()
+            except Exception as e:
+                logger.error(f"Failed to publish worker heartbeat: {e}")
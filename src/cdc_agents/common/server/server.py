@@ -1,10 +1,12 @@
 import importlib
+import inspect
 import os.path
 import typing
 
 import asyncio
 import pydantic
 from starlette.applications import Starlette
+from starlette.concurrency import iterate_in_threadpool
 from starlette.responses import JSONResponse
 from sse_starlette.sse import EventSourceResponse
 from starlette.requests import Request
@@ -52,6 +54,10 @@ def _add_all_managed_agents(agent_config_props: AgentConfigProps):
             _add_managed_agents(a.agent_card, agent_config_props)
 
 def create_json_response(result: Any) -> JSONResponse | EventSourceResponse:
+    if inspect.isgenerator(result):
+        # blocking generators are drained from the threadpool so they can't stall the event loop.
+        result = iterate_in_threadpool(result)
+
     if isinstance(result, AsyncIterable):
 
         async def event_generator(result) -> AsyncIterable[dict[str, str]]:
@@ -115,6 +121,16 @@ class A2AServer:
     def _get_agent_card(self, request: Request) -> JSONResponse:
         return JSONResponse(self.agent_card.model_dump(exclude_none=True))
 
+    @staticmethod
+    def _handle(handler: typing.Callable, json_rpc_request):
+        """
+        Calls an async handler, or runs a sync one in a thread, as it reads the task store and may call the push
+        notification URL - either way returning what is to be awaited.
+        """
+        if inspect.iscoroutinefunction(handler):
+            return handler(json_rpc_request)
+        return asyncio.to_thread(handler, json_rpc_request)
+
     async def _process_request(self, request: Request):
         try:
 
@@ -122,26 +138,26 @@ class A2AServer:
             json_rpc_request = A2ARequest.validate_python(body)
 
             if isinstance(json_rpc_request, GetTaskRequest):
-                result = self.task_manager.on_get_task(json_rpc_request)
+                result = self._handle(self.task_manager.on_get_task, json_rpc_request)
             elif isinstance(json_rpc_request, SendTaskRequest):
-                result = self.task_manager.on_send_task(json_rpc_request)
+                result = self._handle(self.task_manager.on_send_task, json_rpc_request)
             elif isinstance(json_rpc_request, SendTaskStreamingRequest):
-                result = self.task_manager.on_send_task_subscribe(
-                    json_rpc_request
-                )
+                result = self._handle(self.task_manager.on_send_task_subscribe, json_rpc_request)
             elif isinstance(json_rpc_request, CancelTaskRequest):
-                result = self.task_manager.on_cancel_task(json_rpc_request)
+                result = self._handle(self.task_manager.on_cancel_task, json_rpc_request)
             elif isinstance(json_rpc_request, SetTaskPushNotificationRequest):
-                result = self.task_manager.on_set_task_push_notification(json_rpc_request)
+                result = self._handle(self.task_manager.on_set_task_push_notification, json_rpc_request)
             elif isinstance(json_rpc_request, GetTaskPushNotificationRequest):
-                result = self.task_manager.on_get_task_push_notification(json_rpc_request)
+                result = self._handle(self.task_manager.on_get_task_push_notification, json_rpc_request)
             elif isinstance(json_rpc_request, TaskResubscriptionRequest):
-                result = self.task_manager.on_resubscribe_to_task(
-                    json_rpc_request)
+                result = self._handle(self.task_manager.on_resubscribe_to_task, json_rpc_request)
             else:
                 logger.warning(f"Unexpected request type: {type(json_rpc_request)}")
                 raise ValueError(f"Unexpected request type: {type(request)}")
 
+            if inspect.isawaitable(result):
+                result = await result
+
             return create_json_response(result)
 
         except Exception as e:
@@ -1,6 +1,12 @@
 import abc
+import asyncio
+import concurrent.futures
+import contextlib
+import dataclasses
+import functools
 import queue
 import threading
+import time
 import typing
 from langchain.schema import HumanMessage, AIMessage, SystemMessage, FunctionMessage
 from abc import ABC, abstractmethod
@@ -32,9 +38,12 @@ from cdc_agents.common.types import (
     PushNotificationConfig,
     TaskStatusUpdateEvent,
     JSONRPCError,
+    TaskArtifactUpdateEvent,
     TaskPushNotificationConfig,
     InternalError,
 )
+from cdc_agents.common.server.event_bus import EventBus
+from cdc_agents.common.server.task_store import TaskStore, InMemoryTaskStore
 from cdc_agents.common.server.utils import new_not_implemented_error
 import logging
 
@@ -50,6 +59,18 @@ class TaskManager(ABC):
     def pop_to_process_task(self, session_id) -> typing.Optional[Message]:
         pass
 
+    def drain_to_process(self, session_id, max_n: typing.Optional[int] = None) -> typing.List[Message]:
+        """
+        Pops up to max_n, or all, of the messages waiting to be processed by the task, oldest first.
+        """
+        drained = []
+        while max_n is None or len(drained) < max_n:
+            message = self.pop_to_process_task(session_id)
+            if message is None:
+                break
+            drained.append(message)
+        return drained
+
     @abstractmethod
     def on_get_task(self, request: GetTaskRequest) -> GetTaskResponse:
         pass
@@ -137,19 +158,159 @@ class TaskManager(ABC):
             raise ValueError("Only text parts are supported")
         return part.text
 
+@dataclasses.dataclass
+class TaskRetention:
+    """
+    How long completed, failed and canceled tasks are kept - beyond max_tasks or max_bytes the least recently used are
+    removed, and any not read or updated for idle_ttl_seconds. Tasks still running or waiting for input are kept.
+    """
+    max_tasks: typing.Optional[int] = None
+    idle_ttl_seconds: typing.Optional[float] = None
+    max_bytes: typing.Optional[int] = None
+    sweep_interval_seconds: float = 60
+
+
+TERMINAL_TASK_STATES = {TaskState.COMPLETED, TaskState.FAILED, TaskState.CANCELED}
+
+
+def encode_task_event(task_id: str, event) -> dict:
+    """
+    A task update event, or JSONRPCError ending the task's streams, as a message for the event bus.
+    """
+    kind = 'error' if isinstance(event, JSONRPCError) else type(event).__name__
+    return {'task_id': task_id, 'kind': kind, 'event': event.model_dump(mode='json')}
+
+
+def decode_task_event(message: dict):
+    if message['kind'] == 'error':
+        return JSONRPCError.model_validate(message['event'])
+    if message['kind'] == TaskArtifactUpdateEvent.__name__:
+        return TaskArtifactUpdateEvent.model_validate(message['event'])
+    return TaskStatusUpdateEvent.model_validate(message['event'])
+
+
+class TaskLock:
+    """
+    Reentrant lock of a task, counting those that looked it up and have yet to release it - so it is only reclaimed
+    when no one holds it or is about to acquire it. Looked up from TaskLocks to be used as a context manager.
+    """
+
+    def __init__(self, guard: threading.RLock):
+        self._lock = threading.RLock()
+        self._guard = guard
+        self.users = 0
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        return self._lock.acquire(blocking, timeout)
+
+    def release(self):
+        self._lock.release()
+
+    def __enter__(self):
+        self._lock.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._lock.release()
+        self.unuse()
+
+    def unuse(self):
+        with self._guard:
+            self.users -= 1
+
+
+class TaskLocks(dict):
+    """
+    Lock per task id, created on first use, so a lock reclaimed by the sweeper is recreated instead of missing.
+    """
+
+    def __init__(self, lock: threading.RLock):
+        super().__init__()
+        self.lock = lock
+
+    def __getitem__(self, task_id) -> TaskLock:
+        with self.lock:
+            task_lock = super().__getitem__(task_id)
+            task_lock.users += 1
+            return task_lock
+
+    def __missing__(self, task_id) -> TaskLock:
+        return self.setdefault(task_id, TaskLock(self.lock))
+
+    def insert(self, task_id):
+        with self.lock:
+            if task_id not in self:
+                self.setdefault(task_id, TaskLock(self.lock))
+
+    @contextlib.contextmanager
+    def try_acquire(self, task_id) -> typing.Iterator[bool]:
+        """
+        Acquires the lock of the task if no one holds it.
+        """
+        task_lock = self[task_id]
+        acquired = task_lock.acquire(blocking=False)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                task_lock.release()
+            task_lock.unuse()
+
+    def reclaim(self, task_id) -> bool:
+        """
+        Drops the lock of the task when no one holds it or has looked it up.
+        """
+        with self.lock:
+            task_lock = self.get(task_id)
+            if task_lock is None or task_lock.users != 0:
+                return False
+            del self[task_id]
+            return True
+
+
 class InMemoryTaskManager(TaskManager):
-    def __init__(self):
-        self.tasks: dict[str, Task] = {}
-        self.push_notification_infos: dict[str, PushNotificationConfig] = {}
+    """
+    Task manager over a TaskStore - tasks in memory by default, or in a database shared by several worker processes.
+    Locks and SSE subscribers are of this process. With an event bus, task events are published on event_channel and
+    every worker delivers them to its own subscribers, so a stream can be consumed from a worker not running the task.
+    """
+
+    def __init__(self, retention: typing.Optional[TaskRetention] = None,
+                 clock: typing.Callable[[], float] = time.monotonic,
+                 task_store: typing.Optional[TaskStore] = None,
+                 event_bus: typing.Optional[EventBus] = None,
+                 event_channel: str = 'task_events'):
+        self.task_store = task_store if task_store is not None else InMemoryTaskStore()
+        self.event_bus = event_bus
+        self.event_channel = event_channel
+        self._unsubscribe_events = event_bus.subscribe(event_channel, self._on_task_event) \
+            if event_bus is not None else None
         self.lock = threading.RLock()
-        self.task_locks: dict[str, threading.RLock] = {}
+        self.task_locks: TaskLocks = TaskLocks(self.lock)
         self.task_sse_subscribers: dict[str, List[queue.Queue]] = {}
         self.subscriber_lock = threading.RLock()
+        self.retention = retention
+        self.clock = clock
+        self.stats = {'resident_tasks': 0, 'resident_task_bytes': 0, 'evicted_tasks': 0, 'expired_tasks': 0,
+                      'reclaimed_locks': 0}
+        self._task_access: dict[str, float] = {}
+        # serialized size of each task when last swept, dropped whenever the task changes.
+        self._task_bytes: dict[str, int] = {}
+        self._sweep_lock = threading.Lock()
+        self._sweeper_closed = threading.Event()
+        self._sweeper: typing.Optional[threading.Thread] = None
+        if retention is not None and retention.sweep_interval_seconds > 0:
+            self._sweeper = threading.Thread(target=self._sweep_periodically, name='task-retention', daemon=True)
+            self._sweeper.start()
+
+    @property
+    def tasks(self) -> typing.Mapping[str, Task]:
+        return self.task_store.tasks
 
     def peek_to_process_task(self, session_id) -> typing.Optional[Message]:
         self.insert_lock(session_id)
         with self.task_locks[session_id]:
-            t = self.task(session_id)
+            t = self.task_without_history(session_id)
             if t and len(t.to_process) != 0:
                 return t.to_process[0]
 
@@ -158,28 +319,45 @@ class InMemoryTaskManager(TaskManager):
     def pop_to_process_task(self, session_id) -> typing.Optional[Message]:
         self.insert_lock(session_id)
         with self.task_locks[session_id]:
-            t = self.task(session_id)
+            t = self.task_without_history(session_id)
             if t and len(t.to_process) != 0:
-                return t.to_process.pop(0)
+                message = t.to_process.popleft()
+                self.task_store.update(t)
+                return message
 
             return None
 
+    def drain_to_process(self, session_id, max_n: typing.Optional[int] = None) -> typing.List[Message]:
+        self.insert_lock(session_id)
+        with self.task_locks[session_id]:
+            t = self.task_without_history(session_id)
+            if not t or len(t.to_process) == 0:
+                return []
+
+            n = len(t.to_process) if max_n is None else min(max_n, len(t.to_process))
+            drained = [t.to_process.popleft() for _ in range(n)]
+            self.task_store.update(t)
+            return drained
+
     def task(self, session_id) -> typing.Optional[Task]:
-        return self.tasks.get(session_id)
+        return self.task_store.get(session_id)
+
+    def task_without_history(self, session_id) -> typing.Optional[Task]:
+        """
+        The task for its status, artifacts and messages to process, its history not read unless the store has it at hand.
+        """
+        return self.task_store.get_without_history(session_id)
 
     def on_get_task(self, request: GetTaskRequest) -> GetTaskResponse:
         logger.info(f"Getting task {request.params.id}")
         task_query_params: TaskQueryParams = request.params
 
-        self.insert_lock(request.id)
-
-        with self.task_locks[request.id]:
-            task = self.tasks.get(task_query_params.id)
-            if task is None:
-                with self.lock:
-                    del self.task_locks[request.id]
-                    return GetTaskResponse(id=request.id, error=TaskNotFoundError())
+        task = self.task_store.get(task_query_params.id, task_query_params.historyLength)
+        if task is None:
+            return GetTaskResponse(id=request.id, error=TaskNotFoundError())
 
+        with self.task_locks[task_query_params.id]:
+            self._touch(task_query_params.id, changed=False)
             task_result = self.append_task_history(
                 task, task_query_params.historyLength)
 
@@ -189,14 +367,8 @@ class InMemoryTaskManager(TaskManager):
         logger.info(f"Cancelling task {request.params.id}")
         task_id_params: TaskIdParams = request.params
 
-        self.insert_lock(request.id)
-
-        with self.task_locks[request.id]:
-            task = self.tasks.get(task_id_params.id)
-            if task is None:
-                with self.lock:
-                    del self.task_locks[request.id]
-                    return CancelTaskResponse(id=request.id, error=TaskNotFoundError())
+        if not self.task_store.exists(task_id_params.id):
+            return CancelTaskResponse(id=request.id, error=TaskNotFoundError())
 
         return CancelTaskResponse(id=request.id, error=TaskNotCancelableError())
 
@@ -213,30 +385,25 @@ class InMemoryTaskManager(TaskManager):
     def set_push_notification_info(self, task_id: str, notification_config: PushNotificationConfig):
         self.insert_lock(task_id)
         with self.task_locks[task_id]:
-            task = self.tasks.get(task_id)
-            if task is None:
-                with self.lock:
-                    del self.task_locks[task_id]
-                    raise ValueError(f"Task not found for {task_id}")
-
-            self.push_notification_infos[task_id] = notification_config
+            found = self.task_store.set_push_notification(task_id, notification_config)
+        if not found:
+            self.task_locks.reclaim(task_id)
+            raise ValueError(f"Task not found for {task_id}")
 
         return
     
     def get_push_notification_info(self, task_id: str) -> PushNotificationConfig:
         self.insert_lock(task_id)
         with self.task_locks[task_id]:
-            task = self.tasks.get(task_id)
-            if task is None:
-                with self.lock:
-                    del self.task_locks[task_id]
-                    raise ValueError(f"Task not found for {task_id}")
+            notification_config = self.task_store.get_push_notification(task_id)
+        if notification_config is None:
+            self.task_locks.reclaim(task_id)
+            raise ValueError(f"Push notification info not found for {task_id}")
 
-            return self.push_notification_infos[task_id]
+        return notification_config
             
     def has_push_notification_info(self, task_id: str) -> bool:
-        with self.lock:
-            return task_id in self.push_notification_infos
+        return self.task_store.get_push_notification(task_id) is not None
             
     def on_set_task_push_notification(
         self, request: SetTaskPushNotificationRequest
@@ -283,7 +450,7 @@ class InMemoryTaskManager(TaskManager):
             return self.do_upsert_task(task_send_params, do_insert_proces)
 
     def do_upsert_task(self, task_send_params: TaskSendParams, do_insert_proces: bool = True):
-        task = self.tasks.get(task_send_params.id)
+        task = self.task_store.get(task_send_params.id)
         if task is None:
             task = Task(
                 id=task_send_params.id,
@@ -293,19 +460,23 @@ class InMemoryTaskManager(TaskManager):
                 history=[task_send_params.message],
                 to_process=[]
             )
-            self.tasks[task_send_params.id] = task
+            self.task_store.create(task)
         else:
-            task.history.append(task_send_params.message)
             if do_insert_proces:
                 task.to_process.append(task_send_params.message)
+            self.task_store.update(task, [task_send_params.message])
 
+        self._touch(task_send_params.id)
         return task
 
+    def submit_agent_work(self, fn: typing.Callable[[], typing.Any]):
+        """
+        Run agent work, such as a streaming agent run, off of the request path.
+        """
+        threading.Thread(target=fn).start()
+
     def insert_lock(self, task_id):
-        if task_id not in self.task_locks.keys():
-            with self.lock:
-                if task_id not in self.task_locks.keys():
-                    self.task_locks[task_id] = threading.RLock()
+        self.task_locks.insert(task_id)
 
     def on_resubscribe_to_task(
         self, request: TaskResubscriptionRequest
@@ -322,15 +493,17 @@ class InMemoryTaskManager(TaskManager):
     def do_update_store(
             self, task_id: str, status: TaskStatus, artifacts: list[Artifact] = None, append_process = True
     ) -> Task:
-        if task_id not in self.tasks.keys():
+        """
+        :return: the updated task, its history not read unless the store has it at hand.
+        """
+        task = self.task_without_history(task_id)
+        if task is None:
             logger.error(f"Task {task_id} not found for updating the task")
             raise ValueError(f"Task {task_id} not found")
 
-        task = self.tasks.get(task_id)
         task.status = status
 
         if status.message is not None:
-            task.history.append(status.message)
             if append_process and status.state != TaskState.COMPLETED:
                 task.to_process.append(status.message)
 
@@ -339,21 +512,21 @@ class InMemoryTaskManager(TaskManager):
                 task.artifacts = []
             task.artifacts.extend(artifacts)
 
+        self.task_store.update(task, [status.message] if status.message is not None else ())
+        self._touch(task_id)
         return task
 
     def append_task_history(self, task: Task, historyLength: int | None):
-        new_task = task.model_copy()
-        if historyLength is not None and historyLength > 0:
-            new_task.history = new_task.history[-historyLength:]
-        else:
-            new_task.history = task.history
+        if historyLength is None or historyLength <= 0 or task.history is None or len(task.history) <= historyLength:
+            # a shallow copy, sharing the history rather than copying it.
+            return task.model_copy()
 
-        return new_task        
+        return task.model_copy(update={'history': task.history[-historyLength:]})
 
     def setup_sse_consumer(self, task_id: str, is_resubscribe: bool = False):
         with self.subscriber_lock:
             if task_id not in self.task_sse_subscribers:
-                if is_resubscribe:
+                if is_resubscribe and not self._is_streamed_elsewhere(task_id):
                     raise ValueError("Task not found for resubscription")
                 else:
                     self.task_sse_subscribers[task_id] = []
@@ -363,6 +536,24 @@ class InMemoryTaskManager(TaskManager):
             return sse_event_queue
 
     def enqueue_events_for_sse(self, task_id, task_update_event):
+        if self.event_bus is not None:
+            self.event_bus.publish(self.event_channel, encode_task_event(task_id, task_update_event))
+            return
+        self._deliver_events_for_sse(task_id, task_update_event)
+
+    def _on_task_event(self, message: dict):
+        self._deliver_events_for_sse(message['task_id'], decode_task_event(message))
+
+    def _is_streamed_elsewhere(self, task_id: str) -> bool:
+        """
+        Whether another worker may be running the task, publishing its events to this one.
+        """
+        if self.event_bus is None:
+            return False
+        task = self.task_without_history(task_id)
+        return task is not None and task.status.state not in TERMINAL_TASK_STATES
+
+    def _deliver_events_for_sse(self, task_id, task_update_event):
         with self.subscriber_lock:
             if task_id not in self.task_sse_subscribers:
                 return
@@ -389,3 +580,186 @@ class InMemoryTaskManager(TaskManager):
                 if task_id in self.task_sse_subscribers:
                     self.task_sse_subscribers[task_id].remove(sse_event_queue)
 
+    def sweep(self):
+        """
+        Removes the completed, failed and canceled tasks beyond the retention, with their push notification configs and
+        subscribers, then reclaims the locks of task and request ids no longer in the store.
+        """
+        retention = self.retention or TaskRetention()
+        # the task locks' guard is only taken to snapshot and reclaim locks, not across the store reads.
+        with self._sweep_lock:
+            now = self.clock()
+            task_ids = self.task_store.find()
+            for task_id in task_ids:
+                if task_id not in self._task_bytes:
+                    try:
+                        task = self.task_store.get(task_id)
+                        if task is not None:
+                            self._task_bytes[task_id] = len(task.model_dump_json())
+                    except Exception as e:
+                        logger.warning(f"Could not measure task {task_id}: {e}")
+            remaining = set(task_ids)
+            for task_id in [t for t in self._task_bytes.keys() if t not in remaining]:
+                # removed by another worker sharing the store.
+                self._task_bytes.pop(task_id, None)
+                self._task_access.pop(task_id, None)
+
+            # least recently used first - a task another worker wrote is used when this process first saw it.
+            retained = sorted((self._task_access.setdefault(t, now), t) for state in TERMINAL_TASK_STATES
+                              for t in self.task_store.find(state=state))
+            if retention.idle_ttl_seconds is not None:
+                while len(retained) != 0 and now - retained[0][0] >= retention.idle_ttl_seconds:
+                    if self._remove_retired_task(*retained.pop(0), remaining):
+                        self.stats['expired_tasks'] += 1
+            while retention.max_tasks is not None and len(retained) > retention.max_tasks:
+                if self._remove_retired_task(*retained.pop(0), remaining):
+                    self.stats['evicted_tasks'] += 1
+            resident_bytes = sum(self._task_bytes.values())
+            while retention.max_bytes is not None and len(retained) != 0 and resident_bytes > retention.max_bytes:
+                accessed, task_id = retained.pop(0)
+                task_bytes = self._task_bytes.get(task_id, 0)
+                if self._remove_retired_task(accessed, task_id, remaining):
+                    resident_bytes -= task_bytes
+                    self.stats['evicted_tasks'] += 1
+
+            with self.lock:
+                unused_locks = [t for t in self.task_locks.keys() if t not in remaining]
+            for task_id in unused_locks:
+                # a lock held or looked up is of a request in flight, which may be creating its task.
+                if self.task_locks.reclaim(task_id):
+                    self.stats['reclaimed_locks'] += 1
+            self.stats['resident_tasks'] = len(remaining)
+            self.stats['resident_task_bytes'] = resident_bytes
+
+        with self.subscriber_lock:
+            for task_id in [t for t, subscribers in self.task_sse_subscribers.items()
+                            if len(subscribers) == 0 or t not in remaining]:
+                del self.task_sse_subscribers[task_id]
+
+    def close(self):
+        if self._unsubscribe_events is not None:
+            self._unsubscribe_events()
+        self._sweeper_closed.set()
+        if self._sweeper is not None:
+            self._sweeper.join()
+
+    def _touch(self, task_id: str, changed: bool = True):
+        self._task_access[task_id] = self.clock()
+        if changed:
+            self._task_bytes.pop(task_id, None)
+
+    def _remove_retired_task(self, accessed: float, task_id: str, remaining: typing.Set[str]) -> bool:
+        """
+        Removes the task under its lock, if no request holds it and it is still finished and not used since accessed.
+        """
+        with self.task_locks.try_acquire(task_id) as acquired:
+            if not acquired:
+                return False
+            task = self.task_without_history(task_id)
+            if task is None:
+                remaining.discard(task_id)
+                return False
+            if task.status.state not in TERMINAL_TASK_STATES or self._task_access.get(task_id, accessed) != accessed:
+                return False
+            remaining.discard(self._remove_task(task_id))
+            return True
+
+    def _remove_task(self, task_id: str) -> str:
+        logger.debug(f"Removing task {task_id} beyond retention.")
+        self.task_store.delete(task_id)
+        self._task_access.pop(task_id, None)
+        self._task_bytes.pop(task_id, None)
+        return task_id
+
+    def _sweep_periodically(self):
+        while not self._sweeper_closed.wait(self.retention.sweep_interval_seconds):
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error(f"Failed to sweep tasks beyond retention: {e}")
+
+
+
+class AsyncSseQueue:
+    """
+    SSE subscriber queue bound to the event loop of the request consuming it, that can be filled from any thread.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue()
+
+    def put(self, event):
+        try:
+            if asyncio.get_running_loop() is self.loop:
+                self.queue.put_nowait(event)
+                return
+        except RuntimeError:
+            pass
+        try:
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, event)
+        except RuntimeError:
+            logger.warning("Dropping SSE event for subscriber whose event loop is closed.")
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class AsyncInMemoryTaskManager(InMemoryTaskManager):
+    """
+    InMemoryTaskManager for asyncio servers. Agent work runs in a bounded executor instead of a thread per request, and
+    SSE subscribers await an asyncio queue, so an open stream never blocks the event loop waiting for its next event.
+    """
+
+    def __init__(self, executor: typing.Optional[concurrent.futures.Executor] = None, max_workers: int = 16,
+                 retention: typing.Optional[TaskRetention] = None, task_store: typing.Optional[TaskStore] = None,
+                 event_bus: typing.Optional[EventBus] = None, event_channel: str = 'task_events'):
+        super().__init__(retention, task_store=task_store, event_bus=event_bus, event_channel=event_channel)
+        self._executor = executor
+        self._max_workers = max_workers
+        self.task_sse_subscribers: dict[str, List[AsyncSseQueue]] = {}
+
+    @property
+    def executor(self) -> concurrent.futures.Executor:
+        if self._executor is None:
+            with self.lock:
+                if self._executor is None:
+                    self._executor = concurrent.futures.ThreadPoolExecutor(
+                        max_workers=self._max_workers, thread_name_prefix=self.__class__.__name__)
+        return self._executor
+
+    def submit_agent_work(self, fn: typing.Callable[[], typing.Any]):
+        return self.executor.submit(fn)
+
+    async def run_in_executor(self, fn: typing.Callable, *args, **kwargs):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, functools.partial(fn, *args, **kwargs))
+
+    def setup_sse_consumer(self, task_id: str, is_resubscribe: bool = False) -> AsyncSseQueue:
+        with self.subscriber_lock:
+            if task_id not in self.task_sse_subscribers:
+                if is_resubscribe and not self._is_streamed_elsewhere(task_id):
+                    raise ValueError("Task not found for resubscription")
+                else:
+                    self.task_sse_subscribers[task_id] = []
+
+            sse_event_queue = AsyncSseQueue(asyncio.get_running_loop())
+            self.task_sse_subscribers[task_id].append(sse_event_queue)
+            return sse_event_queue
+
+    async def dequeue_events_for_sse(
+        self, request_id, task_id, sse_event_queue: AsyncSseQueue
+    ) -> typing.AsyncIterable[SendTaskStreamingResponse]:
+        try:
+            while True:
+                event = await sse_event_queue.get()
+                if isinstance(event, JSONRPCError):
+                    yield SendTaskStreamingResponse(id=request_id, error=event)
+                    break
+
+                yield SendTaskStreamingResponse(id=request_id, result=event)
+                if isinstance(event, TaskStatusUpdateEvent) and event.final:
+                    break
+        finally:
+            with self.subscriber_lock:
+                if task_id in self.task_sse_subscribers:
+                    self.task_sse_subscribers[task_id].remove(sse_event_queue)
@@ -0,0 +1,566 @@
+import abc
+import collections.abc
+import contextlib
+import copy
+import os
+import sqlite3
+import threading
+import typing
+
+from cdc_agents.common.types import Task, Message, TaskState, PushNotificationConfig
+
+
+def _extend_history(task: Task, appended_history: typing.Sequence[Message]):
+    # in place, as copying the history would make every update of the task cost as much as its history. A task read
+    # without its history is left without it.
+    if len(appended_history) == 0 or task.history is None:
+        return
+    task.history.extend(appended_history)
+
+
+def _replace_history(task: Task, history: typing.Sequence[Message], start: int):
+    if task.history is None:
+        task.history = []
+    task.history[start:] = history
+
+
+class TaskStore(abc.ABC):
+    """
+    Where a task manager keeps its tasks. The history of a task is stored as rows appended as the task goes, rather than
+    with the task, so updating a task does not rewrite its whole history.
+
+    Tasks returned are to be updated through the store - update persists the task and the history appended to it.
+    """
+
+    @abc.abstractmethod
+    def get(self, task_id: str, history_length: typing.Optional[int] = None) -> typing.Optional[Task]:
+        """
+        :return: the task with its latest history_length history messages, or all of them when not positive.
+        """
+        pass
+
+    @abc.abstractmethod
+    def get_without_history(self, task_id: str) -> typing.Optional[Task]:
+        """
+        :return: the task without reading its history, for its status, artifacts and messages to process - its history
+        is None, or all of it when that costs nothing more to return.
+        """
+        pass
+
+    @abc.abstractmethod
+    def exists(self, task_id: str) -> bool:
+        pass
+
+    @abc.abstractmethod
+    def find(self, session_id: typing.Optional[str] = None,
+             state: typing.Optional[TaskState] = None) -> typing.List[str]:
+        """
+        :return: the ids of the tasks of the session and in the state given, in the order they were created.
+        """
+        pass
+
+    @abc.abstractmethod
+    def create(self, task: Task) -> None:
+        pass
+
+    @abc.abstractmethod
+    def update(self, task: Task, appended_history: typing.Sequence[Message] = ()) -> None:
+        """
+        Stores the task, except for its history, and appends appended_history to its history.
+        """
+        pass
+
+    @abc.abstractmethod
+    def replace_history(self, task: Task, history: typing.Sequence[Message], start: int = 0) -> None:
+        """
+        Replaces the history of the task after its first start messages with history.
+        """
+        pass
+
+    @abc.abstractmethod
+    def delete(self, task_id: str) -> bool:
+        pass
+
+    @abc.abstractmethod
+    def set_push_notification(self, task_id: str, config: PushNotificationConfig) -> bool:
+        """
+        :return: False when there is no such task.
+        """
+        pass
+
+    @abc.abstractmethod
+    def get_push_notification(self, task_id: str) -> typing.Optional[PushNotificationConfig]:
+        pass
+
+    @property
+    def tasks(self) -> typing.Mapping[str, Task]:
+        """
+        The tasks by id, loaded as they are read.
+        """
+        return TaskMapping(self)
+
+    def close(self):
+        pass
+
+
+class TaskMapping(collections.abc.Mapping):
+
+    def __init__(self, task_store: TaskStore):
+        self.task_store = task_store
+
+    def __getitem__(self, task_id: str) -> Task:
+        task = self.task_store.get(task_id)
+        if task is None:
+            raise KeyError(task_id)
+        return task
+
+    def __contains__(self, task_id) -> bool:
+        return self.task_store.exists(task_id)
+
+    def __iter__(self) -> typing.Iterator[str]:
+        return iter(self.task_store.find())
+
+    def __len__(self) -> int:
+        return len(self.task_store.find())
+
+
+class InMemoryTaskStore(TaskStore):
+    """
+    Tasks in a dict of this process, indexed by session and state. Tasks are returned as stored, not copied.
+    """
+
+    def __init__(self):
+        self._tasks: typing.Dict[str, Task] = {}
+        self.push_notification_infos: typing.Dict[str, PushNotificationConfig] = {}
+        self._states: typing.Dict[str, TaskState] = {}
+        # ids of the tasks of each session and state, in the order they were created.
+        self._by_session: typing.Dict[str, typing.Dict[str, None]] = collections.defaultdict(dict)
+        self._by_state: typing.Dict[TaskState, typing.Dict[str, None]] = collections.defaultdict(dict)
+        self._lock = threading.RLock()
+
+    @property
+    def tasks(self) -> typing.Dict[str, Task]:
+        return self._tasks
+
+    def get(self, task_id: str, history_length: typing.Optional[int] = None) -> typing.Optional[Task]:
+        task = self._tasks.get(task_id)
+        if task is None or history_length is None or history_length <= 0 or task.history is None:
+            return task
+        return task.model_copy(update={'history': task.history[-history_length:]})
+
+    def get_without_history(self, task_id: str) -> typing.Optional[Task]:
+        return self._tasks.get(task_id)
+
+    def exists(self, task_id: str) -> bool:
+        return task_id in self._tasks
+
+    def find(self, session_id: typing.Optional[str] = None,
+             state: typing.Optional[TaskState] = None) -> typing.List[str]:
+        with self._lock:
+            if session_id is None and state is None:
+                return list(self._tasks.keys())
+            if session_id is None:
+                return list(self._by_state.get(state, {}).keys())
+            return [t for t in self._by_session.get(session_id, {}).keys()
+                    if state is None or self._states.get(t) == state]
+
+    def create(self, task: Task) -> None:
+        with self._lock:
+            self.delete(task.id)
+            self._tasks[task.id] = task
+            self._by_session[task.sessionId][task.id] = None
+            self._index_state(task)
+
+    def update(self, task: Task, appended_history: typing.Sequence[Message] = ()) -> None:
+        with self._lock:
+            stored = self._tasks.get(task.id)
+            if stored is None:
+                raise ValueError(f"Task {task.id} not found")
+            if stored is not task:
+                stored = task.model_copy(update={'history': stored.history})
+                self._tasks[task.id] = stored
+            if len(appended_history) != 0:
+                if stored.history is None:
+                    stored.history = []
+                stored.history.extend(appended_history)
+                if task.history is not stored.history:
+                    _extend_history(task, appended_history)
+            self._index_state(stored)
+
+    def replace_history(self, task: Task, history: typing.Sequence[Message], start: int = 0) -> None:
+        with self._lock:
+            stored = self._tasks.get(task.id)
+            if stored is None:
+                raise ValueError(f"Task {task.id} not found")
+            if stored.history is None:
+                stored.history = []
+            stored.history[start:] = history
+            if task.history is not stored.history:
+                _replace_history(task, history, start)
+
+    def delete(self, task_id: str) -> bool:
+        with self._lock:
+            task = self._tasks.pop(task_id, None)
+            self.push_notification_infos.pop(task_id, None)
+            if task is None:
+                return False
+            session = self._by_session.get(task.sessionId)
+            if session is not None:
+                session.pop(task_id, None)
+                if len(session) == 0:
+                    del self._by_session[task.sessionId]
+            state = self._states.pop(task_id, None)
+            self._by_state.get(state, {}).pop(task_id, None)
+            return True
+
+    def set_push_notification(self, task_id: str, config: PushNotificationConfig) -> bool:
+        with self._lock:
+            if task_id not in self._tasks:
+                return False
+            self.push_notification_infos[task_id] = config
+            return True
+
+    def get_push_notification(self, task_id: str) -> typing.Optional[PushNotificationConfig]:
+        return self.push_notification_infos.get(task_id)
+
+    def _index_state(self, task: Task):
+        previous = self._states.get(task.id)
+        if previous == task.status.state:
+            return
+        self._by_state.get(previous, {}).pop(task.id, None)
+        self._states[task.id] = task.status.state
+        self._by_state[task.status.state][task.id] = None
+
+
+class SqlTaskStore(TaskStore, abc.ABC):
+    """
+    Tasks in a database shared by the workers serving them - a row per task, with its session and state as indexed
+    columns, and a row per history message. namespace separates the tasks of each agent in the one database.
+
+    A task is updated by one worker at a time, the one running it, so writes are not checked against concurrent
+    updates of the same task.
+    """
+
+    def __init__(self, namespace: str = ''):
+        self.namespace = namespace
+
+    def namespaced(self, namespace: str) -> 'SqlTaskStore':
+        """
+        The store for the tasks of namespace, over the same connection.
+        """
+        store = copy.copy(self)
+        store.namespace = namespace
+        return store
+
+    @staticmethod
+    def _dump_task(task: Task) -> str:
+        return task.model_dump_json(exclude={'history'})
+
+    @staticmethod
+    def _load_task(task_json, history: typing.Optional[typing.Iterable]) -> Task:
+        task = Task.model_validate_json(task_json) if isinstance(task_json, (str, bytes)) \
+            else Task.model_validate(task_json)
+        task.history = None if history is None else [
+            Message.model_validate_json(m) if isinstance(m, (str, bytes)) else Message.model_validate(m)
+            for m in history]
+        return task
+
+    @staticmethod
+    def _state(state: typing.Optional[TaskState]) -> typing.Optional[str]:
+        return state.value if isinstance(state, TaskState) else state
+
+
+class SqliteTaskStore(SqlTaskStore):
+    """
+    Tasks in a local SQLite database in WAL mode, shared by the worker processes of one host.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, namespace: str = ''):
+        super().__init__(namespace)
+        self.conn = conn
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_path(cls, path: str, namespace: str = '') -> 'SqliteTaskStore':
+        path = os.path.expanduser(path)
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA busy_timeout=5000')
+        return cls(conn, namespace)
+
+    def setup(self):
+        with self._transaction() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS tasks (
+                    namespace TEXT NOT NULL,
+                    id TEXT NOT NULL,
+                    session_id TEXT,
+                    state TEXT NOT NULL,
+                    task TEXT NOT NULL,
+                    push_notification TEXT,
+                    PRIMARY KEY (namespace, id)
+                )""")
+            conn.execute("CREATE INDEX IF NOT EXISTS tasks_session_idx ON tasks (namespace, session_id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS tasks_state_idx ON tasks (namespace, state)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS task_history (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    namespace TEXT NOT NULL,
+                    task_id TEXT NOT NULL,
+                    message TEXT NOT NULL
+                )""")
+            conn.execute("CREATE INDEX IF NOT EXISTS task_history_task_idx ON task_history (namespace, task_id, seq)")
+
+    def get(self, task_id: str, history_length: typing.Optional[int] = None) -> typing.Optional[Task]:
+        with self._lock:
+            row = self.conn.execute("SELECT task FROM tasks WHERE namespace = ? AND id = ?",
+                                    (self.namespace, task_id)).fetchone()
+            if row is None:
+                return None
+            if history_length is None or history_length <= 0:
+                history = self.conn.execute("SELECT message FROM task_history WHERE namespace = ? AND task_id = ? "
+                                            "ORDER BY seq", (self.namespace, task_id)).fetchall()
+            else:
+                history = self.conn.execute("SELECT message FROM task_history WHERE namespace = ? AND task_id = ? "
+                                            "ORDER BY seq DESC LIMIT ?",
+                                            (self.namespace, task_id, history_length)).fetchall()[::-1]
+        return self._load_task(row[0], (m for m, in history))
+
+    def get_without_history(self, task_id: str) -> typing.Optional[Task]:
+        with self._lock:
+            row = self.conn.execute("SELECT task FROM tasks WHERE namespace = ? AND id = ?",
+                                    (self.namespace, task_id)).fetchone()
+        return self._load_task(row[0], None) if row is not None else None
+
+    def exists(self, task_id: str) -> bool:
+        with self._lock:
+            return self.conn.execute("SELECT 1 FROM tasks WHERE namespace = ? AND id = ?",
+                                     (self.namespace, task_id)).fetchone() is not None
+
+    def find(self, session_id: typing.Optional[str] = None,
+             state: typing.Optional[TaskState] = None) -> typing.List[str]:
+        with self._lock:
+            rows = self.conn.execute("SELECT id FROM tasks WHERE namespace = ? AND (? IS NULL OR session_id = ?) "
+                                     "AND (? IS NULL OR state = ?) ORDER BY rowid",
+                                     (self.namespace, session_id, session_id, self._state(state),
+                                      self._state(state))).fetchall()
+        return [task_id for task_id, in rows]
+
+    def create(self, task: Task) -> None:
+        with self._transaction() as conn:
+            self._delete(conn, task.id)
+            conn.execute("INSERT INTO tasks (namespace, id, session_id, state, task) VALUES (?, ?, ?, ?, ?)",
+                         (self.namespace, task.id, task.sessionId, self._state(task.status.state),
+                          self._dump_task(task)))
+            self._append(conn, task.id, task.history or [])
+
+    def update(self, task: Task, appended_history: typing.Sequence[Message] = ()) -> None:
+        with self._transaction() as conn:
+            updated = conn.execute("UPDATE tasks SET session_id = ?, state = ?, task = ? WHERE namespace = ? AND id = ?",
+                                   (task.sessionId, self._state(task.status.state), self._dump_task(task),
+                                    self.namespace, task.id)).rowcount
+            if updated == 0:
+                raise ValueError(f"Task {task.id} not found")
+            self._append(conn, task.id, appended_history)
+        _extend_history(task, appended_history)
+
+    def replace_history(self, task: Task, history: typing.Sequence[Message], start: int = 0) -> None:
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM task_history WHERE namespace = ? AND task_id = ? AND seq > COALESCE("
+                         "(SELECT MAX(seq) FROM (SELECT seq FROM task_history WHERE namespace = ? AND task_id = ? "
+                         "ORDER BY seq LIMIT ?)), 0)",
+                         (self.namespace, task.id, self.namespace, task.id, start))
+            self._append(conn, task.id, history)
+        _replace_history(task, history, start)
+
+    def delete(self, task_id: str) -> bool:
+        with self._transaction() as conn:
+            return self._delete(conn, task_id)
+
+    def set_push_notification(self, task_id: str, config: PushNotificationConfig) -> bool:
+        with self._transaction() as conn:
+            return conn.execute("UPDATE tasks SET push_notification = ? WHERE namespace = ? AND id = ?",
+                                (config.model_dump_json(), self.namespace, task_id)).rowcount != 0
+
+    def get_push_notification(self, task_id: str) -> typing.Optional[PushNotificationConfig]:
+        with self._lock:
+            row = self.conn.execute("SELECT push_notification FROM tasks WHERE namespace = ? AND id = ?",
+                                    (self.namespace, task_id)).fetchone()
+        return PushNotificationConfig.model_validate_json(row[0]) if row is not None and row[0] is not None else None
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    def _append(self, conn: sqlite3.Connection, task_id: str, messages: typing.Sequence[Message]):
+        conn.executemany("INSERT INTO task_history (namespace, task_id, message) VALUES (?, ?, ?)",
+                         [(self.namespace, task_id, m.model_dump_json()) for m in messages])
+
+    def _delete(self, conn: sqlite3.Connection, task_id: str) -> bool:
+        conn.execute("DELETE FROM task_history WHERE namespace = ? AND task_id = ?", (self.namespace, task_id))
+        return conn.execute("DELETE FROM tasks WHERE namespace = ? AND id = ?",
+                            (self.namespace, task_id)).rowcount != 0
+
+    @contextlib.contextmanager
+    def _transaction(self) -> typing.Iterator[sqlite3.Connection]:
+        with self._lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield self.conn
+            except BaseException:
+                self.conn.execute('ROLLBACK')
+                raise
+            else:
+                self.conn.execute('COMMIT')
+
+
+class PostgresTaskStore(SqlTaskStore):
+    """
+    Tasks in Postgres, shared by the workers of every host - over a connection pool, or one connection taken in turn.
+    """
+
+    def __init__(self, conn, namespace: str = ''):
+        super().__init__(namespace)
+        self.conn = conn
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_uri(cls, uri: str, min_size: int = 1, max_size: int = 10, namespace: str = '') -> 'PostgresTaskStore':
+        from psycopg_pool import ConnectionPool
+        pool = ConnectionPool(uri, min_size=min_size, max_size=max_size, open=True,
+                              kwargs={'autocommit': True, 'prepare_threshold': 0})
+        return cls(pool, namespace)
+
+    def setup(self):
+        with self._cursor() as cur:
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS tasks (
+                    namespace TEXT NOT NULL,
+                    id TEXT NOT NULL,
+                    session_id TEXT,
+                    state TEXT NOT NULL,
+                    task JSONB NOT NULL,
+                    push_notification JSONB,
+                    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+                    PRIMARY KEY (namespace, id)
+                )""")
+            cur.execute("CREATE INDEX IF NOT EXISTS tasks_session_idx ON tasks (namespace, session_id)")
+            cur.execute("CREATE INDEX IF NOT EXISTS tasks_state_idx ON tasks (namespace, state)")
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS task_history (
+                    seq BIGSERIAL PRIMARY KEY,
+                    namespace TEXT NOT NULL,
+                    task_id TEXT NOT NULL,
+                    message JSONB NOT NULL
+                )""")
+            cur.execute("CREATE INDEX IF NOT EXISTS task_history_task_idx ON task_history (namespace, task_id, seq)")
+
+    def get(self, task_id: str, history_length: typing.Optional[int] = None) -> typing.Optional[Task]:
+        with self._cursor() as cur:
+            cur.execute("SELECT task FROM tasks WHERE namespace = %s AND id = %s", (self.namespace, task_id))
+            row = cur.fetchone()
+            if row is None:
+                return None
+            if history_length is None or history_length <= 0:
+                cur.execute("SELECT message FROM task_history WHERE namespace = %s AND task_id = %s ORDER BY seq",
+                            (self.namespace, task_id))
+                history = cur.fetchall()
+            else:
+                cur.execute("SELECT message FROM task_history WHERE namespace = %s AND task_id = %s "
+                            "ORDER BY seq DESC LIMIT %s", (self.namespace, task_id, history_length))
+                history = cur.fetchall()[::-1]
+        return self._load_task(row[0], (m for m, in history))
+
+    def get_without_history(self, task_id: str) -> typing.Optional[Task]:
+        with self._cursor() as cur:
+            cur.execute("SELECT task FROM tasks WHERE namespace = %s AND id = %s", (self.namespace, task_id))
+            row = cur.fetchone()
+        return self._load_task(row[0], None) if row is not None else None
+
+    def exists(self, task_id: str) -> bool:
+        with self._cursor() as cur:
+            cur.execute("SELECT 1 FROM tasks WHERE namespace = %s AND id = %s", (self.namespace, task_id))
+            return cur.fetchone() is not None
+
+    def find(self, session_id: typing.Optional[str] = None,
+             state: typing.Optional[TaskState] = None) -> typing.List[str]:
+        with self._cursor() as cur:
+            cur.execute("SELECT id FROM tasks WHERE namespace = %s AND (%s::text IS NULL OR session_id = %s) "
+                        "AND (%s::text IS NULL OR state = %s) ORDER BY created_at, id",
+                        (self.namespace, session_id, session_id, self._state(state), self._state(state)))
+            return [task_id for task_id, in cur.fetchall()]
+
+    def create(self, task: Task) -> None:
+        with self._cursor() as cur:
+            self._delete(cur, task.id)
+            cur.execute("INSERT INTO tasks (namespace, id, session_id, state, task) VALUES (%s, %s, %s, %s, %s)",
+                        (self.namespace, task.id, task.sessionId, self._state(task.status.state),
+                         self._dump_task(task)))
+            self._append(cur, task.id, task.history or [])
+
+    def update(self, task: Task, appended_history: typing.Sequence[Message] = ()) -> None:
+        with self._cursor() as cur:
+            cur.execute("UPDATE tasks SET session_id = %s, state = %s, task = %s WHERE namespace = %s AND id = %s",
+                        (task.sessionId, self._state(task.status.state), self._dump_task(task), self.namespace,
+                         task.id))
+            if cur.rowcount == 0:
+                raise ValueError(f"Task {task.id} not found")
+            self._append(cur, task.id, appended_history)
+        _extend_history(task, appended_history)
+
+    def replace_history(self, task: Task, history: typing.Sequence[Message], start: int = 0) -> None:
+        with self._cursor() as cur:
+            cur.execute("DELETE FROM task_history WHERE namespace = %s AND task_id = %s AND seq > COALESCE("
+                        "(SELECT MAX(seq) FROM (SELECT seq FROM task_history WHERE namespace = %s AND task_id = %s "
+                        "ORDER BY seq LIMIT %s) AS kept), 0)",
+                        (self.namespace, task.id, self.namespace, task.id, start))
+            self._append(cur, task.id, history)
+        _replace_history(task, history, start)
+
+    def delete(self, task_id: str) -> bool:
+        with self._cursor() as cur:
+            return self._delete(cur, task_id)
+
+    def set_push_notification(self, task_id: str, config: PushNotificationConfig) -> bool:
+        with self._cursor() as cur:
+            cur.execute("UPDATE tasks SET push_notification = %s WHERE namespace = %s AND id = %s",
+                        (config.model_dump_json(), self.namespace, task_id))
+            return cur.rowcount != 0
+
+    def get_push_notification(self, task_id: str) -> typing.Optional[PushNotificationConfig]:
+        with self._cursor() as cur:
+            cur.execute("SELECT push_notification FROM tasks WHERE namespace = %s AND id = %s",
+                        (self.namespace, task_id))
+            row = cur.fetchone()
+        return PushNotificationConfig.model_validate(row[0]) if row is not None and row[0] is not None else None
+
+    def close(self):
+        self.conn.close()
+
+    def _append(self, cur, task_id: str, messages: typing.Sequence[Message]):
+        if len(messages) != 0:
+            cur.executemany("INSERT INTO task_history (namespace, task_id, message) VALUES (%s, %s, %s)",
+                            [(self.namespace, task_id, m.model_dump_json()) for m in messages])
+
+    def _delete(self, cur, task_id: str) -> bool:
+        cur.execute("DELETE FROM task_history WHERE namespace = %s AND task_id = %s", (self.namespace, task_id))
+        cur.execute("DELETE FROM tasks WHERE namespace = %s AND id = %s", (self.namespace, task_id))
+        return cur.rowcount != 0
+
+    @contextlib.contextmanager
+    def _cursor(self):
+        """
+        A cursor in a transaction of its own, returning rows as tuples whatever the connection's row factory.
+        """
+        from psycopg.rows import tuple_row
+        from psycopg_pool import ConnectionPool
+        if isinstance(self.conn, ConnectionPool):
+            with self.conn.connection() as conn, conn.transaction(), conn.cursor(row_factory=tuple_row) as cur:
+                yield cur
+        else:
+            # the connection is shared across threads, each taking the lock to use it.
+            with self._lock, self.conn.transaction(), self.conn.cursor(row_factory=tuple_row) as cur:
+                yield cur
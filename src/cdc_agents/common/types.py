@@ -8,7 +8,7 @@ from typing import Union, Any, Literal
 
 from langchain_core.messages import ToolCall
 from pydantic import BaseModel, Field, TypeAdapter
-from typing import Literal, List, Annotated, Optional
+from typing import Literal, List, Annotated, Optional, Deque
 from datetime import datetime
 from pydantic import model_validator, ConfigDict, field_serializer, field_validator
 from uuid import uuid4
@@ -103,7 +103,8 @@ class Task(BaseModel):
     artifacts: List[Artifact] | None = None
     history: List[Message] | None = None
     metadata: dict[str, Any] | None = None
-    to_process: List[Message] | None = None
+    # messages sent to the task while it runs, taken from the left by the agent.
+    to_process: Deque[Message] | None = None
 
 class AgentPosted(BaseModel):
     success: bool
@@ -312,6 +313,12 @@ class ContentTypeNotSupportedError(JSONRPCError):
     message: str = "Incompatible content types"
     data: None = None
 
+
+class ServerBusyError(JSONRPCError):
+    code: int = -32000
+    message: str = "Server is busy, try again later"
+    data: Any | None = None
+
 class AgentProvider(BaseModel):
     organization: str
     url: str | None = None
@@ -476,6 +483,8 @@ class ResponseFormat(BaseModel):
     status: Literal["input_required", "completed", "error", "goto_agent"] = "input_required"
     message: typing.Union[str, typing.List[BaseMessage], dict[str, typing.Any], typing.List[str], typing.Any] = None
     route_to: typing.Optional[str] = None
+    # every agent delegated to, when delegating to more than one in parallel - route_to is the first.
+    parallel_routes: typing.Optional[typing.List[str]] = None
     history: typing.List[BaseMessage] = None
 
 class AgentGraphResponse(BaseModel):
@@ -483,12 +492,22 @@ class AgentGraphResponse(BaseModel):
     require_user_input: bool
     content: typing.Union[ResponseFormat, str, list[BaseMessage]]
 
+class AgentGraphUpdate(AgentGraphResponse):
+    """The messages one node of an agent's graph added, streamed in place of the graph's whole state."""
+    agent_name: typing.Optional[str] = None
+
+class AgentGraphToken(BaseModel):
+    """Incremental model output streamed while an agent's graph is still running."""
+    token: str
+    agent_name: typing.Optional[str] = None
+
 class AgentGraphResult(BaseModel):
     is_task_complete: bool
     require_user_input: bool
     content: list[BaseMessage]
     last_message: typing.Optional[BaseMessage] = None
     agent_route: typing.Optional[str] = None
+    agent_routes: typing.Optional[typing.List[str]] = None
 
     def add_last_message(self, message: BaseMessage):
         self.content.append(message)
@@ -55,10 +55,18 @@ class PushNotificationSenderAuth(PushNotificationAuth):
 
         return False
 
-    def generate_jwk(self):
+    def generate_jwk(self) -> str:
+        """Generates the signing key, returning it as private JWK to load_jwk in other processes signing with it.
+        """
         key = jwk.JWK.generate(kty='RSA', size=2048, kid=str(uuid.uuid4()), use="sig")
+        private_key = key.export_private()
+        self.load_jwk(private_key)
+        return private_key
+
+    def load_jwk(self, private_key: str):
+        key = jwk.JWK.from_json(private_key)
         self.public_keys.append(key.export_public(as_dict=True))
-        self.private_key_jwk = PyJWK.from_json(key.export_private())
+        self.private_key_jwk = PyJWK.from_json(private_key)
     
     def handle_jwks_endpoint(self, _request: Request):
         """Allow clients to fetch public keys.
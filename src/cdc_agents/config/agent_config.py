@@ -1,13 +1,12 @@
-import json
-import typing
+import atexit
 import unittest.mock
 
-import pydantic
 from langchain.agents.output_parsers import JSONAgentOutputParser, ReActSingleInputOutputParser
 from langgraph.checkpoint.memory import MemorySaver
 from starlette.applications import Starlette
 
-from cdc_agents.agent.agent_server import AgentServerRunner
+from cdc_agents.agent.agent_server import AgentServerRunner, supervises_workers
+from cdc_agents.agent.task_manager import AgentExecutionScheduler
 from cdc_agents.agent.response_format_parser import ResponseFormatParser
 from cdc_agents.agents.cdc_server_agent import CdcCodeSearchAgent
 from cdc_agents.agents.code_build_agent import CodeBuildAgent
@@ -17,16 +16,25 @@ from cdc_agents.agents.human_delegate_agent import HumanDelegateAgent
 from cdc_agents.agents.library_enumeration_agent import LibraryEnumerationAgent
 from cdc_agents.agents.summarizer_agent import SummarizerAgent
 from cdc_agents.agents.test_runner_agent import TestRunnerAgent
+from cdc_agents.checkpoint.bounded_memory import BoundedMemorySaver
+from cdc_agents.checkpoint.compaction import CheckpointCompactor, checkpoint_pruner
+from cdc_agents.checkpoint.delta import DeltaMessageSaver
+from cdc_agents.checkpoint.message_blobs import InMemoryMessageBlobStore
+from cdc_agents.checkpoint.serde import JsonSerializationProtocol, MsgpackCheckpointSerializer
+from cdc_agents.common.graphql_client import GraphQLClient
 from cdc_agents.config.agent_config_props import AgentConfigProps
 from cdc_agents.config.cdc_server_config_props import CdcServerConfigProps
-from cdc_agents.config.checkpoint_config_props import CheckpointConfigProps
+from cdc_agents.config.checkpoint_config_props import CheckpointConfigProps, CheckpointSerializer
 from cdc_agents.config.human_delegate_config_props import HumanDelegateConfigProps
+from cdc_agents.config.mcp_config_props import McpConfigProps
 from cdc_agents.config.model_server_config_props import ModelServerConfigProps
 from cdc_agents.config.runner_props import RunnerConfigProps
 from cdc_agents.config.secret_config_props import SecretConfigProps
+from cdc_agents.config.task_manager_config_props import TaskManagerConfigProps
 from cdc_agents.config.tool_call_properties import ToolCallProps
 from cdc_agents.model_server.model_provider import ModelProvider
 from cdc_agents.model_server.model_server_model import ModelServerModel
+from cdc_agents.tools.mcp_session_pool import McpSessionPool
 from cdc_agents.tools.tool_call_decorator import ToolCallDecorator
 from python_di.configs.bean import bean
 from python_di.configs.component_scan import component_scan
@@ -34,65 +42,17 @@ from python_di.configs.di_configuration import configuration
 from python_di.configs.enable_configuration_properties import enable_configuration_properties
 from python_di.inject.profile_composite_injector.composite_injector import profile_scope
 from python_util.logger.logger import LoggerFacade
-from langgraph.checkpoint.serde.base import UntypedSerializerProtocol, SerializerCompat
-from pydantic import BaseModel
-from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, FunctionMessage, ToolMessage
-
-# TODO: ???
-def discover_registry() -> typing.Dict[str, typing.Type[BaseModel]]:
-    registry = {}
-    for cls in pydantic.BaseModel.__subclasses__():
-        try:
-            key = cls.model_fields['type'].default  # or cls.__fields__['type'].default in v1
-            if key:
-                registry[key] = cls
-        except Exception:
-            continue
-    return registry
-
-TYPE_REGISTRY = {
-    'ai': AIMessage,
-    'human': HumanMessage,
-    'system': SystemMessage,
-    'function': FunctionMessage,
-    'tool': ToolMessage,
-}
-
-class JsonSerializationProtocol(UntypedSerializerProtocol):
-    def dumps(self, obj: typing.Any) -> bytes:
-        if isinstance(obj, BaseModel):
-            obj = obj.model_dump()
-
-        elif isinstance(obj, typing.Collection) and not isinstance(obj, str):
-            obj = [
-                o.model_dump() if isinstance(o, BaseModel) else o
-                for o in obj
-            ]
-
-        return json.dumps(obj).encode('utf-8')
-
-    def loads(self, data: bytes) -> typing.Any:
-        obj = json.loads(data)
-
-        if isinstance(obj, dict) and 'type' in obj and obj['type'] in TYPE_REGISTRY:
-            return TYPE_REGISTRY[obj['type']](**obj)
-
-        if isinstance(obj, list):
-            return [
-                TYPE_REGISTRY[o['type']](**o) if isinstance(o, dict) and 'type' in o and o['type'] in TYPE_REGISTRY else o
-                for o in obj
-            ]
-
-        return obj
-
+from langgraph.checkpoint.serde.base import SerializerCompat
 
 @configuration()
 @enable_configuration_properties(config_props=[AgentConfigProps, ModelServerConfigProps, CheckpointConfigProps, CdcServerConfigProps,
-                                               HumanDelegateConfigProps, RunnerConfigProps, ToolCallProps, SecretConfigProps])
+                                               HumanDelegateConfigProps, RunnerConfigProps, ToolCallProps, SecretConfigProps,
+                                               McpConfigProps, TaskManagerConfigProps])
 @component_scan(base_classes=[ModelServerModel, CdcCodeSearchAgent, DeepCodeAgent,
                               DeepCodeOrchestrator, ModelProvider, AgentServerRunner, HumanDelegateAgent,
                               SummarizerAgent, LibraryEnumerationAgent, ToolCallDecorator, ResponseFormatParser,
-                              TestRunnerAgent, CodeBuildAgent, CodeDeployAgent])
+                              TestRunnerAgent, CodeBuildAgent, CodeDeployAgent, McpSessionPool,
+                              AgentExecutionScheduler, GraphQLClient])
 class AgentConfig:
 
     @bean(profile='test', scope=profile_scope, bindings=[Starlette])
@@ -104,12 +64,35 @@ class AgentConfig:
         return Starlette()
 
     @bean()
-    def memory(self, checkpoint_config_props: CheckpointConfigProps) -> MemorySaver:
+    def memory(self, checkpoint_config_props: CheckpointConfigProps, agent_config_props: AgentConfigProps,
+               runner_config_props: RunnerConfigProps) -> MemorySaver:
         """
         Decouple the memory here into a database for stateless services...
         :return:
         """
         assert checkpoint_config_props
+        saver = self._checkpointer(checkpoint_config_props)
+        # compaction runs in the workers, the supervisor starting them does not checkpoint.
+        if checkpoint_config_props.compaction and not supervises_workers(agent_config_props, runner_config_props):
+            self._start_compaction(saver, checkpoint_config_props)
+        return saver
+
+    def _checkpointer(self, checkpoint_config_props: CheckpointConfigProps):
+        if checkpoint_config_props.sqlite_path:
+            try:
+                from cdc_agents.checkpoint.sqlite import SqliteSaver, SqliteMessageBlobStore
+                LoggerFacade.to_ctx(f"Loading SQLite save from {checkpoint_config_props.sqlite_path}")
+                p = SqliteSaver.from_path(checkpoint_config_props.sqlite_path,
+                                          self._checkpoint_serde(checkpoint_config_props))
+                p.setup()
+                blobs = None
+                if checkpoint_config_props.delta_messages:
+                    blobs = SqliteMessageBlobStore(p)
+                    blobs.setup()
+                return self._wrap_checkpointer(p, blobs, checkpoint_config_props)
+            except Exception as e:
+                LoggerFacade.to_ctx(f"Failed to load SQLite: {e}. Loading from memory.")
+                return self._in_memory_checkpointer(checkpoint_config_props)
         try:
             assert checkpoint_config_props.uri
             from langgraph.checkpoint.postgres import PostgresSaver
@@ -117,17 +100,73 @@ class AgentConfig:
             from psycopg.rows import DictRow, dict_row
             try:
                 LoggerFacade.to_ctx(f"Loading Postgres save from URI {checkpoint_config_props.uri}")
-                conn = Connection.connect(checkpoint_config_props.uri, autocommit=True, prepare_threshold=0, row_factory=dict_row)
-                p = PostgresSaver(conn, serde=SerializerCompat(JsonSerializationProtocol()))
+                serde = self._checkpoint_serde(checkpoint_config_props)
+                if checkpoint_config_props.pooled:
+                    from cdc_agents.checkpoint.postgres import PooledPostgresSaver
+                    p = PooledPostgresSaver.from_uri(checkpoint_config_props.uri, checkpoint_config_props.pool_min_size,
+                                                     checkpoint_config_props.pool_max_size, serde)
+                else:
+                    conn = Connection.connect(checkpoint_config_props.uri, autocommit=True, prepare_threshold=0, row_factory=dict_row)
+                    p = PostgresSaver(conn, serde=serde)
                 p.setup()
-                return p
+                blobs = None
+                if checkpoint_config_props.delta_messages:
+                    from cdc_agents.checkpoint.postgres import PostgresMessageBlobStore
+                    blobs = PostgresMessageBlobStore(p.conn)
+                    blobs.setup()
+                return self._wrap_checkpointer(p, blobs, checkpoint_config_props)
             except Exception as e:
                 LoggerFacade.to_ctx(f"Failed to load postgres: {e}. Loading from memory.")
-                return MemorySaver()
+                return self._in_memory_checkpointer(checkpoint_config_props)
         except Exception as f:
             LoggerFacade.to_ctx(f"No URI configured or error: {f}. Loading from memory.")
+        return self._in_memory_checkpointer(checkpoint_config_props)
+
+    @staticmethod
+    def _start_compaction(saver, checkpoint_config_props: CheckpointConfigProps):
+        pruner = checkpoint_pruner(saver)
+        if pruner is None:
+            LoggerFacade.warn(f"Checkpoint compaction is not supported for {type(saver).__name__}.")
+            return
+        CheckpointCompactor(saver, pruner, checkpoint_config_props.compaction_keep_latest,
+                            checkpoint_config_props.compaction_keep_task_completions,
+                            checkpoint_config_props.compaction_interval_seconds,
+                            checkpoint_config_props.compaction_threads_per_run).start()
+
+    @staticmethod
+    def _wrap_checkpointer(p, blobs, checkpoint_config_props: CheckpointConfigProps):
+        if blobs is not None:
+            p = DeltaMessageSaver(p, blobs, max_cached_messages=checkpoint_config_props.max_cached_messages)
+        if checkpoint_config_props.write_behind:
+            from cdc_agents.checkpoint.write_behind import WriteBehindSaver
+            write_behind = WriteBehindSaver(p, checkpoint_config_props.max_pending_writes,
+                                            checkpoint_config_props.flush_interval_seconds,
+                                            checkpoint_config_props.max_flush_attempts)
+            # flush the writes still buffered at shutdown.
+            atexit.register(write_behind.close)
+            return write_behind
+        return p
+
+    @staticmethod
+    def _in_memory_checkpointer(checkpoint_config_props: CheckpointConfigProps):
+        if checkpoint_config_props.bounded_memory:
+            return BoundedMemorySaver(checkpoint_config_props.memory_max_threads,
+                                      checkpoint_config_props.memory_max_checkpoints_per_thread,
+                                      checkpoint_config_props.memory_idle_ttl_seconds,
+                                      checkpoint_config_props.memory_max_bytes)
+        if checkpoint_config_props.delta_messages:
+            return DeltaMessageSaver(MemorySaver(), InMemoryMessageBlobStore(),
+                                     max_cached_messages=checkpoint_config_props.max_cached_messages)
         return MemorySaver()
 
+    @staticmethod
+    def _checkpoint_serde(checkpoint_config_props: CheckpointConfigProps):
+        json_serde = SerializerCompat(JsonSerializationProtocol())
+        if checkpoint_config_props.serializer == CheckpointSerializer.MSGPACK:
+            return MsgpackCheckpointSerializer(checkpoint_config_props.zstd_level,
+                                               checkpoint_config_props.compress_min_bytes, legacy=json_serde)
+        return json_serde
+
 
     @bean()
     def json_parser(self) -> JSONAgentOutputParser:
@@ -1,3 +1,4 @@
+import enum
 import typing
 
 from cdc_agents.common.types import AgentCard, AgentSkill, AgentDescriptor, AgentType
@@ -13,6 +14,19 @@ class AgentMcpTool(BaseModel):
     # TODO: should be able to keep it running and call exec instead
     # exec_tool_options: typing.Optional[typing.Any] = None
 
+class AgentStartupMode(enum.Enum):
+    SEQUENTIAL = 'SEQUENTIAL'
+    CONCURRENT = 'CONCURRENT'
+
+class AgentStreamMode(enum.Enum):
+    VALUES = 'VALUES'
+    UPDATES = 'UPDATES'
+
+class MessageOverflowStrategy(enum.Enum):
+    DROP = 'DROP'
+    TRUNCATE = 'TRUNCATE'
+    SUMMARIZE = 'SUMMARIZE'
+
 class AgentCardItem(BaseModel):
     agent_card: typing.Optional[AgentCard] = None
     agent_descriptor: typing.Optional[AgentDescriptor] = None
@@ -29,4 +43,31 @@ class AgentConfigProps(ConfigurationProperties):
     orchestrator_max_recurs: typing.Optional[int] = 5000
     host: typing.Optional[str] = "0.0.0.0"
     port: typing.Optional[int] = 50000
-    max_tokens_message_state: int = 20000
\ No newline at end of file
+    # uvicorn worker processes serving the A2A agents, each booting the application. More than one requires a task
+    # store, event bus and checkpointer shared by the workers - see task_manager and checkpoint.
+    workers: int = 1
+    # budget for the messages sent with each model call, counted per message and cached.
+    max_tokens_message_state: int = 20000
+    # how the oldest messages over max_tokens_message_state are removed from a model call.
+    message_overflow_strategy: MessageOverflowStrategy = MessageOverflowStrategy.DROP
+    # TRUNCATE shortens each old message to at most this many tokens before dropping any.
+    max_tokens_truncated_message: int = 512
+    # route agents' output through the summarizer only once this many tokens or messages were added since it last
+    # ran. With neither set, the summarizer runs after every agent turn.
+    summarize_min_tokens: typing.Optional[int] = None
+    summarize_min_messages: typing.Optional[int] = None
+    # extend the running summary kept in the graph state, summarizing only the messages added since the last summary.
+    incremental_summary: bool = False
+    # let orchestrators delegate to several agents in one step, running them concurrently.
+    parallel_delegation: bool = False
+    # run orchestrators nested in other orchestrators as subgraphs of the parent's graph, checkpointed under their own
+    # namespace, instead of invoking their separately compiled graphs.
+    compose_subgraphs: bool = False
+    # CONCURRENT starts MCP tool discovery in the background from each agent's constructor instead of blocking on it.
+    startup_mode: AgentStartupMode = AgentStartupMode.SEQUENTIAL
+    # defer compiling each agent's graph until its first request.
+    lazy_graph_compile: bool = False
+    # stream model tokens to A2A SSE clients as they are generated, alongside the state updates.
+    stream_tokens: bool = False
+    # VALUES streams the graph's whole state after each step, UPDATES only the messages each step added.
+    stream_mode: AgentStreamMode = AgentStreamMode.VALUES
\ No newline at end of file
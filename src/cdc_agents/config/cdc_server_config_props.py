@@ -8,3 +8,10 @@ from python_di.properties.configuration_properties_decorator import configuratio
 @configuration_properties(prefix_name='cdc_server')
 class CdcServerConfigProps(ConfigurationProperties):
     graphql_endpoint: str = "localhost:9991"
+    connect_timeout_seconds: float = 10.0
+    # git operations run without perform_ops_async block until the server finishes them.
+    timeout_seconds: typing.Optional[float] = 600.0
+    max_connections: int = 32
+    max_keepalive_connections: int = 16
+    # send registered GraphQL operations as automatic persisted queries, by sha256 hash instead of the document.
+    persisted_queries: bool = False
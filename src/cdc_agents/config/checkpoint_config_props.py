@@ -1,3 +1,4 @@
+import enum
 import typing
 
 from cdc_agents.common.types import AgentCard, AgentSkill, AgentDescriptor, AgentType
@@ -5,6 +6,51 @@ from python_di.env.base_module_config_props import ConfigurationProperties
 from python_di.properties.configuration_properties_decorator import configuration_properties
 from pydantic.main import BaseModel
 
+class CheckpointSerializer(enum.Enum):
+    JSON = 'JSON'
+    MSGPACK = 'MSGPACK'
+
 @configuration_properties(prefix_name='checkpoint')
 class CheckpointConfigProps(ConfigurationProperties):
-    uri: typing.Optional[str] = None
\ No newline at end of file
+    uri: typing.Optional[str] = None
+    # checkpoint to a local SQLite database in WAL mode instead of Postgres, for single-node deployments.
+    sqlite_path: typing.Optional[str] = None
+    # share a pool of connections across agents and sessions instead of one connection.
+    pooled: bool = False
+    pool_min_size: int = 1
+    pool_max_size: int = 10
+    # MSGPACK stores channel values and writes in binary, reading those stored as JSON before.
+    serializer: CheckpointSerializer = CheckpointSerializer.JSON
+    # zstd level for MSGPACK values of at least compress_min_bytes - no compression when unset.
+    zstd_level: typing.Optional[int] = None
+    compress_min_bytes: int = 1024
+    # buffer checkpoint writes and flush them in batches - every flush_interval_seconds, once max_pending_writes are
+    # buffered, and before reads.
+    write_behind: bool = False
+    max_pending_writes: int = 64
+    flush_interval_seconds: float = 0.5
+    # a buffered write failing this many flushes is dropped.
+    max_flush_attempts: int = 3
+    # store message lists as references to content-addressed message blobs, only the new messages each step.
+    delta_messages: bool = False
+    # messages and segments kept decoded for reconstructing message lists.
+    max_cached_messages: int = 10000
+    # without a uri, evict checkpoints from memory instead of keeping every session's forever - takes precedence over
+    # delta_messages, whose in-memory message blobs are shared across threads and so are not evicted with them.
+    bounded_memory: bool = False
+    # least recently used threads are evicted beyond memory_max_threads.
+    memory_max_threads: typing.Optional[int] = None
+    # older checkpoints of a thread are evicted beyond memory_max_checkpoints_per_thread.
+    memory_max_checkpoints_per_thread: typing.Optional[int] = None
+    # threads not read or written for memory_idle_ttl_seconds are evicted.
+    memory_idle_ttl_seconds: typing.Optional[float] = None
+    # least recently used threads are evicted while the serialized checkpoints exceed memory_max_bytes.
+    memory_max_bytes: typing.Optional[int] = None
+    # prune the checkpoint history of threads in the background, compaction_threads_per_run threads every
+    # compaction_interval_seconds - keeping each thread's latest compaction_keep_latest checkpoints and, with
+    # compaction_keep_task_completions, the last checkpoint of each task.
+    compaction: bool = False
+    compaction_keep_latest: typing.Optional[int] = None
+    compaction_keep_task_completions: bool = True
+    compaction_interval_seconds: float = 300
+    compaction_threads_per_run: int = 100
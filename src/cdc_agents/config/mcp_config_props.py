@@ -0,0 +1,18 @@
+import typing
+
+from python_di.env.base_module_config_props import ConfigurationProperties
+from python_di.properties.configuration_properties_decorator import configuration_properties
+
+
+@configuration_properties(prefix_name='mcp')
+class McpConfigProps(ConfigurationProperties):
+    """
+    Settings for the pool of long-lived MCP client sessions shared by all agents' MCP tools.
+    """
+    max_sessions: int = 16
+    connect_timeout_seconds: float = 120.0
+    call_timeout_seconds: typing.Optional[float] = None
+    health_check_interval_seconds: float = 30.0
+    health_check_timeout_seconds: float = 5.0
+    shutdown_timeout_seconds: float = 10.0
+    schema_cache_dir: typing.Optional[str] = './mcp_tool_cache'
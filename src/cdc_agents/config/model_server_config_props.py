@@ -8,9 +8,30 @@ from python_di.properties.configuration_properties_decorator import configuratio
 class ModelServerModelProps(BaseModel):
     path: str
     api_key: str
+    # overrides ModelServerConfigProps.timeout_seconds for requests to this model.
+    timeout_seconds: typing.Optional[float] = None
 
 @configuration_properties(prefix_name='model_server')
 class ModelServerConfigProps(ConfigurationProperties):
     host: str
     port: int
     models: typing.List[ModelServerModelProps] = None
+    scheme: str = 'http'
+    chat_path: str = '/v1/chat/completions'
+    embed_path: str = '/v1/embeddings'
+    rerank_path: str = '/v1/rerank'
+    validation_path: str = '/v1/validate'
+    timeout_seconds: float = 120.0
+    connect_timeout_seconds: float = 10.0
+    # retries of connection errors, 429 and 5xx, backing off exponentially from retry_backoff_seconds.
+    max_retries: int = 3
+    retry_backoff_seconds: float = 0.5
+    max_connections: int = 32
+    max_keepalive_connections: int = 16
+    keepalive_expiry_seconds: float = 30.0
+    # negotiated over TLS only - needs scheme https and the h2 package, installed with httpx[http2].
+    http2: bool = False
+    # coalesce concurrent embed and rerank requests into one upstream call.
+    batch_requests: bool = False
+    batch_max_size: int = 32
+    batch_max_wait_ms: float = 5.0
@@ -0,0 +1,49 @@
+import enum
+import typing
+
+from python_di.env.base_module_config_props import ConfigurationProperties
+from python_di.properties.configuration_properties_decorator import configuration_properties
+
+
+class TaskStoreType(enum.Enum):
+    MEMORY = 'MEMORY'
+    SQLITE = 'SQLITE'
+    POSTGRES = 'POSTGRES'
+
+
+class EventBusType(enum.Enum):
+    LOCAL = 'LOCAL'
+    POSTGRES = 'POSTGRES'
+
+
+@configuration_properties(prefix_name='task_manager')
+class TaskManagerConfigProps(ConfigurationProperties):
+    # global cap on agent invocations and streams running at once, across every agent.
+    max_workers: int = 16
+    # invocations waiting for a worker beyond this are rejected with a busy error.
+    max_queued: int = 64
+    # cap on concurrent invocations of any one agent, unless overridden in agent_max_concurrency.
+    default_agent_max_concurrency: typing.Optional[int] = None
+    agent_max_concurrency: typing.Dict[str, int] = {}
+    # completed, failed and canceled tasks kept in the task store - the least recently used beyond
+    # max_retained_tasks or max_retained_task_bytes are removed, and any idle for task_idle_ttl_seconds.
+    max_retained_tasks: typing.Optional[int] = None
+    task_idle_ttl_seconds: typing.Optional[float] = None
+    max_retained_task_bytes: typing.Optional[int] = None
+    # how often tasks beyond retention and their locks and subscribers are removed.
+    task_sweep_interval_seconds: float = 60
+    # where tasks are kept - MEMORY in this process, or SQLITE and POSTGRES in the database at task_store_uri, a path or
+    # a postgres uri, so tasks survive restarts and are shared by the worker processes serving them.
+    task_store: TaskStoreType = TaskStoreType.MEMORY
+    task_store_uri: typing.Optional[str] = None
+    task_store_pool_max_size: int = 10
+    # publish task events on a bus shared by the workers, so a task's stream can be consumed from any of them - LOCAL
+    # within this process, or POSTGRES with LISTEN/NOTIFY at event_bus_uri, task_store_uri when unset. Without one,
+    # events are delivered to this process's subscribers directly.
+    event_bus: typing.Optional[EventBusType] = None
+    event_bus_uri: typing.Optional[str] = None
+    # run each session on the worker its id hashes to among the live workers on the event bus, so its checkpoints stay
+    # cached there - tasks received by other workers are forwarded to it.
+    session_affinity: bool = False
+    # workers publish a heartbeat every worker_heartbeat_seconds, and are no longer assigned sessions after missing three.
+    worker_heartbeat_seconds: float = 5
@@ -1,4 +1,5 @@
 import dataclasses
+import inspect
 import time
 import typing
 import uuid
@@ -8,10 +9,13 @@ import asyncio
 import injector
 from mcp.server.fastmcp import FastMCP
 from pydantic import BaseModel
+from starlette.concurrency import iterate_in_threadpool
 
 from cdc_agents.agent.a2a import A2AAgent
 from cdc_agents.agent.agent import A2AReactAgent
-from cdc_agents.agent.task_manager import AgentTaskManager
+from cdc_agents.agent.agent_startup import warm_up_agents
+from cdc_agents.agent.task_manager import AgentTaskManager, AsyncAgentTaskManager, AgentExecutionScheduler, \
+    task_retention, task_store, event_bus
 from cdc_agents.common.types import (
     AgentCard, SendTaskStreamingRequest, TaskSendParams, SendTaskStreamingResponse,
     JSONRPCResponse, Message, TextPart, CancelTaskRequest, TaskIdParams, TaskState, TaskStatus,
@@ -71,16 +75,19 @@ class CdcMcpAgents:
         agent_config_props: AgentConfigProps,
         runner_config_props: RunnerConfigProps,
         model_provider: ModelProvider,
+        agent_execution_scheduler: AgentExecutionScheduler,
         agents: List[A2AAgent] = None
     ):
         self.agent_config_props = agent_config_props
         self.model_provider = model_provider
+        self.agent_execution_scheduler = agent_execution_scheduler
 
         self.server: FastMCP = FastMCP("cdc-agents-mcp", stateless_http=True, json_response=True)
         self.agent_tools: List[AgentTool] = []
 
         # Initialize agent tools
         self.agents = agents or []
+        warm_up_agents(self.agents, agent_config_props)
 
         self._initialize_agent_tools()
 
@@ -102,7 +109,11 @@ class CdcMcpAgents:
         for agent in self.agents:
             agent_name = agent.agent_name
 
-            task_manager = AgentTaskManager(agent, PushNotificationSenderAuth())
+            task_manager = AsyncAgentTaskManager(agent, PushNotificationSenderAuth(),
+                                                 self.agent_execution_scheduler.executor_for(agent_name),
+                                                 task_retention(self.agent_execution_scheduler.props),
+                                                 task_store(self.agent_execution_scheduler.props, agent_name),
+                                                 event_bus(self.agent_execution_scheduler.props))
             agent.set_task_manager(task_manager)
 
             if agent_name in self.agent_config_props.agents:
@@ -424,6 +435,8 @@ class CdcMcpAgents:
                 acceptedOutputModes=["text"])
 
             response = tasks.on_send_task_subscribe(SendTaskStreamingRequest(params=task_send_params))
+            if inspect.isawaitable(response):
+                response = await response
 
             # If it's a JSONRPCResponse, return it directly
             if isinstance(response, JSONRPCResponse):
@@ -433,13 +446,8 @@ class CdcMcpAgents:
             if hasattr(response, '__aiter__'):
                 return response
 
-            # If it's a regular generator, convert it to an async generator
-            async def async_generator():
-                for item in response:
-                    yield item
-                    await asyncio.sleep(0)  # Allow other tasks to run
-
-            return async_generator()
+            # If it's a regular generator, drain it from the threadpool so it can't block the event loop
+            return iterate_in_threadpool(response)
         except Exception as e:
             LoggerFacade.error(f"Error in _call_agent_tool_get_responses: {str(e)}")
             return JSONRPCResponse(result=f"Error processing request: {str(e)}")
@@ -521,10 +529,17 @@ class CdcMcpAgents:
 
         # Get tasks from all agent task managers
         for agent_name, task_manager in self.tasks.items():
-            # To get all tasks, we need to check all task manager's internal tasks dictionary
-            if hasattr(task_manager, 'tasks'):
-                for task_id, task in task_manager.tasks.items():
-                    if status_filter == "all" or task.status.state == status_filter:
+            # To get all tasks, we need to check all task manager's task store, by state when filtered
+            if hasattr(task_manager, 'task_store'):
+                if status_filter == "all":
+                    task_ids_of_agent = task_manager.task_store.find()
+                elif status_filter in {s.value for s in TaskState}:
+                    task_ids_of_agent = task_manager.task_store.find(state=TaskState(status_filter))
+                else:
+                    task_ids_of_agent = []
+                for task_id in task_ids_of_agent:
+                    task = task_manager.task_store.get(task_id, 1)
+                    if task is not None:
                         tasks.append({
                             "task_id": task_id,
                             "agent": agent_name,
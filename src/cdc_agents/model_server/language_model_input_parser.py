@@ -39,6 +39,10 @@ class LanguageModelOutputParser(abc.ABC):
     def convert_to_ai_response(cls, content, tools=None, config = None) -> typing.Optional[LanguageModelOutput]:
         m = AIMessage(content=content)
         m.tool_calls = tools
+        return cls.add_config_metadata(m, config)
+
+    @classmethod
+    def add_config_metadata(cls, m: LanguageModelOutput, config = None) -> LanguageModelOutput:
         if config is not None:
             config['checkpoint_ns'] = time.time_ns()
         if config is not None and 'configurable' in config.keys():
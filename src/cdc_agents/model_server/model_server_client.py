@@ -0,0 +1,186 @@
+import concurrent.futures
+import contextlib
+import dataclasses
+import threading
+import time
+import typing
+
+import httpx
+from httpx_sse import connect_sse
+
+from cdc_agents.config.model_server_config_props import ModelServerConfigProps, ModelServerModelProps
+from python_util.logger.logger import LoggerFacade
+
+try:
+    import h2
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class ModelServerHttpError(Exception):
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(f"Model server returned {status_code}: {message}")
+        self.status_code = status_code
+
+
+class ModelServerHttpClient:
+    """
+    Keep-alive connection pool to the model server shared by all requests, retrying connection errors and transient
+    statuses with exponential backoff.
+    """
+
+    def __init__(self, config_props: ModelServerConfigProps):
+        self.config_props = config_props
+        http2 = config_props.http2 and HTTP2_AVAILABLE
+        if config_props.http2 and not HTTP2_AVAILABLE:
+            LoggerFacade.debug("h2 is not installed - connecting to the model server with HTTP/1.1.")
+        elif http2 and config_props.scheme != 'https':
+            LoggerFacade.debug("HTTP/2 is only negotiated over https - connecting to the model server with HTTP/1.1.")
+        self.client = httpx.Client(
+            base_url=self.base_url, http2=http2,
+            timeout=httpx.Timeout(config_props.timeout_seconds, connect=config_props.connect_timeout_seconds),
+            limits=httpx.Limits(max_connections=config_props.max_connections,
+                                max_keepalive_connections=config_props.max_keepalive_connections,
+                                keepalive_expiry=config_props.keepalive_expiry_seconds))
+
+    @property
+    def base_url(self) -> str:
+        return f"{self.config_props.scheme}://{self.config_props.host}:{self.config_props.port}"
+
+    def timeout(self, model_props: typing.Optional[ModelServerModelProps] = None) -> httpx.Timeout:
+        timeout = model_props.timeout_seconds if model_props is not None and model_props.timeout_seconds \
+            else self.config_props.timeout_seconds
+        return httpx.Timeout(timeout, connect=self.config_props.connect_timeout_seconds)
+
+    @staticmethod
+    def headers(model_props: typing.Optional[ModelServerModelProps] = None) -> typing.Dict[str, str]:
+        if model_props is not None and model_props.api_key:
+            return {'Authorization': f'Bearer {model_props.api_key}'}
+        return {}
+
+    def post(self, path: str, body: typing.Any,
+             model_props: typing.Optional[ModelServerModelProps] = None) -> typing.Any:
+        return self._with_retries(path, lambda: self._post(path, body, model_props))
+
+    def stream_sse(self, path: str, body: typing.Any,
+                   model_props: typing.Optional[ModelServerModelProps] = None) -> typing.Iterator[str]:
+        """
+        Yields the data of each server sent event. Opening the stream is retried, but once events have been yielded
+        a failure is raised to the caller.
+        """
+        with self._with_retries(path, lambda: self._connect_sse(path, body, model_props)) as event_source:
+            for sse in event_source.iter_sse():
+                yield sse.data
+
+    def close(self):
+        self.client.close()
+
+    def _post(self, path, body, model_props):
+        response = self.client.post(path, json=body, headers=self.headers(model_props),
+                                    timeout=self.timeout(model_props))
+        self._raise_for_status(response)
+        return response.json()
+
+    def _connect_sse(self, path, body, model_props):
+        with contextlib.ExitStack() as stack:
+            event_source = stack.enter_context(
+                connect_sse(self.client, "POST", path, json=body, headers=self.headers(model_props),
+                            timeout=self.timeout(model_props)))
+            if event_source.response.status_code >= 400:
+                event_source.response.read()
+            self._raise_for_status(event_source.response)
+            # the response stays open for the caller, who closes it by exiting the returned context.
+            return contextlib.closing(_ClosingEventSource(event_source, stack.pop_all()))
+
+    @staticmethod
+    def _raise_for_status(response: httpx.Response):
+        if response.status_code >= 400:
+            raise ModelServerHttpError(response.status_code, response.text)
+
+    def _with_retries(self, path: str, request: typing.Callable[[], typing.Any]):
+        attempt = 0
+        while True:
+            try:
+                return request()
+            except (httpx.TransportError, ModelServerHttpError) as e:
+                if isinstance(e, ModelServerHttpError) and e.status_code not in RETRY_STATUS_CODES:
+                    raise
+                if attempt >= self.config_props.max_retries:
+                    raise
+                backoff = self.config_props.retry_backoff_seconds * (2 ** attempt)
+                LoggerFacade.warn(f"Model server request to {path} failed: {e}. Retrying in {backoff:.2f}s.")
+                time.sleep(backoff)
+                attempt += 1
+
+
+@dataclasses.dataclass
+class _ClosingEventSource:
+    event_source: typing.Any
+    stack: contextlib.ExitStack
+
+    def iter_sse(self):
+        return self.event_source.iter_sse()
+
+    def close(self):
+        self.stack.close()
+
+
+@dataclasses.dataclass
+class _PendingBatch:
+    items: typing.List[typing.Any] = dataclasses.field(default_factory=list)
+    results: concurrent.futures.Future = dataclasses.field(default_factory=concurrent.futures.Future)
+
+
+class ModelServerRequestBatcher:
+    """
+    Coalesces concurrent requests with the same key into one upstream call. The first request of a batch waits up to
+    max_wait_seconds for others to join, or until the batch is full, then sends the batch on behalf of all of them.
+    send receives the key and the batched items and returns one result per item, in order.
+    """
+
+    def __init__(self, send: typing.Callable[[typing.Hashable, typing.List[typing.Any]], typing.List[typing.Any]],
+                 max_batch_size: int = 32, max_wait_seconds: float = 0.005):
+        self.send = send
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_seconds
+        self.stats = {'batches': 0, 'requests': 0}
+        self._pending: typing.Dict[typing.Hashable, _PendingBatch] = {}
+        self._condition = threading.Condition()
+
+    def submit(self, key: typing.Hashable, item: typing.Any) -> typing.Any:
+        with self._condition:
+            batch = self._pending.get(key)
+            leader = batch is None
+            if leader:
+                batch = self._pending[key] = _PendingBatch()
+            index = len(batch.items)
+            batch.items.append(item)
+            if len(batch.items) >= self.max_batch_size:
+                del self._pending[key]
+                self._condition.notify_all()
+            elif leader:
+                deadline = time.monotonic() + self.max_wait_seconds
+                while self._pending.get(key) is batch and (remaining := deadline - time.monotonic()) > 0:
+                    self._condition.wait(remaining)
+                if self._pending.get(key) is batch:
+                    del self._pending[key]
+
+        if leader:
+            self._send(key, batch)
+        return batch.results.result()[index]
+
+    def _send(self, key, batch: _PendingBatch):
+        with self._condition:
+            self.stats['batches'] += 1
+            self.stats['requests'] += len(batch.items)
+        try:
+            results = self.send(key, batch.items)
+            if len(results) != len(batch.items):
+                raise ValueError(f"Model server returned {len(results)} results for a batch of {len(batch.items)}.")
+            batch.results.set_result(results)
+        except Exception as e:
+            batch.results.set_exception(e)
@@ -1,7 +1,8 @@
 import abc
+import atexit
 import dataclasses
 import json
-import threading
+import re
 import typing
 from typing import Optional, Any
 
@@ -11,11 +12,13 @@ from langchain_core.agents import AgentAction
 from langchain_core.callbacks import CallbackManagerForLLMRun
 from langchain_core.language_models import LanguageModelInput, LanguageModelOutput, BaseChatModel
 from langchain_core.language_models.base import LanguageModelOutputVar
-from langchain_core.messages import BaseMessage, MessageLikeRepresentation, AIMessage, ToolCall
-from langchain_core.outputs import ChatGenerationChunk, ChatResult
+from langchain_core.messages import BaseMessage, MessageLikeRepresentation, AIMessage, ToolCall, AIMessageChunk
+from langchain_core.messages.tool import tool_call_chunk as create_tool_call_chunk
+from langchain_core.outputs import ChatGenerationChunk, ChatResult, ChatGeneration
 from langchain_core.prompt_values import PromptValue
 from langchain_core.runnables import Runnable, RunnableConfig, RunnableSerializable
 from langchain_core.tools import BaseTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
 from pydantic import BaseModel
 
 from aisuite.framework import ChatCompletionResponse
@@ -24,6 +27,7 @@ from cdc_agents.common.types import ToolCallJson, ToolCallAdapter
 from cdc_agents.config.agent_config_props import AgentCardItem
 from cdc_agents.config.model_server_config_props import ModelServerConfigProps, ModelServerModelProps
 from cdc_agents.model_server.language_model_input_parser import LanguageModelOutputParser
+from cdc_agents.model_server.model_server_client import ModelServerHttpClient, ModelServerRequestBatcher
 from python_di.configs.autowire import injectable
 from python_di.configs.component import component
 from python_di.configs.prototype import prototype_scope_bean, prototype_factory
@@ -68,10 +72,41 @@ class ModelServerExecutor(BaseModel, abc.ABC):
                  *args, **kwargs) -> typing.Union[ChatCompletionResponse, str]:
         pass
 
+    def stream(self, model_server_input: ModelServerInput,
+               tools: typing.Optional[typing.Sequence[typing.Union[typing.Dict[str, Any], type, typing.Callable, BaseTool]]] = None,
+               *args, **kwargs) -> typing.Iterator[str]:
+        """
+        Yield the completion incrementally as text chunks. Executors that cannot stream yield the whole completion
+        from call as a single chunk.
+        """
+        yield from completion_text(self.call(model_server_input, tools, *args, **kwargs))
+
     @abc.abstractmethod
     def get_config_props(self) -> ModelServerConfigProps:
         pass
 
+def completion_text(completion: typing.Union[ChatCompletionResponse, str, None]) -> typing.Iterator[str]:
+    if isinstance(completion, ChatCompletionResponse):
+        for c in completion.choices:
+            if c.message.content:
+                yield c.message.content
+    elif completion:
+        yield completion
+
+TOOL_CALL_START = '<tool_call>'
+
+def streamable_text(completion: str) -> int:
+    """
+    Index up to which the completion can be streamed as text - up to the tool call markup, holding back a tail that
+    may be the start of it.
+    """
+    if TOOL_CALL_START in completion:
+        return completion.index(TOOL_CALL_START)
+    for i in range(min(len(TOOL_CALL_START) - 1, len(completion)), 0, -1):
+        if completion.endswith(TOOL_CALL_START[:i]):
+            return len(completion) - i
+    return len(completion)
+
 @component(bind_to=[ModelServerExecutor], profile='test', scope=profile_scope)
 @injectable()
 class LoggingModelServerExecutor(ModelServerExecutor):
@@ -97,25 +132,120 @@ class LoggingModelServerExecutor(ModelServerExecutor):
         else:
             return "hello!"
 
+    def stream(self, model_server_input: ModelServerInput,
+               tools: typing.Optional[typing.Sequence[typing.Union[typing.Dict[str, Any], type, typing.Callable, BaseTool]]] = None,
+               *args, **kwargs) -> typing.Iterator[str]:
+        for text in completion_text(self.call(model_server_input, tools, *args, **kwargs)):
+            # word by word, keeping the whitespace, so that the chunks join back into the completion.
+            yield from [t for t in re.split(r'(?<=\s)', text) if t]
+
 @component(bind_to=[ModelServerExecutor], profile='main_profile', scope=profile_scope)
 @injectable()
 class RestModelServerExecutor(ModelServerExecutor):
+    """
+    Calls the model server over a pooled HTTP client. Chat and embeddings use the OpenAI wire format - chat streams
+    server sent events of completion deltas - and the rerank endpoint takes {"inputs": [...]} and returns
+    {"results": [...]}, one result per input. When batch_requests is set, concurrent embed and rerank requests for the
+    same model are coalesced into one upstream call.
+    """
 
     config_props: ModelServerConfigProps
 
+    __client__: ModelServerHttpClient
+    __batcher__: typing.Optional[ModelServerRequestBatcher]
+
     @injector.inject
     def __init__(self, model_props: ModelServerConfigProps):
         BaseModel.__init__(self, config_props=model_props)
+        self.__client__ = ModelServerHttpClient(model_props)
+        self.__batcher__ = ModelServerRequestBatcher(self._send_batch, model_props.batch_max_size,
+                                                     model_props.batch_max_wait_ms / 1000) \
+            if model_props.batch_requests else None
+        atexit.register(self.__client__.close)
 
     def call(self, model_server_input: ModelServerInput,
                  tools: typing.Optional[typing.Sequence[typing.Union[typing.Dict[str, Any], type, typing.Callable, BaseTool]]] = None,
                  *args, **kwargs) -> typing.Union[ChatCompletionResponse, str]:
-        pass
+        model_props = self.resolve_model(model_server_input, kwargs.get('model_props'))
+        if isinstance(model_server_input, ModelServerChatInput):
+            completion = self.__client__.post(self.config_props.chat_path,
+                                              self._chat_body(model_server_input, tools, model_props), model_props)
+            return ChatCompletionResponse.create_completion_response([
+                Choice.create_choice(Message(content=content, role=c['message'].get('role') or 'assistant'))
+                for c in completion['choices'] for content in self._message_contents(c['message'])])
+        elif isinstance(model_server_input, ModelServerEmbedInput | ModelServerRerankInput):
+            key = (type(model_server_input), None if model_props is None else model_props.path)
+            if self.__batcher__ is not None:
+                return self.__batcher__.submit(key, model_server_input)
+            return self._send_batch(key, [model_server_input])[0]
+        elif isinstance(model_server_input, ModelServerValidationEndpoint):
+            return self.__client__.post(self.config_props.validation_path, model_server_input.model_dump(),
+                                        model_props)
+        raise ValueError(f"Unsupported model server input {type(model_server_input).__name__}.")
+
+    def stream(self, model_server_input: ModelServerInput,
+               tools: typing.Optional[typing.Sequence[typing.Union[typing.Dict[str, Any], type, typing.Callable, BaseTool]]] = None,
+               *args, **kwargs) -> typing.Iterator[str]:
+        if not isinstance(model_server_input, ModelServerChatInput):
+            yield from super().stream(model_server_input, tools, *args, **kwargs)
+            return
+
+        model_props = self.resolve_model(model_server_input, kwargs.get('model_props'))
+        body = self._chat_body(model_server_input, tools, model_props)
+        body['stream'] = True
+        for data in self.__client__.stream_sse(self.config_props.chat_path, body, model_props):
+            if data.strip() == '[DONE]':
+                return
+            for c in json.loads(data).get('choices', []):
+                yield from self._message_contents(c.get('delta') or {})
 
     @property
     def get_config_props(self) -> ModelServerConfigProps:
         return self.config_props
 
+    def resolve_model(self, model_server_input: ModelServerInput,
+                      model_props: typing.Optional[ModelServerModelProps] = None) -> typing.Optional[ModelServerModelProps]:
+        if model_props is not None:
+            return model_props
+        models = self.config_props.models or []
+        if isinstance(model_server_input, ModelServerEmbedInput | ModelServerValidationEndpoint):
+            found = next((m for m in models if m.path == model_server_input.model), None)
+            if found is not None:
+                return found
+        return models[0] if len(models) != 0 else None
+
+    def _send_batch(self, key, inputs: typing.List[ModelServerInput]) -> typing.List[typing.Any]:
+        input_type, model_path = key
+        model_props = next((m for m in self.config_props.models or [] if m.path == model_path), None)
+        if input_type == ModelServerEmbedInput:
+            embedded = self.__client__.post(self.config_props.embed_path, {
+                'model': inputs[0].model,
+                'input': [i.to_embed for i in inputs]
+            }, model_props)
+            return [d['embedding'] for d in sorted(embedded['data'], key=lambda d: d['index'])]
+        reranked = self.__client__.post(self.config_props.rerank_path,
+                                        {'inputs': [i.model_dump() for i in inputs]}, model_props)
+        return reranked['results']
+
+    @staticmethod
+    def _chat_body(model_server_input: ModelServerChatInput, tools, model_props: typing.Optional[ModelServerModelProps]):
+        body = {'messages': [m.model_dump() for m in model_server_input.messages]}
+        if model_props is not None:
+            body['model'] = model_props.path
+        if tools:
+            body['tools'] = [convert_to_openai_tool(t) for t in tools]
+        return body
+
+    @staticmethod
+    def _message_contents(message: dict) -> typing.List[str]:
+        """
+        Tool calls are passed on in the <tool_call> form the output parsers extract them from.
+        """
+        contents = [message['content']] if message.get('content') else []
+        for t in message.get('tool_calls') or []:
+            contents.append(f"<tool_call>{json.dumps({'name': t['function']['name'], 'arguments': t['function']['arguments']})}</tool_call>")
+        return contents
+
 def parse_role(in_value: typing.Union[PromptValue, str, dict[str, Any], BaseMessage, MessageLikeRepresentation]) -> str:
     if isinstance(in_value, str):
         return "system"
@@ -151,8 +281,6 @@ def _to_messages(content, role2):
         return [Message(content=m, role=role2) for m in content]
     return [Message(content=content, role=role2)]
 
-bind_tools_lock = threading.RLock()
-
 @prototype_scope_bean()
 class ModelServerModel(BaseChatModel, Runnable[LanguageModelInput, LanguageModelOutputVar]):
 
@@ -188,14 +316,16 @@ class ModelServerModel(BaseChatModel, Runnable[LanguageModelInput, LanguageModel
     def initialize(self, agent_card: AgentCardItem):
         self.__agent_card__ = agent_card
 
-    @injector.synchronized(bind_tools_lock)
     def invoke(self, model_input: LanguageModelInput,
                config: Optional[RunnableConfig] = None, **kwargs: Any) -> LanguageModelOutput:
-        executed_on_model_server = self.executor.call(self.convert_to_model_server(model_input, config))
-        out = self.convert_to_language_model_output(executed_on_model_server, config)
-        return out
+        """
+        Runs through the chat model callbacks, so that the model is streamed with _stream when a streaming callback
+        handler is attached - for instance when the graph is streamed with stream_mode messages - and called with
+        _generate otherwise.
+        """
+        out = BaseChatModel.invoke(self, model_input, config, **kwargs)
+        return LanguageModelOutputParser.add_config_metadata(out, config)
 
-    @injector.synchronized(bind_tools_lock)
     def bind_tools(
             self,
             tools: typing.Sequence[typing.Union[typing.Dict[str, Any], type, BaseTool]],
@@ -205,6 +335,9 @@ class ModelServerModel(BaseChatModel, Runnable[LanguageModelInput, LanguageModel
     ) -> Runnable[LanguageModelInput, BaseMessage]:
         """Bind tools to the model.
 
+        Bound tools are immutable per instance - binding returns a shallow copy of this model holding the tools, so
+        that the same model can be bound and invoked concurrently from many agents and sessions.
+
         Args:
             tools: Sequence of tools to bind to the model.
             tool_choice: The tool to use. If "any" then any tool can be used.
@@ -212,20 +345,8 @@ class ModelServerModel(BaseChatModel, Runnable[LanguageModelInput, LanguageModel
         Returns:
             A Runnable that returns a message.
         """
-        if self.bound_tools is not None:
-            if tools != self.bound_tools:
-                LoggerFacade.debug(f"Attempted to rebind tools for {self}")
-
-        self.bound_tools = tools
-        self.tool_choice = tool_choice
+        return self.model_copy(update={'bound_tools': tools, 'tool_choice': tool_choice})
 
-        assert not self.tool_choice or self.tool_choice.lower() == "any", \
-            ("tool choice should be either Any or None at this point. "
-             "Future state is return immutable new ModelServerModel each time if this changes.")
-
-        return self
-
-    @injector.synchronized(bind_tools_lock)
     def _stream(
             self,
             messages: list[BaseMessage],
@@ -233,15 +354,53 @@ class ModelServerModel(BaseChatModel, Runnable[LanguageModelInput, LanguageModel
             run_manager: Optional[CallbackManagerForLLMRun] = None,
             **kwargs: Any,
     ) -> typing.Iterator[ChatGenerationChunk]:
-        raise NotImplementedError
+        """
+        Streams the completion as text chunks up to the first tool call. The tool call markup is held back and only
+        the parsed tool calls are sent, in the last chunk, so that the merged chunks give the same message as
+        _generate.
+        """
+        completion = ''
+        streamed = 0
+        for token in self.executor.stream(self.convert_to_model_server(messages, None), self.bound_tools,
+                                          model_props=self.model_props):
+            if not token:
+                continue
+            completion += token
+            streamable = streamable_text(completion)
+            if streamable <= streamed:
+                continue
+            text = completion[streamed:streamable]
+            streamed = streamable
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=text))
+            if run_manager:
+                run_manager.on_llm_new_token(text, chunk=chunk)
+            yield chunk
+
+        # tool calls can only be parsed out of the whole completion, so they arrive in the last chunk.
+        parsed = self.convert_to_language_model_output(completion, None)
+        if parsed.tool_calls:
+            yield ChatGenerationChunk(message=AIMessageChunk(content=parsed.content if not streamed else '',
+                                                             tool_call_chunks=[
+                create_tool_call_chunk(name=t['name'], id=t.get('id'), index=i,
+                                       args=t['args'] if isinstance(t['args'], str) else json.dumps(t['args']))
+                for i, t in enumerate(parsed.tool_calls)]))
+        elif streamed < len(completion):
+            text = completion[streamed:]
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=text))
+            if run_manager:
+                run_manager.on_llm_new_token(text, chunk=chunk)
+            yield chunk
 
     @property
     def _llm_type(self) -> str:
-        raise NotImplementedError
+        return "model_server"
 
     def _generate(self, messages: list[BaseMessage], stop: Optional[list[str]] = None,
                   run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
-        raise NotImplementedError
+        executed_on_model_server = self.executor.call(self.convert_to_model_server(messages, None), self.bound_tools,
+                                                      model_props=self.model_props)
+        out = self.convert_to_language_model_output(executed_on_model_server, None)
+        return ChatResult(generations=[ChatGeneration(message=out)])
 
     @classmethod
     def convert_to_model_server(cls,
@@ -0,0 +1,20 @@
+import functools
+
+from langchain_core.tools import StructuredTool, tool
+
+from cdc_agents.util.nest_async_util import background_loop
+
+
+def async_tool(fn) -> StructuredTool:
+    """
+    @tool for async functions that keeps the tool invocable synchronously. Graphs that are awaited await the
+    coroutine, while graphs invoked synchronously run it on the background event loop.
+    """
+    created: StructuredTool = tool(fn)
+
+    @functools.wraps(fn)
+    def run_sync(*args, **kwargs):
+        return background_loop().run(fn(*args, **kwargs))
+
+    created.func = run_sync
+    return created
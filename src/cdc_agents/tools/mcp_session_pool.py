@@ -0,0 +1,371 @@
+import asyncio
+import atexit
+import copy
+import dataclasses
+import hashlib
+import json
+import os
+import subprocess
+import time
+import typing
+
+import injector
+from langchain_core.tools import BaseTool, StructuredTool
+from langchain_mcp_adapters.client import MultiServerMCPClient
+
+from cdc_agents.config.mcp_config_props import McpConfigProps
+from cdc_agents.util.nest_async_util import BackgroundEventLoop, background_loop
+from python_di.configs.autowire import injectable
+from python_di.configs.component import component
+from python_util.logger.logger import LoggerFacade
+
+
+class McpToolNotFound(Exception):
+    pass
+
+
+@dataclasses.dataclass
+class McpServerConnection:
+    server_name: str
+    connection: dict
+    stop_tool: typing.Optional[str] = None
+
+
+class McpToolSchemaCache:
+    """
+    On-disk cache of the tools an MCP server advertises, keyed by a hash of the server's tool_options, so agents can
+    build their tool lists without launching the server.
+    """
+
+    def __init__(self, cache_dir: typing.Optional[str]):
+        self.cache_dir = cache_dir
+
+    @staticmethod
+    def schema_hash(connection: dict) -> str:
+        return hashlib.sha256(json.dumps(connection, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def _path(self, server: McpServerConnection) -> str:
+        return os.path.join(self.cache_dir, f"{server.server_name}-{self.schema_hash(server.connection)}.json")
+
+    def get(self, server: McpServerConnection) -> typing.Optional[typing.List[dict]]:
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._path(server), 'r') as f:
+                return json.load(f)['tools']
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            LoggerFacade.warn(f"Ignoring unreadable MCP tool schema cache for {server.server_name}: {e}")
+            return None
+
+    def put(self, server: McpServerConnection, schemas: typing.List[dict]):
+        if not self.cache_dir:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._path(server)
+            with open(f"{path}.tmp", 'w') as f:
+                json.dump({'server_name': server.server_name, 'tools': schemas}, f)
+            os.replace(f"{path}.tmp", path)
+        except Exception as e:
+            LoggerFacade.warn(f"Failed to write MCP tool schema cache for {server.server_name}: {e}")
+
+    def invalidate(self, server: McpServerConnection):
+        if not self.cache_dir:
+            return
+        try:
+            os.remove(self._path(server))
+        except FileNotFoundError:
+            pass
+
+
+def tool_schemas(tools: typing.Iterable[BaseTool]) -> typing.List[dict]:
+    return [{'name': t.name, 'description': t.description, 'inputSchema': t.args_schema} for t in tools]
+
+
+def run_stop_tool(stop_tool: typing.Optional[str]):
+    if not stop_tool:
+        return
+    try:
+        subprocess.run(stop_tool, shell=True)
+    except Exception as e:
+        LoggerFacade.error(f"Failed to run MCP stop tool {stop_tool}: {e}")
+
+
+class McpSession:
+    """
+    A connected MultiServerMCPClient for a single server. The client is entered and exited by one owner task, as the
+    MCP transports hold anyio cancel scopes that have to be closed from the task that opened them.
+    """
+
+    def __init__(self, key: str, server: McpServerConnection):
+        self.key = key
+        self.server = server
+        self.client: typing.Optional[MultiServerMCPClient] = None
+        self.tools: typing.Dict[str, BaseTool] = {}
+        self.in_flight = 0
+        self.last_used = time.monotonic()
+        self._ready: typing.Optional[asyncio.Future] = None
+        self._closing: typing.Optional[asyncio.Event] = None
+        self._owner: typing.Optional[asyncio.Task] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self.client is not None and self._owner is not None and not self._owner.done()
+
+    async def open(self, timeout: typing.Optional[float]):
+        loop = asyncio.get_running_loop()
+        self._ready = loop.create_future()
+        self._closing = asyncio.Event()
+        self._owner = loop.create_task(self._own(), name=f"mcp-session-{self.key}")
+        try:
+            await asyncio.wait_for(asyncio.shield(self._ready), timeout)
+        except BaseException:
+            self._owner.cancel()
+            raise
+        return self
+
+    async def _own(self):
+        try:
+            async with MultiServerMCPClient({self.server.server_name: copy.deepcopy(self.server.connection)}) as client:
+                self.client = client
+                self.tools = {t.name: t for t in client.get_tools()}
+                self._ready.set_result(True)
+                await self._closing.wait()
+        except asyncio.CancelledError:
+            if not self._ready.done():
+                self._ready.cancel()
+            raise
+        except Exception as e:
+            if not self._ready.done():
+                self._ready.set_exception(e)
+            else:
+                LoggerFacade.error(f"MCP session {self.key} exited with error: {e}")
+        finally:
+            self.client = None
+            self.tools = {}
+
+    async def ping(self, timeout: typing.Optional[float]) -> bool:
+        if not self.is_open:
+            return False
+        try:
+            await asyncio.wait_for(self.client.sessions[self.server.server_name].send_ping(), timeout)
+            return True
+        except Exception as e:
+            LoggerFacade.warn(f"MCP session {self.key} failed health check: {e}")
+            return False
+
+    async def close(self, timeout: typing.Optional[float]):
+        if self._owner is not None and not self._owner.done():
+            self._closing.set()
+            try:
+                await asyncio.wait_for(asyncio.shield(self._owner), timeout)
+            except asyncio.TimeoutError:
+                self._owner.cancel()
+            except Exception as e:
+                LoggerFacade.error(f"Error closing MCP session {self.key}: {e}")
+        if self.server.stop_tool:
+            await asyncio.get_running_loop().run_in_executor(None, run_stop_tool, self.server.stop_tool)
+
+
+@component()
+@injectable()
+class McpSessionPool:
+    """
+    Process-wide pool of MCP client sessions, one per MCP server configuration, shared by every agent tool that calls
+    into that server. Sessions live on a background event loop so they can be used from any thread or loop, are
+    opened on first use, health checked while idle, restarted when they die, and closed at exit, at which point the
+    server's stop_tool runs.
+
+    Tool discovery goes through the same session that then serves the calls, and the discovered schemas are cached
+    on disk, so with a warm cache no server is launched until one of its tools is actually called.
+    """
+
+    @injector.inject
+    def __init__(self, mcp_config_props: McpConfigProps):
+        self.mcp_config_props = mcp_config_props
+        self.background: BackgroundEventLoop = background_loop()
+        self.servers: typing.Dict[str, McpServerConnection] = {}
+        self.sessions: typing.Dict[str, McpSession] = {}
+        self.schema_cache = McpToolSchemaCache(mcp_config_props.schema_cache_dir)
+        self.stats = {'opened': 0, 'restarted': 0, 'evicted': 0, 'calls': 0, 'schema_cache_hits': 0}
+        self._opening: typing.Dict[str, asyncio.Future] = {}
+        self._reserved = 0
+        self._released = asyncio.Event()
+        self._health_task: typing.Optional[asyncio.Task] = None
+        self._closed = False
+        atexit.register(self.shutdown)
+
+    @staticmethod
+    def session_key(server_name: str, connection: dict) -> str:
+        return f"{server_name}-{McpToolSchemaCache.schema_hash(connection)[:12]}"
+
+    def register(self, server_name: str, connection: dict, stop_tool: typing.Optional[str] = None) -> str:
+        key = self.session_key(server_name, connection)
+        self.servers.setdefault(key, McpServerConnection(server_name, copy.deepcopy(connection), stop_tool))
+        return key
+
+    def get_tools(self, key: str) -> typing.List[BaseTool]:
+        return self.background.run(self._get_tools(key))
+
+    async def aget_tools(self, key: str) -> typing.List[BaseTool]:
+        """
+        Tools advertised by the server registered under key, from the schema cache if present, otherwise from its
+        pooled session, which is then kept open for the calls. Every call returns new tool objects, so callers can
+        edit them without affecting other agents using the same server.
+        """
+        return await self.background.arun(self._get_tools(key))
+
+    def call_tool(self, key: str, tool_name: str, tool_input: typing.Union[str, dict], **kwargs):
+        return self.background.run(self._call(key, tool_name, tool_input, kwargs))
+
+    async def acall_tool(self, key: str, tool_name: str, tool_input: typing.Union[str, dict], **kwargs):
+        return await self.background.arun(self._call(key, tool_name, tool_input, kwargs))
+
+    def shutdown(self):
+        if self._closed:
+            return
+        self._closed = True
+        if len(self.sessions) == 0 and self._health_task is None:
+            return
+        try:
+            self.background.run(self._close_all(), self.mcp_config_props.shutdown_timeout_seconds * 2)
+        except Exception as e:
+            LoggerFacade.error(f"Failed to shut down MCP sessions cleanly: {e}")
+
+    async def _get_tools(self, key: str) -> typing.List[BaseTool]:
+        if key not in self.servers:
+            raise McpToolNotFound(f"No MCP server registered for {key}.")
+        schemas = self.schema_cache.get(self.servers[key])
+        if schemas is not None:
+            self.stats['schema_cache_hits'] += 1
+        else:
+            schemas = tool_schemas((await self._acquire(key)).tools.values())
+        return [self._cached_tool(key, schema) for schema in schemas]
+
+    def _cached_tool(self, key: str, schema: dict) -> BaseTool:
+        def call_tool(**arguments):
+            return self.call_tool(key, schema['name'], arguments)
+
+        async def acall_tool(**arguments):
+            return await self.acall_tool(key, schema['name'], arguments)
+
+        return StructuredTool(name=schema['name'], description=schema.get('description') or "",
+                              args_schema=schema.get('inputSchema'), func=call_tool, coroutine=acall_tool)
+
+    async def _call(self, key: str, tool_name: str, tool_input, kwargs: dict):
+        for attempt in range(2):
+            session = await self._acquire(key)
+            tool = session.tools.get(tool_name)
+            if tool is None:
+                # the cached schemas were built against a different version of the server.
+                self.schema_cache.invalidate(session.server)
+                raise McpToolNotFound(f"MCP server {session.server.server_name} has no tool {tool_name}.")
+            session.in_flight += 1
+            self.stats['calls'] += 1
+            try:
+                return await asyncio.wait_for(tool.arun(tool_input, **kwargs),
+                                              self.mcp_config_props.call_timeout_seconds)
+            except Exception as e:
+                # only retry when the server itself went away - a healthy server returning an error is the tool's answer.
+                if attempt == 0 and not await session.ping(self.mcp_config_props.health_check_timeout_seconds):
+                    LoggerFacade.warn(f"MCP session {key} died during call to {tool_name}: {e}. Restarting.")
+                    self.stats['restarted'] += 1
+                    await self._discard(session)
+                    continue
+                raise
+            finally:
+                session.in_flight -= 1
+                session.last_used = time.monotonic()
+                if session.in_flight == 0:
+                    self._released.set()
+
+    async def _acquire(self, key: str) -> McpSession:
+        if self._closed:
+            raise RuntimeError("MCP session pool has been shut down.")
+        while True:
+            session = self.sessions.get(key)
+            if session is not None and session.is_open:
+                return session
+            elif session is not None:
+                self.stats['restarted'] += 1
+                await self._discard(session)
+                continue
+
+            opening = self._opening.get(key)
+            if opening is not None:
+                await asyncio.shield(opening)
+                continue
+
+            return await self._open(key)
+
+    async def _open(self, key: str) -> McpSession:
+        if key not in self.servers:
+            raise McpToolNotFound(f"No MCP server registered for {key}.")
+        opening = asyncio.get_running_loop().create_future()
+        self._opening[key] = opening
+        try:
+            await self._reserve_capacity()
+            try:
+                session = await McpSession(key, self.servers[key]).open(self.mcp_config_props.connect_timeout_seconds)
+            finally:
+                self._reserved -= 1
+                self._released.set()
+            self.sessions[key] = session
+            self.schema_cache.put(session.server, tool_schemas(session.tools.values()))
+            self.stats['opened'] += 1
+            self._start_health_check()
+            opening.set_result(session)
+            return session
+        except BaseException as e:
+            opening.set_exception(e)
+            # the error is raised to this caller, so mark it retrieved in case nobody else was waiting on it.
+            opening.exception()
+            raise
+        finally:
+            self._opening.pop(key, None)
+
+    async def _reserve_capacity(self):
+        while len(self.sessions) + self._reserved >= self.mcp_config_props.max_sessions:
+            idle = [s for s in self.sessions.values() if s.in_flight == 0]
+            if len(idle) != 0:
+                lru = min(idle, key=lambda s: s.last_used)
+                LoggerFacade.info(f"Evicting idle MCP session {lru.key} to stay under "
+                                  f"{self.mcp_config_props.max_sessions} sessions.")
+                self.stats['evicted'] += 1
+                await self._discard(lru)
+                continue
+            self._released.clear()
+            await self._released.wait()
+        self._reserved += 1
+
+    async def _discard(self, session: McpSession):
+        if self.sessions.get(session.key) is session:
+            self.sessions.pop(session.key)
+        await session.close(self.mcp_config_props.shutdown_timeout_seconds)
+        self._released.set()
+
+    def _start_health_check(self):
+        if self._health_task is None and self.mcp_config_props.health_check_interval_seconds > 0:
+            self._health_task = asyncio.get_running_loop().create_task(self._health_check())
+
+    async def _health_check(self):
+        while not self._closed:
+            await asyncio.sleep(self.mcp_config_props.health_check_interval_seconds)
+            for session in list(self.sessions.values()):
+                if session.in_flight != 0 or self.sessions.get(session.key) is not session:
+                    continue
+                if not await session.ping(self.mcp_config_props.health_check_timeout_seconds):
+                    LoggerFacade.warn(f"Restarting unhealthy MCP session {session.key}.")
+                    self.stats['restarted'] += 1
+                    await self._discard(session)
+                    try:
+                        await self._acquire(session.key)
+                    except Exception as e:
+                        LoggerFacade.error(f"Failed to restart MCP session {session.key}: {e}")
+
+    async def _close_all(self):
+        if self._health_task is not None:
+            self._health_task.cancel()
+        await asyncio.gather(*[self._discard(s) for s in list(self.sessions.values())], return_exceptions=True)
@@ -1,5 +1,8 @@
 import asyncio
-import nest_asyncio
+import concurrent.futures
+import threading
+import typing
+
 import nest_asyncio
 
 
@@ -46,3 +49,80 @@ def do_run_on_event_loop(to_run, err_callback, to_run_loop):
         asyncio.set_event_loop(None)
 
     return ran
+
+
+class BackgroundEventLoop:
+    """
+    Event loop running forever on a daemon thread. Used for async resources (MCP sessions, pooled clients) that are
+    bound to the loop they were created on and so have to outlive the short-lived loops created by
+    do_run_on_event_loop.
+    """
+
+    def __init__(self, name: str = "cdc-agents-background-loop"):
+        self.name = name
+        self._loop: typing.Optional[asyncio.AbstractEventLoop] = None
+        self._thread: typing.Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None or self._loop.is_closed():
+            with self._lock:
+                if self._loop is None or self._loop.is_closed():
+                    self._start()
+        return self._loop
+
+    def _start(self):
+        loop = asyncio.new_event_loop()
+        started = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(loop)
+            loop.call_soon(started.set)
+            loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name=self.name, daemon=True)
+        self._thread.start()
+        started.wait()
+        self._loop = loop
+
+    def in_loop_thread(self) -> bool:
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def submit(self, to_run: typing.Coroutine) -> concurrent.futures.Future:
+        return asyncio.run_coroutine_threadsafe(to_run, self.loop)
+
+    def run(self, to_run: typing.Coroutine, timeout: typing.Optional[float] = None):
+        """
+        Block the calling thread until to_run completes on the background loop.
+        """
+        if self.in_loop_thread():
+            to_run.close()
+            raise RuntimeError(f"Cannot block on {self.name} from inside its own thread.")
+        return self.submit(to_run).result(timeout)
+
+    async def arun(self, to_run: typing.Coroutine):
+        """
+        Await to_run on the background loop from any other loop without blocking it.
+        """
+        if self.in_loop_thread():
+            return await to_run
+        return await asyncio.wrap_future(self.submit(to_run))
+
+    def stop(self):
+        with self._lock:
+            if self._loop is not None and not self._loop.is_closed():
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                if self._thread is not None and not self.in_loop_thread():
+                    self._thread.join(timeout=5)
+                    if not self._loop.is_running():
+                        self._loop.close()
+            self._loop = None
+            self._thread = None
+
+
+_background_loop = BackgroundEventLoop()
+
+
+def background_loop() -> BackgroundEventLoop:
+    return _background_loop
@@ -0,0 +1,56 @@
+import json
+import os
+import unittest
+import unittest.mock
+
+from langgraph.checkpoint.memory import MemorySaver
+
+from cdc_agents.agent import agent_server
+from cdc_agents.agent.agent_server import AgentServerRunner, A2A_WORKER_BOOT_MODULE, A2A_WORKER_SIGNING_KEY
+from cdc_agents.config.task_manager_config_props import TaskStoreType
+
+
+class AgentServerRunnerTest(unittest.TestCase):
+
+    def setUp(self):
+        environ = unittest.mock.patch.dict(os.environ)
+        environ.start()
+        self.addCleanup(environ.stop)
+        for name in ['uvicorn', 'warm_up_agents', '_add_all_managed_agents']:
+            patcher = unittest.mock.patch.object(agent_server, name)
+            setattr(self, name, patcher.start())
+            self.addCleanup(patcher.stop)
+
+    def _runner(self, starlette=None) -> AgentServerRunner:
+        agent_config_props = unittest.mock.MagicMock(workers=2, agents={}, host='localhost', port=50000)
+        runner_config_props = unittest.mock.MagicMock()
+        runner_config_props.is_a2a.return_value = True
+        scheduler = unittest.mock.MagicMock()
+        scheduler.props.task_store = TaskStoreType.SQLITE
+        scheduler.props.task_store_uri = 'tasks.sqlite'
+        return AgentServerRunner(agent_config_props, MemorySaver(), runner_config_props, None,
+                                 starlette or unittest.mock.MagicMock(), scheduler, [])
+
+    def test_supervisor_only_starts_workers(self):
+        runner = self._runner()
+
+        assert not self.warm_up_agents.called and not hasattr(runner, 'starlette')
+        assert self.uvicorn.run.call_args.kwargs['workers'] == 2
+        assert A2A_WORKER_SIGNING_KEY in os.environ
+
+    def test_workers_sign_with_the_supervisors_key(self):
+        self._runner()
+        kid = json.loads(os.environ[A2A_WORKER_SIGNING_KEY])['kid']
+        os.environ[A2A_WORKER_BOOT_MODULE] = 'cdc_agents.main.run_cdc_agents'
+
+        for _ in range(2):
+            starlette = unittest.mock.MagicMock()
+            self._runner(starlette)
+            jwks = next(c.args[1] for c in starlette.add_route.call_args_list if c.args[0] == '/.well-known/jwks.json')
+            assert [k['kid'] for k in jwks.__self__.public_keys] == [kid]
+            assert jwks.__self__.private_key_jwk.key_id == kid
+        assert self.uvicorn.run.call_count == 1
+
+
+if __name__ == '__main__':
+    unittest.main()
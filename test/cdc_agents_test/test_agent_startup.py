@@ -0,0 +1,46 @@
+import threading
+import unittest
+
+from cdc_agents.agent.agent_startup import StartupTimings, warm_up_agents
+from cdc_agents.config.agent_config_props import AgentConfigProps, AgentStartupMode
+
+
+class SlowAgent:
+    def __init__(self, name, barrier):
+        self.agent_name = name
+        self.barrier = barrier
+        self.warmed = False
+
+    def warm_up(self):
+        # every agent has to be warming up at once for the barrier to release.
+        self.barrier.wait(timeout=5)
+        self.warmed = True
+
+
+class AgentStartupTest(unittest.TestCase):
+
+    def test_timings_report(self):
+        timings = StartupTimings()
+        with timings.time('FastAgent', 'graph_compile'):
+            pass
+        timings.record('SlowAgent', 'mcp_tools', 2.0)
+        timings.record('SlowAgent', 'mcp_tools', 1.0)
+        assert timings.timings()['SlowAgent'] == {'mcp_tools': 3.0}
+        report = timings.report().splitlines()
+        assert report[1].strip().startswith('SlowAgent: total=3.000')
+        assert report[2].strip().startswith('FastAgent')
+
+    def test_concurrent_warm_up(self):
+        barrier = threading.Barrier(3)
+        agents = [SlowAgent(str(i), barrier) for i in range(3)]
+        warm_up_agents(agents, AgentConfigProps(startup_mode=AgentStartupMode.CONCURRENT))
+        assert all(a.warmed for a in agents)
+
+    def test_lazy_compile_skips_warm_up(self):
+        agents = [SlowAgent('lazy', threading.Barrier(1))]
+        warm_up_agents(agents, AgentConfigProps(startup_mode=AgentStartupMode.CONCURRENT, lazy_graph_compile=True))
+        assert not agents[0].warmed
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,340 @@
+import asyncio
+import threading
+import time
+import unittest
+import unittest.mock
+import uuid
+
+from cdc_agents.agent.task_manager import AsyncAgentTaskManager, AgentExecutionScheduler, AgentSchedulerBusyError
+from cdc_agents.common.server.server import A2AServer
+from cdc_agents.common.server.task_manager import TaskRetention
+from cdc_agents.common.types import (
+    AgentGraphResponse, AgentGraphToken, AgentGraphUpdate, ResponseFormat, SendTaskRequest, SendTaskStreamingRequest, TaskSendParams, Message,
+    TextPart, TaskState, ServerBusyError, TaskArtifactUpdateEvent, TaskStatusUpdateEvent, GetTaskRequest, TaskQueryParams
+)
+from cdc_agents.common.utils.push_notification_auth import PushNotificationSenderAuth
+from cdc_agents.config.task_manager_config_props import TaskManagerConfigProps
+
+
+class BlockingAgent:
+    """
+    Agent whose runs block their thread, as a model call would.
+    """
+
+    agent_name = 'BlockingAgent'
+    supported_content_types = ['text', 'text/plain']
+
+    def __init__(self, delay: float = 0.2):
+        self.delay = delay
+        self.running = 0
+        self.max_running = 0
+        self._count_lock = threading.Lock()
+
+    def _run(self):
+        with self._count_lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(self.delay)
+        with self._count_lock:
+            self.running -= 1
+
+    def invoke(self, query, sessionId):
+        self._run()
+        return AgentGraphResponse(is_task_complete=True, require_user_input=False,
+                                  content=ResponseFormat(status='completed', message='done', history=[]))
+
+    def stream(self, query, sessionId, graph=None):
+        yield AgentGraphResponse(is_task_complete=False, require_user_input=False,
+                                 content=ResponseFormat(status='input_required', message='working'))
+        self._run()
+        yield AgentGraphResponse(is_task_complete=True, require_user_input=False,
+                                 content=ResponseFormat(status='completed', message='done'))
+
+
+class TokenStreamingAgent(BlockingAgent):
+
+    def stream(self, query, sessionId, graph=None):
+        for token in ['hello ', 'there']:
+            yield AgentGraphToken(token=token, agent_name='agent')
+        yield AgentGraphResponse(is_task_complete=True, require_user_input=False,
+                                 content=ResponseFormat(status='completed', message='hello there'))
+
+
+class UpdateStreamingAgent(BlockingAgent):
+
+    def stream(self, query, sessionId, graph=None):
+        yield AgentGraphUpdate(is_task_complete=False, require_user_input=False, agent_name='SearchAgent',
+                               content=ResponseFormat(status='goto_agent', message='searching'))
+        yield AgentGraphUpdate(is_task_complete=True, require_user_input=False, agent_name='Orchestrator',
+                               content=ResponseFormat(status='completed', message='found'))
+
+
+def task_params():
+    task_id = str(uuid.uuid4())
+    return TaskSendParams(id=task_id, sessionId=task_id, acceptedOutputModes=['text'],
+                          message=Message(role='user', parts=[TextPart(text='hello')]))
+
+
+class AsyncAgentTaskManagerTest(unittest.IsolatedAsyncioTestCase):
+
+    async def test_concurrent_streams_do_not_block_loop(self):
+        agent = BlockingAgent()
+        task_manager = AsyncAgentTaskManager(agent, PushNotificationSenderAuth())
+        streams = [await task_manager.on_send_task_subscribe(SendTaskStreamingRequest(params=task_params()))
+                   for _ in range(4)]
+
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        ticker = asyncio.create_task(tick())
+
+        async def drain(stream):
+            return [event async for event in stream]
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*[drain(s) for s in streams])
+        elapsed = time.perf_counter() - start
+        ticker.cancel()
+
+        for events in results:
+            assert events[-1].result.final
+            assert events[-1].result.status.state == TaskState.COMPLETED
+        assert agent.max_running == 4
+        assert elapsed < 4 * agent.delay
+        # the loop kept running other work while the agents were blocked.
+        assert ticks >= 5
+
+    async def test_send_task_runs_in_executor(self):
+        agent = BlockingAgent()
+        task_manager = AsyncAgentTaskManager(agent, PushNotificationSenderAuth())
+        responses = await asyncio.gather(*[task_manager.on_send_task(SendTaskRequest(params=task_params()))
+                                           for _ in range(3)])
+        assert all(r.result.status.state == TaskState.COMPLETED for r in responses)
+        assert agent.max_running == 3
+
+    async def test_reads_tasks_off_the_loop(self):
+        task_manager = AsyncAgentTaskManager(BlockingAgent(delay=0), PushNotificationSenderAuth())
+        readers = set()
+
+        def reading(read):
+            def record(*args, **kwargs):
+                readers.add(threading.get_ident())
+                return read(*args, **kwargs)
+            return record
+
+        store = task_manager.task_store
+        with unittest.mock.patch.object(store, 'get', reading(store.get)), \
+                unittest.mock.patch.object(store, 'get_without_history', reading(store.get_without_history)):
+            params = task_params()
+            stream = await A2AServer._handle(task_manager.on_send_task_subscribe,
+                                             SendTaskStreamingRequest(params=params))
+            assert [event async for event in stream][-1].result.final
+            response = await A2AServer._handle(task_manager.on_get_task,
+                                               GetTaskRequest(params=TaskQueryParams(id=params.id)))
+        assert response.result.status.state == TaskState.COMPLETED
+        assert len(readers) != 0 and threading.get_ident() not in readers
+
+    async def test_streams_tokens_before_final_artifact(self):
+        task_manager = AsyncAgentTaskManager(TokenStreamingAgent(), PushNotificationSenderAuth())
+        stream = await task_manager.on_send_task_subscribe(SendTaskStreamingRequest(params=task_params()))
+        events = [event.result async for event in stream]
+        artifacts = [e.artifact for e in events if isinstance(e, TaskArtifactUpdateEvent)]
+        assert [(a.parts[0].text, a.append) for a in artifacts] == [
+            ('hello ', True), ('there', True), ('hello there', False)]
+        assert events[-1].final and events[-1].status.state == TaskState.COMPLETED
+
+    async def test_streams_updates_with_agent_name(self):
+        task_manager = AsyncAgentTaskManager(UpdateStreamingAgent(), PushNotificationSenderAuth())
+        stream = await task_manager.on_send_task_subscribe(SendTaskStreamingRequest(params=task_params()))
+        events = [event.result async for event in stream]
+        working = [e for e in events if isinstance(e, TaskStatusUpdateEvent) and e.status.state == TaskState.WORKING]
+        assert [(e.status.message.parts[0].text, e.status.message.metadata) for e in working] == [
+            ('searching', {'agent_name': 'SearchAgent'})]
+        artifact = next(e.artifact for e in events if isinstance(e, TaskArtifactUpdateEvent))
+        assert artifact.parts[0].text == 'found' and artifact.metadata == {'agent_name': 'Orchestrator'}
+
+
+class TaskRetentionTest(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.now = 0.0
+
+    def _task_manager(self, **retention):
+        task_manager = AsyncAgentTaskManager(BlockingAgent(delay=0), PushNotificationSenderAuth(),
+                                             retention=TaskRetention(sweep_interval_seconds=0, **retention))
+        task_manager.clock = lambda: self.now
+        return task_manager
+
+    async def _complete(self, task_manager, count: int):
+        task_ids = []
+        for _ in range(count):
+            params = task_params()
+            await task_manager.on_send_task(SendTaskRequest(params=params))
+            task_ids.append(params.id)
+            self.now += 1
+        return task_ids
+
+    async def test_evicts_least_recently_used_finished_tasks(self):
+        task_manager = self._task_manager(max_tasks=2)
+        task_ids = await self._complete(task_manager, 3)
+        task_manager.on_get_task(GetTaskRequest(params=TaskQueryParams(id=task_ids[0])))
+        running = task_manager.upsert_task(task_params())
+
+        task_manager.sweep()
+        assert set(task_manager.tasks.keys()) == {task_ids[0], task_ids[2], running.id}
+        assert set(task_manager.task_locks.keys()) <= set(task_manager.tasks.keys())
+        assert task_manager.stats['evicted_tasks'] == 1 and task_manager.stats['resident_tasks'] == 3
+        response = task_manager.on_get_task(GetTaskRequest(params=TaskQueryParams(id=task_ids[1])))
+        assert response.error is not None
+
+    async def test_expires_idle_tasks(self):
+        task_manager = self._task_manager(idle_ttl_seconds=60)
+        task_ids = await self._complete(task_manager, 2)
+        self.now = 50
+        task_manager.on_get_task(GetTaskRequest(params=TaskQueryParams(id=task_ids[0])))
+        self.now = 70
+
+        task_manager.sweep()
+        assert list(task_manager.tasks.keys()) == [task_ids[0]]
+        assert task_manager.stats['expired_tasks'] == 1
+
+    async def test_byte_budget(self):
+        task_manager = self._task_manager()
+        await self._complete(task_manager, 4)
+        task_manager.sweep()
+        resident_bytes = task_manager.stats['resident_task_bytes']
+        assert resident_bytes > 0
+
+        task_manager.retention.max_bytes = resident_bytes // 2
+        task_manager.sweep()
+        assert task_manager.stats['resident_task_bytes'] <= resident_bytes // 2
+        assert task_manager.stats['resident_tasks'] == len(task_manager.tasks) == 2
+
+    async def test_reclaims_locks_and_subscribers(self):
+        task_manager = self._task_manager(max_tasks=0)
+        stream = await task_manager.on_send_task_subscribe(SendTaskStreamingRequest(params=task_params()))
+        [event async for event in stream]
+        task_manager.on_get_task(GetTaskRequest(params=TaskQueryParams(id='missing')))
+
+        task_manager.sweep()
+        assert task_manager.tasks == {} and task_manager.task_sse_subscribers == {}
+        assert len(task_manager.task_locks) == 0 and task_manager.stats['reclaimed_locks'] > 0
+
+    async def test_keeps_tasks_and_locks_in_use(self):
+        task_manager = self._task_manager(max_tasks=0)
+        held, looked_up = await self._complete(task_manager, 2)
+        acquired, release = threading.Event(), threading.Event()
+
+        def hold():
+            with task_manager.task_locks[held]:
+                acquired.set()
+                release.wait()
+
+        holder = threading.Thread(target=hold)
+        holder.start()
+        acquired.wait()
+        # looked up by a request about to acquire it.
+        pending_lock = task_manager.task_locks[looked_up]
+
+        task_manager.sweep()
+        assert list(task_manager.tasks.keys()) == [held]
+        assert task_manager.task_locks.get(looked_up) is pending_lock
+        pending_lock.unuse()
+        release.set()
+        holder.join()
+
+        task_manager.sweep()
+        assert task_manager.tasks == {} and len(task_manager.task_locks) == 0
+
+    async def test_keeps_tasks_used_since_found(self):
+        task_manager = self._task_manager(max_tasks=0)
+        task_id, = await self._complete(task_manager, 1)
+        accessed = task_manager._task_access[task_id]
+        self.now += 1
+        task_manager.upsert_task(task_params().model_copy(update={'id': task_id}))
+
+        assert not task_manager._remove_retired_task(accessed, task_id, {task_id})
+        assert list(task_manager.tasks.keys()) == [task_id]
+
+    async def test_looks_up_locks_while_sweep_reads_the_store(self):
+        task_manager = self._task_manager(max_tasks=0)
+        await self._complete(task_manager, 1)
+        task_manager._task_bytes.clear()
+        reading, release = threading.Event(), threading.Event()
+        get = task_manager.task_store.get
+
+        def blocking_get(*args, **kwargs):
+            reading.set()
+            release.wait()
+            return get(*args, **kwargs)
+
+        with unittest.mock.patch.object(task_manager.task_store, 'get', blocking_get):
+            sweeper = threading.Thread(target=task_manager.sweep)
+            sweeper.start()
+            reading.wait()
+            looked_up = threading.Thread(target=lambda: task_manager.task_locks['other'].unuse(), daemon=True)
+            looked_up.start()
+            looked_up.join(timeout=5)
+            release.set()
+            sweeper.join()
+        assert not looked_up.is_alive()
+        assert task_manager.tasks == {}
+
+    async def test_sweeps_in_background(self):
+        task_manager = AsyncAgentTaskManager(BlockingAgent(delay=0), PushNotificationSenderAuth(),
+                                             retention=TaskRetention(max_tasks=0, sweep_interval_seconds=0.05))
+        await self._complete(task_manager, 2)
+        await asyncio.sleep(0.3)
+        assert task_manager.tasks == {}
+        task_manager.close()
+
+
+class AgentExecutionSchedulerTest(unittest.IsolatedAsyncioTestCase):
+
+    def _scheduler(self, **props):
+        scheduler = AgentExecutionScheduler(TaskManagerConfigProps(**props))
+        self.addCleanup(scheduler.shutdown)
+        return scheduler
+
+    def test_global_and_agent_limits(self):
+        scheduler = self._scheduler(max_workers=3, agent_max_concurrency={'limited': 1})
+        limited, other = BlockingAgent(0.1), BlockingAgent(0.1)
+        futures = ([scheduler.submit('limited', limited._run) for _ in range(3)]
+                   + [scheduler.submit('other', other._run) for _ in range(4)])
+        for f in futures:
+            f.result(5)
+        assert limited.max_running == 1
+        assert other.max_running == 2
+        stats = scheduler.queue_wait_stats()
+        assert stats['limited'].scheduled == 3
+        assert stats['limited'].max_wait_seconds >= 0.15
+
+    def test_rejects_when_queue_full(self):
+        scheduler = self._scheduler(max_workers=1, max_queued=1)
+        agent = BlockingAgent(0.2)
+        running = scheduler.submit('agent', agent._run)
+        queued = scheduler.submit('agent', agent._run)
+        with self.assertRaises(AgentSchedulerBusyError):
+            scheduler.submit('agent', agent._run)
+        running.result(5)
+        queued.result(5)
+        assert scheduler.queue_wait_stats()['agent'].rejected == 1
+
+    async def test_send_task_reports_busy(self):
+        scheduler = self._scheduler(max_workers=1, max_queued=0)
+        agent = BlockingAgent(0.2)
+        task_manager = AsyncAgentTaskManager(agent, PushNotificationSenderAuth(), scheduler.executor_for('agent'))
+        first = asyncio.ensure_future(task_manager.on_send_task(SendTaskRequest(params=task_params())))
+        await asyncio.sleep(0.05)
+        busy = await task_manager.on_send_task(SendTaskRequest(params=task_params()))
+        assert isinstance(busy.error, ServerBusyError)
+        assert (await first).result.status.state == TaskState.COMPLETED
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,605 @@
+import contextlib
+import os
+import tempfile
+import threading
+import time
+import typing
+import unittest
+import unittest.mock
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langgraph.checkpoint.base import empty_checkpoint
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.serde.base import SerializerCompat
+from langgraph.graph import StateGraph, MessagesState, START, END
+
+from cdc_agents.agent.message_budget import pin_message, is_pinned
+from cdc_agents.checkpoint.bounded_memory import BoundedMemorySaver
+from cdc_agents.checkpoint.compaction import CheckpointCompactor, checkpoint_pruner
+from cdc_agents.checkpoint.delta import DeltaMessageSaver
+from cdc_agents.checkpoint.message_blobs import InMemoryMessageBlobStore
+from cdc_agents.checkpoint.sqlite import SqliteSaver, SqliteMessageBlobStore
+from cdc_agents.checkpoint.serde import JsonSerializationProtocol, MsgpackCheckpointSerializer
+from cdc_agents.checkpoint.write_behind import WriteBehindSaver
+from python_util.logger.logger import LoggerFacade
+
+
+def history(steps: int):
+    messages = [HumanMessage(content='find where the checkpoint is written', id='task')]
+    for i in range(steps):
+        messages.append(AIMessage(content='', id=f'call-{i}', tool_calls=[
+            {'name': 'search', 'args': {'query': f'checkpoint {i}'}, 'id': f'tool-call-{i}'}]))
+        messages.append(ToolMessage(content=f'def put_checkpoint_{i}(self, config):\n    ...\n' * 20,
+                                    tool_call_id=f'tool-call-{i}', id=f'result-{i}'))
+    return messages
+
+
+def tool_loop_graph(checkpointer, steps: int, whole_history: bool = False):
+    def step(state):
+        i = (len(state['messages']) - 1) // 2
+        # orchestrator nodes return the whole history with their messages appended.
+        added = history(i + 1)[-2:]
+        return {'messages': list(state['messages']) + added if whole_history else added}
+
+    graph = StateGraph(MessagesState)
+    graph.add_node('agent', step)
+    graph.add_edge(START, 'agent')
+    graph.add_conditional_edges('agent', lambda state: END if len(state['messages']) > 2 * steps else 'agent')
+    return graph.compile(checkpointer=checkpointer)
+
+
+def stored_bytes(saver: MemorySaver, blobs: InMemoryMessageBlobStore = None) -> int:
+    checkpoints = sum(len(c[1]) + len(m[1]) for namespaces in saver.storage.values()
+                      for checkpoints in namespaces.values() for c, m, _ in checkpoints.values())
+    channel_values = sum(len(b[1]) for b in saver.blobs.values())
+    writes = sum(len(w[2][1]) for task_writes in saver.writes.values() for w in task_writes.values())
+    messages = sum(len(b[1]) for b in blobs.blobs.values()) if blobs is not None else 0
+    return checkpoints + channel_values + writes + messages
+
+
+def run_tool_loop(checkpointer, steps: int, thread_id: str = 'thread', whole_history: bool = False):
+    graph = tool_loop_graph(checkpointer, steps, whole_history)
+    config = {'configurable': {'thread_id': thread_id}, 'recursion_limit': 2 * steps + 10}
+    graph.invoke({'messages': [HumanMessage(content='find where the checkpoint is written', id='task')]}, config)
+    return graph, config
+
+
+class BatchRecordingSaver(MemorySaver):
+    """
+    Stands in for PooledPostgresSaver, recording the size of each batch written.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+
+    @contextlib.contextmanager
+    def batch(self):
+        saver = self
+        count = [0]
+
+        class Counting:
+            def put(self, *args):
+                count[0] += 1
+                return saver.put(*args)
+
+            def put_writes(self, *args):
+                count[0] += 1
+                return saver.put_writes(*args)
+
+        yield Counting()
+        self.batches.append(count[0])
+
+
+class FailingSaver(BatchRecordingSaver):
+    """
+    Fails the writes of failing_task, as a database rejecting them would - failing the batches holding them too.
+    """
+
+    def __init__(self, failing_task: str):
+        super().__init__()
+        self.failing_task = failing_task
+
+    def put_writes(self, config, writes, task_id, task_path=''):
+        if task_id == self.failing_task:
+            raise ValueError(f"Rejected writes of {task_id}.")
+        return super().put_writes(config, writes, task_id, task_path)
+
+
+class MsgpackCheckpointSerializerTest(unittest.TestCase):
+
+    def test_round_trip_compressed(self):
+        serde = MsgpackCheckpointSerializer(zstd_level=3, compress_min_bytes=256)
+        messages = history(3)
+        type_, data = serde.dumps_typed(messages)
+        assert type_ == 'msgpack+zstd'
+        assert serde.loads_typed((type_, data)) == messages
+
+        assert serde.dumps_typed(['small'])[0] == 'msgpack'
+        assert serde.loads_typed(serde.dumps_typed(None)) is None
+
+    def test_reads_json_checkpoints(self):
+        json_serde = SerializerCompat(JsonSerializationProtocol())
+        serde = MsgpackCheckpointSerializer(zstd_level=3, legacy=json_serde)
+        messages = [HumanMessage(content='hello', id='1'), AIMessage(content='hi', id='2')]
+        assert serde.loads_typed(json_serde.dumps_typed(messages)) == messages
+
+    def test_compression_can_be_switched_off(self):
+        compressed = MsgpackCheckpointSerializer(zstd_level=3, compress_min_bytes=0).dumps_typed(history(1))
+        assert MsgpackCheckpointSerializer().loads_typed(compressed) == history(1)
+
+
+class WriteBehindSaverTest(unittest.TestCase):
+
+    def test_batches_writes_and_flushes_before_reads(self):
+        saver = BatchRecordingSaver()
+        write_behind = WriteBehindSaver(saver, max_pending_writes=16, flush_interval_seconds=60)
+        graph = tool_loop_graph(write_behind, steps=10)
+        config = {'configurable': {'thread_id': 'thread'}, 'recursion_limit': 50}
+        graph.invoke({'messages': [HumanMessage(content='find where the checkpoint is written', id='task')]}, config)
+
+        assert graph.get_state(config).values['messages'] == history(10)
+        assert len(list(write_behind.list(config))) == len(list(saver.list(config)))
+        assert sum(saver.batches) == write_behind.stats['writes']
+        assert max(saver.batches) == 16 and write_behind.stats['flushes'] < write_behind.stats['writes']
+        write_behind.close()
+
+    def test_flushes_periodically(self):
+        saver = MemorySaver()
+        write_behind = WriteBehindSaver(saver, flush_interval_seconds=0.05)
+        graph = tool_loop_graph(write_behind, steps=2)
+        config = {'configurable': {'thread_id': 'thread'}}
+        graph.invoke({'messages': [HumanMessage(content='task', id='task')]}, config)
+        time.sleep(0.3)
+        assert len(saver.get_tuple(config).checkpoint['channel_values']['messages']) == 5
+        write_behind.close()
+
+    def test_rejects_unserializable_writes_on_the_writing_session(self):
+        saver = MemorySaver(serde=MsgpackCheckpointSerializer())
+        write_behind = WriteBehindSaver(saver, flush_interval_seconds=60)
+        bad = {'configurable': {'thread_id': 'bad-session', 'checkpoint_ns': '', 'checkpoint_id': 'c'}}
+        with self.assertRaises(TypeError):
+            write_behind.put_writes(bad, [('messages', threading.Lock())], 'task')
+
+        graph, config = run_tool_loop(write_behind, 2, thread_id='good')
+        assert graph.get_state(config).values['messages'] == history(2)
+        assert write_behind._pending == []
+        write_behind.close()
+
+    def test_drops_writes_failing_every_flush(self):
+        saver = FailingSaver(failing_task='bad')
+        write_behind = WriteBehindSaver(saver, flush_interval_seconds=60, max_flush_attempts=2)
+        bad = {'configurable': {'thread_id': 'bad-session', 'checkpoint_ns': '', 'checkpoint_id': 'c'}}
+        write_behind.put_writes(bad, [('messages', 'rejected')], 'bad')
+
+        graph, config = run_tool_loop(write_behind, 2, thread_id='good')
+        assert graph.get_state(config).values['messages'] == history(2)
+        assert len(write_behind._pending) == 0 and write_behind.stats['dropped'] == 1
+        write_behind.close()
+
+
+class DeltaMessageSaverTest(unittest.TestCase):
+
+    def _delta(self, saver=None, blobs=None):
+        saver = saver if saver is not None else MemorySaver()
+        blobs = blobs if blobs is not None else InMemoryMessageBlobStore()
+        return saver, blobs, DeltaMessageSaver(saver, blobs)
+
+    def test_reconstructs_state_and_history(self):
+        saver, blobs, delta = self._delta()
+        graph, config = run_tool_loop(delta, 10, whole_history=True)
+
+        assert graph.get_state(config).values['messages'] == history(10)
+        states = list(graph.get_state_history(config))
+        assert len(states) == 12
+        for state in states:
+            messages = state.values.get('messages') or []
+            assert messages == history(10)[:len(messages)]
+        # each message stored once, plus a segment for each step's checkpoint and write.
+        segments = [b for b in blobs.blobs.values() if b[0] == 'message_segment']
+        assert len(blobs.blobs) - len(segments) == len(history(10))
+
+    def test_storage_linear_in_conversation_length(self):
+        def sizes(steps):
+            full = MemorySaver()
+            run_tool_loop(full, steps, whole_history=True)
+            saver, blobs, delta = self._delta()
+            run_tool_loop(delta, steps, whole_history=True)
+            return stored_bytes(full), stored_bytes(saver, blobs)
+
+        full_20, delta_20 = sizes(20)
+        full_40, delta_40 = sizes(40)
+        assert full_40 / full_20 > 3
+        assert delta_40 / delta_20 < 2.5
+        assert delta_40 < full_40 / 5
+
+    def test_continues_thread_after_restart(self):
+        saver, blobs, delta = self._delta()
+        graph, config = run_tool_loop(delta, 3)
+        stored = {d for d, b in blobs.blobs.items() if b[0] != 'message_segment'}
+
+        restarted = DeltaMessageSaver(saver, blobs)
+        graph = tool_loop_graph(restarted, 3)
+        graph.update_state(config, {'messages': [HumanMessage(content='and the reads?', id='follow-up')]})
+        messages = graph.get_state(config).values['messages']
+        assert messages == history(3) + [HumanMessage(content='and the reads?', id='follow-up')]
+        # the follow-up is the only message stored again.
+        assert len({d for d, b in blobs.blobs.items() if b[0] != 'message_segment'} - stored) == 1
+
+    def test_stores_messages_changed_in_place(self):
+        saver, blobs, delta = self._delta()
+        config = {'configurable': {'thread_id': 'thread', 'checkpoint_ns': ''}}
+
+        def put(messages):
+            checkpoint = empty_checkpoint()
+            checkpoint['channel_values'] = {'messages': messages}
+            checkpoint['channel_versions'] = {'messages': len(versions) + 1}
+            versions.append(delta.put(config, checkpoint, {}, checkpoint['channel_versions']))
+
+        versions = []
+
+        first, following = HumanMessage(content='original', id='first'), AIMessage(content='next', id='next')
+        put([first])
+        first.content = 'mutated'
+        put([first, following])
+        pin_message(first)
+        put([first, following])
+
+        messages = DeltaMessageSaver(saver, blobs).get_tuple(config).checkpoint['channel_values']['messages']
+        assert [m.content for m in messages] == ['mutated', 'next'] and is_pinned(messages[0])
+
+
+class BoundedMemorySaverTest(unittest.TestCase):
+
+    def test_evicts_least_recently_used_threads(self):
+        saver = BoundedMemorySaver(max_threads=2)
+        run_tool_loop(saver, 2, thread_id='a')
+        graph, config_b = run_tool_loop(saver, 2, thread_id='b')
+        graph.get_state({'configurable': {'thread_id': 'a'}})
+        run_tool_loop(saver, 2, thread_id='c')
+
+        assert set(saver.storage.keys()) == {'a', 'c'}
+        assert graph.get_state(config_b).values == {}
+        assert saver.stats['evicted_threads'] == 1 and saver.stats['threads'] == 2
+
+    def test_keeps_latest_checkpoints_of_thread(self):
+        saver = BoundedMemorySaver(max_checkpoints_per_thread=3)
+        graph, config = run_tool_loop(saver, 10)
+
+        assert graph.get_state(config).values['messages'] == history(10)
+        assert len(list(graph.get_state_history(config))) == 3
+        assert saver.stats['evicted_checkpoints'] == 9
+        # only the message lists of the kept checkpoints remain.
+        assert len([k for k in saver.blobs.keys() if k[2] == 'messages']) == 3
+        assert saver.stats['resident_bytes'] == stored_bytes(saver)
+
+    def test_expires_idle_threads(self):
+        now = [0.0]
+        saver = BoundedMemorySaver(idle_ttl_seconds=60, clock=lambda: now[0])
+        graph, config = run_tool_loop(saver, 2, thread_id='idle')
+        now[0] = 30
+        run_tool_loop(saver, 2, thread_id='active')
+        now[0] = 70
+
+        assert graph.get_state(config).values == {}
+        assert set(saver.storage.keys()) == {'active'}
+        assert saver.stats['expired_threads'] == 1
+
+    def test_byte_budget(self):
+        saver = BoundedMemorySaver(max_bytes=60000)
+        for thread_id in ['a', 'b', 'c']:
+            run_tool_loop(saver, 5, thread_id=thread_id)
+            assert saver.stats['resident_bytes'] <= 60000
+            assert saver.stats['resident_bytes'] == stored_bytes(saver)
+
+        graph, config = run_tool_loop(saver, 20, thread_id='long')
+        assert list(saver.storage.keys()) == ['long']
+        assert graph.get_state(config).values['messages'] == history(20)
+        assert saver.stats['evicted_checkpoints'] > 0
+
+    def test_delete_thread_releases_bytes(self):
+        saver = BoundedMemorySaver()
+        run_tool_loop(saver, 3, thread_id='a')
+        assert saver.stats['resident_bytes'] == stored_bytes(saver) > 0
+        saver.delete_thread('a')
+        assert saver.stats['resident_bytes'] == 0 and saver.stats['threads'] == 0
+        assert len(saver.blobs) == 0 and len(saver.writes) == 0
+
+
+class SqliteSaverTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'checkpoints', 'checkpoints.sqlite')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _saver(self):
+        saver = SqliteSaver.from_path(self.path, MsgpackCheckpointSerializer(zstd_level=3))
+        saver.setup()
+        return saver
+
+    def test_continues_thread_after_restart(self):
+        saver = self._saver()
+        graph, config = run_tool_loop(saver, 5)
+        states = [s.values for s in graph.get_state_history(config)]
+        saver.close()
+
+        restarted = self._saver()
+        graph = tool_loop_graph(restarted, 5)
+        assert graph.get_state(config).values['messages'] == history(5)
+        assert [s.values for s in graph.get_state_history(config)] == states
+        assert restarted.conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+
+        restarted.delete_thread('thread')
+        assert graph.get_state(config).values == {}
+        restarted.close()
+
+    def test_limits_listed_rows_in_sql(self):
+        saver = self._saver()
+        graph, config = run_tool_loop(saver, 5)
+        checkpoint_ids = [t.config['configurable']['checkpoint_id'] for t in saver.list(config)]
+
+        statements = []
+        saver.conn.set_trace_callback(statements.append)
+        assert saver.get_tuple(config).config['configurable']['checkpoint_id'] == checkpoint_ids[0]
+        assert any(s.startswith('SELECT thread_id') and s.endswith('LIMIT 1') for s in statements)
+        saver.conn.set_trace_callback(None)
+
+        looped = list(saver.list(config, filter={'source': 'loop'}, limit=2))
+        assert len(looped) == 2 and all(t.metadata['source'] == 'loop' for t in looped)
+        assert len(list(saver.list(config, filter={'source': 'input'}, limit=2))) == 1
+        saver.close()
+
+    def test_write_behind_commits_in_batches(self):
+        saver = self._saver()
+        write_behind = WriteBehindSaver(saver, max_pending_writes=16, flush_interval_seconds=60)
+        graph, config = run_tool_loop(write_behind, 10)
+
+        assert graph.get_state(config).values['messages'] == history(10)
+        assert write_behind.stats['flushes'] < write_behind.stats['writes']
+        assert len(list(saver.list(config))) == len(list(graph.get_state_history(config)))
+        write_behind.close()
+        saver.close()
+
+    def test_delta_messages(self):
+        saver = self._saver()
+        blobs = SqliteMessageBlobStore(saver)
+        blobs.setup()
+        graph, config = run_tool_loop(DeltaMessageSaver(saver, blobs), 5, whole_history=True)
+        saver.close()
+
+        restarted = self._saver()
+        delta = DeltaMessageSaver(restarted, SqliteMessageBlobStore(restarted))
+        graph = tool_loop_graph(delta, 5)
+        assert graph.get_state(config).values['messages'] == history(5)
+        assert restarted.conn.execute("SELECT count(*) FROM checkpoint_message_blobs "
+                                      "WHERE type != 'message_segment'").fetchone()[0] == len(history(5))
+
+        for _ in range(2):
+            delta.mark_thread('thread')
+            assert delta.sweep_blobs() == (0, 0)
+        delta.delete_thread('thread')
+        delta.sweep_blobs()
+        deleted, reclaimed = delta.sweep_blobs()
+        assert deleted > len(history(5)) and reclaimed > 0
+        assert restarted.conn.execute("SELECT count(*) FROM checkpoint_message_blobs").fetchone()[0] == 0
+        restarted.close()
+
+
+class CheckpointCompactorTest(unittest.TestCase):
+
+    @staticmethod
+    def _run_tasks(checkpointer, tasks: int, thread_id: str = 'thread'):
+        graph, config = run_tool_loop(checkpointer, 3, thread_id)
+        for i in range(tasks - 1):
+            graph.invoke({'messages': [HumanMessage(content=f'follow-up {i}', id=f'follow-up-{i}')]}, config)
+        return graph, config
+
+    def _compact(self, saver, **kwargs):
+        compactor = CheckpointCompactor(saver, checkpoint_pruner(saver), **kwargs)
+        return compactor, compactor.run_once()
+
+    def test_keeps_latest_and_task_completions(self):
+        saver = MemorySaver()
+        graph, config = self._run_tasks(saver, 3)
+        latest = graph.get_state(config).values
+        completions = [s.config['configurable']['checkpoint_id'] for s in graph.get_state_history(config)
+                       if len(s.next) == 0][:3]
+        before = stored_bytes(saver)
+
+        compactor, reclaimed = self._compact(saver, keep_latest=3)
+        history_ids = [s.config['configurable']['checkpoint_id'] for s in saver.list(config)]
+        assert graph.get_state(config).values == latest
+        assert len(history_ids) == 5 and set(completions) <= set(history_ids)
+        assert reclaimed == before - stored_bytes(saver) > 0
+        assert compactor.stats['reclaimed_bytes'] == reclaimed
+
+        graph.invoke({'messages': [HumanMessage(content='after compaction', id='after')]}, config)
+        assert graph.get_state(config).values['messages'][-3].content == 'after compaction'
+
+    def test_without_task_completions_keeps_latest(self):
+        saver = MemorySaver()
+        graph, config = self._run_tasks(saver, 3)
+        self._compact(saver, keep_latest=None, keep_task_completions=False)
+        assert len(list(saver.list(config))) == 2
+
+    def test_compacts_threads_incrementally(self):
+        saver = MemorySaver()
+        for thread_id in ['a', 'b', 'c']:
+            self._run_tasks(saver, 1, thread_id)
+        compactor = CheckpointCompactor(saver, checkpoint_pruner(saver), threads_per_run=2)
+
+        compactor.run_once()
+        assert [len(saver.storage[t]['']) for t in ['a', 'b', 'c']] == [2, 2, 5]
+        compactor.run_once()
+        assert [len(saver.storage[t]['']) for t in ['a', 'b', 'c']] == [2, 2, 2]
+        assert compactor.stats['threads'] == 3 and compactor.stats['runs'] == 2
+
+    def test_bounded_memory_accounting(self):
+        saver = BoundedMemorySaver()
+        graph, config = self._run_tasks(saver, 2)
+        before = saver.stats['resident_bytes']
+        _, reclaimed = self._compact(saver, keep_latest=2)
+        assert saver.stats['resident_bytes'] == stored_bytes(saver) == before - reclaimed
+        assert graph.get_state(config).values['messages'][-3].content == 'follow-up 0'
+
+    def test_sqlite_through_write_behind_and_delta(self):
+        with tempfile.TemporaryDirectory() as directory:
+            saver = SqliteSaver.from_path(os.path.join(directory, 'checkpoints.sqlite'))
+            saver.setup()
+            blobs = SqliteMessageBlobStore(saver)
+            blobs.setup()
+            write_behind = WriteBehindSaver(DeltaMessageSaver(saver, blobs), flush_interval_seconds=60)
+            graph, config = self._run_tasks(write_behind, 2)
+            latest = graph.get_state(config).values
+            checkpoints = len(list(saver.list(config)))
+
+            compactor, reclaimed = self._compact(write_behind, keep_latest=2, keep_task_completions=False)
+            assert reclaimed > 0 and compactor.stats['checkpoints'] == checkpoints - 2
+            assert graph.get_state(config).values == latest
+            referenced = {(c, str(v)) for t in saver.list(config) for c, v in t.checkpoint['channel_versions'].items()}
+            stored = set(saver.conn.execute("SELECT channel, version FROM checkpoint_blobs").fetchall())
+            assert stored <= referenced
+            write_behind.close()
+            saver.close()
+
+    def test_sweeps_unreferenced_message_blobs(self):
+        saver, blobs = MemorySaver(), InMemoryMessageBlobStore()
+        delta = DeltaMessageSaver(saver, blobs)
+        graph, config = run_tool_loop(delta, 3, 'kept', whole_history=True)
+        latest = graph.get_state(config).values
+        kept = set(blobs.blobs.keys())
+        run_tool_loop(delta, 3, 'deleted')
+        graph.update_state({'configurable': {'thread_id': 'deleted'}},
+                           {'messages': [HumanMessage(content='only in the deleted thread', id='deleted')]})
+        delta.delete_thread('deleted')
+        before = sum(len(b[1]) for b in blobs.blobs.values())
+
+        listed = unittest.mock.patch.object(saver, 'list', wraps=saver.list)
+        with listed as saver_list:
+            compactor, first = self._compact(delta, keep_latest=2)
+        # threads are marked one at a time, the checkpoints of all of them are never listed at once.
+        assert saver_list.call_count != 0 and all(c.args[0] is not None for c in saver_list.call_args_list)
+        # blobs found unreferenced are only deleted when the next sweep finds them so too.
+        assert compactor.stats['message_blobs'] == 0
+        second = compactor.run_once()
+        assert compactor.stats['message_blobs'] > 0 and set(blobs.blobs.keys()) <= kept
+        assert first + second == compactor.stats['reclaimed_bytes']
+        assert second == before - sum(len(b[1]) for b in blobs.blobs.values()) > 0
+        assert DeltaMessageSaver(saver, blobs).get_tuple(config).checkpoint['channel_values']['messages'] \
+               == latest['messages']
+        graph.invoke({'messages': [HumanMessage(content='after sweeping', id='after')]}, config)
+        assert graph.get_state(config).values['messages'][-3].content == 'after sweeping'
+
+
+class CheckpointBenchmarkTest(unittest.TestCase):
+    """
+    Checkpoint write latency per step of a tool calling loop - the put and put_writes a graph makes each step -
+    writing JSON directly against msgpack with zstd behind WriteBehindSaver. SqliteSaver stands in for PostgresSaver
+    unless CHECKPOINT_POSTGRES_URI is set.
+    """
+
+    steps = 30
+
+    def _write_steps(self, saver, thread_id: str) -> typing.Tuple[float, float]:
+        """
+        :return: the seconds per step the graph waits on the writes, and per step until they are all stored.
+        """
+        messages = history(self.steps)
+        config = {'configurable': {'thread_id': thread_id, 'checkpoint_ns': ''}}
+        version, waited = None, 0.0
+        start = time.perf_counter()
+        for i in range(1, self.steps + 1):
+            version = saver.get_next_version(version, None)
+            checkpoint = {**empty_checkpoint(), 'channel_values': {'messages': messages[:2 * i + 1]},
+                          'channel_versions': {'messages': version}}
+            metadata = {'source': 'loop', 'step': i, 'writes': {}, 'parents': {}}
+            step_start = time.perf_counter()
+            config = saver.put(config, checkpoint, metadata, {'messages': version})
+            saver.put_writes(config, [('messages', messages[2 * i - 1:2 * i + 1])], f'task-{i}')
+            waited += time.perf_counter() - step_start
+        if isinstance(saver, WriteBehindSaver):
+            saver.flush()
+        stored = time.perf_counter() - start
+        assert saver.get_tuple(config).checkpoint['channel_values']['messages'] == messages
+        return waited / self.steps, stored / self.steps
+
+    def _compare(self, json_saver, write_behind: WriteBehindSaver):
+        thread_id = f'benchmark-{time.time_ns()}'
+        results = {'json': self._write_steps(json_saver, thread_id),
+                   'msgpack+zstd write-behind': self._write_steps(write_behind, f'{thread_id}-write-behind')}
+        write_behind.close()
+        for name, (waited, stored) in results.items():
+            LoggerFacade.info(f"{type(json_saver).__name__} {name}: {waited * 1000:.3f} ms/step waited on writes, "
+                              f"{stored * 1000:.3f} ms/step stored.")
+        assert results['msgpack+zstd write-behind'][0] < results['json'][0]
+
+    def test_sqlite_write_latency_per_step(self):
+        with tempfile.TemporaryDirectory() as directory:
+            json_saver = SqliteSaver.from_path(os.path.join(directory, 'json.sqlite'),
+                                               SerializerCompat(JsonSerializationProtocol()))
+            msgpack_saver = SqliteSaver.from_path(os.path.join(directory, 'msgpack.sqlite'),
+                                                  MsgpackCheckpointSerializer(zstd_level=3))
+            for saver in [json_saver, msgpack_saver]:
+                saver.setup()
+            self._compare(json_saver, WriteBehindSaver(msgpack_saver, flush_interval_seconds=60))
+            json_saver.close()
+            msgpack_saver.close()
+
+    @unittest.skipUnless(os.environ.get('CHECKPOINT_POSTGRES_URI'), 'CHECKPOINT_POSTGRES_URI is not set.')
+    def test_postgres_write_latency_per_step(self):
+        from langgraph.checkpoint.postgres import PostgresSaver
+        from cdc_agents.checkpoint.postgres import PooledPostgresSaver
+        from psycopg import Connection
+        from psycopg.rows import dict_row
+        conn = Connection.connect(os.environ['CHECKPOINT_POSTGRES_URI'], autocommit=True, prepare_threshold=0,
+                                  row_factory=dict_row)
+        json_saver = PostgresSaver(conn, serde=SerializerCompat(JsonSerializationProtocol()))
+        json_saver.setup()
+        pooled = PooledPostgresSaver.from_uri(os.environ['CHECKPOINT_POSTGRES_URI'],
+                                              serde=MsgpackCheckpointSerializer(zstd_level=3))
+        pooled.setup()
+        self._compare(json_saver, WriteBehindSaver(pooled, flush_interval_seconds=60))
+        conn.close()
+        pooled.close()
+
+    def test_checkpoint_bytes_per_step(self):
+        messages = history(self.steps)
+
+        def bytes_per_step(serde):
+            return sum(len(serde.dumps_typed(messages[:2 * i + 1])[1]) for i in range(1, self.steps + 1))
+
+        json_bytes = bytes_per_step(SerializerCompat(JsonSerializationProtocol()))
+        assert bytes_per_step(MsgpackCheckpointSerializer(zstd_level=3)) < \
+               bytes_per_step(MsgpackCheckpointSerializer()) < json_bytes
+
+
+@unittest.skipUnless(os.environ.get('CHECKPOINT_POSTGRES_URI'), 'CHECKPOINT_POSTGRES_URI is not set.')
+class PooledPostgresSaverTest(unittest.TestCase):
+
+    def test_pooled_write_behind(self):
+        from cdc_agents.checkpoint.postgres import PooledPostgresSaver
+        saver = PooledPostgresSaver.from_uri(os.environ['CHECKPOINT_POSTGRES_URI'], max_size=4,
+                                             serde=MsgpackCheckpointSerializer(zstd_level=3))
+        saver.setup()
+        write_behind = WriteBehindSaver(saver, max_pending_writes=16)
+        graph = tool_loop_graph(write_behind, steps=10)
+        config = {'configurable': {'thread_id': f'pooled-{time.time_ns()}'}, 'recursion_limit': 50}
+        graph.invoke({'messages': [HumanMessage(content='find where the checkpoint is written', id='task')]}, config)
+        assert graph.get_state(config).values['messages'] == history(10)
+
+        from cdc_agents.checkpoint.postgres import PostgresCheckpointPruner
+        pruner = PostgresCheckpointPruner(saver)
+        thread_id = config['configurable']['thread_id']
+        checkpoint_ids = [c for _, c, _ in pruner.checkpoints(thread_id)]
+        assert pruner.prune(thread_id, '', checkpoint_ids[:-2]) > 0
+        assert len(list(saver.list(config))) == 2
+        assert graph.get_state(config).values['messages'] == history(10)
+        write_behind.close()
+        saver.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
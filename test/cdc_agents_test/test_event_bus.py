@@ -0,0 +1,160 @@
+import asyncio
+import os
+import queue
+import tempfile
+import time
+import unittest
+
+from cdc_agents.agent.task_manager import AsyncAgentTaskManager
+from cdc_agents.common.server.event_bus import EventBus, LocalEventBus, PostgresEventBus, Workers
+from cdc_agents.common.server.task_store import SqliteTaskStore
+from cdc_agents.common.types import SendTaskRequest, SendTaskStreamingRequest, TaskResubscriptionRequest, \
+    TaskIdParams, TaskState, TaskStatusUpdateEvent
+from cdc_agents.common.utils.push_notification_auth import PushNotificationSenderAuth
+from cdc_agents_test.test_async_task_manager import BlockingAgent, task_params
+
+
+class LinkedEventBus(EventBus):
+    """
+    Bus of one worker among several in this process, delivering what it publishes to the others as the Postgres bus
+    would.
+    """
+
+    def __init__(self, worker_id: str, buses: list):
+        super().__init__(worker_id)
+        self.buses = buses
+        buses.append(self)
+
+    def publish(self, channel: str, message: dict) -> None:
+        for bus in list(self.buses):
+            bus._deliver(channel, message)
+
+
+class CountingAgent(BlockingAgent):
+
+    def __init__(self, delay: float = 0.2):
+        super().__init__(delay)
+        self.runs = 0
+
+    def invoke(self, query, sessionId):
+        self.runs += 1
+        return super().invoke(query, sessionId)
+
+    def stream(self, query, sessionId, graph=None):
+        self.runs += 1
+        yield from super().stream(query, sessionId, graph)
+
+
+class EventBusTest(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'tasks.sqlite')
+        self.buses = []
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _worker(self, bus: EventBus, workers: Workers = None, delay: float = 0.2) -> AsyncAgentTaskManager:
+        store = SqliteTaskStore.from_path(self.path, BlockingAgent.agent_name)
+        store.setup()
+        return AsyncAgentTaskManager(CountingAgent(delay), PushNotificationSenderAuth(), task_store=store,
+                                     event_bus=bus, workers=workers)
+
+    async def test_resubscribes_on_another_worker(self):
+        bus = LocalEventBus()
+        worker, other_worker = self._worker(bus), self._worker(bus)
+        params = task_params()
+        stream = await worker.on_send_task_subscribe(SendTaskStreamingRequest(params=params))
+        first = await stream.__anext__()
+        assert first.result.status.state == TaskState.WORKING
+
+        resubscribed = await other_worker.on_resubscribe_to_task(
+            TaskResubscriptionRequest(params=TaskIdParams(id=params.id)))
+        events = [e.result async for e in resubscribed]
+        assert isinstance(events[-1], TaskStatusUpdateEvent) and events[-1].final
+        assert events[-1].status.state == TaskState.COMPLETED
+        assert [e.result async for e in stream][-1].status.state == TaskState.COMPLETED
+
+    async def test_resubscribe_to_finished_task_fails(self):
+        bus = LocalEventBus()
+        worker, other_worker = self._worker(bus), self._worker(bus, delay=0)
+        params = task_params()
+        await worker.on_send_task(SendTaskRequest(params=params))
+
+        response = await other_worker.on_resubscribe_to_task(
+            TaskResubscriptionRequest(params=TaskIdParams(id=params.id)))
+        assert response.error is not None
+
+    def _affine_workers(self):
+        workers = [Workers(LinkedEventBus(worker_id, self.buses), heartbeat_seconds=1).start()
+                   for worker_id in ['worker-a', 'worker-b']]
+        self.addCleanup(lambda: [w.close() for w in workers])
+        return [self._worker(w.event_bus, w, delay=0.05) for w in workers]
+
+    def _session_of(self, task_manager: AsyncAgentTaskManager, owner: str):
+        while True:
+            params = task_params()
+            if task_manager.workers.owner(params.sessionId) == owner:
+                return params
+
+    async def test_forwards_sessions_to_their_worker(self):
+        worker_a, worker_b = self._affine_workers()
+        assert worker_a.workers.live() == worker_b.workers.live() == ['worker-a', 'worker-b']
+
+        params = self._session_of(worker_a, 'worker-b')
+        response = await worker_a.on_send_task(SendTaskRequest(params=params))
+        assert response.result.status.state == TaskState.COMPLETED
+        assert (worker_a.agent.runs, worker_b.agent.runs) == (0, 1)
+
+        params = self._session_of(worker_a, 'worker-b')
+        stream = await worker_a.on_send_task_subscribe(SendTaskStreamingRequest(params=params))
+        events = [e.result async for e in stream]
+        assert events[-1].final and events[-1].status.state == TaskState.COMPLETED
+        assert (worker_a.agent.runs, worker_b.agent.runs) == (0, 2)
+
+        params = self._session_of(worker_a, 'worker-a')
+        await worker_a.on_send_task(SendTaskRequest(params=params))
+        assert (worker_a.agent.runs, worker_b.agent.runs) == (1, 2)
+
+    async def test_reassigns_sessions_of_stopped_workers(self):
+        worker_a, worker_b = self._affine_workers()
+        params = self._session_of(worker_a, 'worker-b')
+        worker_b.workers.close()
+        await asyncio.sleep(0)
+
+        assert worker_a.workers.live() == ['worker-a'] and worker_a.session_owner(params.sessionId) is None
+        response = await worker_a.on_send_task(SendTaskRequest(params=params))
+        assert response.result.status.state == TaskState.COMPLETED and worker_a.agent.runs == 1
+
+
+@unittest.skipUnless(os.environ.get('CHECKPOINT_POSTGRES_URI'), 'CHECKPOINT_POSTGRES_URI is not set.')
+class PostgresEventBusTest(unittest.TestCase):
+
+    def _bus(self, worker_id: str) -> PostgresEventBus:
+        bus = PostgresEventBus(os.environ['CHECKPOINT_POSTGRES_URI'], worker_id)
+        bus.setup()
+        self.addCleanup(bus.close)
+        return bus.start()
+
+    def test_delivers_to_other_workers(self):
+        publisher, subscriber = self._bus('worker-a'), self._bus('worker-b')
+        channel = f'task-{time.time_ns()}'
+        received = queue.Queue()
+        subscriber.subscribe(channel, received.put)
+
+        small = {'text': 'working'}
+        large = {'text': 'x' * PostgresEventBus.MAX_NOTIFY_BYTES}
+        publisher.publish(channel, small)
+        publisher.publish(channel, large)
+
+        assert received.get(timeout=10) == small
+        assert received.get(timeout=10) == large
+        assert received.empty()
+        # only the message over the notification limit goes through the table.
+        assert publisher._connection().execute("SELECT count(*) FROM event_payloads WHERE payload->>'channel' = %s",
+                                               (channel,)).fetchone()[0] == 1
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,165 @@
+import asyncio
+import hashlib
+import http.server
+import json
+import threading
+import time
+import unittest
+
+from cdc_agents.agents.cdc_server_agent import CdcServerAgentToolCallProvider
+from cdc_agents.common.graphql_client import GraphQLClient
+from cdc_agents.common.graphql_models import GitStagedResult
+from cdc_agents.common.graphql_operations import GraphQLOperationRegistry, GraphQLOperationError
+from cdc_agents.config.cdc_server_config_props import CdcServerConfigProps
+
+
+class StubGraphQLServer(http.server.ThreadingHTTPServer):
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), StubGraphQLHandler)
+        self.client_ports = set()
+        self.delay = 0.0
+        self.lock = threading.Lock()
+        self.requests = []
+        self.persisted = {}
+        self.supports_persisted_queries = True
+
+
+class StubGraphQLHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        with self.server.lock:
+            self.server.client_ports.add(self.client_address[1])
+            self.server.requests.append(request)
+        time.sleep(self.server.delay)
+        persisted_query = request.get('extensions', {}).get('persistedQuery')
+        if persisted_query and not self.server.supports_persisted_queries:
+            return self._respond({'errors': [{'message': 'PersistedQueryNotSupported'}]})
+        if persisted_query and 'query' not in request:
+            if persisted_query['sha256Hash'] not in self.server.persisted:
+                return self._respond({'errors': [{'message': 'PersistedQueryNotFound',
+                                                  'extensions': {'code': 'PERSISTED_QUERY_NOT_FOUND'}}]})
+        elif persisted_query:
+            assert hashlib.sha256(request['query'].encode()).hexdigest() == persisted_query['sha256Hash']
+            self.server.persisted[persisted_query['sha256Hash']] = request['query']
+        session_id = request['variables']['request']['sessionKey']['key']
+        self._respond({'data': {'getStaged': {'staged': {'files': []}, 'sessionKey': {'key': session_id}}}})
+
+    def _respond(self, body):
+        encoded = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(encoded)))
+        self.end_headers()
+        self.wfile.write(encoded)
+
+
+class GraphQLClientTest(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.server = StubGraphQLServer()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.tool = self._tool()
+
+    def _tool(self, **props):
+        self.client = GraphQLClient(CdcServerConfigProps(
+            graphql_endpoint=f'http://127.0.0.1:{self.server.server_address[1]}/graphql', timeout_seconds=5,
+            **props))
+        self.addCleanup(self.client.close)
+        return CdcServerAgentToolCallProvider(self.client.cdc_server, None, self.client) \
+            .produce_retrieve_current_repository_staged()
+
+    def test_sync_invoke_reuses_connection(self):
+        for i in range(3):
+            result = self.tool.invoke({'git_repo_url': 'repo', 'session_id': f'session-{i}'})
+            assert isinstance(result, GitStagedResult)
+            assert result.sessionKey.key == f'session-{i}'
+        assert len(self.server.client_ports) == 1
+
+    async def test_async_invoke_does_not_block_loop(self):
+        self.server.delay = 0.2
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        ticker = asyncio.create_task(tick())
+        start = time.perf_counter()
+        results = await asyncio.gather(*[self.tool.ainvoke({'git_repo_url': 'repo', 'session_id': f'session-{i}'})
+                                         for i in range(5)])
+        elapsed = time.perf_counter() - start
+        ticker.cancel()
+
+        assert [r.sessionKey.key for r in results] == [f'session-{i}' for i in range(5)]
+        assert elapsed < 5 * self.server.delay
+        assert ticks >= 5
+
+    async def test_persisted_queries(self):
+        tool = self._tool(persisted_queries=True)
+        tool.invoke({'git_repo_url': 'repo', 'session_id': 'session-0'})
+        result = await tool.ainvoke({'git_repo_url': 'repo', 'session_id': 'session-1'})
+        assert result.sessionKey.key == 'session-1'
+
+        first, registered, second = self.server.requests
+        assert 'query' not in first and 'query' not in second
+        assert registered['operationName'] == 'GetStaged' and 'persistedQuery' in registered['extensions']
+        assert len(registered['query']) < 400 and '\n' not in registered['query']
+        assert second['extensions']['persistedQuery']['sha256Hash'] in self.server.persisted
+
+    def test_persisted_queries_not_supported(self):
+        self.server.supports_persisted_queries = False
+        tool = self._tool(persisted_queries=True)
+        for i in range(2):
+            assert tool.invoke({'git_repo_url': 'repo', 'session_id': f'session-{i}'}).sessionKey.key == f'session-{i}'
+        assert ['query' in r for r in self.server.requests] == [False, True, True]
+        assert not self.client.persisted_queries
+
+
+class GraphQLOperationRegistryTest(unittest.TestCase):
+
+    def test_register(self):
+        registry = GraphQLOperationRegistry()
+        document = """
+        query GetBuild($buildId: String!) {
+            getBuild(buildId: $buildId) {
+                buildId
+                output
+            }
+        }
+        """
+        operation = registry.register(document)
+        assert operation.name == 'GetBuild' and operation.operation_type == 'query'
+        assert operation.document == 'query GetBuild($buildId:String!){getBuild(buildId:$buildId){buildId output}}'
+        assert operation.sha256 == hashlib.sha256(operation.document.encode()).hexdigest()
+        assert registry.register(document) is operation
+        assert registry.get('GetBuild') is operation
+        assert operation.payload({'buildId': '1'})['query'] == operation.document
+        assert operation.payload({'buildId': '1'}, persisted=True) == {
+            'operationName': 'GetBuild', 'variables': {'buildId': '1'},
+            'extensions': {'persistedQuery': {'version': 1, 'sha256Hash': operation.sha256}}}
+
+        with self.assertRaises(GraphQLOperationError):
+            registry.register('query GetBuild { getBuild { buildId } }')
+
+    def test_rejects_invalid_documents(self):
+        registry = GraphQLOperationRegistry()
+        for document in ['{ getBuild { buildId } }',
+                         'query GetBuild { getBuild { buildId }',
+                         'query GetBuild { getBuild(buildId: $buildId) { buildId } }',
+                         'query A { a } query B { b }']:
+            with self.assertRaises(GraphQLOperationError):
+                registry.register(document)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import os
+import sys
+import tempfile
+import textwrap
+import unittest
+
+from cdc_agents.config.mcp_config_props import McpConfigProps
+from cdc_agents.tools.mcp_session_pool import McpSessionPool, McpToolNotFound
+
+SERVER = textwrap.dedent("""
+    import os
+    from mcp.server.fastmcp import FastMCP
+
+    mcp = FastMCP("pid")
+
+    @mcp.tool()
+    def pid() -> str:
+        \"\"\"Return the server process id.\"\"\"
+        return str(os.getpid())
+
+    @mcp.tool()
+    def exit_server() -> str:
+        \"\"\"Exit the server process.\"\"\"
+        os._exit(1)
+
+    if __name__ == "__main__":
+        mcp.run()
+""")
+
+
+class McpSessionPoolTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server_dir = tempfile.TemporaryDirectory()
+        cls.server_path = os.path.join(cls.server_dir.name, 'pid_server.py')
+        with open(cls.server_path, 'w') as f:
+            f.write(SERVER)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server_dir.cleanup()
+
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.pool = self._pool()
+        self.connection = {"command": sys.executable, "args": [self.server_path], "transport": "stdio"}
+
+    def tearDown(self):
+        self.pool.shutdown()
+        self.cache_dir.cleanup()
+
+    def _pool(self):
+        return McpSessionPool(McpConfigProps(health_check_interval_seconds=0, call_timeout_seconds=10,
+                                             health_check_timeout_seconds=2, schema_cache_dir=self.cache_dir.name))
+
+    def test_reuses_session_across_calls(self):
+        key = self.pool.register("pid", self.connection)
+        first = self.pool.call_tool(key, "pid", {})
+        second = self.pool.call_tool(key, "pid", {})
+        assert first == second
+        assert self.pool.stats['opened'] == 1
+        assert self.pool.stats['calls'] == 2
+
+    def test_restarts_dead_server(self):
+        key = self.pool.register("pid", self.connection)
+        first = self.pool.call_tool(key, "pid", {})
+        with self.assertRaises(Exception):
+            self.pool.call_tool(key, "exit_server", {})
+        assert self.pool.call_tool(key, "pid", {}) != first
+        assert self.pool.stats['restarted'] >= 1
+
+    def test_evicts_idle_session_at_capacity(self):
+        self.pool.mcp_config_props.max_sessions = 1
+        first = self.pool.register("first", self.connection)
+        second = self.pool.register("second", self.connection)
+        self.pool.call_tool(first, "pid", {})
+        self.pool.call_tool(second, "pid", {})
+        assert self.pool.stats['evicted'] == 1
+        assert list(self.pool.sessions.keys()) == [second]
+
+    def test_discovery_keeps_session_for_calls(self):
+        key = self.pool.register("pid", self.connection)
+        tools = self.pool.get_tools(key)
+        assert sorted(t.name for t in tools) == ["exit_server", "pid"]
+        self.pool.call_tool(key, "pid", {})
+        assert self.pool.stats['opened'] == 1
+
+    def test_cached_schemas_defer_server_start(self):
+        key = self.pool.register("pid", self.connection)
+        self.pool.get_tools(key)
+
+        cached = self._pool()
+        try:
+            key = cached.register("pid", self.connection)
+            tools = cached.get_tools(key)
+            assert sorted(t.name for t in tools) == ["exit_server", "pid"]
+            assert cached.stats['schema_cache_hits'] == 1
+            assert cached.stats['opened'] == 0
+            assert next(t for t in tools if t.name == "pid").invoke({}) == cached.call_tool(key, "pid", {})
+            assert cached.stats['opened'] == 1
+        finally:
+            cached.shutdown()
+
+    def test_unknown_tool_invalidates_schema_cache(self):
+        key = self.pool.register("pid", self.connection)
+        self.pool.get_tools(key)
+        assert len(os.listdir(self.cache_dir.name)) == 1
+        with self.assertRaises(McpToolNotFound):
+            self.pool.call_tool(key, "missing", {})
+        assert len(os.listdir(self.cache_dir.name)) == 0
+
+    def test_unknown_tool(self):
+        key = self.pool.register("pid", self.connection)
+        with self.assertRaises(McpToolNotFound):
+            self.pool.call_tool(key, "missing", {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import unittest
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.prebuilt import create_react_agent
+
+from cdc_agents.agent.message_budget import MessageBudget, MessageTokenCounter, pin_message
+from cdc_agents.config.agent_config_props import MessageOverflowStrategy
+
+
+def word_count(messages):
+    return sum(len(m.content.split()) for m in messages)
+
+
+def conversation():
+    return [SystemMessage(content='system prompt', id='system'),
+            HumanMessage(content='the task to do', id='task'),
+            AIMessage(content='calling a tool', id='call',
+                      tool_calls=[{'name': 'search', 'args': {}, 'id': 'tool-call'}]),
+            ToolMessage(content=' '.join(['result'] * 40), tool_call_id='tool-call', id='result'),
+            AIMessage(content=' '.join(['older'] * 40), id='older'),
+            pin_message(HumanMessage(content='pinned note', id='pinned')),
+            AIMessage(content=' '.join(['recent'] * 10), id='recent'),
+            HumanMessage(content='the latest ask', id='latest')]
+
+
+class MessageBudgetTest(unittest.TestCase):
+
+    def setUp(self):
+        self.counter = MessageTokenCounter(word_count)
+
+    def test_under_budget_unchanged(self):
+        messages = conversation()
+        assert MessageBudget(1000, counter=self.counter).fit(messages) == messages
+
+    def test_drop_keeps_pinned_and_tool_call_pairs(self):
+        fitted = MessageBudget(30, counter=self.counter).fit(conversation())
+        assert [m.id for m in fitted] == ['system', 'task', 'pinned', 'recent', 'latest']
+
+        fitted = MessageBudget(70, counter=self.counter).fit(conversation())
+        assert [m.id for m in fitted] == ['system', 'task', 'older', 'pinned', 'recent', 'latest']
+
+    def test_truncate(self):
+        fitted = MessageBudget(60, MessageOverflowStrategy.TRUNCATE, counter=self.counter,
+                               max_tokens_truncated_message=10).fit(conversation())
+        assert [m.id for m in fitted] == [m.id for m in conversation()]
+        assert fitted[3].content.startswith('result result') and 'truncated 30 tokens' in fitted[3].content
+        assert word_count(fitted) <= 60 + 2 * 4
+
+    def test_summarize(self):
+        summarized = []
+
+        def summarize(messages):
+            summarized.append([m.id for m in messages])
+            return 'what happened'
+
+        fitted = MessageBudget(30, MessageOverflowStrategy.SUMMARIZE, counter=self.counter,
+                               summarize=summarize).fit(conversation())
+        assert summarized == [['call', 'result', 'older']]
+        assert [m.id for m in fitted][:2] == ['system', 'task']
+        assert fitted[2].name == 'summary' and 'what happened' in fitted[2].content
+        assert [m.id for m in fitted][3:] == ['pinned', 'recent', 'latest']
+
+    def test_summary_extended_with_newly_removed(self):
+        summarized = []
+
+        def summarize(messages):
+            summarized.append([m.id for m in messages])
+            return f'summary {len(summarized)}'
+
+        budget = MessageBudget(30, MessageOverflowStrategy.SUMMARIZE, counter=self.counter, summarize=summarize)
+        budget.fit(conversation())
+        fitted = budget.fit(conversation())
+        assert summarized == [['call', 'result', 'older']] and 'summary 1' in fitted[2].content
+
+        fitted = budget.fit(conversation() + [AIMessage(content=' '.join(['newer'] * 40), id='newer'),
+                                              HumanMessage(content='the next ask', id='next')])
+        assert summarized[1:] == [[None, 'recent', 'latest', 'newer']]
+        assert [m.id for m in fitted] == ['system', 'task', None, 'pinned', 'next']
+        assert 'summary 2' in fitted[2].content
+
+    def test_counts_are_cached(self):
+        calls = []
+
+        def counting(messages):
+            calls.append(messages[0].id)
+            return word_count(messages)
+
+        counter = MessageTokenCounter(counting)
+        messages = conversation()
+        assert counter.count_all(messages) == counter.count_all(messages)
+        assert len(calls) == len(messages)
+
+        messages[-1].content = 'a changed ask'
+        counter.count_all(messages)
+        assert calls[-1] == 'latest' and len(calls) == len(messages) + 1
+
+    def test_pre_model_hook_limits_model_input_only(self):
+        model = GenericFakeChatModel(messages=iter([AIMessage(content='done')]))
+        seen = []
+        budget = MessageBudget(30, counter=self.counter)
+
+        def hook(state):
+            update = budget.pre_model_hook(state)
+            seen.append(update['llm_input_messages'])
+            return update
+
+        graph = create_react_agent(model, tools=[], checkpointer=MemorySaver(), pre_model_hook=hook)
+        config = {'configurable': {'thread_id': 'thread'}}
+        graph.invoke({'messages': conversation()}, config)
+
+        assert [m.id for m in seen[0]] == ['system', 'task', 'pinned', 'recent', 'latest']
+        assert len(graph.get_state(config).values['messages']) == len(conversation()) + 1
+
+
+if __name__ == '__main__':
+    unittest.main()
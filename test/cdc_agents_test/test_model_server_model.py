@@ -1,4 +1,7 @@
+import concurrent.futures
+import copy
 import logging
+import time
 import typing
 import unittest
 import unittest.mock
@@ -6,8 +9,10 @@ from typing import Any
 from langchain_core.tools import tool
 
 from langchain.agents import create_react_agent
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.prebuilt import create_react_agent as create_react_agent_graph
 from langchain_core.language_models import LanguageModelInput
-from langchain_core.messages import BaseMessage
+from langchain_core.messages import BaseMessage, HumanMessage
 from langchain_core.prompt_values import PromptValue, ChatPromptValue
 from langchain_core.prompts import PromptTemplate
 from langchain_core.tools import BaseTool
@@ -17,7 +22,7 @@ from cdc_agents.config.agent_config import AgentConfig
 from cdc_agents.config.agent_config_props import AgentConfigProps
 from cdc_agents.config.model_server_config_props import ModelServerConfigProps
 from cdc_agents.model_server.model_server_model import ModelServerModel, LoggingModelServerExecutor, \
-    ModelServerExecutor, ModelServerInput
+    ModelServerExecutor, ModelServerInput, TOOL_CALL_START
 from python_di.configs.bean import test_inject
 from python_di.configs.test import test_booter, boot_test
 from python_di.inject.profile_composite_injector.inject_context_di import autowire_fn
@@ -67,6 +72,73 @@ class ModelServerModelTest(unittest.TestCase):
         found = self.server.invoke([message, message_w], test_)
         assert found.content == ["ok", "do"]
 
+    def test_stream_tokens(self):
+        test_ = {'configurable': {'thread_id': 'test'}}
+        chunks = list(self.server.stream("hello there", test_))
+        assert [c.content for c in chunks] == ["hello ", "there"]
+
+        graph = create_react_agent_graph(self.server, tools=[], checkpointer=MemorySaver())
+        streamed = [item[0].content for mode, item in graph.stream({"messages": [("user", "hello there")]}, test_,
+                                                                   stream_mode=["messages", "values"])
+                    if mode == "messages"]
+        assert streamed == ["hello ", "there"]
+
+    def test_stream_tool_call_matches_generate(self):
+        completion = '<tool_call>{"name": "lookup", "arguments": {"query": "cdc"}}</tool_call>'
+        messages = [HumanMessage(content=completion)]
+        generated = self.server._generate(messages).generations[0].message
+
+        chunks = list(self.server._stream(messages))
+        assert all(TOOL_CALL_START not in str(c.message.content) for c in chunks)
+        merged = chunks[0].message
+        for c in chunks[1:]:
+            merged = merged + c.message
+
+        assert merged.content == generated.content
+        assert [(t['name'], t['args']) for t in merged.tool_calls] == \
+               [(t['name'], t['args']) for t in generated.tool_calls] == [('lookup', {'query': 'cdc'})]
+
+    def test_bind_tools_returns_new_instance(self):
+        @tool
+        def bound_tool():
+            """
+            """
+            pass
+
+        bound = self.server.bind_tools([bound_tool], tool_choice="any")
+        assert bound is not self.server
+        assert bound.bound_tools == [bound_tool]
+        assert bound.tool_choice == "any"
+        assert self.server.bound_tools is None
+        assert bound.executor is self.server.executor
+
+    def test_concurrent_invoke_scales(self):
+        delay = 0.2
+        sessions = 8
+
+        class SlowExecutor:
+            def call(self, model_server_input: ModelServerInput, *args, **kwargs):
+                time.sleep(delay)
+                return "done"
+
+            def get_config_props(self) -> ModelServerConfigProps:
+                pass
+
+        model = copy.copy(self.server)
+        model.executor = SlowExecutor()
+
+        def invoke_session(i):
+            return model.bind_tools([]).invoke("hello", {'configurable': {'thread_id': f'session-{i}'}})
+
+        start = time.perf_counter()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=sessions) as executor:
+            results = list(executor.map(invoke_session, range(sessions)))
+        elapsed = time.perf_counter() - start
+
+        assert all(r.content == ["done"] for r in results)
+        # serialized invocations would take sessions * delay.
+        assert elapsed < sessions * delay / 2
+
     def test_with_react_agent(self):
         # TODO: could potentially bootstrap smaller agents with thoughts of larger agents using multishot
         #  Question, Thought, Question, Thought
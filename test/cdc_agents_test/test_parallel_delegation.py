@@ -0,0 +1,98 @@
+import threading
+import time
+import unittest
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.memory import MemorySaver
+
+from cdc_agents.agent.agent_orchestrator import StateGraphOrchestrator, OrchestratedAgent
+from cdc_agents.common.types import AgentGraphResponse, ResponseFormat, AgentDescriptor
+from cdc_agents.config.agent_config_props import AgentConfigProps, AgentCardItem
+
+
+class FakeModelProvider:
+
+    def retrieve_model(self, card, model=None):
+        return GenericFakeChatModel(messages=iter([]))
+
+
+class SleepingAgent:
+
+    def __init__(self, name: str, delay: float):
+        self.agent_name = name
+        self.delay = delay
+
+    def invoke(self, state, session_id):
+        time.sleep(self.delay)
+        return AgentGraphResponse(is_task_complete=True, require_user_input=False, content=ResponseFormat(
+            status='completed', message=f'{self.agent_name} result',
+            history=list(state['messages']) + [AIMessage(content=f'{self.agent_name} result')]))
+
+    def is_terminate_node(self, result, state):
+        return result.is_task_complete
+
+
+class DelegatingOrchestratorAgent(SleepingAgent):
+    """
+    Delegates to every agent at once, then completes with the messages it received.
+    """
+
+    def __init__(self, routes, name: str = 'DelegatingOrchestratorAgent'):
+        super().__init__(name, 0.0)
+        self.routes = routes
+        self.received = []
+        self._lock = threading.Lock()
+
+    def invoke(self, state, session_id):
+        with self._lock:
+            self.received.append([m.content for m in state['messages']])
+            first = len(self.received) == 1
+        history = list(state['messages']) + [AIMessage(content='delegating' if first else 'done')]
+        if first:
+            return AgentGraphResponse(is_task_complete=False, require_user_input=False, content=ResponseFormat(
+                status='goto_agent', message='delegating', route_to=self.routes[0], parallel_routes=self.routes,
+                history=history))
+        return AgentGraphResponse(is_task_complete=True, require_user_input=False,
+                                  content=ResponseFormat(status='completed', message='done', history=history))
+
+
+class ParallelOrchestrator(StateGraphOrchestrator):
+
+    def initialize_response_format_parsers(self, parsers=None):
+        return []
+
+
+class ParallelDelegationTest(unittest.TestCase):
+
+    def _run(self, parallel_delegation: bool):
+        routes = ['SearchAgent', 'LibraryAgent', 'TestAgent']
+        agents = {name: OrchestratedAgent(SleepingAgent(name, 0.3)) for name in routes}
+        orchestrator_agent = DelegatingOrchestratorAgent(routes)
+        props = AgentConfigProps(parallel_delegation=parallel_delegation, agents={
+            ParallelOrchestrator.__name__: AgentCardItem(agent_descriptor=AgentDescriptor(
+                model='fake', agent_name=ParallelOrchestrator.__name__,
+                orchestrator_graph_agent_completion_prompt='Is {{agent_name}} done?')),
+            'SummarizerAgent': AgentCardItem(options={'max_tokens': 1000})})
+        orchestrator = ParallelOrchestrator(agents, orchestrator_agent, props, MemorySaver(), FakeModelProvider())
+
+        config = {'configurable': {'thread_id': 'session'}, 'recursion_limit': 20}
+        start = time.perf_counter()
+        orchestrator.graph.invoke({'messages': [HumanMessage(content='research')], 'session_id': 'session'}, config)
+        return orchestrator_agent, time.perf_counter() - start
+
+    def test_fans_out_concurrently_and_merges_in_route_order(self):
+        orchestrator_agent, elapsed = self._run(parallel_delegation=True)
+
+        assert elapsed < 0.6
+        assert len(orchestrator_agent.received) == 2
+        results = [c for c in orchestrator_agent.received[1] if c.endswith('result')]
+        assert results == ['SearchAgent result', 'LibraryAgent result', 'TestAgent result']
+
+    def test_routes_to_first_agent_when_disabled(self):
+        orchestrator_agent, _ = self._run(parallel_delegation=False)
+        assert [c for c in orchestrator_agent.received[1] if c.endswith('result')] == ['SearchAgent result']
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -8,6 +8,7 @@ from langgraph.checkpoint.memory import MemorySaver
 
 from cdc_agents.agents.deep_code_research_agent import DeepCodeOrchestrator
 from cdc_agents.agents.test_graph.test_graph_cdc_code_search_agent import TestGraphCdcCodeSearchAgent
+from cdc_agents.agents.test_graph.test_graph_library_enumeration_agent import TestGraphLibraryEnumerationAgent
 from cdc_agents.config.agent_config import AgentConfig
 from cdc_agents.config.agent_config_props import AgentConfigProps
 from cdc_agents.model_server.model_provider import ModelProvider
@@ -133,6 +134,23 @@ class TestResponseFormatParser(unittest.TestCase):
 
         self.assertEqual(result.next_agent, TestGraphCdcCodeSearchAgent.__name__)
 
+    def test_next_agent_parsing_parallel(self):
+        """Test several next agents are parsed in order, for parallel delegation."""
+        content = (f"NEXT AGENT: {TestGraphCdcCodeSearchAgent.__name__}, {TestGraphLibraryEnumerationAgent.__name__}\n"
+                   f"NEXT AGENT: {TestGraphCdcCodeSearchAgent.__name__}")
+        message = AIMessage(content=content)
+        values = {"messages": [message]}
+
+        builder = ResponseFormatBuilder()
+        builder.set_content(content)
+        builder.set_status("goto_agent")
+
+        result = self.do_parse(builder, message, values)
+
+        self.assertEqual(result.next_agent, TestGraphCdcCodeSearchAgent.__name__)
+        self.assertEqual(result.build().parallel_routes,
+                         [TestGraphCdcCodeSearchAgent.__name__, TestGraphLibraryEnumerationAgent.__name__])
+
     def do_parse(self, builder, message, values):
         for p in self.parsers:
             builder = p.parse(builder, message, values)
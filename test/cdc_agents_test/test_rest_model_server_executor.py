@@ -0,0 +1,142 @@
+import concurrent.futures
+import http.server
+import json
+import threading
+import time
+import unittest
+
+import httpx
+
+from cdc_agents.config.model_server_config_props import ModelServerConfigProps, ModelServerModelProps
+from cdc_agents.model_server.model_server_client import ModelServerHttpError
+from cdc_agents.model_server.model_server_model import RestModelServerExecutor, ModelServerChatInput, Message, \
+    ModelServerEmbedInput, ModelServerRerankInput
+
+
+class StubModelServer(http.server.ThreadingHTTPServer):
+    """
+    OpenAI style chat and embeddings endpoints plus a batch rerank endpoint, recording each request it serves.
+    """
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), StubModelServerHandler)
+        self.requests = []
+        self.client_ports = set()
+        self.failures = 0
+        self.delay = 0.0
+        self.lock = threading.Lock()
+
+
+class StubModelServerHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        server: StubModelServer = self.server
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        with server.lock:
+            server.requests.append((self.path, body, self.headers.get('Authorization')))
+            server.client_ports.add(self.client_address[1])
+            fail = server.failures > 0
+            if fail:
+                server.failures -= 1
+        time.sleep(server.delay)
+        if fail:
+            return self._respond(503, {'error': 'unavailable'})
+
+        if self.path == '/v1/chat/completions' and body.get('stream'):
+            return self._stream([m['content'] for m in body['messages']])
+        if self.path == '/v1/chat/completions':
+            return self._respond(200, {'choices': [{'message': {'role': 'assistant', 'content': m['content']}}
+                                                   for m in body['messages']]})
+        if self.path == '/v1/embeddings':
+            return self._respond(200, {'data': [{'index': i, 'embedding': [float(len(text))]}
+                                                for i, text in reversed(list(enumerate(body['input'])))]})
+        if self.path == '/v1/rerank':
+            return self._respond(200, {'results': [len(i['rerank_body']) for i in body['inputs']]})
+        self._respond(404, {'error': 'not found'})
+
+    def _respond(self, status, body):
+        encoded = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(encoded)))
+        self.end_headers()
+        self.wfile.write(encoded)
+
+    def _stream(self, contents):
+        events = [f"data: {json.dumps({'choices': [{'delta': {'content': word}}]})}\n\n"
+                  for c in contents for word in c.split(' ')] + ['data: [DONE]\n\n']
+        encoded = ''.join(events).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Content-Length', str(len(encoded)))
+        self.end_headers()
+        self.wfile.write(encoded)
+
+
+class RestModelServerExecutorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubModelServer()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def _executor(self, **props) -> RestModelServerExecutor:
+        props = {'host': '127.0.0.1', 'port': self.server.server_address[1], 'retry_backoff_seconds': 0.01,
+                 'models': [ModelServerModelProps(path='chat-model', api_key='key')], **props}
+        executor = RestModelServerExecutor(ModelServerConfigProps(**props))
+        self.addCleanup(executor.__client__.close)
+        return executor
+
+    def test_chat_reuses_connection(self):
+        executor = self._executor()
+        for _ in range(3):
+            completion = executor.call(ModelServerChatInput(messages=[Message(content='hello')]))
+            assert [c.message.content for c in completion.choices] == ['hello']
+        assert len(self.server.client_ports) == 1
+        path, body, auth = self.server.requests[0]
+        assert body['model'] == 'chat-model'
+        assert auth == 'Bearer key'
+
+    def test_stream_chat(self):
+        executor = self._executor()
+        tokens = list(executor.stream(ModelServerChatInput(messages=[Message(content='hello there')])))
+        assert tokens == ['hello', 'there']
+
+    def test_retries_transient_failures(self):
+        executor = self._executor()
+        self.server.failures = 2
+        assert executor.call(ModelServerEmbedInput(to_embed='abc', model='embed-model')) == [3.0]
+        assert len(self.server.requests) == 3
+
+        self.server.failures = 5
+        with self.assertRaises(ModelServerHttpError):
+            executor.call(ModelServerEmbedInput(to_embed='abc', model='embed-model'))
+
+    def test_per_model_timeout(self):
+        executor = self._executor(max_retries=0,
+                                  models=[ModelServerModelProps(path='embed-model', api_key='', timeout_seconds=0.05)])
+        self.server.delay = 0.5
+        with self.assertRaises(httpx.TimeoutException):
+            executor.call(ModelServerEmbedInput(to_embed='abc', model='embed-model'))
+
+    def test_batches_concurrent_requests(self):
+        executor = self._executor(batch_requests=True, batch_max_wait_ms=200, batch_max_size=8)
+        texts = ['a' * i for i in range(1, 9)]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(texts)) as pool:
+            embedded = list(pool.map(lambda t: executor.call(ModelServerEmbedInput(to_embed=t, model='embed-model')),
+                                     texts))
+            reranked = list(pool.map(lambda n: executor.call(ModelServerRerankInput(
+                rerank_body=[Message(content='doc')] * n)), range(1, 5)))
+        assert embedded == [[float(len(t))] for t in texts]
+        assert reranked == [1, 2, 3, 4]
+        assert [path for path, _, _ in self.server.requests].count('/v1/embeddings') == 1
+        assert executor.__batcher__.stats['requests'] == 12
+
+
+if __name__ == '__main__':
+    unittest.main()
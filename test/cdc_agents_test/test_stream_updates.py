@@ -0,0 +1,78 @@
+import unittest
+
+from langchain_core.messages import AIMessage
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import StateGraph, MessagesState, START, END
+
+from cdc_agents.agent.a2a import A2AAgent
+from cdc_agents.agent.response_format_parser import MessageTypeResponseFormatParser, StatusResponseFormatParser
+from cdc_agents.common.types import AgentGraphUpdate
+from cdc_agents.config.agent_config_props import AgentStreamMode
+
+
+class CountingParser(MessageTypeResponseFormatParser):
+
+    def __init__(self):
+        self.parsed = []
+
+    def parse(self, builder, last_message, values):
+        self.parsed.append(len(values['messages']))
+        return super().parse(builder, last_message, values)
+
+
+class StreamingAgent(A2AAgent):
+
+    def __init__(self, stream_mode: AgentStreamMode):
+        super().__init__()
+        self.stream_mode = stream_mode
+        self.graph = self._graph()
+
+    def initialize_response_format_parsers(self, parsers=None):
+        status = StatusResponseFormatParser()
+        status.add_status([self.completed, self.next_agent, self.needs_input_string])
+        self.counting = CountingParser()
+        return [self.counting, status]
+
+    def _graph(self):
+        def step(name):
+            # returns the whole history with its message appended, as the orchestrator's nodes do.
+            return lambda state: {'messages': list(state['messages']) + [AIMessage(content=f'status: completed\n{name}')]}
+
+        graph = StateGraph(MessagesState)
+        graph.add_node('first', step('first'))
+        graph.add_node('second', step('second'))
+        graph.add_edge(START, 'first')
+        graph.add_edge('first', 'second')
+        graph.add_edge('second', END)
+        return graph.compile(checkpointer=self.memory)
+
+    def invoke(self, query, sessionId):
+        pass
+
+    def stream(self, query, sessionId, graph=None):
+        yield from self.stream_agent_response_graph(query, sessionId, self.graph)
+
+    def get_agent_response(self, config, graph):
+        return self.get_agent_response_graph(config, graph)
+
+
+class StreamUpdatesTest(unittest.TestCase):
+
+    def test_updates_carry_only_added_messages(self):
+        agent = StreamingAgent(AgentStreamMode.UPDATES)
+        responses = list(agent.stream('hello', 'session'))
+
+        assert all(isinstance(r, AgentGraphUpdate) for r in responses)
+        assert [r.agent_name for r in responses] == ['first', 'second']
+        assert [r.content.message for r in responses] == ['first', 'second']
+        assert [m.content for m in responses[1].content.history] == ['status: completed\nsecond']
+
+        agent.counting.parsed.clear()
+        responses = list(agent.stream('again', 'session'))
+        assert [r.content.message for r in responses] == ['first', 'second']
+        # the first run's messages, in the checkpoint, are neither parsed nor streamed again.
+        assert max(agent.counting.parsed) <= 2
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+import unittest.mock
+
+from langchain_core.messages import HumanMessage, AIMessage
+from langgraph.checkpoint.memory import MemorySaver
+
+from cdc_agents.agent.agent_orchestrator import StateGraphOrchestrator, OrchestratedAgent
+from cdc_agents.agent.response_format_parser import MessageTypeResponseFormatParser, StatusResponseFormatParser, \
+    NextAgentResponseFormatParser, AdditionalContextResponseFormatParser, StatusValidationResponseFormatParser
+from cdc_agents.common.types import AgentGraphResponse, AgentDescriptor
+from cdc_agents.config.agent_config_props import AgentConfigProps, AgentCardItem
+from cdc_agents_test.test_parallel_delegation import SleepingAgent, DelegatingOrchestratorAgent, FakeModelProvider
+
+
+class ChildOrchestrator(StateGraphOrchestrator):
+
+    def initialize_response_format_parsers(self, parsers=None):
+        return super().initialize_response_format_parsers([
+            MessageTypeResponseFormatParser(), StatusResponseFormatParser(), NextAgentResponseFormatParser(),
+            AdditionalContextResponseFormatParser(), StatusValidationResponseFormatParser()])
+
+
+class ReportingOrchestratorAgent(DelegatingOrchestratorAgent):
+    """
+    Completes with the status header the orchestrator's model answers with, parsed into the sub-orchestrator's response.
+    """
+
+    def invoke(self, state, session_id):
+        response = super().invoke(state, session_id)
+        if response.is_task_complete:
+            response.content.history[-1] = AIMessage(content='STATUS: completed\nchild done')
+        return response
+
+
+class ParentOrchestrator(ChildOrchestrator):
+    pass
+
+
+def card(name):
+    return AgentCardItem(agent_descriptor=AgentDescriptor(
+        model='fake', agent_name=name, orchestrator_graph_agent_completion_prompt='Is {{agent_name}} done?'))
+
+
+class SubgraphOrchestratorTest(unittest.TestCase):
+
+    def test_nested_orchestrator_runs_as_subgraph(self):
+        props = AgentConfigProps(compose_subgraphs=True, lazy_graph_compile=True, agents={
+            ChildOrchestrator.__name__: card(ChildOrchestrator.__name__),
+            ParentOrchestrator.__name__: card(ParentOrchestrator.__name__),
+            'SummarizerAgent': AgentCardItem(options={'max_tokens': 1000})})
+        memory = MemorySaver()
+        child = ChildOrchestrator({'WorkerAgent': OrchestratedAgent(SleepingAgent('WorkerAgent', 0.0))},
+                                  ReportingOrchestratorAgent(['WorkerAgent'], 'ChildAgent'),
+                                  props, memory, FakeModelProvider())
+        parent = ParentOrchestrator({ChildOrchestrator.__name__: OrchestratedAgent(child)},
+                                    DelegatingOrchestratorAgent([ChildOrchestrator.__name__], 'ParentAgent'),
+                                    props, memory, FakeModelProvider())
+
+        config = {'configurable': {'thread_id': 'session'}, 'recursion_limit': 30}
+        graph = parent._create_compile_graph()
+        subgraph_response = unittest.mock.patch.object(child, 'get_subgraph_response',
+                                                       wraps=child.get_subgraph_response)
+        with subgraph_response as get_subgraph_response:
+            graph.invoke({'messages': [HumanMessage(content='research')], 'session_id': 'session'}, config)
+
+        # the child's standalone graph was never compiled or run.
+        assert child.graph is None
+        namespaces = {c.config['configurable']['checkpoint_ns'] for c in memory.list(None)}
+        assert '' in namespaces
+        assert any(ns.startswith(f'{ChildOrchestrator.__name__}:') for ns in namespaces)
+
+        # the child's final state is parsed into its response, whose history is the parent's state update.
+        response: AgentGraphResponse = child.get_subgraph_response(get_subgraph_response.call_args.args[0])
+        assert response.is_task_complete and not response.require_user_input
+        assert (response.content.status, response.content.message) == ('completed', 'child done')
+
+        contents = [m.content for m in graph.get_state(config).values['messages']]
+        assert contents[:len(response.content.history)] == [m.content for m in response.content.history]
+        assert contents.count('research') == 1
+        assert contents.count('WorkerAgent result') == 1
+        assert contents.count('STATUS: completed\nchild done') == 1
+        assert contents[-1] == 'done'
+
+
+if __name__ == '__main__':
+    unittest.main()
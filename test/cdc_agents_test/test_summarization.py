@@ -0,0 +1,86 @@
+import unittest
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langmem.short_term import SummarizationNode
+
+from cdc_agents.agent.message_budget import MessageTokenCounter
+from cdc_agents.agent.summarization import GatedSummarizationNode
+
+
+class RecordingModel(GenericFakeChatModel):
+    inputs: list = []
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.inputs.append(messages)
+        return super()._generate(messages, stop, run_manager, **kwargs)
+
+
+def turn(i):
+    return [HumanMessage(content=f'question {i}', id=f'human-{i}'),
+            AIMessage(content=f'answer {i} ' + 'word ' * 20, id=f'ai-{i}')]
+
+
+class GatedSummarizationNodeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.model = RecordingModel(messages=iter([AIMessage(content=f'summary {i}') for i in range(10)]), inputs=[])
+        self.counter = MessageTokenCounter(lambda messages: sum(len(m.content.split()) for m in messages))
+
+    def _node(self, **kwargs):
+        return GatedSummarizationNode(
+            SummarizationNode(model=self.model, max_tokens=60, max_tokens_before_summary=20, max_summary_tokens=10),
+            counter=self.counter, **kwargs)
+
+    def test_skips_until_threshold(self):
+        node = self._node(min_messages=4)
+        state = {'messages': turn(0)}
+        assert not node.should_summarize(state)
+        messages = turn(0) + turn(1)
+        assert node.should_summarize(state, messages)
+
+        state = {'messages': messages, **node({'messages': messages}, {'configurable': {}})}
+        assert state['summarized_through'] == 'ai-1'
+        assert not node.should_summarize(state, messages + turn(2))
+        assert node.should_summarize(state, messages + turn(2) + turn(3))
+        assert node.stats == {'calls': 1, 'skipped': 2}
+
+    def test_token_threshold(self):
+        node = self._node(min_tokens=40)
+        assert not node.should_summarize({'messages': turn(0)})
+        assert node.should_summarize({'messages': turn(0) + turn(1)})
+
+    def test_without_thresholds_always_summarizes(self):
+        node = self._node()
+        assert node.should_summarize({'messages': turn(0)[:1]})
+        assert node.stats['skipped'] == 0
+
+    def test_incremental_summarizes_only_new_messages(self):
+        node = self._node(min_messages=4, incremental=True)
+        messages = turn(0) + turn(1)
+        state = {'messages': messages, **node({'messages': messages}, {'configurable': {}})}
+        assert state['context']['running_summary'].summary == 'summary 0'
+        first_summarized = self.model.inputs[-1][-2].content
+
+        messages = messages + turn(2) + turn(3)
+        state = {**state, 'messages': messages, **node({**state, 'messages': messages}, {'configurable': {}})}
+        summarized = self.model.inputs[-1][-2].content
+        assert 'answer 0' in first_summarized
+        assert 'answer 0' not in summarized and 'answer 2' in summarized
+        assert state['context']['running_summary'].summary == 'summary 1'
+
+    def test_non_incremental_keeps_summary_without_extending_it(self):
+        node = self._node()
+        messages = turn(0) + turn(1)
+        state = {'messages': messages, **node({'messages': messages}, {'configurable': {}})}
+        assert state['context']['running_summary'].summary == 'summary 0'
+
+        messages = messages + turn(2) + turn(3)
+        state = {**state, 'messages': messages, **node({**state, 'messages': messages}, {'configurable': {}})}
+        # summarized anew rather than from the previous summary.
+        assert 'summary 0' not in self.model.inputs[-1][-1].content
+        assert state['context']['running_summary'].summary == 'summary 1'
+
+
+if __name__ == '__main__':
+    unittest.main()
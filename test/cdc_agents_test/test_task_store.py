@@ -0,0 +1,264 @@
+import os
+import tempfile
+import unittest
+import uuid
+
+from cdc_agents.agent.task_manager import AsyncAgentTaskManager
+from cdc_agents.common.server.task_store import InMemoryTaskStore, SqliteTaskStore, TaskStore
+from langchain_core.messages import AIMessage, HumanMessage
+
+from cdc_agents.common.types import AgentGraphResponse, ResponseFormat, Task, TaskStatus, TaskState, Message, TextPart, PushNotificationConfig, \
+    SendTaskRequest, TaskSendParams, GetTaskRequest, TaskQueryParams
+from cdc_agents.common.utils.push_notification_auth import PushNotificationSenderAuth
+from cdc_agents_test.test_async_task_manager import BlockingAgent
+
+
+def message(text: str, role: str = 'user') -> Message:
+    return Message(role=role, parts=[TextPart(text=text)])
+
+
+def new_task(session_id: str = 'session') -> Task:
+    return Task(id=str(uuid.uuid4()), sessionId=session_id, status=TaskStatus(state=TaskState.SUBMITTED),
+                history=[message('first')], to_process=[])
+
+
+class ConversationAgent(BlockingAgent):
+    """
+    Agent answering with the whole conversation of the session as its history, as the graph state holds it.
+    """
+
+    def __init__(self):
+        super().__init__(delay=0)
+        self.conversation = []
+
+    def invoke(self, query, sessionId):
+        self.conversation.append(HumanMessage(content=query['messages'][-1]['content'], id=str(uuid.uuid4())))
+        self.conversation.append(AIMessage(content=f'answer {(len(self.conversation) + 1) // 2}', id=str(uuid.uuid4())))
+        return AgentGraphResponse(is_task_complete=True, require_user_input=False,
+                                  content=ResponseFormat(status='completed', message=self.conversation[-1].content,
+                                                         history=list(self.conversation)))
+
+
+class TaskStoreContract:
+
+    def _store(self) -> TaskStore:
+        raise NotImplementedError
+
+    def test_indexed_lookups(self):
+        store = self._store()
+        tasks = [new_task('a'), new_task('a'), new_task('b')]
+        for task in tasks:
+            store.create(task)
+        tasks[1].status = TaskStatus(state=TaskState.COMPLETED)
+        store.update(tasks[1])
+
+        assert store.find() == [t.id for t in tasks]
+        assert store.find(session_id='a') == [tasks[0].id, tasks[1].id]
+        assert store.find(state=TaskState.SUBMITTED) == [tasks[0].id, tasks[2].id]
+        assert store.find(session_id='a', state=TaskState.COMPLETED) == [tasks[1].id]
+        assert store.exists(tasks[2].id) and store.delete(tasks[2].id) and not store.exists(tasks[2].id)
+        assert store.find(session_id='b') == [] and store.get(tasks[2].id) is None
+
+    def test_appends_history(self):
+        store = self._store()
+        task = new_task()
+        store.create(task)
+        task = store.get(task.id)
+        task.status = TaskStatus(state=TaskState.WORKING, message=message('working', 'agent'))
+        task.to_process.append(message('more'))
+        store.update(task, [task.status.message])
+        store.update(task, [message('done', 'agent')])
+
+        loaded = store.get(task.id)
+        assert [m.parts[0].text for m in loaded.history] == ['first', 'working', 'done']
+        assert [m.parts[0].text for m in task.history] == ['first', 'working', 'done']
+        assert loaded.status.state == TaskState.WORKING and [m.parts[0].text for m in loaded.to_process] == ['more']
+        assert [m.parts[0].text for m in store.get(task.id, history_length=2).history] == ['working', 'done']
+
+        store.replace_history(task, [message('summary', 'agent')])
+        assert [m.parts[0].text for m in store.get(task.id).history] == ['summary']
+
+        store.update(task, [message('second'), message('third')])
+        store.replace_history(task, [message('answer', 'agent')], start=2)
+        assert [m.parts[0].text for m in store.get(task.id).history] == ['summary', 'second', 'answer']
+        assert [m.parts[0].text for m in task.history] == ['summary', 'second', 'answer']
+
+    def test_reads_task_without_history(self):
+        store = self._store()
+        task = new_task()
+        task.to_process.append(message('more'))
+        store.create(task)
+        assert store.get_without_history('missing') is None
+
+        task = store.get_without_history(task.id)
+        assert [m.parts[0].text for m in task.to_process] == ['more']
+        task.to_process.popleft()
+        task.status = TaskStatus(state=TaskState.WORKING, message=message('working', 'agent'))
+        store.update(task, [task.status.message])
+
+        loaded = store.get(task.id)
+        assert loaded.status.state == TaskState.WORKING and len(loaded.to_process) == 0
+        assert [m.parts[0].text for m in loaded.history] == ['first', 'working']
+
+    def test_push_notifications(self):
+        store = self._store()
+        task = new_task()
+        assert not store.set_push_notification(task.id, PushNotificationConfig(url='http://localhost/notify'))
+        store.create(task)
+        assert store.get_push_notification(task.id) is None
+        assert store.set_push_notification(task.id, PushNotificationConfig(url='http://localhost/notify'))
+        assert store.get_push_notification(task.id).url == 'http://localhost/notify'
+
+
+class InMemoryTaskStoreTest(TaskStoreContract, unittest.TestCase):
+
+    def _store(self) -> TaskStore:
+        return InMemoryTaskStore()
+
+
+class SqliteTaskStoreTest(TaskStoreContract, unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'tasks.sqlite')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _store(self, namespace: str = 'agent') -> SqliteTaskStore:
+        store = SqliteTaskStore.from_path(self.path, namespace)
+        store.setup()
+        return store
+
+    def test_history_rows_appended(self):
+        store = self._store()
+        task = new_task()
+        store.create(task)
+        for i in range(3):
+            store.update(task, [message(f'message {i}')])
+        rows = store.conn.execute("SELECT seq FROM task_history WHERE task_id = ? ORDER BY seq", (task.id,)).fetchall()
+        # each update inserted its message only - the rows written before it were not rewritten.
+        assert len(rows) == 4 and [s for s, in rows] == sorted(s for s, in rows)
+
+    def test_reads_messages_to_process_without_history_rows(self):
+        store = self._store()
+        task_manager = AsyncAgentTaskManager(BlockingAgent(delay=0), PushNotificationSenderAuth(), task_store=store)
+        params = TaskSendParams(id=str(uuid.uuid4()), sessionId='session', message=message('first'),
+                                acceptedOutputModes=['text'])
+        task_manager.upsert_task(params)
+        task_manager.upsert_task(params.model_copy(update={'message': message('pushed')}))
+        queries = []
+        store.conn.set_trace_callback(queries.append)
+
+        assert task_manager.peek_to_process_task(params.id).parts[0].text == 'pushed'
+        assert [m.parts[0].text for m in task_manager.drain_to_process(params.id)] == ['pushed']
+        task_manager.update_store(params.id, TaskStatus(state=TaskState.WORKING, message=message('working', 'agent')))
+        store.conn.set_trace_callback(None)
+        assert not any('FROM task_history' in q for q in queries)
+        assert [m.parts[0].text for m in store.get(params.id).history] == ['first', 'pushed', 'working']
+
+    def test_survives_restart_and_separates_namespaces(self):
+        store = self._store()
+        task = new_task()
+        store.create(task)
+        store.close()
+
+        restarted = self._store()
+        assert restarted.get(task.id).sessionId == 'session'
+        assert [m.parts[0].text for m in restarted.get(task.id).history] == ['first']
+        assert self._store('other agent').find() == []
+        assert restarted.namespaced('other agent').get(task.id) is None
+
+
+@unittest.skipUnless(os.environ.get('CHECKPOINT_POSTGRES_URI'), 'CHECKPOINT_POSTGRES_URI is not set.')
+class PostgresTaskStoreTest(TaskStoreContract, unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        from cdc_agents.common.server.task_store import PostgresTaskStore
+        cls.store = PostgresTaskStore.from_uri(os.environ['CHECKPOINT_POSTGRES_URI'], max_size=2)
+        cls.store.setup()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.store.close()
+
+    def _store(self) -> TaskStore:
+        return self.store.namespaced(str(uuid.uuid4()))
+
+
+class SqliteTaskManagerTest(unittest.IsolatedAsyncioTestCase):
+    """
+    Task managers of two workers over one database.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'tasks.sqlite')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _task_manager(self) -> AsyncAgentTaskManager:
+        store = SqliteTaskStore.from_path(self.path, BlockingAgent.agent_name)
+        store.setup()
+        return AsyncAgentTaskManager(BlockingAgent(delay=0), PushNotificationSenderAuth(), task_store=store)
+
+    async def test_tasks_shared_across_workers(self):
+        worker, other_worker = self._task_manager(), self._task_manager()
+        params = TaskSendParams(id=str(uuid.uuid4()), sessionId='session', message=message('find the saver'),
+                                acceptedOutputModes=['text'])
+        response = await worker.on_send_task(SendTaskRequest(params=params))
+        assert response.result.status.state == TaskState.COMPLETED
+
+        response = other_worker.on_get_task(GetTaskRequest(params=TaskQueryParams(id=params.id)))
+        assert response.result.status.state == TaskState.COMPLETED
+        assert other_worker.task_store.find(session_id='session', state=TaskState.COMPLETED) == [params.id]
+        assert list(other_worker.tasks.keys()) == [params.id]
+
+    def test_drains_pushed_messages(self):
+        in_memory = AsyncAgentTaskManager(BlockingAgent(delay=0), PushNotificationSenderAuth())
+        for worker in [in_memory, self._task_manager()]:
+            params = TaskSendParams(id=str(uuid.uuid4()), sessionId='session', message=message('first'),
+                                    acceptedOutputModes=['text'])
+            worker.upsert_task(params)
+            for i in range(5):
+                worker.upsert_task(params.model_copy(update={'message': message(f'pushed {i}')}))
+
+            assert [m.parts[0].text for m in worker.drain_to_process(params.id, 2)] == ['pushed 0', 'pushed 1']
+            assert worker.pop_to_process_task(params.id).parts[0].text == 'pushed 2'
+            assert [m.parts[0].text for m in worker.drain_to_process(params.id)] == ['pushed 3', 'pushed 4']
+            assert worker.drain_to_process(params.id) == [] and len(worker.task(params.id).to_process) == 0
+
+    async def test_appends_new_agent_history(self):
+        agent = ConversationAgent()
+        store = SqliteTaskStore.from_path(self.path, BlockingAgent.agent_name)
+        store.setup()
+        worker = AsyncAgentTaskManager(agent, PushNotificationSenderAuth(), task_store=store)
+        params = TaskSendParams(id=str(uuid.uuid4()), sessionId='session', message=message('first'),
+                                acceptedOutputModes=['text'])
+
+        def history():
+            return [m.parts[0].text for m in worker.task(params.id).history]
+
+        def rows():
+            return store.conn.execute("SELECT seq FROM task_history WHERE task_id = ? ORDER BY seq",
+                                      (params.id,)).fetchall()
+
+        await worker.on_send_task(SendTaskRequest(params=params))
+        first_rows = rows()
+        response = await worker.on_send_task(SendTaskRequest(params=params.model_copy(
+            update={'message': message('second'), 'historyLength': 2})))
+        assert [m.parts[0].text for m in response.result.history] == ['second', 'answer 2']
+        assert history() == ['first', 'answer 1', 'second', 'answer 2']
+        # the rows of the first response were kept rather than rewritten.
+        assert rows()[:len(first_rows)] == first_rows
+
+        # the agent's history no longer starting as it did, the task's history is replaced.
+        agent.conversation = [AIMessage(content='summary', id=str(uuid.uuid4()))]
+        await worker.on_send_task(SendTaskRequest(params=params.model_copy(update={'message': message('third')})))
+        assert history() == ['summary', 'third', 'answer 1']
+
+
+if __name__ == '__main__':
+    unittest.main()